@@ -1,5 +1,6 @@
-from django.db import DatabaseError, OperationalError
+from django.utils import timezone
 
+from .audit import get_audit_sink
 from .models import SystemActivityLog
 
 
@@ -24,23 +25,22 @@ def log_system_activity(
     status_code=None,
     metadata=None,
 ):
-    """Persist an audit record without breaking the user request on failure."""
-    try:
-        SystemActivityLog.objects.create(
-            user=user if getattr(user, 'is_authenticated', False) else None,
-            username=username or (user.username if getattr(user, 'username', None) else ''),
-            event_type=event_type,
-            action=action or 'System activity',
-            description=description or '',
-            path=path or (((getattr(request, 'path', '') or '')[:255]) if request else ''),
-            method=method or ((getattr(request, 'method', '') or '') if request else ''),
-            status_code=status_code,
-            ip_address=get_client_ip(request) if request else None,
-            user_agent=(request.META.get('HTTP_USER_AGENT', '')[:255] if request else ''),
-            metadata=metadata or {},
-        )
-    except (DatabaseError, OperationalError):
-        return
+    """Hand an audit record to the configured audit sink; failures never break the request."""
+    entry = SystemActivityLog(
+        user=user if getattr(user, 'is_authenticated', False) else None,
+        username=username or (user.username if getattr(user, 'username', None) else ''),
+        event_type=event_type,
+        action=action or 'System activity',
+        description=description or '',
+        path=path or (((getattr(request, 'path', '') or '')[:255]) if request else ''),
+        method=method or ((getattr(request, 'method', '') or '') if request else ''),
+        status_code=status_code,
+        ip_address=get_client_ip(request) if request else None,
+        user_agent=(request.META.get('HTTP_USER_AGENT', '')[:255] if request else ''),
+        metadata=metadata or {},
+        created_at=timezone.now(),
+    )
+    get_audit_sink().emit(entry)
 
 
 def set_audit_context(request, *, action, description='', event_type=SystemActivityLog.EVENT_ACTION, metadata=None):
@@ -56,7 +56,7 @@ class NotificationAdmin(admin.ModelAdmin):
 
 @admin.register(AcademicYear)
 class AcademicYearAdmin(admin.ModelAdmin):
-    list_display = ['name', 'is_active', 'created_at']
+    list_display = ['name', 'is_active', 'term1_due_date', 'term2_due_date', 'term3_due_date', 'created_at']
     list_filter = ['is_active']
     search_fields = ['name']
 
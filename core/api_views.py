@@ -2,11 +2,20 @@
 API views for Rwanda administrative structure.
 Returns JSON data for hierarchical location selection.
 """
-from django.http import JsonResponse
+import re
+
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django.views.decorators.http import require_http_methods
+from .location_search import DEFAULT_RESULT_LIMIT, MAX_RESULT_LIMIT, MIN_QUERY_LENGTH, search_location_names
+from .location_tree import get_location_tree, get_location_tree_version
 from .models import Province, District, Sector, Cell, Village
 from .utils import encode_id
 
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
+
 @require_http_methods(["GET"])
 def get_provinces(request):
     """Get all provinces as JSON."""
@@ -87,64 +96,27 @@ def get_full_location_tree(request):
     """
     Get complete Rwanda location hierarchy as nested JSON.
     Useful for frontend autocomplete/selection components.
+
+    The payload is precomputed per dataset version (see ``core.location_tree``),
+    so repeat clients get a 304 from ``If-None-Match``/``If-Modified-Since``.
     """
-    provinces = Province.objects.prefetch_related(
-        'districts__sectors__cells__villages'
-    )
-    
-    result = []
-    for province in provinces:
-        province_data = {
-            'id': encode_id(province.id),
-            'name': province.name,
-            'code': province.code,
-            'districts': []
-        }
-        
-        for district in province.districts.all():
-            district_data = {
-                'id': encode_id(district.id),
-                'name': district.name,
-                'code': district.code,
-                'sectors': []
-            }
-            
-            for sector in district.sectors.all():
-                sector_data = {
-                    'id': encode_id(sector.id),
-                    'name': sector.name,
-                    'code': sector.code,
-                    'cells': []
-                }
-                
-                for cell in sector.cells.all():
-                    cell_data = {
-                        'id': encode_id(cell.id),
-                        'name': cell.name,
-                        'code': cell.code,
-                        'villages': []
-                    }
-                    
-                    for village in cell.villages.all():
-                        village_data = {
-                            'id': encode_id(village.id),
-                            'name': village.name,
-                            'code': village.code
-                        }
-                        cell_data['villages'].append(village_data)
-                    
-                    sector_data['cells'].append(cell_data)
-                
-                district_data['sectors'].append(sector_data)
-            
-            province_data['districts'].append(district_data)
-        
-        result.append(province_data)
-    
-    return JsonResponse({
-        'status': 'success',
-        'data': result
-    })
+    version = get_location_tree_version()
+    last_modified = int(version.last_modified.timestamp()) if version.last_modified else None
+    response = get_conditional_response(request, etag=version.etag, last_modified=last_modified)
+    if response is None:
+        tree = get_location_tree(version)
+        if ACCEPTS_GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response = HttpResponse(tree.gzipped, content_type='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(tree.content, content_type='application/json')
+
+    response.headers['ETag'] = version.etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
 
 
 @require_http_methods(["GET"])
@@ -154,67 +126,26 @@ def search_locations(request):
     Query parameters:
     - q: search query string
     - level: 'province', 'district', 'sector', 'cell', 'village' (optional)
+    - limit: maximum results per level (default 20, max 100)
+
+    Answers from the in-memory index in ``core.location_search``.
     """
     query = request.GET.get('q', '').strip()
     level = request.GET.get('level', '')
     
-    if not query or len(query) < 2:
+    if not query or len(query) < MIN_QUERY_LENGTH:
         return JsonResponse({
             'status': 'error',
             'message': 'Query must be at least 2 characters'
         }, status=400)
-    
-    results = {
-        'provinces': [],
-        'districts': [],
-        'sectors': [],
-        'cells': [],
-        'villages': []
-    }
-    
-    if not level or level == 'province':
-        results['provinces'] = [{
-            'id': encode_id(p.id),
-            'name': p.name,
-            'code': p.code
-        } for p in Province.objects.filter(name__icontains=query)]
-    
-    if not level or level == 'district':
-        results['districts'] = [{
-            'id': encode_id(d.id),
-            'name': d.name,
-            'code': d.code,
-            'province__name': d.province.name if d.province else None
-        } for d in District.objects.filter(name__icontains=query).select_related('province')]
-    
-    if not level or level == 'sector':
-        results['sectors'] = [{
-            'id': encode_id(s.id),
-            'name': s.name,
-            'code': s.code,
-            'district__name': s.district.name,
-            'district__province__name': s.district.province.name if s.district.province else None
-        } for s in Sector.objects.filter(name__icontains=query).select_related('district', 'district__province')]
-    
-    if not level or level == 'cell':
-        results['cells'] = [{
-            'id': encode_id(c.id),
-            'name': c.name,
-            'code': c.code,
-            'sector__name': c.sector.name,
-            'sector__district__name': c.sector.district.name
-        } for c in Cell.objects.filter(name__icontains=query).select_related('sector', 'sector__district')]
-    
-    if not level or level == 'village':
-        results['villages'] = [{
-            'id': encode_id(v.id),
-            'name': v.name,
-            'code': v.code,
-            'cell__name': v.cell.name,
-            'cell__sector__name': v.cell.sector.name
-        } for v in Village.objects.filter(name__icontains=query).select_related('cell', 'cell__sector')]
+
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_RESULT_LIMIT))
+    except (TypeError, ValueError):
+        limit = DEFAULT_RESULT_LIMIT
+    limit = max(1, min(limit, MAX_RESULT_LIMIT))
     
     return JsonResponse({
         'status': 'success',
-        'data': results
+        'data': search_location_names(query, level=level, limit=limit)
     })
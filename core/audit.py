@@ -0,0 +1,267 @@
+"""
+Audit sinks that persist ``SystemActivityLog`` entries.
+
+``log_system_activity`` hands each unsaved entry to the sink named by the
+``AUDIT_LOG_SINK`` setting:
+
+- ``buffered`` (default): entries are queued in-process and written with
+  ``bulk_create`` by a background thread once ``AUDIT_LOG_BATCH_SIZE`` entries are
+  waiting or every ``AUDIT_LOG_FLUSH_INTERVAL`` seconds. If the database cannot be
+  reached the batch is spilled as JSON lines to ``AUDIT_LOG_SPILL_DIR`` and replayed
+  on a later flush (or with ``python manage.py flush_audit_log``).
+- ``sync``: entries are saved inside the request, as before. Used by the test suite.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core import serializers
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+
+from .models import SystemActivityLog
+
+
+logger = logging.getLogger(__name__)
+
+SPILL_FILE_PREFIX = 'audit-'
+SPILL_FILE_SUFFIX = '.jsonl'
+# A replaying process renames a spill file to ``<name>.<token>.replaying`` so no
+# other process inserts it too; a claim this old was left by a process that died.
+CLAIMED_FILE_SUFFIX = '.replaying'
+CLAIM_STALE_AFTER_SECONDS = 600
+
+
+class SynchronousAuditSink:
+    """Save every entry immediately, without breaking the request on failure."""
+
+    def emit(self, entry):
+        try:
+            entry.save()
+        except DatabaseError:
+            logger.warning('Could not save audit log entry: %s', entry.action, exc_info=True)
+
+    def flush(self):
+        return 0
+
+
+def _spill_files(spill_dir):
+    """Spill files waiting to be replayed, including claims abandoned by a dead process."""
+    if not os.path.isdir(spill_dir):
+        return []
+    stale_before = time.time() - CLAIM_STALE_AFTER_SECONDS
+    paths = []
+    for name in os.listdir(spill_dir):
+        if not name.startswith(SPILL_FILE_PREFIX):
+            continue
+        path = os.path.join(spill_dir, name)
+        if name.endswith(SPILL_FILE_SUFFIX):
+            paths.append(path)
+        elif name.endswith(CLAIMED_FILE_SUFFIX):
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    paths.append(path)
+            except FileNotFoundError:
+                continue
+    return sorted(paths)
+
+
+def _unclaimed_path(path):
+    return path[:path.rindex(SPILL_FILE_SUFFIX) + len(SPILL_FILE_SUFFIX)]
+
+
+def _claim_spill_file(path):
+    """Rename ``path`` to a name only this call knows, or return ``None`` if another process took it."""
+    claimed_path = f'{_unclaimed_path(path)}.{os.getpid()}-{uuid.uuid4().hex[:8]}{CLAIMED_FILE_SUFFIX}'
+    try:
+        os.rename(path, claimed_path)
+    except FileNotFoundError:
+        return None
+    # The claim's age is measured from now, not from when the entries were spilled.
+    os.utime(claimed_path)
+    return claimed_path
+
+
+def spill_audit_entries(entries, spill_dir=None):
+    """Write entries to a new JSON lines file so they survive until the database is back."""
+    spill_dir = spill_dir or settings.AUDIT_LOG_SPILL_DIR
+    os.makedirs(spill_dir, exist_ok=True)
+    name = f'{SPILL_FILE_PREFIX}{time.time_ns()}-{uuid.uuid4().hex[:8]}{SPILL_FILE_SUFFIX}'
+    temp_path = os.path.join(spill_dir, f'.{name}.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as spill_file:
+        serializers.serialize('jsonl', entries, stream=spill_file)
+    os.replace(temp_path, os.path.join(spill_dir, name))
+    return len(entries)
+
+
+def _insert_entries(entries, savepoint=False):
+    """``savepoint`` guards the bulk insert inside a transaction so the fallback can still run."""
+    try:
+        if savepoint:
+            with transaction.atomic():
+                SystemActivityLog.objects.bulk_create(entries)
+        else:
+            SystemActivityLog.objects.bulk_create(entries)
+    except IntegrityError:
+        # Usually a user deleted while the entry was queued: keep the username, drop the link.
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    entry.save(force_insert=True)
+            except IntegrityError:
+                entry.user = None
+                entry.save(force_insert=True)
+    return len(entries)
+
+
+def replay_spilled_audit_entries(spill_dir=None):
+    """
+    Insert spilled entries, deleting each file once its rows are committed. Returns rows written.
+
+    Each file is first claimed with an atomic rename, so when several processes
+    replay at once every file is inserted by one of them only. Every file is
+    written in one transaction; a replay that fails partway renames the file back
+    with none of its rows written and the next replay starts over.
+    """
+    spill_dir = spill_dir or settings.AUDIT_LOG_SPILL_DIR
+    written = 0
+    for path in _spill_files(spill_dir):
+        claimed_path = _claim_spill_file(path)
+        if claimed_path is None:
+            continue
+        try:
+            with open(claimed_path, encoding='utf-8') as spill_file:
+                entries = [item.object for item in serializers.deserialize('jsonl', spill_file)]
+            with transaction.atomic():
+                written += _insert_entries(entries, savepoint=True)
+        except BaseException:
+            os.rename(claimed_path, _unclaimed_path(path))
+            raise
+        try:
+            os.remove(claimed_path)
+        except FileNotFoundError:
+            pass
+    return written
+
+
+class BufferedAuditSink:
+    """Queue entries in memory and write them in batches from a background thread."""
+
+    def __init__(self, *, batch_size, flush_interval, max_queue, spill_dir, start_thread=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.spill_dir = spill_dir
+        self.start_thread = start_thread
+        self.queue = deque()
+        self.flush_lock = threading.Lock()
+        self.wake_up = threading.Event()
+        self.thread = None
+        self.thread_pid = None
+
+    def emit(self, entry):
+        if len(self.queue) >= self.max_queue:
+            # The writer is far behind (database down or very slow): go straight to disk.
+            self._spill([entry])
+            return
+        self.queue.append(entry)
+        self._ensure_thread()
+        if len(self.queue) >= self.batch_size:
+            self.wake_up.set()
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, so pre-forking servers get one writer per worker.
+        if not self.start_thread or (self.thread_pid == os.getpid() and self.thread.is_alive()):
+            return
+        self.thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+        self.thread_pid = os.getpid()
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            self.wake_up.wait(self.flush_interval)
+            self.wake_up.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Audit log writer failed to flush.')
+
+    def _spill(self, entries):
+        try:
+            spill_audit_entries(entries, self.spill_dir)
+        except OSError:
+            logger.error('Dropped %s audit log entries: database and spill directory unavailable.', len(entries))
+
+    def _take_batch(self):
+        batch = []
+        while self.queue and len(batch) < self.batch_size:
+            batch.append(self.queue.popleft())
+        return batch
+
+    def flush(self):
+        """Write every queued entry (and any earlier spill files). Returns rows written."""
+        written = 0
+        with self.flush_lock:
+            try:
+                written += replay_spilled_audit_entries(self.spill_dir)
+            except DatabaseError:
+                logger.warning('Database unavailable; keeping spilled audit log entries.', exc_info=True)
+                self._spill(self._drain())
+                return written
+
+            while self.queue:
+                batch = self._take_batch()
+                try:
+                    written += _insert_entries(batch)
+                except DatabaseError:
+                    logger.warning('Database unavailable; spilling %s audit log entries.', len(batch), exc_info=True)
+                    self._spill(batch + self._drain())
+                    break
+        return written
+
+    def _drain(self):
+        entries = list(self.queue)
+        self.queue.clear()
+        return entries
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_audit_sink():
+    """Return the process-wide sink configured by ``AUDIT_LOG_SINK``."""
+    global _sink
+    if _sink is not None:
+        return _sink
+    with _sink_lock:
+        if _sink is None:
+            if settings.AUDIT_LOG_SINK == 'sync':
+                _sink = SynchronousAuditSink()
+            elif settings.AUDIT_LOG_SINK == 'buffered':
+                _sink = BufferedAuditSink(
+                    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+                    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL,
+                    max_queue=settings.AUDIT_LOG_MAX_QUEUE,
+                    spill_dir=settings.AUDIT_LOG_SPILL_DIR,
+                )
+                atexit.register(flush_audit_log)
+            else:
+                raise ValueError(f"Unknown AUDIT_LOG_SINK '{settings.AUDIT_LOG_SINK}'. Use 'buffered' or 'sync'.")
+        return _sink
+
+
+def flush_audit_log():
+    """Write any buffered entries now; safe to call from management commands and shutdown hooks."""
+    if _sink is None:
+        return 0
+    try:
+        return _sink.flush()
+    except Exception:
+        logger.exception('Could not flush the audit log on shutdown.')
+        return 0
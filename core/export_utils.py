@@ -1,9 +1,16 @@
+from copy import copy
 from datetime import datetime
+import io
 import os
+import pickle
+import tempfile
 
 from django.conf import settings
+from django.http import FileResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.drawing.image import Image as OpenpyxlImage
-from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
 from openpyxl.utils import get_column_letter
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT
@@ -27,39 +34,61 @@ EXCEL_BORDER_COLOR = 'CBD5E1'
 EXCEL_ALT_ROW_FILL = 'F8FAFC'
 EXCEL_TOTAL_FILL = 'D1FAE5'
 EXCEL_TOTAL_TEXT = '065F46'
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# Rows fetched per database round trip when an export iterates its queryset.
+EXPORT_CHUNK_SIZE = 2000
 
 
 class ExportNumberedCanvas(canvas.Canvas):
-    """Canvas that adds a consistent footer and page numbers."""
+    """
+    Canvas that adds a consistent footer and "Page X of Y" numbers.
+
+    The total is only known after the last page, so each page draws its footer
+    rule straight away and places a form XObject holding its page number text.
+    The forms are written in ``save()`` once the count is known. Every page is
+    therefore finished and handed to the document as soon as it ends, instead of
+    keeping each page's drawing state in memory until the report is complete.
+    """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._saved_page_states = []
+        self._footer_page_widths = []
+
+    @staticmethod
+    def _page_number_form(page_number):
+        return f'ExportPageNumber{page_number}'
 
     def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
+        page_width, _page_height = self._pagesize
+        self._footer_page_widths.append(page_width)
+        self.draw_footer()
+        self.doForm(self._page_number_form(self._pageNumber))
+        super().showPage()
 
     def save(self):
-        page_count = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(page_count)
-            canvas.Canvas.showPage(self)
-        canvas.Canvas.save(self)
-
-    def draw_page_number(self, page_count):
+        if len(self._code):
+            self.showPage()
+        page_count = len(self._footer_page_widths)
+        for page_number, page_width in enumerate(self._footer_page_widths, start=1):
+            self.beginForm(self._page_number_form(page_number))
+            self.draw_page_number(page_number, page_count, page_width)
+            self.endForm()
+        super().save()
+
+    def draw_footer(self):
         page_width, _page_height = self._pagesize
+        self.setStrokeColor(EXPORT_PRIMARY)
+        self.setLineWidth(1)
+        self.line(0.75 * inch, 0.65 * inch, page_width - 0.75 * inch, 0.65 * inch)
+
+    def draw_page_number(self, page_number, page_count, page_width):
         self.setFont(EXPORT_FONT, 9)
         self.setFillColor(colors.grey)
         self.drawRightString(
             page_width - 0.5 * inch,
             0.5 * inch,
-            f"Page {self._pageNumber} of {page_count}"
+            f"Page {page_number} of {page_count}"
         )
-        self.setStrokeColor(EXPORT_PRIMARY)
-        self.setLineWidth(1)
-        self.line(0.75 * inch, 0.65 * inch, page_width - 0.75 * inch, 0.65 * inch)
 
 
 def resolve_logo_path():
@@ -202,105 +231,271 @@ def prepend_row_numbers(headers, rows, label='No.'):
     return [[label, *list(headers)], *numbered_rows]
 
 
-def write_excel_report_header(worksheet, title, subtitle, total_columns, generated_label=None):
-    end_column = get_column_letter(total_columns)
-    logo_path = resolve_logo_path()
-    title_start_column = 'B' if logo_path else 'A'
-
-    if logo_path:
-        logo = OpenpyxlImage(logo_path)
-        logo.width = 54
-        logo.height = 54
-        worksheet.add_image(logo, 'A1')
-        worksheet.column_dimensions['A'].width = 11
-
-    worksheet.merge_cells(f'{title_start_column}1:{end_column}1')
-    worksheet[f'{title_start_column}1'] = 'Solidact Foundation'
-    worksheet[f'{title_start_column}1'].font = Font(size=11, bold=True, color='0F766E')
-    worksheet[f'{title_start_column}1'].alignment = Alignment(horizontal='center', vertical='center')
-
-    worksheet.merge_cells(f'{title_start_column}2:{end_column}2')
-    worksheet[f'{title_start_column}2'] = title
-    worksheet[f'{title_start_column}2'].font = Font(size=16, bold=True, color='0F172A')
-    worksheet[f'{title_start_column}2'].alignment = Alignment(horizontal='center', vertical='center')
-
-    worksheet.merge_cells(f'{title_start_column}3:{end_column}3')
-    worksheet[f'{title_start_column}3'] = subtitle
-    worksheet[f'{title_start_column}3'].alignment = Alignment(horizontal='center', vertical='center')
-    worksheet[f'{title_start_column}3'].font = Font(size=10, color='475569')
-
-    worksheet.merge_cells(f'{title_start_column}4:{end_column}4')
-    worksheet[f'{title_start_column}4'] = generated_label or f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-    worksheet[f'{title_start_column}4'].alignment = Alignment(horizontal='center', vertical='center')
-    worksheet[f'{title_start_column}4'].font = Font(size=9, italic=True, color='64748B')
-
-    worksheet.row_dimensions[1].height = 18
-    worksheet.row_dimensions[2].height = 24
-    worksheet.row_dimensions[3].height = 18
-    worksheet.row_dimensions[4].height = 16
-    return 6
-
-
-def style_excel_header(worksheet, row_idx, fill_color='0F766E'):
-    header_fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-    header_font = Font(bold=True, color='FFFFFF')
-    for cell in worksheet[row_idx]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-
-def style_excel_table_rows(
-    worksheet,
-    header_row_idx,
-    data_start_row,
-    data_end_row,
-    max_col,
-    centered_columns=None,
-    right_aligned_columns=None,
-    total_row_indexes=None,
-):
-    centered_columns = centered_columns or []
-    right_aligned_columns = right_aligned_columns or []
-    total_row_indexes = set(total_row_indexes or [])
-    thin_border = Border(
-        left=Side(style='thin', color=EXCEL_BORDER_COLOR),
-        right=Side(style='thin', color=EXCEL_BORDER_COLOR),
-        top=Side(style='thin', color=EXCEL_BORDER_COLOR),
-        bottom=Side(style='thin', color=EXCEL_BORDER_COLOR),
-    )
-    alt_fill = PatternFill(start_color=EXCEL_ALT_ROW_FILL, end_color=EXCEL_ALT_ROW_FILL, fill_type='solid')
-    total_fill = PatternFill(start_color=EXCEL_TOTAL_FILL, end_color=EXCEL_TOTAL_FILL, fill_type='solid')
-
-    for row_idx in range(header_row_idx, data_end_row + 1):
-        worksheet.row_dimensions[row_idx].height = 22
-        for col_idx in range(1, max_col + 1):
-            cell = worksheet.cell(row=row_idx, column=col_idx)
-            cell.border = thin_border
-            if row_idx == header_row_idx:
-                continue
-            alignment = 'left'
-            if col_idx in centered_columns:
-                alignment = 'center'
-            elif col_idx in right_aligned_columns:
-                alignment = 'right'
-            cell.alignment = Alignment(horizontal=alignment, vertical='top', wrap_text=True)
-
-            if row_idx in total_row_indexes:
-                cell.fill = total_fill
-                cell.font = Font(bold=True, color=EXCEL_TOTAL_TEXT)
-            elif (row_idx - data_start_row) % 2 == 1:
-                cell.fill = alt_fill
-
-    worksheet.freeze_panes = worksheet.cell(row=data_start_row, column=1)
-
-
-def autosize_worksheet_columns(worksheet, max_width=32):
-    for column_cells in worksheet.columns:
-        max_length = 0
-        column_letter = column_cells[0].column_letter
-        for cell in column_cells:
-            value = '' if cell.value is None else str(cell.value)
-            if len(value) > max_length:
-                max_length = len(value)
-        worksheet.column_dimensions[column_letter].width = min(max_length + 2, max_width)
+def _solid_fill(color):
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+class ExcelReportWriter:
+    """
+    Streaming XLSX export with the standard letterhead and table styling.
+
+    Rows go to a ``write_only`` worksheet, which serialises each row as it is
+    appended, and every cell points at one of a few shared named styles instead
+    of carrying its own border, alignment and fill objects. Write-only sheets
+    need their column widths before the first row, so unless ``column_widths``
+    is given the rows are spooled to a temporary file while their widths are
+    measured and written out on ``save``. Either way memory stays flat however
+    many rows are exported.
+    """
+
+    ALIGNMENTS = ('left', 'center', 'right')
+
+    def __init__(
+        self,
+        title,
+        subtitle,
+        headers=None,
+        *,
+        sheet_title,
+        total_columns=None,
+        column_widths=None,
+        max_width=32,
+        centered_columns=None,
+        right_aligned_columns=None,
+        header_fill='0F766E',
+        generated_label=None,
+    ):
+        self.title = title
+        self.subtitle = subtitle
+        self.headers = list(headers or [])
+        self.sheet_title = sheet_title
+        self.total_columns = total_columns or len(self.headers)
+        self.column_widths = list(column_widths) if column_widths else None
+        self.max_width = max_width
+        self.header_fill = header_fill
+        self.generated_label = generated_label
+        self._column_alignments = {}
+        for column in centered_columns or []:
+            self._column_alignments[column] = 'center'
+        for column in right_aligned_columns or []:
+            self._column_alignments[column] = 'right'
+        self._custom_styles = {}
+        self._measured_widths = {}
+        self._spool = None if self.column_widths else tempfile.TemporaryFile()
+        self._workbook = None
+        self._worksheet = None
+        self._style_arrays = {}
+        self._row_idx = 0
+        self._data_index = 0
+        if self.headers:
+            self.append_header(self.headers)
+
+    def add_style(self, name, *, font=None, fill=None, horizontal='center'):
+        """Register a bordered cell style for ``append(..., styles={column: name})``."""
+        self._custom_styles[name] = {'font': font, 'fill': fill, 'horizontal': horizontal}
+        if self._workbook is not None:
+            for style in self._custom_style_variants(name, self._custom_styles[name]):
+                self._workbook.add_named_style(style)
+
+    def append(self, values, *, styles=None):
+        """Add a data row; ``styles`` maps 1-based columns to names from ``add_style``."""
+        self._add_row('data', list(values), styles)
+
+    def append_total(self, values, *, style=None):
+        """Add a highlighted totals row, in ``style`` from ``add_style`` if given."""
+        self._add_row('total', list(values), style)
+
+    def append_header(self, values):
+        """Add a table header row; the data rows after it restart the alternating fill."""
+        self._add_row('header', list(values))
+
+    def append_section(self, text, *, style=None):
+        """Add a title row merged across the table, such as a group heading."""
+        self._add_row('section', [text], style)
+
+    def append_plain(self, values=(), *, style=None):
+        """Add a row without table borders, or an empty spacer row."""
+        self._add_row('plain', list(values), style)
+
+    def _add_row(self, kind, values, styles=None):
+        if self._spool is None:
+            self._write_row(kind, values, styles)
+            return
+        if kind != 'section':
+            for column, value in enumerate(values, start=1):
+                length = 0 if value is None else len(str(value))
+                if length > self._measured_widths.get(column, 0):
+                    self._measured_widths[column] = length
+        pickle.dump((kind, values, styles), self._spool, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _named_styles(self):
+        border_side = Side(style='thin', color=EXCEL_BORDER_COLOR)
+        border = Border(left=border_side, right=border_side, top=border_side, bottom=border_side)
+        alt_fill = _solid_fill(EXCEL_ALT_ROW_FILL)
+        yield NamedStyle(
+            name='export-header',
+            font=Font(bold=True, color='FFFFFF'),
+            fill=_solid_fill(self.header_fill),
+            border=border,
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        )
+        for horizontal in self.ALIGNMENTS:
+            alignment = Alignment(horizontal=horizontal, vertical='top', wrap_text=True)
+            yield NamedStyle(name=f'export-{horizontal}', border=border, alignment=alignment)
+            yield NamedStyle(name=f'export-{horizontal}-alt', border=border, alignment=alignment, fill=alt_fill)
+            yield NamedStyle(
+                name=f'export-{horizontal}-total',
+                border=border,
+                alignment=alignment,
+                fill=_solid_fill(EXCEL_TOTAL_FILL),
+                font=Font(bold=True, color=EXCEL_TOTAL_TEXT),
+            )
+        for name, spec in self._custom_styles.items():
+            yield from self._custom_style_variants(name, spec)
+
+    def _custom_style_variants(self, name, spec):
+        border_side = Side(style='thin', color=EXCEL_BORDER_COLOR)
+        border = Border(left=border_side, right=border_side, top=border_side, bottom=border_side)
+        options = {'alignment': Alignment(horizontal=spec['horizontal'], vertical='top', wrap_text=True)}
+        if spec['font']:
+            options['font'] = spec['font']
+        if spec['fill']:
+            options['fill'] = _solid_fill(spec['fill'])
+        yield NamedStyle(name=name, border=border, **options)
+        yield NamedStyle(name=f'{name}-alt', border=border, **{'fill': _solid_fill(EXCEL_ALT_ROW_FILL), **options})
+        yield NamedStyle(name=f'{name}-plain', **options)
+
+    def _open(self):
+        self._workbook = Workbook(write_only=True)
+        self._worksheet = self._workbook.create_sheet(self.sheet_title)
+        for style in self._named_styles():
+            self._workbook.add_named_style(style)
+
+        if self.column_widths:
+            widths = dict(enumerate(self.column_widths, start=1))
+        else:
+            widths = {column: min(length + 2, self.max_width) for column, length in self._measured_widths.items()}
+        logo_path = resolve_logo_path()
+        if logo_path:
+            widths[1] = max(widths.get(1, 0), 11)
+        for column, width in widths.items():
+            self._worksheet.column_dimensions[get_column_letter(column)].width = width
+        if self.headers:
+            # Letterhead, a spacer row and the table header stay in view; set before any row is written.
+            self._worksheet.freeze_panes = 'A7'
+        self._worksheet.sheet_format.defaultRowHeight = 22
+        self._worksheet.sheet_format.customHeight = True
+        self._write_letterhead(logo_path)
+
+    def _write_letterhead(self, logo_path):
+        worksheet = self._worksheet
+        title_column = 2 if logo_path else 1
+        end_column = get_column_letter(max(self.total_columns, title_column))
+        if logo_path:
+            logo = OpenpyxlImage(logo_path)
+            logo.width = 54
+            logo.height = 54
+            worksheet.add_image(logo, 'A1')
+
+        lines = [
+            ('Solidact Foundation', Font(size=11, bold=True, color='0F766E'), 18),
+            (self.title, Font(size=16, bold=True, color='0F172A'), 24),
+            (self.subtitle, Font(size=10, color='475569'), 18),
+            (
+                self.generated_label or f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                Font(size=9, italic=True, color='64748B'),
+                16,
+            ),
+        ]
+        for row_idx, (text, font, height) in enumerate(lines, start=1):
+            cell = WriteOnlyCell(worksheet, value=text)
+            cell.font = font
+            cell.alignment = Alignment(horizontal='center', vertical='center')
+            worksheet.row_dimensions[row_idx].height = height
+            if end_column != get_column_letter(title_column):
+                worksheet.merged_cells.add(f'{get_column_letter(title_column)}{row_idx}:{end_column}{row_idx}')
+            worksheet.append([None] * (title_column - 1) + [cell])
+        worksheet.append([])
+        self._row_idx = len(lines) + 1
+
+    def _write_row(self, kind, values, styles=None):
+        if self._worksheet is None:
+            self._open()
+        worksheet = self._worksheet
+        self._row_idx += 1
+
+        if kind == 'section':
+            cell = WriteOnlyCell(worksheet, value=values[0])
+            if styles:
+                cell.style = f'{styles}-plain'
+            worksheet.merged_cells.add(f'A{self._row_idx}:{get_column_letter(self.total_columns)}{self._row_idx}')
+            worksheet.append([cell])
+            return
+        if kind == 'plain':
+            if styles:
+                values = [self._cell(value, f'{styles}-plain') for value in values]
+            worksheet.append(values)
+            return
+
+        if kind == 'header':
+            self._data_index = 0
+        elif kind == 'data':
+            self._data_index += 1
+        alternate = kind == 'data' and self._data_index % 2 == 0
+        if isinstance(styles, str):
+            styles = dict.fromkeys(range(1, max(len(values), self.total_columns) + 1), styles)
+        styles = styles or {}
+        row = []
+        for column in range(1, max(len(values), self.total_columns) + 1):
+            value = values[column - 1] if column <= len(values) else None
+            if kind == 'header':
+                style = 'export-header'
+            elif column in styles:
+                style = f'{styles[column]}-alt' if alternate else styles[column]
+            else:
+                style = f'export-{self._column_alignments.get(column, "left")}'
+                if kind == 'total':
+                    style += '-total'
+                elif alternate:
+                    style += '-alt'
+            row.append(self._cell(value, style))
+        worksheet.append(row)
+
+    def _cell(self, value, style):
+        cell = WriteOnlyCell(self._worksheet, value=value)
+        # Resolving a named style is slow; copy the resolved style array instead.
+        style_array = self._style_arrays.get(style)
+        if style_array is None:
+            cell.style = style
+            self._style_arrays[style] = copy(cell._style)
+        else:
+            cell._style = copy(style_array)
+        return cell
+
+    def save(self, target):
+        """Write the workbook to a path or binary file object."""
+        if self._spool is not None:
+            spool, self._spool = self._spool, None
+            spool.seek(0)
+            with spool:
+                while True:
+                    try:
+                        kind, values, styles = pickle.load(spool)
+                    except EOFError:
+                        break
+                    self._write_row(kind, values, styles)
+        if self._worksheet is None:
+            self._open()
+        self._workbook.save(target)
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        self.save(buffer)
+        return buffer.getvalue()
+
+    def to_response(self, filename):
+        """Save to a temporary file and stream it back as an attachment."""
+        output = tempfile.TemporaryFile()
+        self.save(output)
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=EXCEL_CONTENT_TYPE)
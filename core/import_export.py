@@ -1,16 +1,21 @@
 """
 Excel Import/Export functionality for Students, Families, and Schools
 """
+from dataclasses import dataclass, field
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
 from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment
-from datetime import datetime
+from datetime import date, datetime
 import re
 from io import BytesIO
 
+from dashboard.snapshots import schedule_snapshot_refresh, student_snapshot_keys
+from reports.cache import bump_report_generations
 from students.models import Student
 from families.models import Family
 from core.models import School, Province, District, Sector, Cell, Village
@@ -104,14 +109,13 @@ def download_student_template(request):
         ("- Sponsorship Status", "Options: active, pending, graduated (default: pending)"),
         ("- Has Disability", "Yes or No (default: No)"),
         ("- Disability Types", "Comma-separated: visual, hearing, mobility, intellectual, autism, speech, learning, emotional, other"),
-        ("- Province/District/Sector/Cell/Village", "Rwanda location hierarchy"),
-        ("- Program Officer Name", "Name of assigned program officer"),
-        ("- National ID", "Student's national ID if available"),
+        ("- Province/District/Sector/Cell/Village", "Informational only; student location comes from the family"),
+        ("- Program Officer Name", "Full name or username of the assigned program officer"),
+        ("- National ID", "Informational only; not stored on the student record"),
         ("", ""),
         ("Tips:", ""),
         ("- Row 2 contains example data (delete before importing)", ""),
         ("- Import will skip rows with errors and show summary", ""),
-        ("- Duplicate checks: National ID (if provided)", ""),
     ]
     
     for row_num, (col1, col2) in enumerate(instructions, 1):
@@ -325,165 +329,258 @@ def download_school_template(request):
     return response
 
 
+# ========== STREAMING STUDENT IMPORT ==========
+
+STUDENT_IMPORT_HEADERS = [
+    ('first name', True),
+    ('last name', True),
+    ('gender', True),
+    ('date of birth', True),
+    ('family code', False),
+    ('school name', True),
+    ('class level', True),
+    ('enrollment status', False),
+    ('sponsorship status', False),
+    ('has disability', False),
+    ('disability types', False),
+    ('disability description', False),
+    ('province', False),
+    ('district', False),
+    ('sector', False),
+    ('cell', False),
+    ('village', False),
+    ('program officer name', False),
+    ('national id', False),
+]
+STUDENT_IMPORT_CHUNK_SIZE = 500
+GENDER_VALUES = {value for value, _label in Student.GENDER_CHOICES}
+ENROLLMENT_STATUS_VALUES = {value for value, _label in Student.ENROLLMENT_STATUS_CHOICES}
+SPONSORSHIP_STATUS_VALUES = {value for value, _label in Student.SPONSORSHIP_STATUS_CHOICES}
+
+
+class StudentImportError(Exception):
+    """Raised when an uploaded student sheet cannot be imported at all."""
+
+
+@dataclass
+class StudentImportReport:
+    """Outcome of a student import with per-row errors and warnings."""
+
+    created_count: int = 0
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+
+    @property
+    def error_count(self):
+        return len(self.errors)
+
+    def add_error(self, row_num, message):
+        self.errors.append({'row': row_num, 'message': message})
+
+    def add_warning(self, row_num, message):
+        self.warnings.append({'row': row_num, 'message': message})
+
+
+class StudentImportLookups:
+    """Name/code -> id dictionaries resolved once per uploaded file."""
+
+    def __init__(self):
+        self.families = dict(
+            Family.objects.exclude(family_code__isnull=True).values_list('family_code', 'id')
+        )
+        # Keep the first school per name, matching ``filter(name=...).first()``.
+        self.schools = {}
+        for school_id, name in School.objects.values_list('id', 'name'):
+            self.schools.setdefault(name, school_id)
+        self.program_officers = {}
+        for user_id, username, first_name, last_name in User.objects.values_list(
+            'id', 'username', 'first_name', 'last_name'
+        ):
+            full_name = f'{first_name} {last_name}'.strip().lower()
+            if full_name:
+                self.program_officers.setdefault(full_name, user_id)
+            self.program_officers.setdefault(username.lower(), user_id)
+
+
+def _clean_text(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _parse_import_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(_clean_text(value), '%Y-%m-%d').date()
+
+
+def _build_student_from_row(row_num, get_value, lookups, report):
+    first_name = _clean_text(get_value('first name'))
+    last_name = _clean_text(get_value('last name'))
+    gender = _clean_text(get_value('gender')).upper()[:1]
+    dob_value = get_value('date of birth')
+    school_name = _clean_text(get_value('school name'))
+    class_level = _clean_text(get_value('class level'))
+
+    if not all([first_name, last_name, gender, dob_value, school_name, class_level]):
+        report.add_error(row_num, 'Missing required fields')
+        return None
+    if gender not in GENDER_VALUES:
+        report.add_error(row_num, f"Gender '{get_value('gender')}' must be M or F")
+        return None
+    try:
+        date_of_birth = _parse_import_date(dob_value)
+    except ValueError:
+        report.add_error(row_num, f"Date of birth '{dob_value}' must use YYYY-MM-DD")
+        return None
+
+    enrollment_status = _clean_text(get_value('enrollment status')).lower() or 'enrolled'
+    if enrollment_status not in ENROLLMENT_STATUS_VALUES:
+        report.add_error(row_num, f"Unknown enrollment status '{enrollment_status}'")
+        return None
+    sponsorship_status = _clean_text(get_value('sponsorship status')).lower() or 'pending'
+    if sponsorship_status not in SPONSORSHIP_STATUS_VALUES:
+        report.add_error(row_num, f"Unknown sponsorship status '{sponsorship_status}'")
+        return None
+
+    family_code = _clean_text(get_value('family code'))
+    family_id = lookups.families.get(family_code) if family_code else None
+    if family_code and family_id is None:
+        report.add_warning(row_num, f"Family code '{family_code}' not found")
+
+    school_id = lookups.schools.get(school_name)
+    if school_id is None:
+        report.add_warning(
+            row_num,
+            f"School '{school_name}' not found (student will be created without school link)",
+        )
+
+    program_officer = _clean_text(get_value('program officer name'))
+    program_officer_id = lookups.program_officers.get(program_officer.lower()) if program_officer else None
+    if program_officer and program_officer_id is None:
+        report.add_warning(row_num, f"Program officer '{program_officer}' not found")
+
+    return Student(
+        family_id=family_id,
+        first_name=first_name,
+        last_name=last_name,
+        gender=gender,
+        date_of_birth=date_of_birth,
+        school_name=school_name,
+        school_id=school_id,
+        class_level=class_level,
+        enrollment_status=enrollment_status,
+        sponsorship_status=sponsorship_status,
+        has_disability=_clean_text(get_value('has disability')).lower() in {'yes', 'true', '1'},
+        disability_types=_clean_text(get_value('disability types')),
+        disability_description=_clean_text(get_value('disability description')),
+        program_officer_id=program_officer_id,
+    )
+
+
+def _insert_student_chunk(chunk, report):
+    """Insert one validated chunk, isolating failing rows if the batch insert fails."""
+    try:
+        with transaction.atomic():
+            created = Student.objects.bulk_create([student for _row_num, student in chunk])
+    except DatabaseError:
+        created = []
+        for row_num, student in chunk:
+            try:
+                with transaction.atomic():
+                    student.save()
+            except DatabaseError as exc:
+                report.add_error(row_num, str(exc))
+            else:
+                created.append(student)
+
+    report.created_count += len(created)
+    created_ids = [student.pk for student in created if student.pk]
+    if created_ids:
+        # bulk_create skips model signals, so refresh the dashboard buckets explicitly.
+        schedule_snapshot_refresh(student_snapshot_keys(Student.objects.filter(pk__in=created_ids)))
+        bump_report_generations('students')
+
+
+def import_students_from_workbook(excel_file, *, chunk_size=STUDENT_IMPORT_CHUNK_SIZE):
+    """Stream an uploaded student sheet into the database in validated chunks.
+
+    The workbook is opened in openpyxl read-only mode, every family, school and
+    program officer lookup is resolved once up front, and valid rows are
+    inserted with ``bulk_create`` one chunk (and one transaction) at a time.
+    """
+    wb = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header_index = _build_header_index(next(rows, ()))
+        missing_required = [
+            name for name, required in STUDENT_IMPORT_HEADERS
+            if required and name not in header_index
+        ]
+        if missing_required:
+            raise StudentImportError(
+                "Missing required columns: "
+                + ", ".join(missing_required)
+                + ". Please download the latest template and try again."
+            )
+
+        lookups = StudentImportLookups()
+        report = StudentImportReport()
+        chunk = []
+        for row_num, row in enumerate(rows, start=2):
+            if not row or not any(value not in (None, '') for value in row):
+                continue
+
+            row = _normalize_row(row, len(STUDENT_IMPORT_HEADERS))
+
+            def get_value(key):
+                idx = header_index.get(key)
+                return row[idx] if idx is not None and idx < len(row) else None
+
+            student = _build_student_from_row(row_num, get_value, lookups, report)
+            if student is None:
+                continue
+            chunk.append((row_num, student))
+            if len(chunk) >= chunk_size:
+                _insert_student_chunk(chunk, report)
+                chunk = []
+
+        if chunk:
+            _insert_student_chunk(chunk, report)
+        return report
+    finally:
+        wb.close()
+
+
 # ========== IMPORT VIEWS ==========
 
 @login_required
 def import_students(request):
     """Handle student Excel file import."""
     if request.method == 'POST' and request.FILES.get('excel_file'):
-        excel_file = request.FILES['excel_file']
-        expected_columns = 19
-        expected_headers = [
-            ('first name', True),
-            ('last name', True),
-            ('gender', True),
-            ('date of birth', True),
-            ('family code', False),
-            ('school name', True),
-            ('class level', True),
-            ('enrollment status', False),
-            ('sponsorship status', False),
-            ('has disability', False),
-            ('disability types', False),
-            ('disability description', False),
-            ('province', False),
-            ('district', False),
-            ('sector', False),
-            ('cell', False),
-            ('village', False),
-            ('program officer name', False),
-            ('national id', False),
-        ]
-        
         try:
-            # Load workbook
-            wb = load_workbook(excel_file)
-            ws = wb.active
-
-            header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
-            header_index = _build_header_index(header_row)
-            missing_required = [name for name, required in expected_headers if required and name not in header_index]
-            if missing_required:
-                messages.error(
-                    request,
-                    "Missing required columns: "
-                    + ", ".join(missing_required)
-                    + ". Please download the latest template and try again."
-                )
-                return redirect('students:student_list')
-            
-            success_count = 0
-            error_count = 0
-            errors = []
-            
-            # Skip header row (row 1) and example row (row 2 if it's example)
-            for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                # Skip empty rows
-                if not any(row):
-                    continue
-                
-                try:
-                    row = _normalize_row(row, expected_columns)
-                    get_value = lambda key: row[header_index.get(key, -1)] if header_index.get(key, -1) >= 0 and header_index.get(key, -1) < len(row) else None
-                    # Extract data
-                    first_name = get_value('first name')
-                    last_name = get_value('last name')
-                    gender = get_value('gender')
-                    dob_str = get_value('date of birth')
-                    family_code = get_value('family code')
-                    school_name = get_value('school name')
-                    class_level = get_value('class level')
-                    enrollment_status = get_value('enrollment status') or 'enrolled'
-                    sponsorship_status = get_value('sponsorship status') or 'pending'
-                    has_disability_str = get_value('has disability')
-                    disability_types = get_value('disability types')
-                    disability_description = get_value('disability description')
-                    province_name = get_value('province')
-                    district_name = get_value('district')
-                    sector_name = get_value('sector')
-                    cell_name = get_value('cell')
-                    village_name = get_value('village')
-                    program_officer = get_value('program officer name')
-                    national_id = get_value('national id')
-                    
-                    # Validate required fields
-                    if not all([first_name, last_name, gender, dob_str, school_name, class_level]):
-                        errors.append(f"Row {row_num}: Missing required fields")
-                        error_count += 1
-                        continue
-                    
-                    # Parse date
-                    if isinstance(dob_str, datetime):
-                        date_of_birth = dob_str.date()
-                    else:
-                        date_of_birth = datetime.strptime(str(dob_str), '%Y-%m-%d').date()
-                    
-                    # Get or create family
-                    family = None
-                    if family_code:
-                        try:
-                            family = Family.objects.get(family_code=family_code)
-                        except Family.DoesNotExist:
-                            errors.append(f"Row {row_num}: Family code '{family_code}' not found")
-                    
-                    # Get school
-                    school = School.objects.filter(name=school_name).first()
-                    if not school:
-                        errors.append(f"Row {row_num}: School '{school_name}' not found (student will be created without school link)")
-                    
-                    # Get locations
-                    province = Province.objects.filter(name=province_name).first() if province_name else None
-                    district = District.objects.filter(name=district_name).first() if district_name else None
-                    sector = Sector.objects.filter(name=sector_name).first() if sector_name else None
-                    cell = Cell.objects.filter(name=cell_name).first() if cell_name else None
-                    village = Village.objects.filter(name=village_name).first() if village_name else None
-                    
-                    # Parse disability
-                    has_disability = has_disability_str and str(has_disability_str).lower() in ['yes', 'true', '1']
-                    
-                    # Create student
-                    student = Student.objects.create(
-                        family=family,
-                        first_name=first_name,
-                        last_name=last_name,
-                        gender=gender.upper()[0],  # M or F
-                        date_of_birth=date_of_birth,
-                        school_name=school_name,
-                        school=school,
-                        class_level=class_level,
-                        enrollment_status=enrollment_status,
-                        sponsorship_status=sponsorship_status,
-                        has_disability=has_disability,
-                        disability_types=disability_types or '',
-                        disability_description=disability_description or '',
-                        province=province,
-                        district=district,
-                        sector=sector,
-                        cell=cell,
-                        village=village,
-                        program_officer_name=program_officer or '',
-                        national_id=national_id or ''
-                    )
-                    
-                    success_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
-                    error_count += 1
-            
-            # Show results
-            if success_count > 0:
-                messages.success(request, f"Successfully imported {success_count} student(s)!")
-            if error_count > 0:
-                messages.warning(request, f"Failed to import {error_count} row(s). See details below.")
-                for error in errors[:10]:  # Show first 10 errors
-                    messages.error(request, error)
-                if len(errors) > 10:
-                    messages.error(request, f"...and {len(errors) - 10} more errors")
-            
+            report = import_students_from_workbook(request.FILES['excel_file'])
+        except StudentImportError as e:
+            messages.error(request, str(e))
+            return redirect('students:student_list')
         except Exception as e:
             messages.error(request, f"Error reading Excel file: {str(e)}")
-        
+            return redirect('students:student_list')
+
+        # Show results
+        if report.created_count > 0:
+            messages.success(request, f"Successfully imported {report.created_count} student(s)!")
+        if report.error_count > 0:
+            messages.warning(request, f"Failed to import {report.error_count} row(s). See details below.")
+        issues = sorted(report.errors + report.warnings, key=lambda issue: issue['row'])
+        for issue in issues[:10]:  # Show first 10 issues
+            messages.error(request, f"Row {issue['row']}: {issue['message']}")
+        if len(issues) > 10:
+            messages.error(request, f"...and {len(issues) - 10} more errors")
+
         return redirect('students:student_list')
     
     return render(request, 'core/import_form.html', {
@@ -0,0 +1,163 @@
+"""
+Process-local search index for Rwanda location names.
+
+``api_views.search_locations`` is called on every autocomplete keystroke, so the
+names of all five levels are loaded once into an n-gram index (bigrams for two
+character queries, trigrams otherwise) together with their ready-made JSON rows.
+Lookups intersect the posting sets, confirm the substring match and rank the hits
+without touching the database. The index is rebuilt when the dataset version
+changes (checked at most every ``LOCATION_SEARCH_INDEX_TTL`` seconds) and is
+dropped by ``sync_rwanda_locations``.
+"""
+import heapq
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from django.conf import settings
+
+from .location_tree import get_location_tree_version
+from .models import Province, District, Sector, Cell, Village
+from .utils import encode_id
+
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_RESULT_LIMIT = 20
+MAX_RESULT_LIMIT = 100
+
+# Level name -> (response key, model, extra values copied into each result row).
+LOCATION_LEVELS = {
+    'province': ('provinces', Province, ()),
+    'district': ('districts', District, ('province__name',)),
+    'sector': ('sectors', Sector, ('district__name', 'district__province__name')),
+    'cell': ('cells', Cell, ('sector__name', 'sector__district__name')),
+    'village': ('villages', Village, ('cell__name', 'cell__sector__name')),
+}
+
+_lock = threading.Lock()
+_index = None
+
+
+def normalize_location_name(value):
+    """Lower-case, strip accents and collapse whitespace so 'Nyarugenge ' matches 'nyarugenge'."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    without_marks = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(without_marks.casefold().split())
+
+
+def _ngrams(text, size):
+    return {text[start:start + size] for start in range(len(text) - size + 1)}
+
+
+class LocationSearchIndex:
+    """Bigram/trigram postings over the normalised names of one location level."""
+
+    def __init__(self, rows):
+        self.names = []
+        self.rows = []
+        self.postings = {2: defaultdict(set), 3: defaultdict(set)}
+        for position, (name, row) in enumerate(rows):
+            normalized = normalize_location_name(name)
+            self.names.append(normalized)
+            self.rows.append(row)
+            for size, postings in self.postings.items():
+                for gram in _ngrams(normalized, size):
+                    postings[gram].add(position)
+
+    def _candidates(self, query):
+        size = 3 if len(query) >= 3 else 2
+        postings = self.postings[size]
+        grams = sorted(_ngrams(query, size), key=lambda gram: len(postings.get(gram, ())))
+        if not grams or grams[0] not in postings:
+            return set()
+        candidates = set(postings[grams[0]])
+        for gram in grams[1:]:
+            candidates &= postings[gram]
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query, limit):
+        """Return up to ``limit`` rows whose name contains ``query``, best matches first."""
+        names = self.names
+
+        def ranked():
+            for position in self._candidates(query):
+                name = names[position]
+                offset = name.find(query)
+                if offset < 0:
+                    continue
+                if offset == 0:
+                    rank = 0 if len(name) == len(query) else 1
+                elif name[offset - 1] in ' -':
+                    rank = 2
+                else:
+                    rank = 3
+                yield rank, len(name), name, position
+
+        return [self.rows[position] for *_, position in heapq.nsmallest(limit, ranked())]
+
+
+class LocationSearchIndexSet:
+    def __init__(self, version, levels):
+        self.version = version
+        self.levels = levels
+        self.checked_at = time.monotonic()
+
+
+def _build_level(model, extra_fields):
+    rows = []
+    for values in model.objects.values('id', 'name', 'code', *extra_fields).order_by('name'):
+        row = {'id': encode_id(values['id']), 'name': values['name'], 'code': values['code']}
+        for field in extra_fields:
+            row[field] = values[field]
+        rows.append((values['name'], row))
+    return LocationSearchIndex(rows)
+
+
+def build_location_search_index(version=None):
+    version = version or get_location_tree_version()
+    levels = {
+        level: _build_level(model, extra_fields)
+        for level, (_key, model, extra_fields) in LOCATION_LEVELS.items()
+    }
+    return LocationSearchIndexSet(version, levels)
+
+
+def get_location_search_index():
+    """Return the current index, revalidating the dataset version once per TTL."""
+    global _index
+    index = _index
+    if index is not None and time.monotonic() - index.checked_at < settings.LOCATION_SEARCH_INDEX_TTL:
+        return index
+
+    with _lock:
+        index = _index
+        if index is not None and time.monotonic() - index.checked_at < settings.LOCATION_SEARCH_INDEX_TTL:
+            return index
+        version = get_location_tree_version()
+        if index is not None and index.version == version:
+            index.checked_at = time.monotonic()
+        else:
+            _index = build_location_search_index(version)
+        return _index
+
+
+def invalidate_location_search_index():
+    global _index
+    with _lock:
+        _index = None
+
+
+def search_location_names(query, level=None, limit=DEFAULT_RESULT_LIMIT):
+    """Search every level (or just ``level``) and return results keyed like the API response."""
+    normalized = normalize_location_name(query)
+    index = get_location_search_index()
+    results = {}
+    for level_name, (key, _model, _extra_fields) in LOCATION_LEVELS.items():
+        if level and level != level_name:
+            results[key] = []
+        else:
+            results[key] = index.levels[level_name].search(normalized, limit)
+    return results
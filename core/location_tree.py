@@ -0,0 +1,216 @@
+"""
+Precomputed Rwanda location tree.
+
+The nested Province -> District -> Sector -> Cell -> Village payload served by
+``api_views.get_full_location_tree`` only changes when ``sync_rwanda_locations``
+runs, so it is serialised and gzipped once per dataset version, kept in memory
+and written to ``LOCATION_TREE_CACHE_ROOT`` so other workers and restarts reuse it.
+
+The version itself costs one aggregate query per level, so it is kept in memory
+too: saves and deletes of locations drop it once they commit (``core.signals``),
+and other processes recompute it at most every ``LOCATION_TREE_VERSION_TTL``
+seconds. A revalidated request (304) therefore usually runs no queries.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Province, District, Sector, Cell, Village
+from .utils import encode_id
+
+
+LOCATION_MODELS = (Province, District, Sector, Cell, Village)
+CACHE_FILE_PREFIX = 'location-tree-'
+CACHE_FILE_SUFFIX = '.json.gz'
+
+_lock = threading.Lock()
+_cached_tree = None
+# (LocationTreeVersion, time.monotonic() when it was computed)
+_cached_version = None
+
+
+@dataclass(frozen=True)
+class LocationTreeVersion:
+    """Fingerprint of the location tables; changes whenever a row is added, edited or removed."""
+    key: str
+    last_modified: datetime | None
+
+    @property
+    def etag(self):
+        return f'"{self.key}"'
+
+
+@dataclass(frozen=True)
+class CachedLocationTree:
+    version: LocationTreeVersion
+    gzipped: bytes
+
+    @property
+    def content(self):
+        return gzip.decompress(self.gzipped)
+
+
+def get_location_tree_version():
+    """Return the dataset version, recomputed at most every ``LOCATION_TREE_VERSION_TTL`` seconds."""
+    global _cached_version
+    cached = _cached_version
+    if cached is not None and time.monotonic() - cached[1] < settings.LOCATION_TREE_VERSION_TTL:
+        return cached[0]
+    version = compute_location_tree_version()
+    _cached_version = (version, time.monotonic())
+    return version
+
+
+def invalidate_location_tree_version():
+    """Forget the cached dataset version so the next request recomputes it."""
+    global _cached_version
+    _cached_version = None
+
+
+def compute_location_tree_version():
+    """Return the current dataset version from row counts, latest edit times and the ID codec."""
+    # encode_id(1) changes with the codec and SECRET_KEY, both of which change every node ID.
+    parts = [f'codec:{encode_id(1)}']
+    last_modified = None
+    for model in LOCATION_MODELS:
+        stats = model.objects.aggregate(total=Count('id'), latest=Max('updated_at'))
+        parts.append(f"{model._meta.model_name}:{stats['total']}:{stats['latest'] and stats['latest'].isoformat()}")
+        if stats['latest'] and (last_modified is None or stats['latest'] > last_modified):
+            last_modified = stats['latest']
+    key = hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+    return LocationTreeVersion(key=key, last_modified=last_modified)
+
+
+def _group_by_parent(queryset, parent_field):
+    grouped = defaultdict(list)
+    for row in queryset.values('id', 'name', 'code', parent_field):
+        grouped[row[parent_field]].append(row)
+    return grouped
+
+
+def build_location_tree():
+    """Build the nested location hierarchy with one query per level."""
+    villages = _group_by_parent(Village.objects.all(), 'cell_id')
+    cells = _group_by_parent(Cell.objects.all(), 'sector_id')
+    sectors = _group_by_parent(Sector.objects.all(), 'district_id')
+    districts = _group_by_parent(District.objects.all(), 'province_id')
+
+    def node(row):
+        return {'id': encode_id(row['id']), 'name': row['name'], 'code': row['code']}
+
+    return [
+        {
+            **node(province),
+            'districts': [
+                {
+                    **node(district),
+                    'sectors': [
+                        {
+                            **node(sector),
+                            'cells': [
+                                {
+                                    **node(cell),
+                                    'villages': [node(village) for village in villages[cell['id']]],
+                                }
+                                for cell in cells[sector['id']]
+                            ],
+                        }
+                        for sector in sectors[district['id']]
+                    ],
+                }
+                for district in districts[province['id']]
+            ],
+        }
+        for province in Province.objects.values('id', 'name', 'code')
+    ]
+
+
+def _cache_path(version):
+    return os.path.join(settings.LOCATION_TREE_CACHE_ROOT, f'{CACHE_FILE_PREFIX}{version.key}{CACHE_FILE_SUFFIX}')
+
+
+def _read_cache_file(version):
+    try:
+        with open(_cache_path(version), 'rb') as cache_file:
+            return cache_file.read()
+    except OSError:
+        return None
+
+
+def _write_cache_file(version, gzipped):
+    """Write atomically and drop files left behind by older dataset versions."""
+    cache_root = settings.LOCATION_TREE_CACHE_ROOT
+    try:
+        os.makedirs(cache_root, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cache_root, suffix='.tmp', delete=False) as temp_file:
+            temp_file.write(gzipped)
+        os.replace(temp_file.name, _cache_path(version))
+        current_name = os.path.basename(_cache_path(version))
+        for name in os.listdir(cache_root):
+            if name.startswith(CACHE_FILE_PREFIX) and name != current_name:
+                os.remove(os.path.join(cache_root, name))
+    except OSError:
+        # The in-memory copy still serves this process; disk caching is best effort.
+        pass
+
+
+def _serialize(tree):
+    content = json.dumps({'status': 'success', 'data': tree}, separators=(',', ':')).encode('utf-8')
+    # mtime=0 keeps the gzip bytes identical for identical payloads.
+    return gzip.compress(content, compresslevel=6, mtime=0)
+
+
+def get_location_tree(version=None):
+    """Return the cached tree for the current dataset version, building it at most once."""
+    global _cached_tree
+    version = version or get_location_tree_version()
+
+    cached = _cached_tree
+    if cached is not None and cached.version == version:
+        return cached
+
+    with _lock:
+        cached = _cached_tree
+        if cached is not None and cached.version == version:
+            return cached
+
+        gzipped = _read_cache_file(version)
+        if gzipped is None:
+            gzipped = _serialize(build_location_tree())
+            _write_cache_file(version, gzipped)
+
+        _cached_tree = CachedLocationTree(version=version, gzipped=gzipped)
+        return _cached_tree
+
+
+def invalidate_location_tree():
+    """Forget the in-memory and on-disk tree so the next request rebuilds it."""
+    global _cached_tree
+    invalidate_location_tree_version()
+    with _lock:
+        _cached_tree = None
+        cache_root = settings.LOCATION_TREE_CACHE_ROOT
+        if not os.path.isdir(cache_root):
+            return
+        for name in os.listdir(cache_root):
+            if name.startswith(CACHE_FILE_PREFIX):
+                try:
+                    os.remove(os.path.join(cache_root, name))
+                except OSError:
+                    pass
+
+
+def rebuild_location_tree():
+    """Invalidate and immediately precompute the tree for the current dataset."""
+    invalidate_location_tree()
+    return get_location_tree()
@@ -0,0 +1,105 @@
+import io
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from reportlab.pdfgen import canvas
+
+from core.export_utils import (
+    ExportNumberedCanvas,
+    build_export_pdf_document,
+    build_export_table,
+    prepend_row_numbers,
+)
+
+
+class StatefulNumberedCanvas(ExportNumberedCanvas):
+    """The previous page numbering: keep every page's state and draw the numbers in ``save()``."""
+
+    def __init__(self, *args, **kwargs):
+        canvas.Canvas.__init__(self, *args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        page_count = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            page_width, _page_height = self._pagesize
+            self.draw_footer()
+            self.draw_page_number(self._pageNumber, page_count, page_width)
+            canvas.Canvas.showPage(self)
+        canvas.Canvas.save(self)
+
+
+# Marks each page object (but not the /Pages tree) in the generated PDF.
+PAGE_OBJECT = b'/Type /Page\n'
+
+CANVASES = {
+    'stateful': StatefulNumberedCanvas,
+    'deferred': ExportNumberedCanvas,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare peak memory and time of PDF page numbering canvases on a generated table report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            dest='rows',
+            type=int,
+            default=5000,
+            help='Number of table rows in the generated report (default: 5000).',
+        )
+
+    def _build(self, canvas_class, rows):
+        buffer = io.BytesIO()
+        doc = build_export_pdf_document(buffer, 'Page Numbering Benchmark')
+        data = prepend_row_numbers(['Student Name', 'Term', 'School', 'Required', 'Paid', 'Balance', 'Status'], rows)
+        doc.build([build_export_table(data, body_font_size=7)], canvasmaker=canvas_class)
+        return buffer.getvalue()
+
+    def _measure(self, canvas_class, rows):
+        """Peak traced memory of a build, and the memory still traced when the canvas starts saving."""
+        at_save = []
+
+        class MeasuredCanvas(canvas_class):
+            def save(self):
+                at_save.append(tracemalloc.get_traced_memory()[0])
+                super().save()
+
+        tracemalloc.start()
+        try:
+            self._build(MeasuredCanvas, rows)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak, at_save[0]
+
+    def handle(self, *args, **options):
+        row_count = options['rows']
+        if row_count < 1:
+            raise CommandError('--rows must be at least 1.')
+
+        rows = [
+            [f'Student {index}', f'Term {index % 3 + 1}', f'School {index % 40}', '150,000', '100,000', '50,000', 'Partial']
+            for index in range(1, row_count + 1)
+        ]
+        megabyte = 1024 * 1024
+        self.stdout.write(f'Rows: {row_count}')
+        for name, canvas_class in CANVASES.items():
+            started = time.perf_counter()
+            content = self._build(canvas_class, rows)
+            seconds = time.perf_counter() - started
+            # Measured in a second run: tracemalloc slows allocation down too much to time with it.
+            peak, at_save = self._measure(canvas_class, rows)
+
+            self.stdout.write(
+                f'{name}: {seconds:.2f} s, peak {peak / megabyte:.1f} MB, '
+                f'held at save {at_save / megabyte:.1f} MB, '
+                f'{content.count(PAGE_OBJECT)} pages, {len(content) / 1024:.0f} KB'
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.audit import replay_spilled_audit_entries
+
+
+class Command(BaseCommand):
+    help = 'Write audit log entries that were spilled to AUDIT_LOG_SPILL_DIR while the database was unavailable.'
+
+    def handle(self, *args, **options):
+        written = replay_spilled_audit_entries()
+        self.stdout.write(self.style.SUCCESS(f'Replayed {written} spilled audit log entries.'))
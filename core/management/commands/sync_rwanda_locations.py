@@ -5,6 +5,8 @@ import urllib.request
 from django.core.management import BaseCommand, call_command
 from django.db import transaction
 
+from core.location_search import invalidate_location_search_index
+from core.location_tree import rebuild_location_tree
 from core.models import Province, District, Sector, Cell, Village
 
 
@@ -203,6 +205,11 @@ class Command(BaseCommand):
             f"villages={created_counts['village']}"
         )
 
+        self.stdout.write("Rebuilding cached location tree...")
+        tree = rebuild_location_tree()
+        invalidate_location_search_index()
+        self.stdout.write(f"Location tree version: {tree.version.key}")
+
         if no_export:
             return
 
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_systemactivitylog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemactivitylog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
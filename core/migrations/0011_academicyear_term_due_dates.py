@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_systemactivitylog_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='academicyear',
+            name='term1_due_date',
+            field=models.DateField(blank=True, help_text='School fees for term 1 are overdue after this date', null=True),
+        ),
+        migrations.AddField(
+            model_name='academicyear',
+            name='term2_due_date',
+            field=models.DateField(blank=True, help_text='School fees for term 2 are overdue after this date', null=True),
+        ),
+        migrations.AddField(
+            model_name='academicyear',
+            name='term3_due_date',
+            field=models.DateField(blank=True, help_text='School fees for term 3 are overdue after this date', null=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class Province(models.Model):
@@ -84,6 +85,9 @@ class AcademicYear(models.Model):
     """Academic year options (admin-managed)."""
     name = models.CharField(max_length=20, unique=True)
     is_active = models.BooleanField(default=False)
+    term1_due_date = models.DateField(null=True, blank=True, help_text="School fees for term 1 are overdue after this date")
+    term2_due_date = models.DateField(null=True, blank=True, help_text="School fees for term 2 are overdue after this date")
+    term3_due_date = models.DateField(null=True, blank=True, help_text="School fees for term 3 are overdue after this date")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -92,6 +96,9 @@ class AcademicYear(models.Model):
     def __str__(self):
         return self.name
 
+    def due_date_for_term(self, term):
+        return getattr(self, f'term{term}_due_date', None)
+
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
         if self.is_active:
@@ -225,7 +232,8 @@ class SystemActivityLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.CharField(max_length=255, blank=True, default='')
     metadata = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the buffered audit sink writes it.
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
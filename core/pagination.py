@@ -0,0 +1,198 @@
+"""
+Keyset ("seek") pagination for long list views.
+
+``Paginator`` counts the whole filtered queryset and skips rows with ``OFFSET``,
+so deep pages get slower as the table grows. ``CursorPaginator`` instead filters
+on the ordering columns of the last row shown (``WHERE (created_at, id) < (...)``)
+and reads one row more than the page size, so every page costs one indexed range
+scan whatever its depth.
+
+The position travels in the ``cursor`` query parameter as a signed token, so
+users cannot forge a boundary; a missing, stale or tampered cursor falls back to
+the first page. Totals are optional: pass an exact ``count`` the view already
+has, or let the paginator count at most ``count_limit`` rows and report
+"1,000+" beyond that.
+"""
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+CURSOR_PARAM = 'cursor'
+CURSOR_SALT = 'core.pagination.cursor'
+DEFAULT_COUNT_LIMIT = 1000
+
+
+def _split_ordering(ordering):
+    fields = []
+    for item in ordering:
+        descending = item.startswith('-')
+        fields.append((item.lstrip('-'), descending))
+    return fields
+
+
+def _model_field(model, path):
+    opts = model._meta
+    field = None
+    for name in path.split('__'):
+        field = opts.pk if name == 'pk' else opts.get_field(name)
+        if field.is_relation and field.related_model is not None:
+            opts = field.related_model._meta
+    return field
+
+
+def _row_value(row, path):
+    if isinstance(row, dict):
+        return row[path]
+    value = row
+    for name in path.split('__'):
+        value = getattr(value, name)
+    return value
+
+
+class CursorPage:
+    """One page of rows with the cursors needed to move either way."""
+
+    def __init__(self, object_list, paginator, *, number, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.number = number
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return (self.number - 1) * self.paginator.per_page + len(self.object_list)
+
+
+class CursorPaginator:
+    """
+    Paginate ``queryset`` by ``ordering``, which must end in a unique column.
+
+    Ordering columns are compared with ``<``/``>`` so they should be non-null.
+    """
+
+    def __init__(self, queryset, per_page, *, ordering=('-created_at', '-pk'), count=None,
+                 count_limit=DEFAULT_COUNT_LIMIT):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = _split_ordering(self.ordering)
+        self.count_limit = count_limit
+        self._count = count
+        self._count_is_exact = count is not None
+
+    def _count_rows(self):
+        if self._count is None:
+            if self.count_limit is None:
+                self._count = self.queryset.order_by().count()
+                self._count_is_exact = True
+            else:
+                capped = self.queryset.order_by()[:self.count_limit + 1].count()
+                self._count = min(capped, self.count_limit)
+                self._count_is_exact = capped <= self.count_limit
+
+    @property
+    def count(self):
+        self._count_rows()
+        return self._count
+
+    @property
+    def count_is_exact(self):
+        self._count_rows()
+        return self._count_is_exact
+
+    def encode_cursor(self, row, *, direction, number):
+        values = [str(_row_value(row, name)) for name, _descending in self.fields]
+        return signing.dumps({'v': values, 'd': direction, 'n': number}, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, token):
+        """Return ``(values, direction, number)`` or ``None`` for a missing or invalid cursor."""
+        if not token:
+            return None
+        try:
+            payload = signing.loads(token, salt=CURSOR_SALT)
+            raw_values = payload['v']
+            direction = payload['d']
+            number = int(payload['n'])
+            if direction not in ('next', 'prev') or number < 1 or len(raw_values) != len(self.fields):
+                return None
+            values = [
+                _model_field(self.queryset.model, name).to_python(value)
+                for (name, _descending), value in zip(self.fields, raw_values)
+            ]
+        except (signing.BadSignature, ValidationError, KeyError, TypeError, ValueError):
+            return None
+        return values, direction, number
+
+    def _seek_filter(self, values, *, forward):
+        """Rows strictly after (or before) ``values`` in the paginator's ordering."""
+        condition = Q()
+        equal_prefix = Q()
+        for (name, descending), value in zip(self.fields, values):
+            lookup = f'{name}__lt' if descending == forward else f'{name}__gt'
+            condition |= equal_prefix & Q(**{lookup: value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def _reversed_ordering(self):
+        return [name if descending else f'-{name}' for name, descending in self.fields]
+
+    def get_page(self, token=None):
+        decoded = self.decode_cursor(token)
+        if decoded is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return self._page(rows, number=1, has_next=has_more, has_previous=False)
+
+        values, direction, number = decoded
+        forward = direction == 'next'
+        queryset = self.queryset.filter(self._seek_filter(values, forward=forward))
+        if forward:
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return self._page(rows, number=number, has_next=has_more, has_previous=number > 1)
+
+        rows = list(queryset.order_by(*self._reversed_ordering())[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        if not has_more:
+            # Nothing before these rows, so this is the first page whatever the cursor said.
+            number = 1
+        return self._page(rows, number=number, has_next=True, has_previous=has_more)
+
+    def _page(self, rows, *, number, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], direction='next', number=number + 1)
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], direction='prev', number=number - 1)
+        return CursorPage(
+            rows,
+            self,
+            number=number,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+        )
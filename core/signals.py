@@ -1,12 +1,14 @@
 from django.conf import settings
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 from django.core.mail import send_mail
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
 from .activity import log_system_activity
+from .location_tree import LOCATION_MODELS, invalidate_location_tree_version
 from .models import Notification
 
 
@@ -57,6 +59,17 @@ def email_notification(sender, instance, created, **kwargs):
     )
 
 
+
+def drop_location_tree_version(sender, **kwargs):
+    # Recompute only once the change is visible to the request that recomputes it.
+    transaction.on_commit(invalidate_location_tree_version)
+
+
+for location_model in LOCATION_MODELS:
+    post_save.connect(drop_location_tree_version, sender=location_model)
+    post_delete.connect(drop_location_tree_version, sender=location_model)
+
+
 @receiver(user_logged_in)
 def log_user_logged_in(sender, request, user, **kwargs):
     log_system_activity(
@@ -1,8 +1,36 @@
+import gzip
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO
+from urllib.parse import urlencode
+from unittest import mock, skipUnless
+
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import IntegrityError, OperationalError, connection
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
 
-from core.models import School, SystemActivityLog
+from core.audit import CLAIM_STALE_AFTER_SECONDS, BufferedAuditSink, replay_spilled_audit_entries, spill_audit_entries
+from core.export_utils import EXCEL_CONTENT_TYPE, ExcelReportWriter, ExportNumberedCanvas
+from core.id_codecs import SignedIdCodec, get_id_codec
+from core.import_export import import_students_from_workbook
+from core import location_search, location_tree
+from core.activity import log_system_activity
+from core.pagination import CursorPaginator
+from core.models import AcademicYear, Cell, District, Province, School, Sector, SystemActivityLog, Village
+from core.utils import decode_id, encode_id
+from finance.models import SchoolFee
+from finance.services import filter_school_fee_queryset
+from reports.services import _student_queryset
+from students.models import Student, StudentEnrollmentHistory, StudentMark
 
 
 class SystemActivityLogTests(TestCase):
@@ -79,3 +107,463 @@ class SystemActivityLogTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'System Activity Logs')
         self.assertContains(response, 'Manual entry')
+
+
+class StudentImportTests(TestCase):
+    HEADERS = [
+        'First Name*', 'Last Name*', 'Gender (M/F)*', 'Date of Birth (YYYY-MM-DD)*',
+        'Family Code', 'School Name*', 'Class Level*', 'Enrollment Status', 'Program Officer Name',
+    ]
+
+    def setUp(self):
+        self.school = School.objects.create(name='Alpha Primary')
+        self.officer = User.objects.create_user(username='officer', first_name='Jane', last_name='Smith')
+
+    def _workbook(self, rows):
+        wb = Workbook()
+        ws = wb.active
+        ws.append(self.HEADERS)
+        for row in rows:
+            ws.append(row)
+        buffer = BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def _valid_rows(self, count):
+        return [
+            [f'Student{index}', 'Test', 'F', '2012-01-01', '', 'Alpha Primary', 'P4', '', 'Jane Smith']
+            for index in range(count)
+        ]
+
+    def test_import_reports_row_errors_and_creates_valid_rows(self):
+        rows = self._valid_rows(2) + [
+            ['Bad', 'Gender', 'X', '2012-01-01', '', 'Alpha Primary', 'P4', '', ''],
+            ['No', 'Date', 'M', '01/02/2012', '', 'Alpha Primary', 'P4', '', ''],
+            ['Unknown', 'School', 'M', '2012-01-01', 'FAM-MISSING', 'Hill School', 'P2', 'enrolled', ''],
+        ]
+
+        report = import_students_from_workbook(self._workbook(rows), chunk_size=2)
+
+        self.assertEqual(report.created_count, 3)
+        self.assertEqual([error['row'] for error in report.errors], [4, 5])
+        self.assertEqual({warning['row'] for warning in report.warnings}, {6})
+        student = Student.objects.get(first_name='Student0')
+        self.assertEqual(student.school, self.school)
+        self.assertEqual(student.program_officer, self.officer)
+        self.assertIsNone(Student.objects.get(first_name='Unknown').school)
+
+    def test_import_query_count_does_not_grow_per_row(self):
+        with CaptureQueriesContext(connection) as small:
+            import_students_from_workbook(self._workbook(self._valid_rows(3)), chunk_size=50)
+        with CaptureQueriesContext(connection) as large:
+            import_students_from_workbook(self._workbook(self._valid_rows(40)), chunk_size=50)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Student.objects.count(), 43)
+
+
+class LocationTreeCacheTests(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(LOCATION_TREE_CACHE_ROOT=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        location_tree.invalidate_location_tree()
+        self.addCleanup(location_tree.invalidate_location_tree)
+
+        province = Province.objects.create(name='Kigali City', code='1')
+        district = District.objects.create(name='Gasabo', province=province, code='11')
+        sector = Sector.objects.create(name='Kimironko', district=district, code='1101')
+        self.cell = Cell.objects.create(name='Bibare', sector=sector, code='110101')
+        Village.objects.create(name='Abatuje', cell=self.cell, code='11010101')
+        self.url = reverse('core:api_location_tree')
+
+    def test_tree_is_served_gzipped_and_revalidated_with_etag(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Last-Modified', response)
+        payload = json.loads(gzip.decompress(response.content))
+        village = payload['data'][0]['districts'][0]['sectors'][0]['cells'][0]['villages'][0]
+        self.assertEqual(village['name'], 'Abatuje')
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        plain = self.client.get(self.url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(json.loads(plain.content), payload)
+
+    def test_changes_and_invalidation_produce_a_new_version(self):
+        first = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Village.objects.create(name='Amahoro', cell=self.cell, code='11010102')
+
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        villages = json.loads(second.content)['data'][0]['districts'][0]['sectors'][0]['cells'][0]['villages']
+        self.assertEqual([village['name'] for village in villages], ['Abatuje', 'Amahoro'])
+
+        tree = location_tree.rebuild_location_tree()
+        self.assertEqual(tree.version.etag, second['ETag'])
+        with self.assertNumQueries(0):
+            self.assertEqual(location_tree.get_location_tree().gzipped, tree.gzipped)
+
+
+class LocationSearchIndexTests(TestCase):
+    def setUp(self):
+        location_search.invalidate_location_search_index()
+        self.addCleanup(location_search.invalidate_location_search_index)
+        location_tree.invalidate_location_tree_version()
+
+        province = Province.objects.create(name='Kigali City', code='1')
+        district = District.objects.create(name='Nyarugenge', province=province, code='11')
+        sector = Sector.objects.create(name='Nyamirambo', district=district, code='1101')
+        cell = Cell.objects.create(name='Rugarama', sector=sector, code='110101')
+        for index, name in enumerate(['Kanyinya', 'Nyamabuye', 'Gitega Nyamata', 'Amahoro']):
+            Village.objects.create(name=name, cell=cell, code=f'1101010{index}')
+        self.url = reverse('core:api_search_locations')
+
+    def test_search_is_ranked_limited_and_served_from_memory(self):
+        self.client.get(self.url, {'q': 'nya'})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'q': 'NYA', 'level': 'village', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual([village['name'] for village in data['villages']], ['Nyamabuye', 'Gitega Nyamata'])
+        self.assertEqual(data['villages'][0]['cell__name'], 'Rugarama')
+        self.assertEqual(data['districts'], [])
+
+        results = location_search.search_location_names('ny')
+        self.assertEqual([district['name'] for district in results['districts']], ['Nyarugenge'])
+        self.assertEqual(results['districts'][0]['province__name'], 'Kigali City')
+        self.assertEqual([sector['name'] for sector in results['sectors']], ['Nyamirambo'])
+
+    def test_index_picks_up_new_locations_after_revalidation(self):
+        self.assertEqual(location_search.search_location_names('Rwezamenyo')['villages'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Village.objects.create(name='Rwezamenyo', cell=Cell.objects.get(), code='11010199')
+
+        with self.settings(LOCATION_SEARCH_INDEX_TTL=0):
+            villages = location_search.search_location_names('rwezamenyo')['villages']
+        self.assertEqual([village['name'] for village in villages], ['Rwezamenyo'])
+
+    def test_short_queries_are_rejected(self):
+        response = self.client.get(self.url, {'q': 'a'})
+        self.assertEqual(response.status_code, 400)
+
+
+class IdCodecTests(SimpleTestCase):
+    def test_feistel_tokens_round_trip_and_reject_tampering(self):
+        token = encode_id(42)
+        self.assertEqual(len(token), 8)
+        self.assertTrue(token.isalnum())
+        self.assertEqual(decode_id(token), 42)
+        self.assertEqual(encode_id('42'), token)
+        self.assertEqual(decode_id(encode_id(2 ** 32 - 1)), 2 ** 32 - 1)
+        self.assertIsNone(get_id_codec().decode('zzzzzzzz'))
+
+    def test_legacy_signed_tokens_and_plain_ids_still_decode(self):
+        legacy_token = SignedIdCodec(settings.SECRET_KEY).encode(42)
+        self.assertEqual(decode_id(legacy_token), 42)
+        self.assertEqual(decode_id(legacy_token[:-1] + 'x'), None)
+        self.assertEqual(decode_id('17'), 17)
+        self.assertEqual(decode_id(17), 17)
+        self.assertIsNone(decode_id(''))
+
+    def test_ids_outside_the_feistel_range_fall_back_to_signed_tokens(self):
+        token = encode_id(2 ** 40)
+        self.assertIn(':', token)
+        self.assertEqual(decode_id(token), 2 ** 40)
+
+    @override_settings(ID_CODEC='signed')
+    def test_signed_codec_can_be_selected(self):
+        self.assertEqual(encode_id(5), SignedIdCodec(settings.SECRET_KEY).encode(5))
+
+
+class BufferedAuditSinkTests(TestCase):
+    def setUp(self):
+        spill_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spill_dir.cleanup)
+        self.spill_dir = spill_dir.name
+        self.sink = BufferedAuditSink(
+            batch_size=50,
+            flush_interval=60,
+            max_queue=1000,
+            spill_dir=self.spill_dir,
+            start_thread=False,
+        )
+        patcher = mock.patch('core.activity.get_audit_sink', return_value=self.sink)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='buffered', password='StrongPass123!')
+
+    def test_entries_are_queued_then_written_in_one_batch(self):
+        for index in range(3):
+            log_system_activity(user=self.user, action=f'Action {index}')
+        self.assertFalse(SystemActivityLog.objects.exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.sink.flush(), 3)
+        self.assertEqual(
+            sorted(SystemActivityLog.objects.values_list('action', flat=True)),
+            ['Action 0', 'Action 1', 'Action 2'],
+        )
+
+    def test_entries_spill_to_disk_when_the_database_is_down_and_replay_later(self):
+        log_system_activity(user=self.user, action='Offline action', metadata={'reason': 'outage'})
+        with mock.patch.object(SystemActivityLog.objects, 'bulk_create', side_effect=OperationalError('down')):
+            with self.assertLogs('core.audit', level='WARNING'):
+                self.assertEqual(self.sink.flush(), 0)
+        self.assertEqual(len(os.listdir(self.spill_dir)), 1)
+        self.assertFalse(SystemActivityLog.objects.exists())
+
+        self.assertEqual(self.sink.flush(), 1)
+        entry = SystemActivityLog.objects.get()
+        self.assertEqual(entry.action, 'Offline action')
+        self.assertEqual(entry.user, self.user)
+        self.assertEqual(entry.metadata, {'reason': 'outage'})
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+    def test_replay_skips_files_another_process_claimed_and_retries_stale_claims(self):
+        spill_audit_entries([SystemActivityLog(username='buffered', action='Taken')], self.spill_dir)
+        spill_audit_entries([SystemActivityLog(username='buffered', action='Abandoned')], self.spill_dir)
+        taken, abandoned = sorted(os.listdir(self.spill_dir))
+        # Another process is replaying the first file; the second was claimed by a process that died.
+        os.rename(os.path.join(self.spill_dir, taken), os.path.join(self.spill_dir, f'{taken}.1-live.replaying'))
+        stale_path = os.path.join(self.spill_dir, f'{abandoned}.2-dead.replaying')
+        os.rename(os.path.join(self.spill_dir, abandoned), stale_path)
+        stale_time = time.time() - CLAIM_STALE_AFTER_SECONDS - 60
+        os.utime(stale_path, (stale_time, stale_time))
+
+        self.assertEqual(replay_spilled_audit_entries(self.spill_dir), 1)
+        self.assertEqual(list(SystemActivityLog.objects.values_list('action', flat=True)), ['Abandoned'])
+        self.assertEqual(os.listdir(self.spill_dir), [f'{taken}.1-live.replaying'])
+
+    def test_replay_tolerates_a_file_removed_by_another_process(self):
+        spill_audit_entries([SystemActivityLog(username='buffered', action='Racing')], self.spill_dir)
+        with mock.patch('core.audit.os.rename', side_effect=FileNotFoundError):
+            self.assertEqual(replay_spilled_audit_entries(self.spill_dir), 0)
+        self.assertFalse(SystemActivityLog.objects.exists())
+
+        with mock.patch('core.audit.os.remove', side_effect=FileNotFoundError):
+            self.assertEqual(replay_spilled_audit_entries(self.spill_dir), 1)
+
+    def test_failed_replay_keeps_the_spill_file_and_writes_no_rows(self):
+        first_user = User.objects.create_user(username='removed', password='StrongPass123!')
+        spill_audit_entries(
+            [
+                SystemActivityLog(user=first_user, username='removed', action='First'),
+                SystemActivityLog(user=self.user, username='buffered', action='Second'),
+            ],
+            self.spill_dir,
+        )
+        save = SystemActivityLog.save
+        saved = []
+
+        def save_once(entry, *args, **kwargs):
+            if saved:
+                raise OperationalError('down')
+            saved.append(entry)
+            return save(entry, *args, **kwargs)
+
+        with mock.patch.object(SystemActivityLog.objects, 'bulk_create', side_effect=IntegrityError('fk')):
+            with mock.patch.object(SystemActivityLog, 'save', save_once):
+                with self.assertRaises(OperationalError):
+                    replay_spilled_audit_entries(self.spill_dir)
+        self.assertFalse(SystemActivityLog.objects.exists())
+        self.assertEqual(len(os.listdir(self.spill_dir)), 1)
+
+        self.assertEqual(replay_spilled_audit_entries(self.spill_dir), 2)
+        self.assertEqual(
+            sorted(SystemActivityLog.objects.values_list('action', flat=True)),
+            ['First', 'Second'],
+        )
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+
+@skipUnless(connection.vendor in {'sqlite', 'postgresql'}, 'Query plan checks cover SQLite and PostgreSQL.')
+class QueryPlanTests(TestCase):
+    """EXPLAIN the querysets behind the hot list filters and fail on full table scans."""
+
+    def setUp(self):
+        self.year = AcademicYear.objects.create(name='2025-2026', is_active=True)
+        self.school = School.objects.create(name='Plan School')
+
+    def assertNoFullScan(self, queryset, table):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Tiny test tables are always cheapest to scan; ask for the plan the indexes allow.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            full_scan = re.search(rf'Seq Scan on {table}\b', queryset.explain())
+        else:
+            full_scan = re.search(rf'\bSCAN {table}\b', queryset.explain())
+        if full_scan:
+            self.fail(f'{table} is read with a full scan:\n{queryset.explain()}')
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain(), f'{index_name} is not used:\n{queryset.explain()}')
+
+    def test_school_fee_filters_use_an_index(self):
+        fees, _filters = filter_school_fee_queryset(SchoolFee.objects.all(), params={
+            'academic_year': str(self.year.pk),
+            'term': '1',
+            'school': str(self.school.pk),
+            'status': 'pending',
+        })
+        self.assertNoFullScan(fees, 'finance_schoolfee')
+        self.assertUsesIndex(fees, 'finance_sch_academi_fa1fbb_idx')
+        overdue = SchoolFee.objects.filter(academic_year=self.year, term='1', payment_status='overdue')
+        self.assertNoFullScan(overdue, 'finance_schoolfee')
+        self.assertUsesIndex(overdue, 'fee_overdue_year_term_idx')
+
+    def test_student_report_filters_use_an_index(self):
+        students, _subtitle = _student_queryset({
+            'sponsorship_status': 'active',
+            'gender': 'F',
+            'school_level': 'secondary',
+        })
+        self.assertNoFullScan(students, 'students_student')
+
+    def test_enrollment_and_mark_filters_use_an_index(self):
+        self.assertNoFullScan(
+            StudentEnrollmentHistory.objects.filter(academic_year=self.year, student__is_active=True),
+            'students_studentenrollmenthistory',
+        )
+        self.assertNoFullScan(
+            StudentMark.objects.filter(academic_year=self.year, term='Term 1'),
+            'students_studentmark',
+        )
+
+    def test_activity_log_filters_use_an_index(self):
+        logs = SystemActivityLog.objects.filter(
+            event_type=SystemActivityLog.EVENT_EXPORT,
+            created_at__gte=timezone.now() - timedelta(days=7),
+        ).order_by('-created_at')
+        self.assertNoFullScan(logs, 'core_systemactivitylog')
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        SystemActivityLog.objects.bulk_create([
+            SystemActivityLog(username=f'user{index}', action=f'Entry {index}')
+            for index in range(23)
+        ])
+        # Give groups of rows the same timestamp so the pk tiebreaker is exercised.
+        base = timezone.now()
+        for log in SystemActivityLog.objects.all():
+            SystemActivityLog.objects.filter(pk=log.pk).update(created_at=base - timedelta(minutes=log.pk // 4))
+        self.expected = list(SystemActivityLog.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+
+    def test_next_and_previous_cursors_walk_every_row_once(self):
+        paginator = CursorPaginator(SystemActivityLog.objects.all(), 5)
+        pages = [paginator.get_page(None)]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+
+        self.assertEqual([page.number for page in pages], [1, 2, 3, 4, 5])
+        self.assertEqual([log.pk for page in pages for log in page], self.expected)
+        self.assertEqual((pages[-1].start_index(), pages[-1].end_index()), (21, 23))
+
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = paginator.get_page(page.previous_cursor)
+            self.assertEqual([log.pk for log in page], [log.pk for log in expected])
+            self.assertEqual(page.number, expected.number)
+        self.assertFalse(page.has_previous)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = CursorPaginator(SystemActivityLog.objects.all(), 5)
+        cursor = paginator.get_page(None).next_cursor
+        for token in ('garbage', cursor[:-2] + 'xx'):
+            page = paginator.get_page(token)
+            self.assertEqual(page.number, 1)
+            self.assertEqual([log.pk for log in page], self.expected[:5])
+
+    def test_deep_pages_cost_one_query_and_totals_are_capped(self):
+        paginator = CursorPaginator(SystemActivityLog.objects.all(), 5, count_limit=10)
+        page = paginator.get_page(None)
+        for _ in range(3):
+            page = paginator.get_page(page.next_cursor)
+        with self.assertNumQueries(1):
+            paginator.get_page(page.next_cursor)
+        self.assertEqual(paginator.count, 10)
+        self.assertFalse(paginator.count_is_exact)
+
+    def test_activity_log_view_follows_cursor_links(self):
+        staff_user = User.objects.create_user(username='pager', password='StrongPass123!', is_staff=True)
+        self.client.force_login(staff_user)
+        response = self.client.get(reverse('core:system_activity_logs'))
+        self.assertFalse(response.context['page_obj'].has_next)
+
+        SystemActivityLog.objects.bulk_create([
+            SystemActivityLog(username='bulk', action='Bulk entry') for _ in range(30)
+        ])
+        response = self.client.get(reverse('core:system_activity_logs'), {'event_type': SystemActivityLog.EVENT_ACTION})
+        page_obj = response.context['page_obj']
+        self.assertTrue(page_obj.has_next)
+        self.assertContains(response, urlencode({'cursor': page_obj.next_cursor}))
+        self.assertContains(response, 'event_type=')
+
+        response = self.client.get(
+            reverse('core:system_activity_logs'),
+            {'event_type': SystemActivityLog.EVENT_ACTION, 'cursor': page_obj.next_cursor},
+        )
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(len(response.context['page_obj']), 23)
+
+
+class ExportNumberedCanvasTests(SimpleTestCase):
+    def test_page_totals_are_filled_in_when_the_document_is_saved(self):
+        buffer = BytesIO()
+        pdf = ExportNumberedCanvas(buffer, pageCompression=0)
+        for page in range(3):
+            pdf.drawString(72, 720, f'Body {page}')
+            pdf.showPage()
+        pdf.drawString(72, 720, 'Unfinished last page')
+        pdf.save()
+
+        content = buffer.getvalue()
+        self.assertEqual(content.count(b'/Type /Page\n'), 4)
+        self.assertEqual(re.findall(rb'\(Page (\d) of (\d)\)', content), [(b'1', b'4'), (b'2', b'4'), (b'3', b'4'), (b'4', b'4')])
+
+
+class ExcelReportWriterTests(SimpleTestCase):
+    def test_rows_stream_into_styled_write_only_sheet(self):
+        writer = ExcelReportWriter(
+            'Fees Report',
+            'All schools',
+            ['No.', 'Student', 'Amount'],
+            sheet_title='Fees',
+            max_width=20,
+            right_aligned_columns=[3],
+        )
+        writer.add_style('flagged', fill='FEE2E2')
+        writer.append([1, 'Alice', 1000])
+        writer.append([2, 'A student with a very long name', 2500], styles={3: 'flagged'})
+        writer.append_total(['', 'TOTAL', 3500])
+
+        worksheet = load_workbook(BytesIO(writer.to_bytes())).active
+        self.assertEqual(worksheet.title, 'Fees')
+        self.assertEqual(worksheet.freeze_panes, 'A7')
+        self.assertEqual([cell.value for cell in worksheet[6]], ['No.', 'Student', 'Amount'])
+        self.assertEqual(worksheet['B7'].style, 'export-left')
+        self.assertEqual(worksheet['B8'].style, 'export-left-alt')
+        self.assertEqual(worksheet['C7'].alignment.horizontal, 'right')
+        self.assertEqual(worksheet['C8'].style, 'flagged-alt')
+        self.assertEqual(worksheet['B9'].style, 'export-left-total')
+        self.assertEqual(worksheet.column_dimensions['B'].width, 20)
+        self.assertEqual(worksheet.column_dimensions['C'].width, 8)
+
+    def test_response_streams_from_temporary_file(self):
+        writer = ExcelReportWriter('Report', 'Subtitle', ['No.'], sheet_title='Sheet', column_widths=[8])
+        writer.append([1])
+        response = writer.to_response('report.xlsx')
+        self.assertEqual(response['Content-Type'], EXCEL_CONTENT_TYPE)
+        self.assertIn('report.xlsx', response['Content-Disposition'])
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
@@ -1,31 +1,36 @@
-from django.core.signing import Signer, BadSignature
-from django.conf import settings
 from decimal import Decimal, InvalidOperation
 
-signer = Signer(sep=':', salt='id-encryption')
+from .id_codecs import get_id_codec
+
 
 def encode_id(n):
-    """Encodes an integer ID into an 'encrypted' string."""
+    """Encodes an integer ID into an 'encrypted' string using the configured ID codec."""
     if n is None:
         return None
-    return signer.sign(str(n))
+    try:
+        n = int(n)
+    except (TypeError, ValueError):
+        return get_id_codec('signed').encode(str(n))
+    return get_id_codec().encode(n)
 
 def decode_id(e):
     """Decodes an 'encrypted' string back into an integer ID.
-    Falls back to parsing as integer if not a signed string.
+    Accepts tokens from the current codec and legacy signed tokens, and
+    falls back to parsing as integer if it is neither.
     """
     if not e:
         return None
-    
+    if isinstance(e, int):
+        return e
+
+    decoded = get_id_codec().decode(str(e))
+    if decoded is not None:
+        return decoded
+    # Fallback to plain integer if it's already an ID or numeric string
     try:
-        # Try to unsign it first
-        return int(signer.unsign(str(e)))
-    except (BadSignature, ValueError, TypeError):
-        # Fallback to plain integer if it's already an ID or numeric string
-        try:
-            return int(e)
-        except (ValueError, TypeError):
-            return None
+        return int(e)
+    except (ValueError, TypeError):
+        return None
 
 
 def normalize_identifier_value(value, empty_value=''):
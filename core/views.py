@@ -1,3 +1,5 @@
+from datetime import datetime, time, timedelta
+
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.shortcuts import render, redirect, get_object_or_404
@@ -6,8 +8,10 @@ from django.contrib import messages
 from django.db.models import Q, Count
 from django.db import models
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.core.paginator import Paginator
 from .activity import set_audit_context
+from .pagination import CURSOR_PARAM, CursorPaginator
 from .models import District, Sector, Cell, Village, Province, School, Notification, Partner, SystemActivityLog
 from students.models import Student
 from .forms import SchoolForm, PartnerForm
@@ -289,6 +293,17 @@ def is_staff_user(user):
     return user.is_staff or user.is_superuser
 
 
+def _local_day_start(value):
+    """Midnight in the current timezone for a date or ISO date string, or None if unparseable."""
+    try:
+        day = parse_date(value) if isinstance(value, str) else value
+    except ValueError:
+        return None
+    if not day:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
 @login_required
 @user_passes_test(is_staff_user)
 def system_activity_logs(request):
@@ -312,16 +327,22 @@ def system_activity_logs(request):
         logs = logs.filter(event_type=event_filter)
     if user_filter:
         logs = logs.filter(user_id=user_filter)
-    if date_from:
-        logs = logs.filter(created_at__date__gte=date_from)
-    if date_to:
-        logs = logs.filter(created_at__date__lte=date_to)
-
-    paginator = Paginator(logs, 30)
-    page_obj = paginator.get_page(request.GET.get('page'))
-
-    today = timezone.localdate()
-    today_logs = SystemActivityLog.objects.filter(created_at__date=today)
+    # Compare created_at against day boundaries (not created_at__date) so the indexes apply.
+    start = _local_day_start(date_from)
+    if start:
+        logs = logs.filter(created_at__gte=start)
+    end = _local_day_start(date_to)
+    if end:
+        logs = logs.filter(created_at__lt=end + timedelta(days=1))
+
+    paginator = CursorPaginator(logs, 30)
+    page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
+
+    today_start = _local_day_start(timezone.localdate())
+    today_logs = SystemActivityLog.objects.filter(
+        created_at__gte=today_start,
+        created_at__lt=today_start + timedelta(days=1),
+    )
     context = {
         'logs': page_obj,
         'page_obj': page_obj,
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.snapshots import rebuild_dashboard_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Recompute every dashboard KPI snapshot from the student, fee, mark and Mutuelle tables.'
+
+    def handle(self, *args, **options):
+        bucket_count = rebuild_dashboard_snapshots()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {bucket_count} dashboard snapshot bucket(s).'))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0009_systemactivitylog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_key', models.CharField(editable=False, max_length=100, unique=True)),
+                ('term', models.CharField(blank=True, default='', max_length=1)),
+                ('school_level', models.CharField(blank=True, default='', max_length=20)),
+                ('students_total', models.PositiveIntegerField(default=0)),
+                ('students_male', models.PositiveIntegerField(default=0)),
+                ('students_female', models.PositiveIntegerField(default=0)),
+                ('students_enrolled', models.PositiveIntegerField(default=0)),
+                ('students_transferred', models.PositiveIntegerField(default=0)),
+                ('students_graduated', models.PositiveIntegerField(default=0)),
+                ('students_dropped_out', models.PositiveIntegerField(default=0)),
+                ('students_with_disability', models.PositiveIntegerField(default=0)),
+                ('students_sponsorship_active', models.PositiveIntegerField(default=0)),
+                ('students_sponsorship_pending', models.PositiveIntegerField(default=0)),
+                ('students_sponsorship_graduated', models.PositiveIntegerField(default=0)),
+                ('fees_total', models.PositiveIntegerField(default=0)),
+                ('fees_paid', models.PositiveIntegerField(default=0)),
+                ('fees_partial', models.PositiveIntegerField(default=0)),
+                ('fees_pending', models.PositiveIntegerField(default=0)),
+                ('fees_overdue', models.PositiveIntegerField(default=0)),
+                ('fees_required_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fees_paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fees_balance_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('insurance_total', models.PositiveIntegerField(default=0)),
+                ('insurance_covered', models.PositiveIntegerField(default=0)),
+                ('insurance_partially_covered', models.PositiveIntegerField(default=0)),
+                ('insurance_not_covered', models.PositiveIntegerField(default=0)),
+                ('insurance_required_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('insurance_paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('marks_count', models.PositiveIntegerField(default=0)),
+                ('marks_passed', models.PositiveIntegerField(default=0)),
+                ('marks_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshots', to='core.academicyear')),
+                ('district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshots', to='core.district')),
+                ('partner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshots', to='core.partner')),
+            ],
+            options={
+                'verbose_name': 'Dashboard snapshot',
+                'verbose_name_plural': 'Dashboard snapshots',
+                'ordering': ['bucket_key'],
+                'indexes': [models.Index(fields=['academic_year', 'term'], name='dashboard_d_academi_24c978_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import models
+
+
+class DashboardSnapshot(models.Model):
+    """Precomputed dashboard counters for one (year, term, district, partner, level) bucket.
+
+    Student counters live in buckets without an academic year or term, fee and mark
+    counters in term buckets, and Mutuelle counters in yearly buckets without a term.
+    """
+
+    bucket_key = models.CharField(max_length=100, unique=True, editable=False)
+    academic_year = models.ForeignKey(
+        'core.AcademicYear',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='dashboard_snapshots',
+    )
+    term = models.CharField(max_length=1, blank=True, default='')
+    district = models.ForeignKey(
+        'core.District',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='dashboard_snapshots',
+    )
+    partner = models.ForeignKey(
+        'core.Partner',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='dashboard_snapshots',
+    )
+    school_level = models.CharField(max_length=20, blank=True, default='')
+
+    # Students
+    students_total = models.PositiveIntegerField(default=0)
+    students_male = models.PositiveIntegerField(default=0)
+    students_female = models.PositiveIntegerField(default=0)
+    students_enrolled = models.PositiveIntegerField(default=0)
+    students_transferred = models.PositiveIntegerField(default=0)
+    students_graduated = models.PositiveIntegerField(default=0)
+    students_dropped_out = models.PositiveIntegerField(default=0)
+    students_with_disability = models.PositiveIntegerField(default=0)
+    students_sponsorship_active = models.PositiveIntegerField(default=0)
+    students_sponsorship_pending = models.PositiveIntegerField(default=0)
+    students_sponsorship_graduated = models.PositiveIntegerField(default=0)
+
+    # School fees
+    fees_total = models.PositiveIntegerField(default=0)
+    fees_paid = models.PositiveIntegerField(default=0)
+    fees_partial = models.PositiveIntegerField(default=0)
+    fees_pending = models.PositiveIntegerField(default=0)
+    fees_overdue = models.PositiveIntegerField(default=0)
+    fees_required_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fees_paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fees_balance_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Mutuelle de Santé
+    insurance_total = models.PositiveIntegerField(default=0)
+    insurance_covered = models.PositiveIntegerField(default=0)
+    insurance_partially_covered = models.PositiveIntegerField(default=0)
+    insurance_not_covered = models.PositiveIntegerField(default=0)
+    insurance_required_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    insurance_paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Academic performance
+    marks_count = models.PositiveIntegerField(default=0)
+    marks_passed = models.PositiveIntegerField(default=0)
+    marks_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['bucket_key']
+        indexes = [
+            models.Index(fields=['academic_year', 'term']),
+        ]
+        verbose_name = 'Dashboard snapshot'
+        verbose_name_plural = 'Dashboard snapshots'
+
+    def __str__(self):
+        return self.bucket_key
@@ -0,0 +1,190 @@
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from core.models import Partner, School
+from families.models import Family, FamilyStudent
+from insurance.models import FamilyInsurance
+from students.models import Student
+
+from .snapshots import summarize_marks_by_term, summarize_snapshots
+
+
+DASHBOARD_TERM_ORDER = ['Term 1', 'Term 2', 'Term 3']
+DASHBOARD_FEE_TERM_MAP = {'Term 1': '1', 'Term 2': '2', 'Term 3': '3'}
+RECENT_ACTIVITY_DAYS = 7
+
+
+@dataclass
+class DashboardStats:
+    """Typed snapshot of every KPI rendered on the dashboard home page."""
+
+    # Students
+    total_students: int = 0
+    boys: int = 0
+    girls: int = 0
+    active_students: int = 0
+    transferred_students: int = 0
+    graduated_students: int = 0
+    dropped_out: int = 0
+    students_with_disability: int = 0
+    students_without_disability: int = 0
+    students_with_partner: int = 0
+
+    # Families
+    total_families: int = 0
+    total_family_members: int = 0
+    total_family_contribution: int = 0
+    total_families_supported_mutuelle: int = 0
+
+    # Schools and partners
+    total_schools: int = 0
+    schools_with_students: int = 0
+    total_partners: int = 0
+
+    # Fees
+    total_fees: int = 0
+    paid_fees: int = 0
+    unpaid_fees: int = 0
+
+    # Insurance
+    covered_insurance: int = 0
+    not_covered_insurance: int = 0
+    families_with_insurance: int = 0
+    families_without_insurance: int = 0
+
+    # Recent activity
+    recent_students: int = 0
+    recent_families: int = 0
+    recent_schools: int = 0
+
+    # Performance
+    marks_terms: list = field(default_factory=lambda: list(DASHBOARD_TERM_ORDER))
+    avg_marks_by_term: list = field(default_factory=list)
+
+    @property
+    def paid_percentage(self):
+        return round((self.paid_fees / self.total_fees * 100) if self.total_fees > 0 else 0, 1)
+
+    @property
+    def unpaid_percentage(self):
+        return round((self.unpaid_fees / self.total_fees * 100) if self.total_fees > 0 else 0, 1)
+
+    @property
+    def total_insurance(self):
+        return self.covered_insurance + self.not_covered_insurance
+
+    @property
+    def has_recent_activity(self):
+        return self.recent_students + self.recent_families + self.recent_schools > 0
+
+    def as_context(self):
+        """Return the template context keys used by ``dashboard/index.html``."""
+        context = asdict(self)
+        context.update({
+            'paid_percentage': self.paid_percentage,
+            'unpaid_percentage': self.unpaid_percentage,
+            'total_insurance': self.total_insurance,
+            'has_recent_activity': self.has_recent_activity,
+        })
+        return context
+
+
+def _student_stats(since):
+    # Status, gender and partner counters come from the snapshot table; these
+    # three depend on joins or timestamps the snapshot buckets do not carry.
+    return Student.objects.aggregate(
+        students_without_family=Count('id', filter=Q(family_member__isnull=True)),
+        schools_with_students=Count('school_id', distinct=True),
+        recent_students=Count('id', filter=Q(created_at__gte=since)),
+    )
+
+
+def _family_stats(since):
+    covered_family_ids = FamilyInsurance.objects.filter(coverage_status='covered').values('family_id')
+    return Family.objects.aggregate(
+        total_families=Count('id'),
+        total_family_members=Sum('total_family_members'),
+        total_families_supported_mutuelle=Count(
+            'id',
+            filter=Q(mutuelle_support_status=Family.MUTUELLE_SUPPORT_STATUS_SUPPORTED),
+        ),
+        families_without_any_coverage=Count('id', filter=~Q(id__in=covered_family_ids)),
+        recent_families=Count('id', filter=Q(created_at__gte=since)),
+    )
+
+
+def _school_stats(since):
+    return School.objects.aggregate(
+        total_schools=Count('id'),
+        recent_schools=Count('id', filter=Q(created_at__gte=since)),
+    )
+
+
+def _insurance_stats(academic_year_id=None):
+    insurance = FamilyInsurance.objects.all()
+    if academic_year_id:
+        insurance = insurance.filter(insurance_year_id=academic_year_id)
+
+    covered_ids = insurance.filter(coverage_status='covered').values('family_id')
+    not_covered_ids = insurance.exclude(coverage_status='covered').values('family_id')
+    return FamilyStudent.objects.aggregate(
+        covered_insurance=Count('id', filter=Q(family_id__in=covered_ids)),
+        not_covered_insurance=Count('id', filter=Q(family_id__in=not_covered_ids)),
+    )
+
+
+def build_dashboard_stats(*, academic_year_id=None, term=None):
+    """Compute all dashboard KPIs from snapshot rows plus one conditional aggregate per model."""
+    since = timezone.now() - timedelta(days=RECENT_ACTIVITY_DAYS)
+
+    mapped_term = DASHBOARD_FEE_TERM_MAP.get(term) if term else None
+
+    snapshot = summarize_snapshots(academic_year=academic_year_id, term=mapped_term)
+    term_averages = summarize_marks_by_term(academic_year=academic_year_id, term=mapped_term)
+    student_stats = _student_stats(since)
+    family_stats = _family_stats(since)
+    school_stats = _school_stats(since)
+    insurance_stats = _insurance_stats(academic_year_id)
+
+    total_families = family_stats['total_families']
+    if academic_year_id:
+        # For a specific year, families without insurance are Total - Covered.
+        families_without_insurance = total_families - snapshot['insurance_covered']
+    else:
+        families_without_insurance = family_stats['families_without_any_coverage']
+
+    return DashboardStats(
+        total_students=snapshot['students_total'],
+        boys=snapshot['students_male'],
+        girls=snapshot['students_female'],
+        active_students=snapshot['students_enrolled'],
+        transferred_students=snapshot['students_transferred'],
+        graduated_students=snapshot['students_graduated'],
+        dropped_out=snapshot['students_dropped_out'],
+        students_with_disability=snapshot['students_with_disability'],
+        students_without_disability=snapshot['students_total'] - snapshot['students_with_disability'],
+        students_with_partner=snapshot['students_with_partner'],
+        total_families=total_families,
+        total_family_members=family_stats['total_family_members'] or 0,
+        # Each family contributes a flat 3000 in the dashboard estimate.
+        total_family_contribution=total_families * 3000,
+        total_families_supported_mutuelle=family_stats['total_families_supported_mutuelle'],
+        total_schools=school_stats['total_schools'],
+        schools_with_students=student_stats['schools_with_students'],
+        total_partners=Partner.objects.count(),
+        total_fees=snapshot['fees_total'],
+        paid_fees=snapshot['fees_paid'],
+        unpaid_fees=snapshot['fees_pending'] + snapshot['fees_overdue'],
+        covered_insurance=insurance_stats['covered_insurance'],
+        # Students without a family link have no insurance record and count as not covered.
+        not_covered_insurance=insurance_stats['not_covered_insurance'] + student_stats['students_without_family'],
+        families_with_insurance=snapshot['insurance_covered'],
+        families_without_insurance=families_without_insurance,
+        recent_students=student_stats['recent_students'],
+        recent_families=family_stats['recent_families'],
+        recent_schools=school_stats['recent_schools'],
+        avg_marks_by_term=[round(term_averages.get(term_name, 0), 1) for term_name in DASHBOARD_TERM_ORDER],
+    )
@@ -0,0 +1,115 @@
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from families.models import Family
+from finance.models import SchoolFee
+from insurance.models import FamilyInsurance
+from students.models import Student, StudentMark
+
+from .snapshots import (
+    fee_snapshot_keys,
+    insurance_snapshot_keys,
+    mark_snapshot_keys,
+    rebase_snapshot_keys,
+    schedule_snapshot_refresh,
+    student_snapshot_keys,
+)
+
+
+SNAPSHOT_KEY_READERS = {
+    Student: student_snapshot_keys,
+    SchoolFee: fee_snapshot_keys,
+    StudentMark: mark_snapshot_keys,
+    FamilyInsurance: insurance_snapshot_keys,
+}
+
+
+def _instance_keys(instance):
+    model = type(instance)
+    return SNAPSHOT_KEY_READERS[model](model.objects.filter(pk=instance.pk))
+
+
+def _student_period_keys(student_filter):
+    return (
+        fee_snapshot_keys(SchoolFee.objects.filter(**student_filter))
+        | mark_snapshot_keys(StudentMark.objects.filter(**student_filter))
+    )
+
+
+@receiver(pre_save, sender=Student)
+@receiver(pre_save, sender=SchoolFee)
+@receiver(pre_save, sender=StudentMark)
+@receiver(pre_save, sender=FamilyInsurance)
+def capture_previous_snapshot_keys(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._dashboard_snapshot_keys = _instance_keys(instance)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=SchoolFee)
+@receiver(post_save, sender=StudentMark)
+@receiver(post_save, sender=FamilyInsurance)
+def refresh_saved_snapshot_keys(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous_keys = getattr(instance, '_dashboard_snapshot_keys', set())
+    current_keys = _instance_keys(instance)
+    keys = previous_keys | current_keys
+
+    if sender is Student and previous_keys and previous_keys != current_keys:
+        # The student's district, partner or level moved, so their fees and marks move too.
+        period_keys = _student_period_keys({'student_id': instance.pk})
+        previous_key = next(iter(previous_keys))
+        keys |= period_keys | rebase_snapshot_keys(
+            period_keys,
+            district_id=previous_key.district_id,
+            partner_id=previous_key.partner_id,
+            school_level=previous_key.school_level,
+        )
+
+    schedule_snapshot_refresh(keys)
+
+
+@receiver(pre_delete, sender=Student)
+@receiver(pre_delete, sender=SchoolFee)
+@receiver(pre_delete, sender=StudentMark)
+@receiver(pre_delete, sender=FamilyInsurance)
+def refresh_deleted_snapshot_keys(sender, instance, **kwargs):
+    schedule_snapshot_refresh(_instance_keys(instance))
+
+
+def _family_keys(family_id):
+    students = Student.objects.filter(family_id=family_id)
+    return (
+        student_snapshot_keys(students)
+        | _student_period_keys({'student__family_id': family_id})
+        | insurance_snapshot_keys(FamilyInsurance.objects.filter(family_id=family_id))
+    )
+
+
+@receiver(pre_save, sender=Family)
+def capture_previous_family_district(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._dashboard_previous_district_id = (
+        Family.objects.filter(pk=instance.pk).values_list('district_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Family)
+def refresh_relocated_family_keys(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_dashboard_previous_district_id'):
+        return
+    previous_district_id = instance._dashboard_previous_district_id
+    if previous_district_id == instance.district_id:
+        return
+    keys = _family_keys(instance.pk)
+    schedule_snapshot_refresh(keys | rebase_snapshot_keys(keys, district_id=previous_district_id))
+
+
+@receiver(pre_delete, sender=Family)
+def refresh_deleted_family_keys(sender, instance, **kwargs):
+    # Students are detached (SET_NULL) without signals, so move them to the no-district bucket here.
+    keys = _family_keys(instance.pk)
+    schedule_snapshot_refresh(keys | rebase_snapshot_keys(keys, district_id=None))
@@ -0,0 +1,469 @@
+"""Maintain and read the precomputed ``DashboardSnapshot`` counters.
+
+Counters are grouped into buckets keyed by (academic_year, term, district,
+partner, school_level). District, partner and level always come from the
+student (family district, partner organisation, current school level), so a
+student, their fees and their marks land in matching buckets. Model signals
+schedule the affected buckets for recomputation once the surrounding
+transaction commits; ``rebuild_dashboard_snapshots`` recomputes everything.
+"""
+
+import threading
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+
+from finance.models import SchoolFee
+from insurance.models import FamilyInsurance
+from students.models import Student, StudentMark
+
+from .models import DashboardSnapshot
+
+
+SnapshotKey = namedtuple(
+    'SnapshotKey',
+    ['academic_year_id', 'term', 'district_id', 'partner_id', 'school_level'],
+)
+
+MARK_TERM_KEYS = {'Term 1': '1', 'Term 2': '2', 'Term 3': '3'}
+MARK_TERM_VALUES = {value: label for label, value in MARK_TERM_KEYS.items()}
+PASS_MARK = 50
+
+STUDENT_COUNTER_FIELDS = [
+    'students_total',
+    'students_male',
+    'students_female',
+    'students_enrolled',
+    'students_transferred',
+    'students_graduated',
+    'students_dropped_out',
+    'students_with_disability',
+    'students_sponsorship_active',
+    'students_sponsorship_pending',
+    'students_sponsorship_graduated',
+]
+FEE_COUNTER_FIELDS = [
+    'fees_total',
+    'fees_paid',
+    'fees_partial',
+    'fees_pending',
+    'fees_overdue',
+    'fees_required_amount',
+    'fees_paid_amount',
+    'fees_balance_amount',
+]
+INSURANCE_COUNTER_FIELDS = [
+    'insurance_total',
+    'insurance_covered',
+    'insurance_partially_covered',
+    'insurance_not_covered',
+    'insurance_required_amount',
+    'insurance_paid_amount',
+]
+MARK_COUNTER_FIELDS = ['marks_count', 'marks_passed', 'marks_sum']
+COUNTER_FIELDS = STUDENT_COUNTER_FIELDS + FEE_COUNTER_FIELDS + INSURANCE_COUNTER_FIELDS + MARK_COUNTER_FIELDS
+
+# Columns rewritten when a refreshed bucket already has a row.
+SNAPSHOT_UPSERT_FIELDS = [
+    'academic_year', 'term', 'district', 'partner', 'school_level', *COUNTER_FIELDS, 'updated_at',
+]
+
+_pending_refresh = threading.local()
+
+
+def build_bucket_key(key):
+    """Return the unique text key stored on ``DashboardSnapshot.bucket_key``."""
+    return ':'.join('-' if part in (None, '') else str(part) for part in key)
+
+
+def _student_counters():
+    return {
+        'students_total': Count('id'),
+        'students_male': Count('id', filter=Q(gender='M')),
+        'students_female': Count('id', filter=Q(gender='F')),
+        'students_enrolled': Count('id', filter=Q(enrollment_status='enrolled')),
+        'students_transferred': Count('id', filter=Q(enrollment_status='transferred')),
+        'students_graduated': Count('id', filter=Q(enrollment_status='graduated')),
+        'students_dropped_out': Count('id', filter=Q(enrollment_status='dropped_out')),
+        'students_with_disability': Count('id', filter=Q(has_disability=True)),
+        'students_sponsorship_active': Count('id', filter=Q(sponsorship_status='active')),
+        'students_sponsorship_pending': Count('id', filter=Q(sponsorship_status='pending')),
+        'students_sponsorship_graduated': Count('id', filter=Q(sponsorship_status='graduated')),
+    }
+
+
+def _fee_counters():
+    return {
+        'fees_total': Count('id'),
+        'fees_paid': Count('id', filter=Q(payment_status='paid')),
+        'fees_partial': Count('id', filter=Q(payment_status='partial')),
+        'fees_pending': Count('id', filter=Q(payment_status='pending')),
+        'fees_overdue': Count('id', filter=Q(payment_status='overdue')),
+        'fees_required_amount': Sum('total_fees'),
+        'fees_paid_amount': Sum('amount_paid'),
+        'fees_balance_amount': Sum('balance'),
+    }
+
+
+def _insurance_counters():
+    return {
+        'insurance_total': Count('id'),
+        'insurance_covered': Count('id', filter=Q(coverage_status='covered')),
+        'insurance_partially_covered': Count('id', filter=Q(coverage_status='partially_covered')),
+        'insurance_not_covered': Count('id', filter=Q(coverage_status='not_covered')),
+        'insurance_required_amount': Sum('required_amount'),
+        'insurance_paid_amount': Sum('amount_paid'),
+    }
+
+
+def _mark_counters():
+    return {
+        'marks_count': Count('id'),
+        'marks_passed': Count('id', filter=Q(marks__gte=PASS_MARK)),
+        'marks_sum': Sum('marks'),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Key readers: map a queryset of source rows onto the buckets they feed.
+# ---------------------------------------------------------------------------
+
+def student_snapshot_keys(queryset):
+    rows = queryset.order_by().values_list('family__district_id', 'partner_id', 'school_level').distinct()
+    return {SnapshotKey(None, '', district_id, partner_id, level or '') for district_id, partner_id, level in rows}
+
+
+def fee_snapshot_keys(queryset):
+    rows = queryset.order_by().values_list(
+        'academic_year_id',
+        'term',
+        'student__family__district_id',
+        'student__partner_id',
+        'student__school_level',
+    ).distinct()
+    return {SnapshotKey(year_id, term, district_id, partner_id, level or '') for year_id, term, district_id, partner_id, level in rows}
+
+
+def mark_snapshot_keys(queryset):
+    rows = queryset.order_by().values_list(
+        'academic_year_id',
+        'term',
+        'student__family__district_id',
+        'student__partner_id',
+        'student__school_level',
+    ).distinct()
+    return {
+        SnapshotKey(year_id, MARK_TERM_KEYS[term], district_id, partner_id, level or '')
+        for year_id, term, district_id, partner_id, level in rows
+        if term in MARK_TERM_KEYS
+    }
+
+
+def insurance_snapshot_keys(queryset):
+    rows = queryset.order_by().values_list('insurance_year_id', 'family__district_id').distinct()
+    return {SnapshotKey(year_id, '', district_id, None, '') for year_id, district_id in rows}
+
+
+def rebase_snapshot_keys(keys, **dimensions):
+    """Return ``keys`` with some dimensions replaced, e.g. a student's previous district."""
+    return {key._replace(**dimensions) for key in keys}
+
+
+# ---------------------------------------------------------------------------
+# Counter computation
+# ---------------------------------------------------------------------------
+
+def _student_key_filter(key):
+    return Q(
+        family__district_id=key.district_id,
+        partner_id=key.partner_id,
+        school_level=key.school_level,
+    )
+
+
+def _period_key_filter(key, term):
+    return Q(
+        academic_year_id=key.academic_year_id,
+        term=term,
+        student__family__district_id=key.district_id,
+        student__partner_id=key.partner_id,
+        student__school_level=key.school_level,
+    )
+
+
+def _insurance_key_filter(key):
+    return Q(insurance_year_id=key.academic_year_id, family__district_id=key.district_id)
+
+
+def _is_student_key(key):
+    return key.academic_year_id is None and not key.term
+
+
+def _is_insurance_key(key):
+    return not key.term and key.partner_id is None and not key.school_level
+
+
+def _combine_filters(filters):
+    combined = None
+    for item in filters:
+        combined = item if combined is None else combined | item
+    return combined
+
+
+def _grouped_rows(queryset, filter_q, group_by, counters):
+    if filter_q is not None:
+        queryset = queryset.filter(filter_q)
+    return queryset.order_by().values(**group_by).annotate(**counters)
+
+
+def collect_snapshot_counters(keys=None):
+    """Return ``{SnapshotKey: counters}`` for the given buckets, or for every bucket."""
+    keys = set(keys) if keys is not None else None
+    student_filter = fee_filter = mark_filter = insurance_filter = None
+    if keys is not None:
+        student_filter = _combine_filters(_student_key_filter(key) for key in keys if _is_student_key(key))
+        fee_filter = _combine_filters(_period_key_filter(key, key.term) for key in keys if key.term)
+        mark_filter = _combine_filters(
+            _period_key_filter(key, MARK_TERM_VALUES[key.term]) for key in keys if key.term in MARK_TERM_VALUES
+        )
+        insurance_filter = _combine_filters(_insurance_key_filter(key) for key in keys if _is_insurance_key(key))
+
+    student_group = {
+        'snapshot_district': F('family__district_id'),
+        'snapshot_partner': F('partner_id'),
+        'snapshot_level': F('school_level'),
+    }
+    period_group = {
+        'snapshot_year': F('academic_year_id'),
+        'snapshot_term': F('term'),
+        'snapshot_district': F('student__family__district_id'),
+        'snapshot_partner': F('student__partner_id'),
+        'snapshot_level': F('student__school_level'),
+    }
+    insurance_group = {
+        'snapshot_year': F('insurance_year_id'),
+        'snapshot_district': F('family__district_id'),
+    }
+
+    counters = {}
+
+    def merge(key, row, fields):
+        if keys is not None and key not in keys:
+            return
+        entry = counters.setdefault(key, {})
+        for field_name in fields:
+            entry[field_name] = row[field_name] or 0
+
+    if keys is None or student_filter is not None:
+        for row in _grouped_rows(Student.objects.all(), student_filter, student_group, _student_counters()):
+            key = SnapshotKey(None, '', row['snapshot_district'], row['snapshot_partner'], row['snapshot_level'] or '')
+            merge(key, row, STUDENT_COUNTER_FIELDS)
+
+    if keys is None or fee_filter is not None:
+        for row in _grouped_rows(SchoolFee.objects.all(), fee_filter, period_group, _fee_counters()):
+            key = SnapshotKey(
+                row['snapshot_year'],
+                row['snapshot_term'],
+                row['snapshot_district'],
+                row['snapshot_partner'],
+                row['snapshot_level'] or '',
+            )
+            merge(key, row, FEE_COUNTER_FIELDS)
+
+    if keys is None or mark_filter is not None:
+        for row in _grouped_rows(StudentMark.objects.all(), mark_filter, period_group, _mark_counters()):
+            term = MARK_TERM_KEYS.get(row['snapshot_term'])
+            if not term:
+                continue
+            key = SnapshotKey(
+                row['snapshot_year'],
+                term,
+                row['snapshot_district'],
+                row['snapshot_partner'],
+                row['snapshot_level'] or '',
+            )
+            merge(key, row, MARK_COUNTER_FIELDS)
+
+    if keys is None or insurance_filter is not None:
+        for row in _grouped_rows(FamilyInsurance.objects.all(), insurance_filter, insurance_group, _insurance_counters()):
+            key = SnapshotKey(row['snapshot_year'], '', row['snapshot_district'], None, '')
+            merge(key, row, INSURANCE_COUNTER_FIELDS)
+
+    return counters
+
+
+def _snapshot_values(key, values):
+    data = {field_name: 0 for field_name in COUNTER_FIELDS}
+    data.update(values)
+    data.update({
+        'academic_year_id': key.academic_year_id,
+        'term': key.term,
+        'district_id': key.district_id,
+        'partner_id': key.partner_id,
+        'school_level': key.school_level,
+    })
+    return data
+
+
+def refresh_snapshot_buckets(keys):
+    """Recompute the given buckets from source tables and upsert or drop their rows."""
+    keys = {SnapshotKey(*key) for key in keys}
+    if not keys:
+        return 0
+
+    counters = collect_snapshot_counters(keys)
+    with transaction.atomic():
+        empty_keys = [build_bucket_key(key) for key in keys if not any(counters.get(key, {}).values())]
+        if empty_keys:
+            DashboardSnapshot.objects.filter(bucket_key__in=empty_keys).delete()
+        # One upsert: two commits refreshing the same new bucket at once cannot
+        # collide on the unique bucket_key the way get-then-insert can.
+        DashboardSnapshot.objects.bulk_create(
+            [
+                DashboardSnapshot(bucket_key=build_bucket_key(key), **_snapshot_values(key, values))
+                for key, values in counters.items()
+                if any(values.values())
+            ],
+            update_conflicts=True,
+            unique_fields=['bucket_key'],
+            update_fields=SNAPSHOT_UPSERT_FIELDS,
+        )
+    return len(keys)
+
+
+@transaction.atomic
+def rebuild_dashboard_snapshots():
+    """Replace every snapshot row with counters recomputed from the source tables."""
+    counters = collect_snapshot_counters()
+    DashboardSnapshot.objects.all().delete()
+    DashboardSnapshot.objects.bulk_create(
+        [
+            DashboardSnapshot(bucket_key=build_bucket_key(key), **_snapshot_values(key, values))
+            for key, values in counters.items()
+            if any(values.values())
+        ],
+        batch_size=500,
+    )
+    return DashboardSnapshot.objects.count()
+
+
+def _flush_pending_snapshot_refresh():
+    keys = getattr(_pending_refresh, 'keys', None)
+    _pending_refresh.keys = set()
+    if keys:
+        refresh_snapshot_buckets(keys)
+
+
+def schedule_snapshot_refresh(keys):
+    """Queue buckets for recomputation once the current transaction commits."""
+    keys = set(keys)
+    if not keys:
+        return
+    pending = getattr(_pending_refresh, 'keys', None)
+    if pending is None:
+        pending = _pending_refresh.keys = set()
+    pending.update(keys)
+    transaction.on_commit(_flush_pending_snapshot_refresh)
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+def _dimension_filter(*, district=None, partner=None, school_level=None):
+    filter_q = Q()
+    if district:
+        filter_q &= Q(district_id=district)
+    if partner:
+        filter_q &= Q(partner_id=partner)
+    if school_level:
+        filter_q &= Q(school_level=school_level)
+    return filter_q
+
+
+def _period_filter(*, academic_year=None, term=None):
+    filter_q = ~Q(term='')
+    if academic_year:
+        filter_q &= Q(academic_year_id=academic_year)
+    if term:
+        filter_q &= Q(term=term)
+    return filter_q
+
+
+def summarize_snapshots(*, academic_year=None, term=None, district=None, partner=None, school_level=None):
+    """Sum every counter for a filter scope in a single query over snapshot rows.
+
+    Student counters ignore the year and term filters, and Mutuelle counters
+    ignore partner and school level, mirroring the source tables.
+    """
+    dimension_q = _dimension_filter(district=district, partner=partner, school_level=school_level)
+    student_q = Q(academic_year__isnull=True, term='') & dimension_q
+    period_q = _period_filter(academic_year=academic_year, term=term) & dimension_q
+    insurance_q = Q(term='')
+    if academic_year:
+        insurance_q &= Q(academic_year_id=academic_year)
+    if district:
+        insurance_q &= Q(district_id=district)
+
+    aggregates = {}
+    for field_names, filter_q in (
+        (STUDENT_COUNTER_FIELDS, student_q),
+        (FEE_COUNTER_FIELDS + MARK_COUNTER_FIELDS, period_q),
+        (INSURANCE_COUNTER_FIELDS, insurance_q),
+    ):
+        for field_name in field_names:
+            aggregates[f'sum_{field_name}'] = Sum(field_name, filter=filter_q)
+    aggregates['sum_students_with_partner'] = Sum('students_total', filter=student_q & Q(partner__isnull=False))
+
+    totals = {}
+    for alias, value in DashboardSnapshot.objects.aggregate(**aggregates).items():
+        field_name = alias[len('sum_'):]
+        totals[field_name] = value or (Decimal('0') if field_name.endswith(('_amount', '_sum')) else 0)
+    totals['marks_average'] = (
+        float(totals['marks_sum']) / totals['marks_count'] if totals['marks_count'] else 0
+    )
+    totals['marks_pass_rate'] = (
+        totals['marks_passed'] / totals['marks_count'] * 100 if totals['marks_count'] else 0
+    )
+    return totals
+
+
+def summarize_snapshots_by(group_field, *, district=None, partner=None, school_level=None):
+    """Return student counters grouped by a bucket dimension (``school_level`` or ``partner__name``)."""
+    rows = (
+        DashboardSnapshot.objects.filter(
+            Q(academic_year__isnull=True, term='')
+            & _dimension_filter(district=district, partner=partner, school_level=school_level)
+        )
+        .order_by()
+        .values(group_field)
+        .annotate(**{f'sum_{field_name}': Sum(field_name) for field_name in STUDENT_COUNTER_FIELDS})
+        .filter(sum_students_total__gt=0)
+    )
+    return [
+        {
+            group_field: row[group_field],
+            **{field_name: row[f'sum_{field_name}'] for field_name in STUDENT_COUNTER_FIELDS},
+        }
+        for row in rows
+    ]
+
+
+def summarize_marks_by_term(*, academic_year=None, term=None, district=None, partner=None, school_level=None):
+    """Return ``{term: average}`` for mark buckets, using the ``Term N`` labels."""
+    rows = (
+        DashboardSnapshot.objects.filter(
+            _period_filter(academic_year=academic_year, term=term)
+            & _dimension_filter(district=district, partner=partner, school_level=school_level)
+        )
+        .order_by()
+        .values('term')
+        .annotate(total=Sum('marks_sum', output_field=DecimalField()), count=Sum('marks_count'))
+    )
+    return {
+        MARK_TERM_VALUES[row['term']]: float(row['total'] or 0) / row['count']
+        for row in rows
+        if row['count'] and row['term'] in MARK_TERM_VALUES
+    }
@@ -0,0 +1,210 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import AcademicYear, District, Partner, Province, School
+from dashboard.models import DashboardSnapshot
+from dashboard.snapshots import (
+    COUNTER_FIELDS,
+    SnapshotKey,
+    rebuild_dashboard_snapshots,
+    refresh_snapshot_buckets,
+    summarize_snapshots,
+)
+from families.models import Family, FamilyStudent
+from finance.models import SchoolFee
+from insurance.models import FamilyInsurance
+from students.models import Student, StudentMark
+
+
+DASHBOARD_QUERY_BUDGET = 20
+
+
+class DashboardDataMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(username='viewer', password='password123')
+        self.client.force_login(self.user)
+
+        self.province = Province.objects.create(name='Kigali')
+        self.district = District.objects.create(name='Gasabo', province=self.province)
+        self.year = AcademicYear.objects.create(name='2025-2026', is_active=True)
+        self.partner = Partner.objects.create(name='Partner A', district=self.district)
+        self.school = School.objects.create(
+            name='Alpha Primary',
+            district=self.district,
+            fee_amount=Decimal('1000.00'),
+        )
+
+    def _create_family(self, index, covered):
+        family = Family.objects.create(
+            head_of_family=f'Parent {index}',
+            national_id=f'11999999999{index:05d}',
+            phone_number='0780000000',
+            province=self.province,
+            district=self.district,
+            total_family_members=3,
+        )
+        FamilyInsurance.objects.create(
+            family=family,
+            insurance_year=self.year,
+            required_amount=Decimal('9000.00'),
+            amount_paid=Decimal('9000.00') if covered else Decimal('0'),
+        )
+        return family
+
+    def _create_student(self, index, *, family=None, gender='F', status='enrolled', paid=False):
+        student = Student.objects.create(
+            family=family,
+            partner=self.partner if index % 2 else None,
+            first_name=f'Student{index}',
+            last_name='Test',
+            gender=gender,
+            date_of_birth='2012-01-01',
+            school=self.school,
+            school_name=self.school.name,
+            class_level='Primary 4',
+            enrollment_status=status,
+            has_disability=index % 3 == 0,
+        )
+        if family:
+            FamilyStudent.objects.create(family=family, student=student)
+        SchoolFee.objects.create(
+            student=student,
+            academic_year=self.year,
+            term='1',
+            total_fees=Decimal('1000.00'),
+            amount_paid=Decimal('1000.00') if paid else Decimal('0'),
+        )
+        StudentMark.objects.create(
+            student=student,
+            subject='Maths',
+            term='Term 1',
+            academic_year=self.year,
+            marks=Decimal('70.00'),
+        )
+        return student
+
+    def _seed(self, count):
+        for index in range(count):
+            family = self._create_family(index, covered=index % 2 == 0) if index % 4 else None
+            self._create_student(
+                index,
+                family=family,
+                gender='M' if index % 2 else 'F',
+                status='graduated' if index == 0 else 'enrolled',
+                paid=index % 2 == 0,
+            )
+
+    def _seed_more(self, count):
+        for index in range(100, 100 + count):
+            family = self._create_family(index, covered=index % 2 == 0)
+            self._create_student(index, family=family, gender='M' if index % 2 else 'F')
+
+
+class DashboardIndexTests(DashboardDataMixin, TestCase):
+    def test_dashboard_reports_expected_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._seed(8)
+
+        response = self.client.get(reverse('dashboard:index'))
+
+        self.assertEqual(response.status_code, 200)
+        context = response.context
+        self.assertEqual(context['total_students'], 8)
+        self.assertEqual(context['boys'], 4)
+        self.assertEqual(context['girls'], 4)
+        self.assertEqual(context['active_students'], 7)
+        self.assertEqual(context['graduated_students'], 1)
+        self.assertEqual(context['students_with_disability'], 3)
+        self.assertEqual(context['students_with_partner'], 4)
+        self.assertEqual(context['total_families'], 6)
+        self.assertEqual(context['total_family_members'], 18)
+        self.assertEqual(context['schools_with_students'], 1)
+        self.assertEqual(context['total_fees'], 8)
+        self.assertEqual(context['paid_fees'], 4)
+        self.assertEqual(context['unpaid_fees'], 4)
+        self.assertEqual(context['families_with_insurance'], 2)
+        self.assertEqual(context['families_without_insurance'], 4)
+        self.assertEqual(context['covered_insurance'], 2)
+        # Four students in uncovered families plus two without a family link.
+        self.assertEqual(context['not_covered_insurance'], 6)
+        self.assertEqual(context['avg_marks_by_term'], [70.0, 0, 0])
+        self.assertTrue(context['has_recent_activity'])
+
+    def test_dashboard_query_count_does_not_grow_with_data(self):
+        self._seed(3)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('dashboard:index'), {'academic_year': self.year.id, 'term': 'Term 1'})
+
+        self._seed_more(12)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse('dashboard:index'), {'academic_year': self.year.id, 'term': 'Term 1'})
+
+        self.assertLessEqual(len(large.captured_queries), DASHBOARD_QUERY_BUDGET)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class DashboardSnapshotTests(DashboardDataMixin, TestCase):
+    def _snapshot_rows(self):
+        return {
+            row['bucket_key']: {field_name: row[field_name] for field_name in COUNTER_FIELDS}
+            for row in DashboardSnapshot.objects.values('bucket_key', *COUNTER_FIELDS)
+        }
+
+    def test_signals_keep_snapshots_in_sync_with_full_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._seed(6)
+        with self.captureOnCommitCallbacks(execute=True):
+            student = Student.objects.filter(partner__isnull=True).first()
+            student.partner = self.partner
+            student.gender = 'M'
+            student.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            fee = SchoolFee.objects.filter(payment_status='pending').first()
+            fee.amount_paid = Decimal('400.00')
+            fee.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.filter(enrollment_status='graduated').first().delete()
+
+        incremental = self._snapshot_rows()
+        rebuild_dashboard_snapshots()
+        self.assertEqual(incremental, self._snapshot_rows())
+
+        totals = summarize_snapshots(academic_year=self.year.id, term='1')
+        self.assertEqual(totals['students_total'], 5)
+        self.assertEqual(totals['fees_total'], 5)
+        self.assertEqual(totals['fees_partial'], 1)
+        self.assertEqual(totals['marks_count'], 5)
+
+    def test_refresh_upserts_rows_another_commit_inserted_first(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._seed(4)
+        expected = self._snapshot_rows()
+        keys = [
+            SnapshotKey(row.academic_year_id, row.term, row.district_id, row.partner_id, row.school_level)
+            for row in DashboardSnapshot.objects.all()
+        ]
+        # Another commit inserted the same buckets with the values it saw.
+        DashboardSnapshot.objects.update(**{field_name: 0 for field_name in COUNTER_FIELDS})
+
+        with CaptureQueriesContext(connection) as queries:
+            refresh_snapshot_buckets(keys)
+        self.assertEqual(self._snapshot_rows(), expected)
+        # No read-then-insert on the snapshot table that a concurrent insert could break.
+        snapshot_reads = [
+            query for query in queries
+            if query['sql'].startswith('SELECT') and 'dashboard_dashboardsnapshot' in query['sql']
+        ]
+        self.assertEqual(snapshot_reads, [])
+
+    def test_snapshot_reads_do_not_touch_source_tables(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._seed(4)
+        with CaptureQueriesContext(connection) as queries:
+            summarize_snapshots(academic_year=self.year.id, district=self.district.id)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertIn('dashboard_dashboardsnapshot', queries.captured_queries[0]['sql'])
@@ -1,13 +1,8 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from students.models import Student, StudentMark
-from finance.models import SchoolFee
-from insurance.models import FamilyInsurance
-from families.models import Family, FamilyStudent
-from core.models import School, AcademicYear, Partner
-from django.db.models import Count, Q, Sum, Avg
-from django.utils import timezone
-from datetime import timedelta
+from core.models import AcademicYear
+
+from .services import build_dashboard_stats
 
 
 @login_required
@@ -19,169 +14,15 @@ def index(request):
     selected_term = request.GET.get('term')
     
     academic_years = AcademicYear.objects.all().order_by('-name')
-    
-    # ===== STUDENT STATISTICS =====
-    total_students = Student.objects.count()
-    boys = Student.objects.filter(gender='M').count()
-    girls = Student.objects.filter(gender='F').count()
-    
-    # Enrollment status distribution
-    active_students = Student.objects.filter(enrollment_status='enrolled').count()
-    transferred_students = Student.objects.filter(enrollment_status='transferred').count()
-    graduated_students = Student.objects.filter(enrollment_status='graduated').count()
-    dropped_out = Student.objects.filter(enrollment_status='dropped_out').count()
-    
-    # Disability statistics
-    students_with_disability = Student.objects.filter(has_disability=True).count()
-    students_without_disability = Student.objects.filter(has_disability=False).count()
-
-    
-    # ===== FAMILY STATISTICS =====
-    total_families = Family.objects.count()
-    total_family_members = Family.objects.aggregate(Sum('total_family_members'))['total_family_members__sum'] or 0
-    total_family_contribution = Family.objects.count() * 3000  # Each family contributes member_count * 3000
-    total_families_supported_mutuelle = Family.objects.filter(
-        mutuelle_support_status=Family.MUTUELLE_SUPPORT_STATUS_SUPPORTED
-    ).count()
-    
-    # ===== SCHOOL STATISTICS =====
-    total_schools = School.objects.count()
-
-    # ===== PARTNER STATISTICS =====
-    total_partners = Partner.objects.count()
-    students_with_partner = Student.objects.filter(partner__isnull=False).count()
-    
-    # ===== FEES STATISTICS =====
-    fees_queryset = SchoolFee.objects.all()
-    
-    if selected_year_id:
-        fees_queryset = fees_queryset.filter(academic_year_id=selected_year_id)
-    
-    if selected_term:
-        # Map "Term 1" -> "1", etc.
-        term_map = {'Term 1': '1', 'Term 2': '2', 'Term 3': '3'}
-        mapped_term = term_map.get(selected_term)
-        if mapped_term:
-            fees_queryset = fees_queryset.filter(term=mapped_term)
-
-    total_fees = fees_queryset.count()
-    paid_fees = fees_queryset.filter(payment_status='paid').count()
-    unpaid_fees = fees_queryset.filter(payment_status__in=['pending', 'overdue']).count()
-    
-    # ===== INSURANCE STATISTICS =====
-    insurance_queryset = FamilyInsurance.objects.all()
-    
-    if selected_year_id:
-        insurance_queryset = insurance_queryset.filter(insurance_year_id=selected_year_id)
 
-    # Students covered = students whose family has insurance status = 'covered'
-    families_covered = insurance_queryset.filter(coverage_status='covered').values_list('family_id', flat=True)
-    students_covered = FamilyStudent.objects.filter(family_id__in=families_covered).count()
-    
-    families_not_covered = insurance_queryset.exclude(coverage_status='covered').values_list('family_id', flat=True)
-    students_not_covered = FamilyStudent.objects.filter(family_id__in=families_not_covered).count()
-    
-    # If student has no family insurance record, count as not covered
-    students_without_family = Student.objects.filter(family_member__isnull=True).count()
-    students_not_covered += students_without_family
-    
-    # Family insurance statistics
-    families_with_insurance = insurance_queryset.filter(coverage_status='covered').count()
-    
-    if selected_year_id:
-        # If a specific year is selected, families without insurance are Total - Covered
-        families_without_insurance = total_families - families_with_insurance
-    else:
-        families_without_insurance = Family.objects.exclude(
-            insurance_records__coverage_status='covered'
-        ).distinct().count()
-    
-    # ===== RECENT DATA =====
-    # Recent students (last 7 days)
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    recent_students = Student.objects.filter(created_at__gte=seven_days_ago).count()
-    recent_families = Family.objects.filter(created_at__gte=seven_days_ago).count()
-    recent_schools = School.objects.filter(created_at__gte=seven_days_ago).count()
-    
-    # Total schools with students
-    schools_with_students = School.objects.filter(students__isnull=False).distinct().count()
-    
-    # ===== PERFORMANCE STATISTICS =====
-    marks_queryset = StudentMark.objects.all()
-    
-    if selected_year_id:
-        marks_queryset = marks_queryset.filter(academic_year_id=selected_year_id)
-        
-    if selected_term:
-        marks_queryset = marks_queryset.filter(term=selected_term)
-
-    marks_by_term = (
-        marks_queryset.values('term')
-        .annotate(avg_marks=Avg('marks'))
-        .order_by('term')
-    )
-    term_order = ['Term 1', 'Term 2', 'Term 3']
-    term_averages = {item['term']: float(item['avg_marks'] or 0) for item in marks_by_term}
-    avg_marks_by_term = [round(term_averages.get(term, 0), 1) for term in term_order]
+    stats = build_dashboard_stats(academic_year_id=selected_year_id, term=selected_term)
 
-    # ===== FINANCIAL SUMMARY =====
-    # Calculate total school fees from all schools
-    total_school_fees_per_student = School.objects.aggregate(Count('fee_amount'))
-    
     context = {
         # Filters
         'academic_years': academic_years,
         'selected_year_id': int(selected_year_id) if selected_year_id else None,
         'selected_term': selected_term,
-
-        # Student Stats
-        'total_students': total_students,
-        'boys': boys,
-        'girls': girls,
-        'active_students': active_students,
-        'transferred_students': transferred_students,
-        'graduated_students': graduated_students,
-        'dropped_out': dropped_out,
-        'students_with_disability': students_with_disability,
-        'students_without_disability': students_without_disability,
-        
-        # Family Stats
-        'total_families': total_families,
-        'total_family_members': total_family_members,
-        'total_family_contribution': total_family_contribution,
-        'total_families_supported_mutuelle': total_families_supported_mutuelle,
-        
-        # School Stats
-        'total_schools': total_schools,
-        'schools_with_students': schools_with_students,
-        
-        # Partner Stats
-        'total_partners': total_partners,
-        'students_with_partner': students_with_partner,
-        
-        # Fees Stats
-        'total_fees': total_fees,
-        'paid_fees': paid_fees,
-        'unpaid_fees': unpaid_fees,
-        'unpaid_percentage': round((unpaid_fees / total_fees * 100) if total_fees > 0 else 0, 1),
-        'paid_percentage': round((paid_fees / total_fees * 100) if total_fees > 0 else 0, 1),
-        
-        # Insurance Stats
-        'total_insurance': students_covered + students_not_covered,
-        'covered_insurance': students_covered,
-        'not_covered_insurance': students_not_covered,
-        'families_with_insurance': families_with_insurance,
-        'families_without_insurance': families_without_insurance,
-        
-        # Recent Activity
-        'recent_students': recent_students,
-        'recent_families': recent_families,
-        'recent_schools': recent_schools,
-        'has_recent_activity': recent_students + recent_families + recent_schools > 0,
-
-        # Performance
-        'marks_terms': term_order,
-        'avg_marks_by_term': avg_marks_by_term,
+        **stats.as_context(),
     }
     
     return render(request, 'dashboard/index.html', context)
@@ -48,6 +48,11 @@ echo ""
 echo "Setting up user groups and permissions..."
 python manage.py setup_groups || echo "  ⚠ Groups setup skipped (may already exist)"
 
+# Rebuild precomputed dashboard counters
+echo ""
+echo "Rebuilding dashboard snapshots..."
+python manage.py rebuild_dashboard_snapshots || echo "  ⚠ Dashboard snapshot rebuild skipped"
+
 # Collect static files
 echo ""
 echo "Collecting static files..."
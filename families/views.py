@@ -1,10 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.db.models import Q, Count, Sum
 from .models import Family, FamilyStudent, MutuelleContributionSettings
 from core.models import District, Province
+from core.pagination import CURSOR_PARAM, CursorPaginator
 from .forms import FamilyForm, MutuelleContributionSettingsForm
 from students.models import Student
 
@@ -159,9 +159,8 @@ def family_list(request):
     )
     
     # Pagination
-    paginator = Paginator(families.order_by('-created_at'), 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(families, 20, count=summary['total_families'] or 0)
+    page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
     
     context = {
         'families': page_obj,
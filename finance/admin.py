@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SchoolFee, SchoolFeePayment, SchoolFeeDisbursement
+from .models import FeeAgingBucket, PayoutBatch, SchoolFee, SchoolFeePayment, SchoolFeeDisbursement
 
 
 @admin.register(SchoolFee)
@@ -19,7 +19,20 @@ class SchoolFeePaymentAdmin(admin.ModelAdmin):
 
 @admin.register(SchoolFeeDisbursement)
 class SchoolFeeDisbursementAdmin(admin.ModelAdmin):
-    list_display = ['student_name', 'school_name', 'amount_to_pay', 'status', 'requested_at', 'paid_at']
+    list_display = ['student_name', 'school_name', 'amount_to_pay', 'status', 'payout_batch', 'requested_at', 'paid_at']
     list_filter = ['status', 'school_fee__academic_year']
     search_fields = ['student_name', 'school_name', 'bank_account_name', 'bank_account_number', 'payment_reference']
 
+
+
+@admin.register(PayoutBatch)
+class PayoutBatchAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'file_format', 'status', 'record_count', 'total_amount', 'created_by', 'created_at']
+    list_filter = ['status', 'file_format']
+    readonly_fields = ['checksum', 'record_count', 'total_amount', 'filters', 'created_at', 'completed_at']
+
+
+@admin.register(FeeAgingBucket)
+class FeeAgingBucketAdmin(admin.ModelAdmin):
+    list_display = ['snapshot_date', 'academic_year', 'term', 'bucket', 'fee_count', 'outstanding_amount']
+    list_filter = ['snapshot_date', 'academic_year', 'term', 'bucket']
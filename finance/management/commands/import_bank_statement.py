@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AcademicYear
+from finance.models import SchoolFee
+from finance.statements import (
+    StatementImportError,
+    import_bank_statement,
+    read_statement_lines,
+    write_unmatched_report,
+)
+
+
+class Command(BaseCommand):
+    help = 'Match bank statement lines (CSV or XLSX) to outstanding school fees and post them as payments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('statements', nargs='+', help='Statement files to import, in date order.')
+        parser.add_argument(
+            '--academic-year',
+            dest='academic_year',
+            help='Only match fees in this academic year, for example 2025-2026.',
+        )
+        parser.add_argument(
+            '--user',
+            dest='username',
+            help='Username recorded on the posted payments.',
+        )
+        parser.add_argument(
+            '--unmatched-report',
+            dest='unmatched_report',
+            help='Write the lines that could not be matched to this CSV file.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Match lines without posting payments.',
+        )
+
+    def handle(self, *args, **options):
+        fee_queryset = SchoolFee.objects.all()
+        year_name = options.get('academic_year')
+        if year_name:
+            academic_year = AcademicYear.objects.filter(name=year_name).first()
+            if not academic_year:
+                raise CommandError(f'Academic year "{year_name}" was not found.')
+            fee_queryset = fee_queryset.filter(academic_year=academic_year)
+
+        recorded_by = None
+        if options.get('username'):
+            recorded_by = get_user_model().objects.filter(username=options['username']).first()
+            if not recorded_by:
+                raise CommandError(f'User "{options["username"]}" was not found.')
+
+        results = []
+        for path in options['statements']:
+            try:
+                with open(path, 'rb') as statement_file:
+                    result = import_bank_statement(
+                        read_statement_lines(statement_file, path),
+                        fee_queryset=fee_queryset,
+                        recorded_by=recorded_by,
+                        dry_run=options['dry_run'],
+                    )
+            except (OSError, StatementImportError) as exc:
+                raise CommandError(f'{path}: {exc}')
+            results.append((path, result))
+            self.stdout.write(
+                f'{path}: lines {result.line_count}, matched {result.matched_count}, '
+                f'posted {result.posted_count} ({result.posted_amount:.2f}), '
+                f'already posted {result.duplicate_count}, unmatched {len(result.unmatched)}'
+            )
+
+        unmatched_count = sum(len(result.unmatched) for _path, result in results)
+        if options.get('unmatched_report'):
+            with open(options['unmatched_report'], 'w', newline='', encoding='utf-8') as report_file:
+                for position, (path, result) in enumerate(results):
+                    write_unmatched_report(result, report_file, source=path, header=position == 0)
+            self.stdout.write(f'Unmatched report: {options["unmatched_report"]}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: no payments were posted.'))
+        elif unmatched_count:
+            self.stdout.write(self.style.WARNING(f'Unmatched lines: {unmatched_count}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Every statement line was matched.'))
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.academic_years import get_default_academic_year
+from core.models import AcademicYear, School
+from finance.models import SchoolFee
+from finance.services import reconcile_disbursement_scope
+
+
+class Command(BaseCommand):
+    help = 'Reconcile school fee snapshots, balances and the payout queue for an academic year.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--academic-year',
+            dest='academic_year',
+            help='Academic year name, for example 2025-2026. Defaults to the active year.',
+        )
+        parser.add_argument(
+            '--term',
+            default='all',
+            choices=['all'] + [value for value, _label in SchoolFee.TERM_CHOICES],
+            help='Term to reconcile, or "all".',
+        )
+        parser.add_argument(
+            '--school',
+            type=int,
+            help='Restrict reconciliation to one school id.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the changes that would be applied without writing them.',
+        )
+
+    def handle(self, *args, **options):
+        year_name = options.get('academic_year')
+        if year_name:
+            academic_year = AcademicYear.objects.filter(name=year_name).first()
+            if not academic_year:
+                raise CommandError(f'Academic year "{year_name}" was not found.')
+        else:
+            academic_year = get_default_academic_year()
+            if not academic_year:
+                raise CommandError('No academic year exists yet.')
+
+        school = None
+        if options.get('school'):
+            school = School.objects.filter(pk=options['school']).first()
+            if not school:
+                raise CommandError(f'School {options["school"]} was not found.')
+
+        results = reconcile_disbursement_scope(
+            academic_year=academic_year,
+            term=options['term'],
+            school=school,
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            for change in results['changes']:
+                fields = ', '.join(
+                    f'{name}: {old!r} -> {new!r}' for name, (old, new) in change['fields'].items()
+                )
+                self.stdout.write(f'Fee {change["fee_id"]} [{change["model"]}] {fields}')
+            self.stdout.write(self.style.WARNING('Dry run: no changes were written.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Fee reconciliation completed successfully.'))
+        self.stdout.write(f'Academic year: {academic_year.name}')
+        self.stdout.write(f'Processed fees: {results["processed_count"]}')
+        self.stdout.write(f'Created disbursements: {results["created_count"]}')
+        self.stdout.write(f'Updated rows: {results["updated_count"]}')
+        self.stdout.write(f'Cancelled disbursements: {results["cancelled_count"]}')
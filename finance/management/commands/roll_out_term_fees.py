@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.academic_years import get_default_academic_year
+from core.models import AcademicYear, School
+from finance.models import SchoolFee
+from finance.services import roll_out_term_fees
+
+
+class Command(BaseCommand):
+    help = 'Create the missing school fee for every active enrollment in an academic year term.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--academic-year',
+            dest='academic_year',
+            help='Academic year name, for example 2025-2026. Defaults to the active year.',
+        )
+        parser.add_argument(
+            '--term',
+            required=True,
+            choices=[value for value, _label in SchoolFee.TERM_CHOICES],
+            help='Term to open.',
+        )
+        parser.add_argument(
+            '--school',
+            type=int,
+            help='Restrict the roll-out to one school id.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the fees that would be created without writing them.',
+        )
+
+    def handle(self, *args, **options):
+        year_name = options.get('academic_year')
+        if year_name:
+            academic_year = AcademicYear.objects.filter(name=year_name).first()
+            if not academic_year:
+                raise CommandError(f'Academic year "{year_name}" was not found.')
+        else:
+            academic_year = get_default_academic_year()
+            if not academic_year:
+                raise CommandError('No academic year exists yet.')
+
+        school = None
+        if options.get('school'):
+            school = School.objects.filter(pk=options['school']).first()
+            if not school:
+                raise CommandError(f'School {options["school"]} was not found.')
+
+        result = roll_out_term_fees(
+            academic_year=academic_year,
+            term=options['term'],
+            school=school,
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: no fees were created.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Term fee roll-out completed successfully.'))
+        self.stdout.write(f'Academic year: {academic_year.name}')
+        self.stdout.write(f'Term: {options["term"]}')
+        self.stdout.write(f'Created fees: {result.created_count}')
+        self.stdout.write(f'Skipped existing fees: {result.existing_count}')
+        self.stdout.write(f'Skipped without school fee amount: {result.skipped_without_fee_count}')
+        self.stdout.write(f'Total fees: {result.total_fees}')
@@ -0,0 +1,56 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from finance.models import FeeAgingBucket
+from finance.services import sweep_overdue_fees
+
+
+class Command(BaseCommand):
+    help = (
+        'Mark school fees past their term due date as overdue, reopen overdue fees no longer past due '
+        'and record the daily aging buckets.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            dest='sweep_date',
+            help='Sweep as of this date (YYYY-MM-DD). Defaults to today.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and sweep again every N seconds instead of exiting.',
+        )
+
+    def handle(self, *args, **options):
+        sweep_date = None
+        if options.get('sweep_date'):
+            try:
+                sweep_date = date.fromisoformat(options['sweep_date'])
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format.')
+        if options['interval'] < 0:
+            raise CommandError('--interval cannot be negative.')
+
+        while True:
+            close_old_connections()
+            result = sweep_overdue_fees(sweep_date)
+            self.stdout.write(f'Date: {result.snapshot_date.isoformat()}')
+            self.stdout.write(f'Marked overdue: {result.swept_count}')
+            self.stdout.write(f'Reopened: {result.reopened_count}')
+            for name, _label in FeeAgingBucket.BUCKET_CHOICES:
+                rows = [bucket for bucket in result.aging_buckets if bucket.bucket == name]
+                self.stdout.write(
+                    f'Aging {name} days: {sum(row.fee_count for row in rows)} fee(s), '
+                    f'{sum((row.outstanding_amount for row in rows), Decimal("0"))}'
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Overdue sweep completed successfully.'))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AcademicYear
+from finance.models import SchoolFee
+from finance.services import find_fee_ledger_drift, repair_fee_ledger_drift
+
+
+class Command(BaseCommand):
+    help = 'Recompute school fee totals from their payments and report (or repair) cached ledger drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--academic-year',
+            dest='academic_year',
+            help='Academic year name, for example 2025-2026. Defaults to every year.',
+        )
+        parser.add_argument(
+            '--term',
+            default='all',
+            choices=['all'] + [value for value, _label in SchoolFee.TERM_CHOICES],
+            help='Term to verify, or "all".',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rewrite drifted fees from their payment rows.',
+        )
+
+    def handle(self, *args, **options):
+        queryset = SchoolFee.objects.all()
+        year_name = options.get('academic_year')
+        if year_name:
+            academic_year = AcademicYear.objects.filter(name=year_name).first()
+            if not academic_year:
+                raise CommandError(f'Academic year "{year_name}" was not found.')
+            queryset = queryset.filter(academic_year=academic_year)
+        if options['term'] != 'all':
+            queryset = queryset.filter(term=options['term'])
+
+        drift = find_fee_ledger_drift(queryset)
+        for row in drift:
+            self.stdout.write(
+                f'Fee {row.fee_id}: amount_paid {row.cached_amount_paid} (payments {row.ledger_amount_paid}), '
+                f'balance {row.cached_balance} (expected {row.expected_balance})'
+            )
+
+        self.stdout.write(f'Checked fees: {queryset.count()}')
+        self.stdout.write(f'Drifted fees: {len(drift)}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Fee ledger matches the recorded payments.'))
+        elif options['fix']:
+            repaired_count = repair_fee_ledger_drift([row.fee_id for row in drift])
+            self.stdout.write(self.style.SUCCESS(f'Repaired fees: {repaired_count}'))
+        else:
+            self.stdout.write(self.style.WARNING('Run with --fix to rewrite the drifted fees.'))
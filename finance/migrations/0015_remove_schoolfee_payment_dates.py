@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0014_schoolfee_historical_refactor'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='schoolfee',
+            name='payment_dates',
+        ),
+    ]
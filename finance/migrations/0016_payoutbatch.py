@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0015_remove_schoolfee_payment_dates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('fixed', 'Fixed width')], default='csv', max_length=10)),
+                ('status', models.CharField(choices=[('generating', 'Generating'), ('completed', 'Completed'), ('aborted', 'Aborted')], default='generating', max_length=20)),
+                ('filters', models.JSONField(blank=True, default=dict, help_text='Queue filters used for this batch')),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('checksum', models.CharField(blank=True, help_text='SHA-256 of the header and detail lines', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payout_batches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Payout Batch',
+                'verbose_name_plural': 'Payout Batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='schoolfeedisbursement',
+            name='payout_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='disbursements', to='finance.payoutbatch'),
+        ),
+    ]
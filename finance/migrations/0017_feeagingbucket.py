@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_academicyear_term_due_dates'),
+        ('finance', '0016_payoutbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeAgingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField(db_index=True)),
+                ('term', models.CharField(choices=[('1', 'TERM 1'), ('2', 'TERM 2'), ('3', 'TERM 3')], max_length=1)),
+                ('bucket', models.CharField(choices=[('0-30', '0-30 days'), ('31-60', '31-60 days'), ('61-90', '61-90 days'), ('90+', 'Over 90 days')], max_length=5)),
+                ('fee_count', models.PositiveIntegerField(default=0)),
+                ('outstanding_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_aging_buckets', to='core.academicyear')),
+            ],
+            options={
+                'verbose_name': 'Fee Aging Bucket',
+                'verbose_name_plural': 'Fee Aging Buckets',
+                'ordering': ['-snapshot_date', 'academic_year', 'term', 'bucket'],
+                'constraints': [models.UniqueConstraint(fields=('snapshot_date', 'academic_year', 'term', 'bucket'), name='unique_fee_aging_bucket_per_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_academicyear_term_due_dates'),
+        ('finance', '0017_feeagingbucket'),
+        ('students', '0017_studentmaterial_material_package_expansion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schoolfee',
+            index=models.Index(fields=['academic_year', 'term', 'school', 'payment_status'], name='finance_sch_academi_fa1fbb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolfee',
+            index=models.Index(condition=models.Q(('payment_status', 'overdue')), fields=['academic_year', 'term'], name='fee_overdue_year_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolfee',
+            index=models.Index(condition=models.Q(('balance__gt', 0)), fields=['academic_year', 'term'], name='fee_outstanding_year_term_idx'),
+        ),
+    ]
@@ -2,8 +2,9 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Q, Sum
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 from core.utils import normalize_identifier_value
@@ -11,6 +12,9 @@ from students.models import Student, StudentEnrollmentHistory
 from core.models import AcademicYear
 
 
+LEDGER_FIELDS = ['amount_paid', 'balance', 'payment_status', 'updated_at']
+
+
 class SchoolFee(models.Model):
     """Term fee plan and cached payment summary for a student."""
     TERM_CHOICES = [
@@ -61,7 +65,6 @@ class SchoolFee(models.Model):
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
-    payment_dates = models.TextField(blank=True, help_text="Dates of payments (comma-separated)")
     payment_date = models.DateField(
         default=timezone.now,
         null=True,
@@ -86,6 +89,20 @@ class SchoolFee(models.Model):
         permissions = [
             ('manage_fees', 'Can manage fees'),
         ]
+        indexes = [
+            # Fee lists, dashboards and the payout queue filter year -> term -> school -> status.
+            models.Index(fields=['academic_year', 'term', 'school', 'payment_status']),
+            models.Index(
+                fields=['academic_year', 'term'],
+                condition=Q(payment_status='overdue'),
+                name='fee_overdue_year_term_idx',
+            ),
+            models.Index(
+                fields=['academic_year', 'term'],
+                condition=Q(balance__gt=0),
+                name='fee_outstanding_year_term_idx',
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['student', 'academic_year', 'term'],
@@ -139,18 +156,24 @@ class SchoolFee(models.Model):
         ):
             self.update_bank_snapshot(school=school)
 
-    def refresh_payment_summary(self, commit=True):
-        """Refresh cached totals from recorded payment transactions."""
-        total_paid = self.payments.aggregate(total=Sum('amount_paid'))['total'] or Decimal('0')
-        self.amount_paid = total_paid
+    @property
+    def payment_dates(self):
+        """Dates of payments (comma-separated), derived from the payment ledger."""
+        if 'payments' in getattr(self, '_prefetched_objects_cache', {}):
+            payments = sorted(self.payments.all(), key=lambda payment: (payment.payment_date, payment.created_at))
+            dates = [payment.payment_date for payment in payments]
+        elif self.pk:
+            dates = self.payments.order_by('payment_date', 'created_at').values_list('payment_date', flat=True)
+        else:
+            dates = []
+        return ", ".join(date.isoformat() for date in dates if date)
+
+    def apply_payment_summary(self, total_paid):
+        """Set cached totals and status from already aggregated payment data."""
+        self.amount_paid = total_paid or Decimal('0')
         if not self.payment_date:
             self.payment_date = timezone.now().date()
 
-        payment_dates = (
-            self.payments.order_by('payment_date', 'created_at')
-            .values_list('payment_date', flat=True)
-        )
-        self.payment_dates = ", ".join(date.isoformat() for date in payment_dates if date)
         self.balance = max(self.total_fees - self.amount_paid, Decimal('0'))
 
         if self.balance <= 0:
@@ -161,16 +184,48 @@ class SchoolFee(models.Model):
             if self.payment_status != 'overdue':
                 self.payment_status = 'pending'
 
+    def refresh_payment_summary(self, commit=True):
+        """Recompute cached totals from every recorded payment (see ``verify_fee_ledger``)."""
+        total_paid = self.payments.aggregate(total=Sum('amount_paid'))['total'] or Decimal('0')
+        self.apply_payment_summary(total_paid)
+
         if commit:
             self.save(update_fields=[
                 'amount_paid',
                 'balance',
                 'payment_status',
-                'payment_dates',
                 'payment_date',
                 'updated_at',
             ])
 
+    def post_payment_delta(self, delta):
+        """Move the cached ledger by ``delta`` with one atomic UPDATE (negative for removed payments).
+
+        Uses the same balance/status rules as ``apply_payment_summary`` without
+        re-reading the payments, and without a read-modify-write race between
+        concurrent postings.
+        """
+        from dashboard.snapshots import fee_snapshot_keys, schedule_snapshot_refresh
+        from reports.cache import bump_report_generations
+
+        new_amount_paid = F('amount_paid') + delta
+        # amount_paid is assigned last so every expression reads the pre-update row, even on MySQL.
+        SchoolFee.objects.filter(pk=self.pk).update(
+            balance=Greatest(F('total_fees') - new_amount_paid, Value(Decimal('0'))),
+            payment_status=Case(
+                When(total_fees__lte=new_amount_paid, then=Value('paid')),
+                When(amount_paid__gt=-delta, then=Value('partial')),
+                When(payment_status='overdue', then=Value('overdue')),
+                default=Value('pending'),
+            ),
+            amount_paid=new_amount_paid,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=LEDGER_FIELDS)
+        # The UPDATE skips post_save, so refresh the dashboard buckets explicitly.
+        schedule_snapshot_refresh(fee_snapshot_keys(SchoolFee.objects.filter(pk=self.pk)))
+        bump_report_generations('fees')
+
     def save(self, *args, **kwargs):
         """Auto-calculate balance and update payment status."""
         if self.enrollment_history_id:
@@ -260,14 +315,23 @@ class SchoolFeePayment(models.Model):
             ),
         ]
 
+    def _stored_amount(self):
+        if self._state.adding or not self.pk:
+            return Decimal('0')
+        stored = SchoolFeePayment.objects.filter(pk=self.pk).values_list('amount_paid', flat=True).first()
+        return stored or Decimal('0')
+
     def clean(self):
         errors = {}
         if self.amount_paid is not None and self.amount_paid <= 0:
             errors['amount_paid'] = 'Payment amount must be greater than zero.'
         if self.school_fee_id:
-            other_payments = self.school_fee.payments.exclude(pk=self.pk)
-            already_paid = other_payments.aggregate(total=Sum('amount_paid'))['total'] or Decimal('0')
-            remaining_balance = self.school_fee.total_fees - already_paid
+            total_fees, ledger_paid = (
+                SchoolFee.objects.filter(pk=self.school_fee_id)
+                .values_list('total_fees', 'amount_paid')
+                .get()
+            )
+            remaining_balance = total_fees - (ledger_paid - self._stored_amount())
             if self.amount_paid is not None and self.amount_paid > remaining_balance:
                 errors['amount_paid'] = 'Payment amount cannot exceed the remaining balance.'
         if self.reference_number:
@@ -277,18 +341,70 @@ class SchoolFeePayment(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
-        self.school_fee.refresh_payment_summary()
+        with transaction.atomic():
+            delta = self.amount_paid - self._stored_amount()
+            super().save(*args, **kwargs)
+            self.school_fee.post_payment_delta(delta)
 
     def delete(self, *args, **kwargs):
         school_fee = self.school_fee
-        super().delete(*args, **kwargs)
-        school_fee.refresh_payment_summary()
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            school_fee.post_payment_delta(-self.amount_paid)
+        return result
 
     def __str__(self):
         return f"{self.school_fee.student.full_name} - {self.amount_paid} on {self.payment_date}"
 
 
+class PayoutBatch(models.Model):
+    """Bank payout file generated from the disbursement queue, with its control totals."""
+
+    FORMAT_CSV = 'csv'
+    FORMAT_FIXED = 'fixed'
+    FORMAT_CHOICES = [
+        (FORMAT_CSV, 'CSV'),
+        (FORMAT_FIXED, 'Fixed width'),
+    ]
+
+    STATUS_GENERATING = 'generating'
+    STATUS_COMPLETED = 'completed'
+    STATUS_ABORTED = 'aborted'
+    STATUS_CHOICES = [
+        (STATUS_GENERATING, 'Generating'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_ABORTED, 'Aborted'),
+    ]
+
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default=FORMAT_CSV)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_GENERATING)
+    filters = models.JSONField(default=dict, blank=True, help_text="Queue filters used for this batch")
+    record_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    checksum = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the header and detail lines")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payout_batches',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Payout Batch'
+        verbose_name_plural = 'Payout Batches'
+
+    @property
+    def reference(self):
+        return f"PB{self.pk:06d}"
+
+    def __str__(self):
+        return f"{self.reference} - {self.record_count} payment(s), {self.total_amount}"
+
+
 class SchoolFeeDisbursement(models.Model):
     """Queue of school fee amounts finance still needs to pay out."""
 
@@ -314,6 +430,13 @@ class SchoolFeeDisbursement(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     requested_at = models.DateTimeField(auto_now_add=True)
     exported_at = models.DateTimeField(null=True, blank=True)
+    payout_batch = models.ForeignKey(
+        PayoutBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='disbursements',
+    )
     paid_at = models.DateTimeField(null=True, blank=True)
     paid_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -357,3 +480,40 @@ class SchoolFeeDisbursement(models.Model):
 
     def __str__(self):
         return f"{self.student_name or self.school_fee.student.full_name} - {self.amount_to_pay} ({self.get_status_display()})"
+
+
+class FeeAgingBucket(models.Model):
+    """Daily count and amount of outstanding fees by how long they have been past due."""
+
+    BUCKET_CHOICES = [
+        ('0-30', '0-30 days'),
+        ('31-60', '31-60 days'),
+        ('61-90', '61-90 days'),
+        ('90+', 'Over 90 days'),
+    ]
+
+    snapshot_date = models.DateField(db_index=True)
+    academic_year = models.ForeignKey(
+        AcademicYear,
+        on_delete=models.CASCADE,
+        related_name='fee_aging_buckets',
+    )
+    term = models.CharField(max_length=1, choices=SchoolFee.TERM_CHOICES)
+    bucket = models.CharField(max_length=5, choices=BUCKET_CHOICES)
+    fee_count = models.PositiveIntegerField(default=0)
+    outstanding_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-snapshot_date', 'academic_year', 'term', 'bucket']
+        verbose_name = 'Fee Aging Bucket'
+        verbose_name_plural = 'Fee Aging Buckets'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['snapshot_date', 'academic_year', 'term', 'bucket'],
+                name='unique_fee_aging_bucket_per_day',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.snapshot_date} {self.academic_year} T{self.term} {self.bucket}: {self.fee_count}"
@@ -0,0 +1,258 @@
+"""Bank payout files streamed from the school fee disbursement queue.
+
+A payout export creates a ``PayoutBatch`` and reads the unpaid fees that are not
+already in an earlier batch (or paid) from a ``values()`` projection with
+``.iterator()``. Chunk by chunk it claims the matching ``SchoolFeeDisbursement``
+rows (creating any that are missing) and writes detail lines only for the fees
+it claimed, so two concurrent exports never pay the same fee and memory use does
+not grow with the size of the payout. The file ends
+with a trailer carrying the record count, total amount and the SHA-256 of every
+line before it; the same checksum is stored on the batch.
+"""
+
+import csv
+import hashlib
+import io
+import unicodedata
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from core.utils import normalize_identifier_value
+
+from .models import PayoutBatch, SchoolFee, SchoolFeeDisbursement
+from .services import UNASSIGNED_SCHOOL_NAME
+
+
+PAYOUT_CHUNK_SIZE = 500
+# Disbursements already in a payout file (or settled) that a new batch must not pay again.
+SETTLED_DISBURSEMENT_STATUSES = ('exported', 'paid')
+PAYOUT_ROW_FIELDS = (
+    'pk',
+    'balance',
+    'term',
+    'class_level',
+    'school_name',
+    'bank_name',
+    'bank_account_name',
+    'bank_account_number',
+    'academic_year__name',
+    'student__first_name',
+    'student__last_name',
+    'school__name',
+    'school__bank_name',
+    'school__bank_account_name',
+    'school__bank_account_number',
+)
+
+
+def normalize_account_number(value):
+    """Account numbers as banks print them: no spaces and no spreadsheet ``.0`` suffix."""
+    return normalize_identifier_value(value).replace(' ', '')
+
+
+def _payout_line(row):
+    """Resolve the bank details for one fee, falling back to the school's current details."""
+    account_number = row['bank_account_number'] or row['school__bank_account_number'] or ''
+    return {
+        'fee_id': row['pk'],
+        'amount': row['balance'],
+        'student_name': f"{row['student__first_name'] or ''} {row['student__last_name'] or ''}".strip(),
+        'school_name': row['school_name'] or row['school__name'] or UNASSIGNED_SCHOOL_NAME,
+        'class_level': row['class_level'] or '',
+        'academic_year': row['academic_year__name'] or '',
+        'term': row['term'] or '',
+        'bank_name': row['bank_name'] or row['school__bank_name'] or '',
+        'bank_account_name': row['bank_account_name'] or row['school__bank_account_name'] or '',
+        'bank_account_number': normalize_account_number(account_number),
+    }
+
+
+def _narrative(batch, line):
+    return f"{batch.reference} FEE {line['fee_id']} T{line['term']}"
+
+
+def _cents(amount):
+    return int((amount * 100).quantize(Decimal('1')))
+
+
+class CsvPayoutFormatter:
+    extension = 'csv'
+    content_type = 'text/csv'
+
+    def _row(self, values):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue()
+
+    def header(self, batch, created_at):
+        return (
+            self._row(['H', batch.reference, created_at.strftime('%Y-%m-%d'), 'SIMS SCHOOL FEE PAYOUT'])
+            + self._row([
+                'D', 'Sequence', 'Fee ID', 'Bank', 'Account Number', 'Account Name', 'Amount',
+                'Narrative', 'Student', 'School', 'Class Level', 'Academic Year', 'Term',
+            ])
+        )
+
+    def detail(self, batch, sequence, line):
+        return self._row([
+            'D',
+            sequence,
+            line['fee_id'],
+            line['bank_name'],
+            line['bank_account_number'],
+            line['bank_account_name'],
+            f"{line['amount']:.2f}",
+            _narrative(batch, line),
+            line['student_name'],
+            line['school_name'],
+            line['class_level'],
+            line['academic_year'],
+            line['term'],
+        ])
+
+    def trailer(self, batch, record_count, total_amount, checksum):
+        return self._row(['T', record_count, f"{total_amount:.2f}", checksum])
+
+
+class FixedWidthPayoutFormatter:
+    """ASCII records padded to fixed column widths for bank bulk-upload portals."""
+
+    extension = 'txt'
+    content_type = 'text/plain'
+    # (field, width) for each detail record after the record type and sequence.
+    DETAIL_LAYOUT = (
+        ('bank_account_number', 20),
+        ('bank_account_name', 35),
+        ('bank_name', 30),
+        ('amount', 15),
+        ('narrative', 30),
+        ('student_name', 35),
+        ('school_name', 35),
+    )
+
+    def _text(self, value, width):
+        folded = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+        return folded.upper()[:width].ljust(width)
+
+    def header(self, batch, created_at):
+        return f"H{self._text(batch.reference, 10)}{created_at:%Y%m%d}{self._text('SIMS SCHOOL FEE PAYOUT', 30)}\r\n"
+
+    def detail(self, batch, sequence, line):
+        values = {**line, 'narrative': _narrative(batch, line)}
+        fields = []
+        for name, width in self.DETAIL_LAYOUT:
+            if name == 'amount':
+                fields.append(str(_cents(values['amount'])).zfill(width))
+            else:
+                fields.append(self._text(values[name], width))
+        return f"D{sequence:06d}{''.join(fields)}\r\n"
+
+    def trailer(self, batch, record_count, total_amount, checksum):
+        return f"T{record_count:08d}{_cents(total_amount):018d}{checksum}\r\n"
+
+
+PAYOUT_FORMATTERS = {
+    PayoutBatch.FORMAT_CSV: CsvPayoutFormatter(),
+    PayoutBatch.FORMAT_FIXED: FixedWidthPayoutFormatter(),
+}
+
+
+def _claim_disbursements(batch, lines, exported_at):
+    """Claim a chunk of fees for this batch and return the ids of the fees it won.
+
+    Missing payout rows are created first, then one conditional UPDATE moves every
+    row that is not already in a payout file to this batch. A fee a concurrent
+    batch claimed first keeps that batch and is left out of this file.
+    """
+    fee_ids = [line['fee_id'] for line in lines]
+    existing_fee_ids = set(
+        SchoolFeeDisbursement.objects.filter(school_fee_id__in=fee_ids).values_list('school_fee_id', flat=True)
+    )
+    SchoolFeeDisbursement.objects.bulk_create(
+        [
+            SchoolFeeDisbursement(
+                school_fee_id=line['fee_id'],
+                student_name=line['student_name'],
+                school_name=line['school_name'],
+                class_level=line['class_level'],
+                bank_name=line['bank_name'],
+                bank_account_name=line['bank_account_name'],
+                bank_account_number=line['bank_account_number'],
+                amount_to_pay=line['amount'],
+            )
+            for line in lines
+            if line['fee_id'] not in existing_fee_ids
+        ],
+        # Another batch may create the same rows at the same time; the UPDATE below decides.
+        ignore_conflicts=True,
+    )
+    SchoolFeeDisbursement.objects.filter(school_fee_id__in=fee_ids).exclude(
+        status__in=SETTLED_DISBURSEMENT_STATUSES,
+    ).update(
+        status='exported',
+        exported_at=exported_at,
+        payout_batch=batch,
+        amount_to_pay=Subquery(SchoolFee.objects.filter(pk=OuterRef('school_fee_id')).values('balance')[:1]),
+        updated_at=exported_at,
+    )
+    return set(
+        SchoolFeeDisbursement.objects.filter(school_fee_id__in=fee_ids, payout_batch=batch, status='exported')
+        .values_list('school_fee_id', flat=True)
+    )
+
+
+def stream_payout_batch(batch, fee_queryset):
+    """Yield the payout file for ``batch`` line by line and record its control totals."""
+    formatter = PAYOUT_FORMATTERS[batch.file_format]
+    digest = hashlib.sha256()
+    exported_at = timezone.now()
+    record_count = 0
+    total_amount = Decimal('0')
+    completed = False
+
+    rows = (
+        fee_queryset.exclude(disbursement__status__in=SETTLED_DISBURSEMENT_STATUSES)
+        .order_by('school_name', 'student__last_name', 'student__first_name', 'pk')
+        .values(*PAYOUT_ROW_FIELDS)
+        .iterator(chunk_size=PAYOUT_CHUNK_SIZE)
+    )
+    try:
+        text = formatter.header(batch, exported_at)
+        digest.update(text.encode('utf-8'))
+        yield text
+
+        # Each chunk is claimed before any of its lines are written, so a fee is in one file only.
+        while chunk := [_payout_line(row) for row in islice(rows, PAYOUT_CHUNK_SIZE)]:
+            claimed_fee_ids = _claim_disbursements(batch, chunk, exported_at)
+            for line in chunk:
+                if line['fee_id'] not in claimed_fee_ids:
+                    continue
+                record_count += 1
+                total_amount += line['amount']
+                text = formatter.detail(batch, record_count, line)
+                digest.update(text.encode('utf-8'))
+                yield text
+
+        checksum = digest.hexdigest()
+        PayoutBatch.objects.filter(pk=batch.pk).update(
+            status=PayoutBatch.STATUS_COMPLETED,
+            record_count=record_count,
+            total_amount=total_amount,
+            checksum=checksum,
+            completed_at=timezone.now(),
+        )
+        completed = True
+        yield formatter.trailer(batch, record_count, total_amount, checksum)
+    finally:
+        if not completed:
+            # The download was interrupted: release the rows so they can go in the next batch.
+            # Only rows this batch stamped point at it, never rows of an earlier batch.
+            SchoolFeeDisbursement.objects.filter(payout_batch=batch, status='exported').update(
+                status='pending',
+                exported_at=None,
+                payout_batch=None,
+            )
+            PayoutBatch.objects.filter(pk=batch.pk).update(status=PayoutBatch.STATUS_ABORTED)
@@ -1,14 +1,19 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import date, timedelta
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Case, Count, DateField, Exists, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Lower, NullIf
+from django.utils import timezone
 
 from core.utils import normalize_identifier_value
+from dashboard.snapshots import fee_snapshot_keys, schedule_snapshot_refresh
+from reports.cache import bump_report_generations
 from students.models import Student, StudentEnrollmentHistory, sync_student_enrollment_history
 
-from .models import SchoolFee, SchoolFeeDisbursement, SchoolFeePayment
+from .models import LEDGER_FIELDS, FeeAgingBucket, SchoolFee, SchoolFeeDisbursement, SchoolFeePayment
 
 
 @dataclass(frozen=True)
@@ -126,6 +131,68 @@ def filter_school_fee_queryset(queryset, *, params):
     }
 
 
+UNASSIGNED_SCHOOL_NAME = 'Unassigned School'
+
+
+def _status_count(*statuses):
+    return Count('id', filter=Q(payment_status__in=statuses))
+
+
+def summarize_fees_by_school(queryset):
+    """Group fees per linked school (or per external school name) in one query.
+
+    Rows are ordered by school name so the result can be paginated in the database.
+    """
+    display_name = Coalesce(
+        'school__name',
+        NullIf('school_name', Value('')),
+        Value(UNASSIGNED_SCHOOL_NAME),
+    )
+    return (
+        SchoolFee.objects.filter(pk__in=queryset.values('pk'))
+        .annotate(
+            external_school_key=Case(
+                When(school__isnull=False, then=Value('')),
+                default=Lower(display_name),
+            ),
+        )
+        .values('school_id', 'external_school_key')
+        .annotate(
+            school_name=Max(display_name),
+            student_count=Count('student_id', distinct=True),
+            total_required=Coalesce(Sum('total_fees'), Decimal('0')),
+            total_paid=Coalesce(Sum('amount_paid'), Decimal('0')),
+            total_balance=Coalesce(Sum('balance'), Decimal('0')),
+            paid_count=_status_count('paid'),
+            partial_count=_status_count('partial'),
+            pending_count=_status_count('pending', ''),
+            overdue_count=_status_count('overdue'),
+        )
+        .order_by(Lower('school_name'), 'school_id')
+    )
+
+
+def summarize_fees_by_student(queryset):
+    """Roll fees up per student in one query, carrying the status of their latest fee."""
+    latest_fee = SchoolFee.objects.filter(
+        pk__in=queryset.values('pk'),
+        student_id=OuterRef('student_id'),
+    ).order_by('-academic_year__name', '-term', '-id')
+    return (
+        SchoolFee.objects.filter(pk__in=queryset.values('pk'))
+        .values('student_id')
+        .annotate(
+            total_required=Coalesce(Sum('total_fees'), Decimal('0')),
+            total_paid=Coalesce(Sum('amount_paid'), Decimal('0')),
+            total_balance=Coalesce(Sum('balance'), Decimal('0')),
+            latest_status=Subquery(latest_fee.values('payment_status')[:1]),
+            first_name=Max('student__first_name'),
+            last_name=Max('student__last_name'),
+        )
+        .order_by('first_name', 'last_name', 'student_id')
+    )
+
+
 def get_bulk_enrollment_queryset(scope: SchoolFeeScope):
     queryset = (
         StudentEnrollmentHistory.objects.filter(
@@ -136,6 +203,7 @@ def get_bulk_enrollment_queryset(scope: SchoolFeeScope):
             'student',
             'student__family__district',
             'student__partner__district',
+            'student__school',
             'school',
             'academic_year',
         )
@@ -188,93 +256,503 @@ def get_or_create_school_fee_for_enrollment(enrollment_history, term, *, total_f
     return fee, created
 
 
-def reconcile_fee_scope(*, academic_year, term, school=None):
-    queryset = get_fee_queryset_with_context().filter(
-        academic_year=academic_year,
-        term=term,
+FEE_SNAPSHOT_FIELDS = [
+    'enrollment_history',
+    'school',
+    'school_name',
+    'class_level',
+    'school_level',
+    'bank_name',
+    'bank_account_name',
+    'bank_account_number',
+]
+FEE_SUMMARY_FIELDS = ['amount_paid', 'balance', 'payment_status', 'payment_date']
+DISBURSEMENT_SYNC_FIELDS = [
+    'student_name',
+    'school_name',
+    'class_level',
+    'bank_name',
+    'bank_account_name',
+    'bank_account_number',
+    'amount_to_pay',
+    'status',
+]
+RECONCILE_BATCH_SIZE = 500
+
+
+@dataclass
+class FeeReconciliation:
+    processed_count: int = 0
+    refreshed_count: int = 0
+    created_count: int = 0
+    updated_count: int = 0
+    cancelled_count: int = 0
+    dry_run: bool = False
+    changes: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            'processed_count': self.processed_count,
+            'created_count': self.created_count,
+            'updated_count': self.updated_count,
+            'cancelled_count': self.cancelled_count,
+        }
+
+
+def _field_values(instance, field_names):
+    return {
+        name: getattr(instance, instance._meta.get_field(name).attname)
+        for name in field_names
+    }
+
+
+def _changed_fields(before, after):
+    return {name: (before[name], after[name]) for name in before if before[name] != after[name]}
+
+
+def _load_payment_totals(fee_queryset):
+    return dict(
+        SchoolFeePayment.objects.filter(school_fee__in=fee_queryset.values('pk'))
+        .order_by()
+        .values('school_fee_id')
+        .annotate(total=Sum('amount_paid'))
+        .values_list('school_fee_id', 'total')
     )
-    if school is not None:
-        queryset = queryset.filter(school=school)
 
-    refreshed_count = 0
-    for fee in queryset:
-        if fee.enrollment_history_id:
-            assign_fee_from_enrollment(fee, fee.enrollment_history, total_fees=fee.total_fees, overwrite=True)
-            fee.save()
-            refreshed_count += 1
-        else:
-            history = get_or_create_fee_enrollment(fee.student, fee.academic_year)
-            if history:
-                assign_fee_from_enrollment(fee, history, total_fees=fee.total_fees, overwrite=True)
-                fee.save()
-                refreshed_count += 1
-        fee.refresh_payment_summary()
-    return refreshed_count
 
+def _load_scope_enrollments(fees):
+    missing = [fee for fee in fees if not fee.enrollment_history_id]
+    if not missing:
+        return {}
+    histories = StudentEnrollmentHistory.objects.select_related(
+        'school', 'academic_year', 'student__school',
+    ).filter(
+        student_id__in={fee.student_id for fee in missing},
+        academic_year_id__in={fee.academic_year_id for fee in missing},
+    )
+    return {(history.student_id, history.academic_year_id): history for history in histories}
 
-def reconcile_disbursement_scope(*, academic_year, term='all', school=None):
-    """Reconcile fee snapshots and disbursement artifacts for an explicit scope."""
-    queryset = get_fee_queryset_with_context().filter(academic_year=academic_year)
-    if term != 'all':
-        queryset = queryset.filter(term=term)
-    if school is not None:
-        queryset = queryset.filter(school=school)
 
-    processed_count = 0
-    created_count = 0
-    updated_count = 0
-    cancelled_count = 0
-
-    for fee in queryset:
-        processed_count += 1
-        original_snapshot = {
-            'school_name': fee.school_name,
-            'class_level': fee.class_level,
-            'school_level': fee.school_level,
-            'bank_name': fee.bank_name,
-            'bank_account_name': fee.bank_account_name,
-            'bank_account_number': fee.bank_account_number,
-            'amount_paid': fee.amount_paid,
-            'balance': fee.balance,
-            'payment_status': fee.payment_status,
-        }
+@transaction.atomic
+def reconcile_fees(queryset, *, sync_disbursements=False, dry_run=False):
+    """Recompute fee snapshots, cached balances and (optionally) payout rows in bulk.
 
-        history = fee.enrollment_history or get_or_create_fee_enrollment(fee.student, fee.academic_year)
+    Enrollment snapshots and payment totals for the whole scope are loaded up
+    front, new values are computed in memory, and only changed rows are written
+    back with ``bulk_update``/``bulk_create``. The fee rows stay locked from the
+    read to the write, so a payment posted meanwhile waits and then applies its
+    delta on top instead of being overwritten. With ``dry_run`` nothing is
+    written or locked and ``changes`` lists the field-level diff that would be applied.
+    """
+    result = FeeReconciliation(dry_run=dry_run)
+    fee_rows = queryset.select_related(
+        'student__school',
+        'academic_year',
+        'school',
+        'enrollment_history__school',
+        'enrollment_history__academic_year',
+        'enrollment_history__student__school',
+        'disbursement',
+    ).order_by('pk')
+    if not dry_run:
+        # Lock only the fee rows; the outer joins cannot be locked on PostgreSQL.
+        fee_rows = fee_rows.select_for_update(of=('self',))
+    fees = list(fee_rows)
+    histories = _load_scope_enrollments(fees)
+    payment_totals = _load_payment_totals(queryset)
+    tracked_fields = FEE_SNAPSHOT_FIELDS + FEE_SUMMARY_FIELDS
+
+    changed_fees = []
+    new_disbursements = []
+    changed_disbursements = []
+    cancelled_disbursement_ids = []
+    now = timezone.now()
+
+    for fee in fees:
+        result.processed_count += 1
+        before = _field_values(fee, tracked_fields)
+
+        history = fee.enrollment_history or histories.get((fee.student_id, fee.academic_year_id))
+        if history is None and not dry_run:
+            history = get_or_create_fee_enrollment(fee.student, fee.academic_year)
         if history:
             assign_fee_from_enrollment(fee, history, total_fees=fee.total_fees, overwrite=True)
-        fee.save()
-        fee.refresh_payment_summary()
+            result.refreshed_count += 1
+        fee.bank_account_number = normalize_identifier_value(fee.bank_account_number).replace(' ', '')
+        fee.apply_payment_summary(payment_totals.get(fee.pk, Decimal('0')))
+
+        fee_changes = _changed_fields(before, _field_values(fee, tracked_fields))
+        if fee_changes:
+            fee.updated_at = now
+            changed_fees.append(fee)
+            result.updated_count += 1
+            result.changes.append({'fee_id': fee.pk, 'model': 'school_fee', 'fields': fee_changes})
 
-        changed_fee = any(getattr(fee, field) != value for field, value in original_snapshot.items())
-        if changed_fee:
-            updated_count += 1
+        if not sync_disbursements:
+            continue
 
         disbursement = getattr(fee, 'disbursement', None)
         if fee.balance > 0:
             if disbursement is None:
-                disbursement = SchoolFeeDisbursement.objects.create(
-                    school_fee=fee,
-                    status='pending',
-                )
-                created_count += 1
-            else:
-                original_status = disbursement.status
-                original_amount = disbursement.amount_to_pay
+                disbursement = SchoolFeeDisbursement(school_fee=fee, status='pending')
+                disbursement.sync_from_fee()
+                new_disbursements.append(disbursement)
+                result.created_count += 1
+                result.changes.append({
+                    'fee_id': fee.pk,
+                    'model': 'disbursement',
+                    'fields': {'status': (None, 'pending'), 'amount_to_pay': (None, disbursement.amount_to_pay)},
+                })
+                continue
+            disbursement_before = _field_values(disbursement, DISBURSEMENT_SYNC_FIELDS)
+            if disbursement.status != 'exported':
+                # Rows already sent to the bank in a payout batch stay exported.
                 disbursement.status = 'pending'
-                disbursement.save()
-                if disbursement.status != original_status or disbursement.amount_to_pay != original_amount:
-                    updated_count += 1
+            disbursement.sync_from_fee()
+            disbursement_changes = _changed_fields(
+                disbursement_before,
+                _field_values(disbursement, DISBURSEMENT_SYNC_FIELDS),
+            )
+            if disbursement_changes:
+                disbursement.updated_at = now
+                changed_disbursements.append(disbursement)
+                result.changes.append({'fee_id': fee.pk, 'model': 'disbursement', 'fields': disbursement_changes})
+                if {'status', 'amount_to_pay'} & disbursement_changes.keys():
+                    result.updated_count += 1
         elif disbursement is not None and disbursement.status in {'pending', 'exported'}:
-            disbursement.status = 'cancelled'
-            disbursement.save(update_fields=['status', 'updated_at'])
-            cancelled_count += 1
+            cancelled_disbursement_ids.append(disbursement.pk)
+            result.cancelled_count += 1
+            result.changes.append({
+                'fee_id': fee.pk,
+                'model': 'disbursement',
+                'fields': {'status': (disbursement.status, 'cancelled')},
+            })
 
-    return {
-        'processed_count': processed_count,
-        'created_count': created_count,
-        'updated_count': updated_count,
-        'cancelled_count': cancelled_count,
-    }
+    if dry_run:
+        return result
+
+    SchoolFee.objects.bulk_update(
+        changed_fees,
+        tracked_fields + ['updated_at'],
+        batch_size=RECONCILE_BATCH_SIZE,
+    )
+    SchoolFeeDisbursement.objects.bulk_create(new_disbursements, batch_size=RECONCILE_BATCH_SIZE)
+    SchoolFeeDisbursement.objects.bulk_update(
+        changed_disbursements,
+        DISBURSEMENT_SYNC_FIELDS + ['updated_at'],
+        batch_size=RECONCILE_BATCH_SIZE,
+    )
+    SchoolFeeDisbursement.objects.filter(pk__in=cancelled_disbursement_ids).update(
+        status='cancelled',
+        updated_at=now,
+    )
+    if changed_fees:
+        # bulk_update skips model signals, so refresh the dashboard buckets explicitly.
+        schedule_snapshot_refresh(fee_snapshot_keys(queryset))
+        bump_report_generations('fees')
+    return result
+
+
+def _fee_scope_queryset(*, academic_year, term='all', school=None):
+    queryset = SchoolFee.objects.filter(academic_year=academic_year)
+    if term != 'all':
+        queryset = queryset.filter(term=term)
+    if school is not None:
+        queryset = queryset.filter(school=school)
+    return queryset
+
+
+def reconcile_fee_scope(*, academic_year, term, school=None, dry_run=False):
+    """Refresh fee snapshots and cached balances; return how many fees had an enrollment snapshot."""
+    queryset = _fee_scope_queryset(academic_year=academic_year, term=term, school=school)
+    return reconcile_fees(queryset, dry_run=dry_run).refreshed_count
+
+
+def reconcile_disbursement_scope(*, academic_year, term='all', school=None, dry_run=False):
+    """Reconcile fee snapshots and disbursement artifacts for an explicit scope."""
+    queryset = _fee_scope_queryset(academic_year=academic_year, term=term, school=school)
+    result = reconcile_fees(queryset, sync_disbursements=True, dry_run=dry_run)
+    summary = result.as_dict()
+    if dry_run:
+        summary['changes'] = result.changes
+    return summary
+
+
+@dataclass
+class TermFeeRollout:
+    created_count: int = 0
+    existing_count: int = 0
+    skipped_without_fee_count: int = 0
+    total_fees: Decimal = Decimal('0')
+    dry_run: bool = False
+
+
+@transaction.atomic
+def roll_out_term_fees(*, academic_year, term, school=None, actor=None, dry_run=False):
+    """Create the missing term fee for every active enrollment in the scope, in one pass.
+
+    Enrollments, their school's standard ``fee_amount`` and bank details, and
+    whether a fee already exists are read with a single ``values()`` query; the
+    missing fees are inserted with ``bulk_create``. Enrollments whose school has
+    no fee amount are skipped rather than given a zero fee.
+    """
+    enrollments = StudentEnrollmentHistory.objects.filter(
+        academic_year=academic_year,
+        student__is_active=True,
+    )
+    if school is not None:
+        enrollments = enrollments.filter(school=school)
+    rows = (
+        enrollments.annotate(
+            has_fee=Exists(SchoolFee.objects.filter(
+                student_id=OuterRef('student_id'),
+                academic_year=academic_year,
+                term=term,
+            )),
+        )
+        .order_by('pk')
+        .values(
+            'pk',
+            'student_id',
+            'school_id',
+            'school_name',
+            'class_level',
+            'school_level',
+            'has_fee',
+            'school__name',
+            'school__fee_amount',
+            'school__bank_name',
+            'school__bank_account_name',
+            'school__bank_account_number',
+            'student__school__name',
+        )
+    )
+
+    result = TermFeeRollout(dry_run=dry_run)
+    today = timezone.now().date()
+    new_fees = []
+    for row in rows.iterator(chunk_size=RECONCILE_BATCH_SIZE):
+        if row['has_fee']:
+            result.existing_count += 1
+            continue
+        total_fees = row['school__fee_amount'] or Decimal('0')
+        if total_fees <= 0:
+            result.skipped_without_fee_count += 1
+            continue
+        # Same snapshot as build_fee_snapshot_from_enrollment, from the pre-joined columns.
+        new_fees.append(SchoolFee(
+            student_id=row['student_id'],
+            enrollment_history_id=row['pk'],
+            academic_year=academic_year,
+            term=term,
+            school_id=row['school_id'],
+            school_name=row['school__name'] or row['school_name'] or row['student__school__name'] or 'N/A',
+            class_level=row['class_level'],
+            school_level=row['school_level'],
+            bank_name=row['school__bank_name'] or '',
+            bank_account_name=row['school__bank_account_name'] or '',
+            bank_account_number=normalize_identifier_value(row['school__bank_account_number']).replace(' ', ''),
+            total_fees=total_fees,
+            amount_paid=Decimal('0'),
+            balance=total_fees,
+            payment_status='pending',
+            payment_date=today,
+            recorded_by=actor,
+        ))
+        result.total_fees += total_fees
+
+    result.created_count = len(new_fees)
+    if dry_run or not new_fees:
+        return result
+
+    # bulk_create skips SchoolFee.save(), which would re-read the enrollment for every row.
+    SchoolFee.objects.bulk_create(new_fees, batch_size=RECONCILE_BATCH_SIZE)
+    schedule_snapshot_refresh(fee_snapshot_keys(SchoolFee.objects.filter(
+        academic_year=academic_year,
+        term=term,
+        student_id__in=[fee.student_id for fee in new_fees],
+    )))
+    bump_report_generations('fees')
+    return result
+
+
+AGING_BUCKET_LIMITS = (('0-30', 30), ('31-60', 60), ('61-90', 90))
+OPEN_PAYMENT_STATUSES = ['pending', 'partial']
+
+
+def _past_due_filter(today):
+    """Fees whose academic year sets a due date for their term that is before ``today``."""
+    condition = Q()
+    for term, _label in SchoolFee.TERM_CHOICES:
+        condition |= Q(term=term, **{f'academic_year__term{term}_due_date__lt': today})
+    return condition
+
+
+def _not_yet_due_filter(today):
+    """Fees whose academic year sets a due date for their term that is ``today`` or later."""
+    condition = Q()
+    for term, _label in SchoolFee.TERM_CHOICES:
+        condition |= Q(term=term, **{f'academic_year__term{term}_due_date__gte': today})
+    return condition
+
+
+def _fee_due_date():
+    return Case(
+        *[
+            When(term=term, then=F(f'academic_year__term{term}_due_date'))
+            for term, _label in SchoolFee.TERM_CHOICES
+        ],
+        output_field=DateField(),
+    )
+
+
+def mark_overdue_fees(today=None):
+    """Flip pending and partial fees past their term due date to overdue with one UPDATE."""
+    today = today or timezone.localdate()
+    queryset = SchoolFee.objects.filter(
+        _past_due_filter(today),
+        payment_status__in=OPEN_PAYMENT_STATUSES,
+        balance__gt=0,
+    )
+    keys = fee_snapshot_keys(queryset)
+    swept_count = queryset.update(payment_status='overdue', updated_at=timezone.now())
+    if swept_count:
+        # The UPDATE skips post_save, so refresh the dashboard buckets explicitly.
+        schedule_snapshot_refresh(keys)
+        bump_report_generations('fees')
+    return swept_count
+
+
+def reopen_overdue_fees(today=None):
+    """Move overdue fees that are no longer past due back to pending or partial with one UPDATE.
+
+    Only fees whose term due date is set and has been moved to ``today`` or later
+    are reopened. Overdue fees without a due date (marked by hand, or from a year
+    that never set one) are left alone.
+    """
+    today = today or timezone.localdate()
+    queryset = SchoolFee.objects.filter(_not_yet_due_filter(today), payment_status='overdue')
+    keys = fee_snapshot_keys(queryset)
+    reopened_count = queryset.update(
+        payment_status=Case(When(amount_paid__gt=0, then=Value('partial')), default=Value('pending')),
+        updated_at=timezone.now(),
+    )
+    if reopened_count:
+        schedule_snapshot_refresh(keys)
+        bump_report_generations('fees')
+    return reopened_count
+
+
+@transaction.atomic
+def record_fee_aging(today=None):
+    """Replace ``today``'s FeeAgingBucket rows from one grouped query over outstanding fees."""
+    today = today or timezone.localdate()
+    bucket = Case(
+        *[
+            When(due_date__gte=today - timedelta(days=days), then=Value(name))
+            for name, days in AGING_BUCKET_LIMITS
+        ],
+        default=Value('90+'),
+    )
+    rows = (
+        SchoolFee.objects.filter(_past_due_filter(today), balance__gt=0)
+        .annotate(due_date=_fee_due_date())
+        .annotate(bucket=bucket)
+        .order_by()
+        .values('academic_year_id', 'term', 'bucket')
+        .annotate(fee_count=Count('id'), outstanding_amount=Sum('balance'))
+    )
+    buckets = [
+        FeeAgingBucket(
+            snapshot_date=today,
+            academic_year_id=row['academic_year_id'],
+            term=row['term'],
+            bucket=row['bucket'],
+            fee_count=row['fee_count'],
+            outstanding_amount=row['outstanding_amount'] or Decimal('0'),
+        )
+        for row in rows
+    ]
+    FeeAgingBucket.objects.filter(snapshot_date=today).delete()
+    FeeAgingBucket.objects.bulk_create(buckets)
+    return buckets
+
+
+@dataclass
+class OverdueSweep:
+    snapshot_date: date
+    swept_count: int = 0
+    reopened_count: int = 0
+    aging_buckets: list = field(default_factory=list)
+
+
+def sweep_overdue_fees(today=None):
+    """Mark past-due fees overdue, reopen those no longer past due, then record the day's aging buckets."""
+    today = today or timezone.localdate()
+    swept_count = mark_overdue_fees(today)
+    reopened_count = reopen_overdue_fees(today)
+    return OverdueSweep(
+        snapshot_date=today,
+        swept_count=swept_count,
+        reopened_count=reopened_count,
+        aging_buckets=record_fee_aging(today),
+    )
+
+
+@dataclass
+class FeeLedgerDrift:
+    fee_id: int
+    cached_amount_paid: Decimal
+    ledger_amount_paid: Decimal
+    cached_balance: Decimal
+    expected_balance: Decimal
+
+
+def find_fee_ledger_drift(queryset):
+    """Compare the cached amount_paid/balance of each fee with the sum of its payments.
+
+    ``SchoolFeePayment`` postings move the cached columns by deltas, so this is
+    the audit that they still agree with the payment rows. One grouped query.
+    """
+    drift = []
+    rows = (
+        queryset.order_by('pk')
+        .annotate(ledger_amount_paid=Sum('payments__amount_paid'))
+        .values_list('pk', 'total_fees', 'amount_paid', 'balance', 'ledger_amount_paid')
+    )
+    for fee_id, total_fees, amount_paid, balance, ledger_amount_paid in rows.iterator():
+        ledger_amount_paid = Decimal(ledger_amount_paid or 0).quantize(Decimal('0.01'))
+        expected_balance = max(total_fees - ledger_amount_paid, Decimal('0'))
+        if amount_paid != ledger_amount_paid or balance != expected_balance:
+            drift.append(FeeLedgerDrift(fee_id, amount_paid, ledger_amount_paid, balance, expected_balance))
+    return drift
+
+
+@transaction.atomic
+def repair_fee_ledger_drift(fee_ids):
+    """Rewrite ``amount_paid``, ``balance`` and status of drifted fees from their payments.
+
+    The fees are locked before their payments are summed, and only rows that
+    still disagree are written; snapshots and payout rows are left alone.
+    Returns how many fees were repaired.
+    """
+    fees = list(SchoolFee.objects.select_for_update().filter(pk__in=fee_ids).order_by('pk'))
+    payment_totals = _load_payment_totals(SchoolFee.objects.filter(pk__in=fee_ids))
+    summary_fields = ['amount_paid', 'balance', 'payment_status']
+    now = timezone.now()
+    repaired = []
+    for fee in fees:
+        before = _field_values(fee, summary_fields)
+        fee.apply_payment_summary(payment_totals.get(fee.pk, Decimal('0')))
+        if _changed_fields(before, _field_values(fee, summary_fields)):
+            fee.updated_at = now
+            repaired.append(fee)
+    SchoolFee.objects.bulk_update(repaired, summary_fields + ['updated_at'])
+    if repaired:
+        # bulk_update skips model signals, so refresh the dashboard buckets explicitly.
+        schedule_snapshot_refresh(fee_snapshot_keys(SchoolFee.objects.filter(pk__in=[fee.pk for fee in repaired])))
+        bump_report_generations('fees')
+    return len(repaired)
 
 
 @transaction.atomic
@@ -319,3 +797,259 @@ def record_school_fee_payment(
         idempotency_key=idempotency_key,
     )
     return payment, True
+
+
+@dataclass(frozen=True)
+class FeePaymentRequest:
+    fee_id: int
+    amount_paid: Decimal
+    idempotency_key: str = None
+
+
+@dataclass
+class FeePaymentOutcome:
+    fee_id: int
+    created: bool = False
+    payment: SchoolFeePayment = None
+    error: str = ''
+
+
+@transaction.atomic
+def record_school_fee_payments_bulk(
+    payment_requests,
+    *,
+    payment_date,
+    payment_method,
+    reference_number='',
+    recorded_by=None,
+    notes='',
+):
+    """Post many fee payments in one transaction and return one outcome per payment request.
+
+    All fees are locked with a single ``SELECT ... FOR UPDATE`` ordered by id (so
+    concurrent batches cannot deadlock), idempotency keys are resolved with one
+    ``IN`` query, payments are inserted with ``bulk_create`` and the cached fee
+    ledgers and payout rows are written back set-wise. Requests that fail
+    validation get an ``error`` and do not stop the rest of the batch.
+    """
+    payment_requests = list(payment_requests)
+    fees = {
+        fee.pk: fee
+        for fee in SchoolFee.objects.select_for_update()
+        .filter(pk__in={item.fee_id for item in payment_requests})
+        .order_by('pk')
+    }
+    keys = {item.idempotency_key for item in payment_requests if item.idempotency_key}
+    existing_payments = {
+        payment.idempotency_key: payment
+        for payment in SchoolFeePayment.objects.filter(idempotency_key__in=keys)
+    }
+
+    outcomes = []
+    new_payments = []
+    posted_totals = {}
+    reference_number = (reference_number or '').strip()
+    for item in payment_requests:
+        outcome = FeePaymentOutcome(fee_id=item.fee_id)
+        outcomes.append(outcome)
+        fee = fees.get(item.fee_id)
+        if item.idempotency_key in existing_payments:
+            outcome.payment = existing_payments[item.idempotency_key]
+            continue
+        if fee is None:
+            outcome.error = f'School fee {item.fee_id} was not found.'
+            continue
+        if item.amount_paid is None or item.amount_paid <= 0:
+            outcome.error = 'Payment amount must be greater than zero.'
+            continue
+        remaining_balance = fee.balance - posted_totals.get(fee.pk, Decimal('0'))
+        if item.amount_paid > remaining_balance:
+            outcome.error = f'Payment amount cannot exceed the remaining balance of {remaining_balance}.'
+            continue
+
+        outcome.payment = SchoolFeePayment(
+            school_fee=fee,
+            amount_paid=item.amount_paid,
+            payment_date=payment_date,
+            payment_method=payment_method,
+            reference_number=reference_number,
+            recorded_by=recorded_by,
+            notes=notes or '',
+            idempotency_key=item.idempotency_key,
+        )
+        outcome.created = True
+        new_payments.append(outcome.payment)
+        posted_totals[fee.pk] = posted_totals.get(fee.pk, Decimal('0')) + item.amount_paid
+        if item.idempotency_key:
+            existing_payments[item.idempotency_key] = outcome.payment
+
+    if not new_payments:
+        return outcomes
+
+    # bulk_create skips SchoolFeePayment.save(), so the ledger is moved here; the rows are locked.
+    SchoolFeePayment.objects.bulk_create(new_payments, batch_size=RECONCILE_BATCH_SIZE)
+    now = timezone.now()
+    changed_fees = []
+    for fee_id, posted_total in posted_totals.items():
+        fee = fees[fee_id]
+        fee.apply_payment_summary(fee.amount_paid + posted_total)
+        fee.updated_at = now
+        changed_fees.append(fee)
+    SchoolFee.objects.bulk_update(
+        changed_fees,
+        FEE_SUMMARY_FIELDS + ['updated_at'],
+        batch_size=RECONCILE_BATCH_SIZE,
+    )
+
+    disbursements = list(
+        SchoolFeeDisbursement.objects.filter(school_fee_id__in=posted_totals, status__in=['pending', 'exported'])
+    )
+    for disbursement in disbursements:
+        fee = fees[disbursement.school_fee_id]
+        disbursement.amount_to_pay = fee.balance
+        disbursement.updated_at = now
+        if fee.balance <= 0:
+            disbursement.status = 'paid'
+            disbursement.paid_at = now
+            disbursement.paid_by = recorded_by
+            disbursement.payment_reference = reference_number
+    SchoolFeeDisbursement.objects.bulk_update(
+        disbursements,
+        ['amount_to_pay', 'status', 'paid_at', 'paid_by', 'payment_reference', 'updated_at'],
+        batch_size=RECONCILE_BATCH_SIZE,
+    )
+
+    schedule_snapshot_refresh(fee_snapshot_keys(SchoolFee.objects.filter(pk__in=posted_totals)))
+    bump_report_generations('fees')
+    return outcomes
+
+
+@dataclass(frozen=True)
+class BulkFeeEntry:
+    student_id: int
+    total_fees: Decimal
+    amount_paid: Decimal = Decimal('0')
+
+
+@dataclass
+class BulkFeeEntryResult:
+    created_count: int = 0
+    updated_count: int = 0
+    unchanged_count: int = 0
+    payment_count: int = 0
+    errors: dict = field(default_factory=dict)
+
+
+@transaction.atomic
+@transaction.atomic
+def save_bulk_fee_entries(entries, *, enrollments, existing_fees, term, payment_date, actor=None):
+    """Upsert the rows of a bulk fee entry sheet and post the payment increases.
+
+    ``entries`` are diffed against ``existing_fees`` (student id -> fee, already
+    loaded for display): new fees are inserted with ``bulk_create``, fees whose
+    total or snapshot changed are written with ``bulk_update`` and untouched rows
+    are skipped. The existing fees are locked and their ledger re-read first, so a
+    payment posted since the sheet was loaded is neither overwritten nor counted
+    twice. Every row is validated before anything is written; ``errors`` maps the
+    position of each rejected entry to its message and nothing is saved when it
+    is not empty.
+    """
+    locked_ledgers = {
+        row['pk']: row
+        for row in SchoolFee.objects.select_for_update()
+        .filter(pk__in=[fee.pk for fee in existing_fees.values()])
+        .order_by('pk')
+        .values('pk', *LEDGER_FIELDS)
+    }
+    for fee in existing_fees.values():
+        for name in LEDGER_FIELDS:
+            setattr(fee, name, locked_ledgers.get(fee.pk, {}).get(name, getattr(fee, name)))
+    enrollment_lookup = {enrollment.student_id: enrollment for enrollment in enrollments}
+    result = BulkFeeEntryResult()
+    new_fees = []
+    changed_fees = []
+    payment_targets = []
+
+    for position, entry in enumerate(entries):
+        enrollment = enrollment_lookup.get(entry.student_id)
+        if enrollment is None or entry.total_fees is None:
+            continue
+        desired_paid = entry.amount_paid or Decimal('0')
+        fee = existing_fees.get(entry.student_id)
+        current_paid = fee.amount_paid if fee else Decimal('0')
+        if desired_paid < current_paid:
+            result.errors[position] = (
+                'Bulk entry cannot reduce already recorded payments. Use payment history for corrections.'
+            )
+            continue
+        if desired_paid > entry.total_fees:
+            result.errors[position] = (
+                f'Payment amount cannot exceed the remaining balance of {entry.total_fees - current_paid}.'
+            )
+            continue
+
+        if fee is None:
+            fee = SchoolFee(
+                student_id=entry.student_id,
+                term=term,
+                amount_paid=Decimal('0'),
+                **build_fee_snapshot_from_enrollment(enrollment, total_fees=entry.total_fees),
+            )
+            new_fees.append(fee)
+        else:
+            before = _field_values(fee, FEE_SNAPSHOT_FIELDS + ['total_fees'])
+            fee.sync_from_enrollment_history(enrollment, overwrite=False)
+            fee.total_fees = entry.total_fees
+            if _changed_fields(before, _field_values(fee, FEE_SNAPSHOT_FIELDS + ['total_fees'])):
+                changed_fees.append(fee)
+            elif desired_paid == current_paid:
+                result.unchanged_count += 1
+                continue
+            else:
+                changed_fees.append(fee)
+        fee.payment_date = payment_date
+        fee.recorded_by = actor
+        fee.apply_payment_summary(fee.amount_paid)
+        if desired_paid > current_paid:
+            payment_targets.append((fee, desired_paid))
+
+    if result.errors:
+        return result
+
+    now = timezone.now()
+    # bulk_create/bulk_update skip SchoolFee.save(); the snapshot and summary are set above.
+    SchoolFee.objects.bulk_create(new_fees, batch_size=RECONCILE_BATCH_SIZE)
+    for fee in changed_fees:
+        fee.updated_at = now
+    SchoolFee.objects.bulk_update(
+        changed_fees,
+        FEE_SNAPSHOT_FIELDS + FEE_SUMMARY_FIELDS + ['total_fees', 'recorded_by', 'updated_at'],
+        batch_size=RECONCILE_BATCH_SIZE,
+    )
+    result.created_count = len(new_fees)
+    result.updated_count = len(changed_fees)
+
+    if payment_targets:
+        payment_requests = [
+            FeePaymentRequest(
+                fee.pk,
+                desired_paid - fee.amount_paid,
+                f'bulk-entry:{fee.pk}:{payment_date.isoformat()}:{desired_paid}',
+            )
+            for fee, desired_paid in payment_targets
+        ]
+        academic_year = enrollments[0].academic_year
+        outcomes = record_school_fee_payments_bulk(
+            payment_requests,
+            payment_date=payment_date,
+            payment_method='bank',
+            recorded_by=actor,
+            notes=f'Bulk entry adjustment for {academic_year.name} {dict(SchoolFee.TERM_CHOICES).get(term, term)}.',
+        )
+        result.payment_count = sum(1 for outcome in outcomes if outcome.created)
+
+    touched_ids = [fee.pk for fee in new_fees + changed_fees]
+    if touched_ids:
+        schedule_snapshot_refresh(fee_snapshot_keys(SchoolFee.objects.filter(pk__in=touched_ids)))
+        bump_report_generations('fees')
+    return result
@@ -0,0 +1,419 @@
+"""Bank statement reconciliation for school fee payouts.
+
+Statement lines are streamed from a CSV or XLSX export and matched against an
+in-memory index of outstanding fees built with one ``values()`` query:
+
+- by reference: the ``FEE <id>`` narrative written on every payout file line, or
+  the payment reference already stored on the fee's disbursement. A ``FEE <id>``
+  found only in the free-text description ("SCHOOL FEE 2024") is trusted only
+  when the line's account and amount agree with that fee too;
+- by account and amount: the school's normalised bank account number plus the
+  exact amount, when exactly one outstanding fee fits.
+
+Each match is posted with ``record_school_fee_payment`` under an idempotency key
+derived from the statement line itself, so importing overlapping statements or
+the same file twice never posts a payment twice.
+"""
+
+import csv
+import hashlib
+import io
+import os
+import re
+import zipfile
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from .models import SchoolFee, SchoolFeeDisbursement, SchoolFeePayment
+from .payouts import normalize_account_number
+from .services import record_school_fee_payment
+
+
+STATEMENT_COLUMNS = {
+    'date': ('value date', 'transaction date', 'posting date', 'date'),
+    'amount': ('amount', 'debit', 'debit amount', 'withdrawal', 'paid out'),
+    'account_number': ('beneficiary account', 'account number', 'counterparty account', 'credit account', 'account'),
+    'reference': ('reference', 'transaction reference', 'ref'),
+    'description': ('description', 'narrative', 'details', 'remarks'),
+}
+REQUIRED_STATEMENT_COLUMNS = ('date', 'amount')
+STATEMENT_CHUNK_SIZE = 500
+STATEMENT_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d')
+FEE_NARRATIVE_RE = re.compile(r'\bFEE\s*0*(\d+)\b', re.IGNORECASE)
+REFERENCE_CLEAN_RE = re.compile(r'[^0-9A-Z]')
+
+
+class StatementImportError(Exception):
+    """Raised when a statement file cannot be read at all."""
+
+
+@dataclass(frozen=True)
+class StatementLine:
+    line_number: int
+    value_date: date | None
+    amount: Decimal | None
+    account_number: str
+    reference: str
+    description: str
+
+
+@dataclass(frozen=True)
+class StatementMatch:
+    line: StatementLine
+    fee_id: int
+    matched_by: str
+    idempotency_key: str
+
+
+@dataclass(frozen=True)
+class UnmatchedStatementLine:
+    line: StatementLine
+    reason: str
+
+
+@dataclass
+class StatementImportResult:
+    line_count: int = 0
+    posted_count: int = 0
+    duplicate_count: int = 0
+    posted_amount: Decimal = Decimal('0')
+    matches: list = field(default_factory=list)
+    unmatched: list = field(default_factory=list)
+
+    @property
+    def matched_count(self):
+        return len(self.matches)
+
+
+def normalize_reference(value):
+    return REFERENCE_CLEAN_RE.sub('', str(value or '').upper())
+
+
+def _clean_text(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _parse_amount(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        amount = Decimal(str(value))
+    else:
+        text = str(value).strip().replace(',', '').replace(' ', '')
+        negative = text.startswith('(') and text.endswith(')')
+        try:
+            amount = Decimal(text.strip('()'))
+        except InvalidOperation:
+            return None
+        if negative:
+            amount = -amount
+    # Debits are negative on some statements; the payout amount is what matters.
+    return abs(amount).quantize(Decimal('0.01'))
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _clean_text(value)
+    for date_format in STATEMENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:10], date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _column_index(header_row):
+    headers = {
+        ' '.join(_clean_text(value).lower().replace('_', ' ').split()): index
+        for index, value in enumerate(header_row)
+        if _clean_text(value)
+    }
+    index = {}
+    for column, aliases in STATEMENT_COLUMNS.items():
+        for alias in aliases:
+            if alias in headers:
+                index[column] = headers[alias]
+                break
+    missing = [column for column in REQUIRED_STATEMENT_COLUMNS if column not in index]
+    if missing:
+        raise StatementImportError(f"Statement is missing required columns: {', '.join(missing)}.")
+    return index
+
+
+def _build_lines(rows):
+    rows = iter(rows)
+    index = _column_index(next(rows, ()))
+
+    def value(row, column):
+        position = index.get(column)
+        return row[position] if position is not None and position < len(row) else None
+
+    for line_number, row in enumerate(rows, start=2):
+        if not row or not any(_clean_text(cell) for cell in row):
+            continue
+        yield StatementLine(
+            line_number=line_number,
+            value_date=_parse_date(value(row, 'date')),
+            amount=_parse_amount(value(row, 'amount')),
+            account_number=normalize_account_number(value(row, 'account_number')),
+            reference=_clean_text(value(row, 'reference')),
+            description=_clean_text(value(row, 'description')),
+        )
+
+
+def read_statement_lines(statement_file, filename=None):
+    """Yield ``StatementLine`` rows from a CSV or XLSX file object without loading it whole."""
+    filename = filename or getattr(statement_file, 'name', '') or ''
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        try:
+            workbook = load_workbook(statement_file, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError) as exc:
+            raise StatementImportError('The statement workbook is damaged or is not an .xlsx file.') from exc
+        try:
+            yield from _build_lines(workbook.active.iter_rows(values_only=True))
+        except zipfile.BadZipFile as exc:
+            raise StatementImportError('The statement workbook is damaged or is not an .xlsx file.') from exc
+        finally:
+            workbook.close()
+    elif extension in ('.csv', '.txt'):
+        text_file = io.TextIOWrapper(statement_file, encoding='utf-8-sig', newline='')
+        try:
+            yield from _build_lines(csv.reader(text_file))
+        except UnicodeDecodeError as exc:
+            raise StatementImportError('Save the bank statement CSV with UTF-8 encoding and upload it again.') from exc
+        except csv.Error as exc:
+            raise StatementImportError(f'The statement CSV could not be read: {exc}') from exc
+        finally:
+            text_file.detach()
+    else:
+        raise StatementImportError('Upload the bank statement as a .csv or .xlsx file.')
+
+
+class OutstandingFeeIndex:
+    """Hash indexes over outstanding fees; balances are tracked as lines are matched."""
+
+    def __init__(self, rows):
+        self.balances = {}
+        self.accounts = {}
+        self.by_reference = {}
+        self.by_account_amount = defaultdict(list)
+        for row in rows:
+            fee_id = row['pk']
+            account = normalize_account_number(row['bank_account_number'] or row['school__bank_account_number'])
+            self.balances[fee_id] = row['balance']
+            self.accounts[fee_id] = account
+            reference = normalize_reference(row['disbursement__payment_reference'])
+            if reference:
+                self.by_reference[reference] = fee_id
+            if account:
+                self.by_account_amount[(account, row['balance'])].append(fee_id)
+
+    @classmethod
+    def from_queryset(cls, fee_queryset):
+        return cls(
+            fee_queryset.filter(balance__gt=0)
+            .order_by('pk')
+            .values(
+                'pk',
+                'balance',
+                'bank_account_number',
+                'school__bank_account_number',
+                'disbursement__payment_reference',
+            )
+            .iterator(chunk_size=2000)
+        )
+
+    def _narrative_fee(self, text):
+        narrative_match = FEE_NARRATIVE_RE.search(text)
+        if narrative_match and int(narrative_match.group(1)) in self.balances:
+            return int(narrative_match.group(1))
+        return None
+
+    def _reference_candidate(self, line):
+        fee_id = self._narrative_fee(line.reference)
+        if fee_id is not None:
+            return fee_id
+        return self.by_reference.get(normalize_reference(line.reference))
+
+    def _description_candidate(self, line):
+        """Free text can name a fee by accident, so the account and amount must agree too."""
+        fee_id = self._narrative_fee(line.description)
+        if (
+            fee_id is not None
+            and line.account_number
+            and line.account_number == self.accounts[fee_id]
+            and line.amount == self.balances[fee_id]
+        ):
+            return fee_id
+        return None
+
+    def match(self, line):
+        """Return ``(fee_id, matched_by, reason)`` for one statement line."""
+        fee_id = self._reference_candidate(line)
+        if fee_id is not None:
+            if line.account_number and self.accounts[fee_id] and line.account_number != self.accounts[fee_id]:
+                return None, None, 'Reference matches a fee paid to a different account.'
+            if line.amount > self.balances[fee_id]:
+                return None, None, f'Amount exceeds the outstanding balance of {self.balances[fee_id]}.'
+            return fee_id, 'reference', ''
+        fee_id = self._description_candidate(line)
+        if fee_id is not None:
+            return fee_id, 'reference', ''
+
+        if not line.account_number:
+            return None, None, 'No fee reference or account number on the line.'
+        candidates = [
+            candidate for candidate in self.by_account_amount.get((line.account_number, line.amount), ())
+            if self.balances[candidate] == line.amount
+        ]
+        if len(candidates) == 1:
+            return candidates[0], 'account', ''
+        if candidates:
+            return None, None, f'{len(candidates)} outstanding fees match this account and amount.'
+        return None, None, 'No outstanding fee matches this account and amount.'
+
+    def apply(self, fee_id, amount):
+        self.balances[fee_id] -= amount
+
+
+def statement_idempotency_key(line, occurrence):
+    """Stable key for a statement line; ``occurrence`` separates identical lines in one file."""
+    source = '|'.join([
+        line.value_date.isoformat(),
+        f'{line.amount:.2f}',
+        line.account_number,
+        normalize_reference(line.reference),
+        normalize_reference(line.description),
+        str(occurrence),
+    ])
+    return f"statement:{hashlib.sha256(source.encode('utf-8')).hexdigest()[:40]}"
+
+
+def _settle_disbursements(fee_ids, *, paid_by, references):
+    """Bring payout rows for the posted fees in line with their new balances."""
+    now = timezone.now()
+    disbursements = list(
+        SchoolFeeDisbursement.objects.select_related('school_fee')
+        .filter(school_fee_id__in=fee_ids, status__in=['pending', 'exported'])
+    )
+    for disbursement in disbursements:
+        balance = disbursement.school_fee.balance
+        disbursement.amount_to_pay = balance
+        disbursement.updated_at = now
+        if balance <= 0:
+            disbursement.status = 'paid'
+            disbursement.paid_at = now
+            disbursement.paid_by = paid_by
+            disbursement.payment_reference = references.get(disbursement.school_fee_id, '')[:100]
+    SchoolFeeDisbursement.objects.bulk_update(
+        disbursements,
+        ['amount_to_pay', 'status', 'paid_at', 'paid_by', 'payment_reference', 'updated_at'],
+    )
+
+
+def _chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_bank_statement(statement_lines, *, fee_queryset=None, recorded_by=None, dry_run=False):
+    """Match statement lines to outstanding fees and post the matches as bank payments."""
+    fee_queryset = SchoolFee.objects.all() if fee_queryset is None else fee_queryset
+    index = OutstandingFeeIndex.from_queryset(fee_queryset)
+    result = StatementImportResult()
+    occurrences = Counter()
+    posted_references = {}
+
+    for chunk in _chunked(statement_lines, STATEMENT_CHUNK_SIZE):
+        keyed_lines = []
+        for line in chunk:
+            result.line_count += 1
+            if line.amount is None or line.amount <= 0:
+                result.unmatched.append(UnmatchedStatementLine(line, 'Missing or zero amount.'))
+            elif line.value_date is None:
+                result.unmatched.append(UnmatchedStatementLine(line, 'Missing or unreadable date.'))
+            else:
+                identity = (line.value_date, line.amount, line.account_number, line.reference, line.description)
+                occurrences[identity] += 1
+                keyed_lines.append((line, statement_idempotency_key(line, occurrences[identity])))
+        # Lines posted by an earlier import are recognised before matching, with one query per chunk.
+        already_posted = set(
+            SchoolFeePayment.objects.filter(idempotency_key__in=[key for _line, key in keyed_lines])
+            .values_list('idempotency_key', flat=True)
+        )
+
+        for line, key in keyed_lines:
+            if key in already_posted:
+                result.duplicate_count += 1
+                continue
+            fee_id, matched_by, reason = index.match(line)
+            if fee_id is None:
+                result.unmatched.append(UnmatchedStatementLine(line, reason))
+                continue
+            if not dry_run:
+                try:
+                    with transaction.atomic():
+                        _payment, created = record_school_fee_payment(
+                            fee=SchoolFee(pk=fee_id),
+                            amount_paid=line.amount,
+                            payment_date=line.value_date,
+                            payment_method='bank',
+                            reference_number=(line.reference or line.description)[:100],
+                            recorded_by=recorded_by,
+                            notes=f'Imported from bank statement line {line.line_number}.',
+                            idempotency_key=key,
+                        )
+                except ValidationError as exc:
+                    result.unmatched.append(UnmatchedStatementLine(line, '; '.join(exc.messages)))
+                    continue
+                if not created:
+                    result.duplicate_count += 1
+                    continue
+                result.posted_count += 1
+                result.posted_amount += line.amount
+                posted_references[fee_id] = line.reference or line.description
+            result.matches.append(StatementMatch(line, fee_id, matched_by, key))
+            index.apply(fee_id, line.amount)
+
+    if posted_references:
+        _settle_disbursements(posted_references, paid_by=recorded_by, references=posted_references)
+    return result
+
+
+def write_unmatched_report(result, stream, *, source='', header=True):
+    """Write the unmatched statement lines as CSV for manual follow-up."""
+    writer = csv.writer(stream)
+    if header:
+        writer.writerow(['Statement', 'Line', 'Date', 'Amount', 'Account Number', 'Reference', 'Description', 'Reason'])
+    for item in result.unmatched:
+        line = item.line
+        writer.writerow([
+            source,
+            line.line_number,
+            line.value_date.isoformat() if line.value_date else '',
+            f'{line.amount:.2f}' if line.amount is not None else '',
+            line.account_number,
+            line.reference,
+            line.description,
+            item.reason,
+        ])
@@ -1,17 +1,40 @@
-from io import BytesIO
+import hashlib
+import os
+import tempfile
+from io import BytesIO, StringIO
+from datetime import date
 from decimal import Decimal
+from unittest import mock, skipUnless
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from openpyxl import load_workbook
 
 from core.models import AcademicYear, District, Partner, Province, School
 from families.models import Family
-from finance.models import SchoolFee, SchoolFeeDisbursement, SchoolFeePayment
-from finance.services import get_or_create_school_fee_for_enrollment, record_school_fee_payment
+from finance import payouts
+from finance.models import FeeAgingBucket, PayoutBatch, SchoolFee, SchoolFeeDisbursement, SchoolFeePayment
+from finance.payouts import stream_payout_batch
+from finance.statements import StatementImportError, StatementLine, import_bank_statement, read_statement_lines
+from finance.services import (
+    find_fee_ledger_drift,
+    FeePaymentRequest,
+    get_or_create_school_fee_for_enrollment,
+    BulkFeeEntry,
+    reconcile_disbursement_scope,
+    record_school_fee_payment,
+    roll_out_term_fees,
+    sweep_overdue_fees,
+    record_school_fee_payments_bulk,
+    save_bulk_fee_entries,
+    summarize_fees_by_school,
+)
 from students.models import Student, StudentEnrollmentHistory
 
 
@@ -341,7 +364,7 @@ class SchoolFeeDomainTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('pending_school_fee_payments_by_school.xlsx', response['Content-Disposition'])
 
-        workbook = load_workbook(BytesIO(response.content))
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)))
         worksheet = workbook.active
         rows = list(worksheet.iter_rows(values_only=True))
         flattened = ' | '.join(str(value) for row in rows for value in row if value is not None)
@@ -403,3 +426,585 @@ class SchoolFeeDomainTests(TestCase):
         self.assertEqual(SchoolFeeDisbursement.objects.filter(status='pending').count(), 2)
         self.assertTrue(SchoolFeeDisbursement.objects.filter(school_fee=fee_alpha).exists())
         self.assertTrue(SchoolFeeDisbursement.objects.filter(school_fee=fee_beta).exists())
+
+    def test_school_fee_dashboard_groups_schools_in_the_database(self):
+        fee_term_1 = self._create_fee(self.enrollment_2024, term='1', total='1200.00')
+        self._create_fee(self.enrollment_2024, term='2', total='1200.00')
+        record_school_fee_payment(
+            fee=fee_term_1,
+            amount_paid=Decimal('1200.00'),
+            payment_date=self.year_2024.created_at.date(),
+            payment_method='bank',
+            recorded_by=self.user,
+        )
+        external_fee = self._create_fee(self.enrollment_2024, term='3', total='500.00')
+        SchoolFee.objects.filter(pk=external_fee.pk).update(school=None, school_name='hill academy')
+
+        groups = {group['school_name']: group for group in summarize_fees_by_school(SchoolFee.objects.all())}
+        self.assertEqual(list(groups), ['Alpha Primary', 'hill academy'])
+        alpha = groups['Alpha Primary']
+        self.assertEqual(alpha['school_id'], self.school_a.id)
+        self.assertEqual(alpha['student_count'], 1)
+        self.assertEqual(alpha['total_required'], Decimal('2400.00'))
+        self.assertEqual(alpha['total_paid'], Decimal('1200.00'))
+        self.assertEqual((alpha['paid_count'], alpha['pending_count']), (1, 1))
+        self.assertIsNone(groups['hill academy']['school_id'])
+
+        response = self.client.get(
+            reverse('finance:school_fees_dashboard'),
+            {'academic_year': self.year_2024.id, 'term': '2'},
+        )
+        dashboard_groups = list(response.context['school_fee_groups'].object_list)
+        self.assertEqual(len(dashboard_groups), 1)
+        self.assertEqual(dashboard_groups[0]['school_name'], 'Alpha Primary')
+        self.assertEqual(dashboard_groups[0]['status_counts'], {'paid': 0, 'partial': 0, 'pending': 1, 'overdue': 0})
+        self.assertTrue(dashboard_groups[0]['has_linked_school'])
+
+        students_response = self.client.get(reverse('finance:school_fee_students', args=[self.school_a.id]))
+        summaries = list(students_response.context['student_summaries'].object_list)
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0]['student'], self.student)
+        self.assertEqual(summaries[0]['total_balance'], Decimal('1200.00'))
+        self.assertEqual(students_response.context['school_totals']['student_count'], 1)
+
+    def test_bulk_reconciliation_supports_dry_run_and_flat_query_count(self):
+        fees = [self._create_fee(self.enrollment_2024, term=term) for term in ('1', '2', '3')]
+        SchoolFee.objects.filter(pk__in=[fee.pk for fee in fees]).update(
+            school_name='Stale School',
+            balance=Decimal('0.00'),
+            payment_status='paid',
+        )
+
+        preview = reconcile_disbursement_scope(academic_year=self.year_2024, dry_run=True)
+        self.assertEqual(preview['created_count'], 3)
+        self.assertEqual(SchoolFeeDisbursement.objects.count(), 0)
+        self.assertTrue(SchoolFee.objects.filter(school_name='Stale School').exists())
+        fee_changes = [change for change in preview['changes'] if change['model'] == 'school_fee']
+        self.assertEqual(fee_changes[0]['fields']['school_name'], ('Stale School', 'Alpha Primary'))
+
+        with CaptureQueriesContext(connection) as single_term:
+            reconcile_disbursement_scope(academic_year=self.year_2024, term='1')
+        with CaptureQueriesContext(connection) as all_terms:
+            results = reconcile_disbursement_scope(academic_year=self.year_2024)
+
+        self.assertEqual(len(single_term.captured_queries), len(all_terms.captured_queries))
+        self.assertEqual(results['created_count'], 2)
+        self.assertFalse(SchoolFee.objects.filter(school_name='Stale School').exists())
+        self.assertEqual(
+            set(SchoolFee.objects.values_list('payment_status', flat=True)),
+            {'pending'},
+        )
+        self.assertEqual(SchoolFeeDisbursement.objects.filter(status='pending').count(), 3)
+
+    @skipUnless(connection.features.has_select_for_update, 'Row locks need a backend with SELECT ... FOR UPDATE.')
+    def test_reconciliation_locks_the_fees_it_rewrites(self):
+        self._create_fee(self.enrollment_2024, term='1')
+        with CaptureQueriesContext(connection) as preview:
+            reconcile_disbursement_scope(academic_year=self.year_2024, dry_run=True)
+        with CaptureQueriesContext(connection) as reconcile:
+            reconcile_disbursement_scope(academic_year=self.year_2024)
+
+        self.assertFalse([query for query in preview if 'FOR UPDATE' in query['sql']])
+        self.assertTrue([query for query in reconcile if 'FOR UPDATE' in query['sql']])
+
+    def _post_payment(self, fee, amount, reference):
+        return SchoolFeePayment.objects.create(
+            school_fee=fee,
+            amount_paid=Decimal(amount),
+            payment_date=self.year_2024.created_at.date(),
+            payment_method='bank',
+            reference_number=reference,
+            recorded_by=self.user,
+        )
+
+    def test_payments_move_the_ledger_incrementally(self):
+        fee = self._create_fee(self.enrollment_2024, term='1', total='1000.00')
+        self._post_payment(fee, '100.00', 'LEDGER-1')
+        with CaptureQueriesContext(connection) as first_posting:
+            self._post_payment(fee, '100.00', 'LEDGER-2')
+        for index in range(3, 8):
+            self._post_payment(fee, '100.00', f'LEDGER-{index}')
+        with CaptureQueriesContext(connection) as later_posting:
+            payment = self._post_payment(fee, '100.00', 'LEDGER-8')
+        self.assertEqual(len(later_posting), len(first_posting))
+
+        fee.refresh_from_db()
+        self.assertEqual(fee.amount_paid, Decimal('800.00'))
+        self.assertEqual(fee.balance, Decimal('200.00'))
+        self.assertEqual(fee.payment_status, 'partial')
+        self.assertEqual(fee.payment_dates.count(','), 7)
+
+        self._post_payment(fee, '200.00', 'LEDGER-9')
+        fee.refresh_from_db()
+        self.assertEqual(fee.payment_status, 'paid')
+
+        payment.delete()
+        fee.refresh_from_db()
+        self.assertEqual(fee.amount_paid, Decimal('900.00'))
+        self.assertEqual(fee.balance, Decimal('100.00'))
+        self.assertEqual(fee.payment_status, 'partial')
+        self.assertEqual(find_fee_ledger_drift(SchoolFee.objects.all()), [])
+
+    def test_verify_fee_ledger_reports_and_repairs_drift(self):
+        fee = self._create_fee(self.enrollment_2024, term='2', total='1000.00')
+        self._post_payment(fee, '300.00', 'DRIFT-1')
+        SchoolFee.objects.filter(pk=fee.pk).update(
+            amount_paid=Decimal('50.00'),
+            balance=Decimal('950.00'),
+            school_name='Snapshot Kept',
+        )
+
+        output = StringIO()
+        call_command('verify_fee_ledger', stdout=output)
+        self.assertIn(f'Fee {fee.pk}: amount_paid 50.00 (payments 300.00)', output.getvalue())
+        self.assertIn('Drifted fees: 1', output.getvalue())
+
+        output = StringIO()
+        call_command('verify_fee_ledger', '--fix', stdout=output)
+        self.assertIn('Repaired fees: 1', output.getvalue())
+        fee.refresh_from_db()
+        self.assertEqual((fee.amount_paid, fee.balance, fee.payment_status), (Decimal('300.00'), Decimal('700.00'), 'partial'))
+        # The repair only touches the ledger, not the enrollment snapshot.
+        self.assertEqual(fee.school_name, 'Snapshot Kept')
+        self.assertEqual(find_fee_ledger_drift(SchoolFee.objects.all()), [])
+
+    def _mark_paid_in_bulk(self, fees, reference):
+        return record_school_fee_payments_bulk(
+            [
+                FeePaymentRequest(fee.pk, fee.balance, f'bulk:{reference}:{fee.pk}')
+                for fee in fees
+            ],
+            payment_date=self.year_2024.created_at.date(),
+            payment_method='bank',
+            reference_number=reference,
+            recorded_by=self.user,
+        )
+
+    def test_bulk_payment_posting_uses_a_flat_number_of_queries(self):
+        fees = [
+            self._create_fee(enrollment, term=term, total='1000.00')
+            for enrollment in (self.enrollment_2024, self.enrollment_2025)
+            for term in ('1', '2', '3')
+        ]
+        for fee in (fees[0], fees[2]):
+            SchoolFeeDisbursement.objects.create(school_fee=fee, status='pending')
+
+        with CaptureQueriesContext(connection) as small_batch:
+            outcomes = self._mark_paid_in_bulk(fees[:2], 'BULK-A')
+        with CaptureQueriesContext(connection) as large_batch:
+            self._mark_paid_in_bulk(fees[2:], 'BULK-B')
+        self.assertEqual(len(small_batch), len(large_batch))
+        self.assertTrue(all(outcome.created for outcome in outcomes))
+
+        self.assertFalse(SchoolFee.objects.filter(balance__gt=0).exists())
+        self.assertEqual(set(SchoolFee.objects.values_list('payment_status', flat=True)), {'paid'})
+        disbursement = SchoolFeeDisbursement.objects.get(school_fee=fees[0])
+        self.assertEqual(disbursement.status, 'paid')
+        self.assertEqual(disbursement.payment_reference, 'BULK-A')
+        self.assertEqual(find_fee_ledger_drift(SchoolFee.objects.all()), [])
+
+        repeated = record_school_fee_payments_bulk(
+            [FeePaymentRequest(fees[0].pk, Decimal('1000.00'), f'bulk:BULK-A:{fees[0].pk}'),
+             FeePaymentRequest(fees[1].pk, Decimal('10.00'), 'bulk:extra')],
+            payment_date=self.year_2024.created_at.date(),
+            payment_method='bank',
+        )
+        self.assertFalse(repeated[0].created)
+        self.assertEqual(repeated[0].payment.reference_number, 'BULK-A')
+        self.assertIn('remaining balance', repeated[1].error)
+        self.assertEqual(SchoolFeePayment.objects.count(), 6)
+
+    def test_mark_disbursements_paid_posts_selected_fees_in_one_batch(self):
+        fees = [self._create_fee(self.enrollment_2024, term=term, total='800.00') for term in ('1', '2')]
+        response = self.client.post(reverse('finance:mark_fee_disbursements_paid'), {
+            'selected_fees': [fee.pk for fee in fees],
+            'payment_date': '2024-10-01',
+            'payment_reference': 'BANK-77',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(SchoolFeePayment.objects.order_by('school_fee_id').values_list('amount_paid', 'reference_number')),
+            [(Decimal('800.00'), 'BANK-77'), (Decimal('800.00'), 'BANK-77')],
+        )
+        self.assertFalse(SchoolFee.objects.filter(pk__in=[fee.pk for fee in fees], balance__gt=0).exists())
+
+    def test_payout_batch_streams_control_totals_and_stamps_disbursements(self):
+        fees = [self._create_fee(self.enrollment_2024, term=term, total='750.50') for term in ('1', '2')]
+        SchoolFeeDisbursement.objects.create(school_fee=fees[0], status='pending')
+
+        response = self.client.post(
+            reverse('finance:export_payout_batch') + f'?academic_year={self.year_2024.id}',
+            {'file_format': 'csv'},
+        )
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines(keepends=True)
+
+        batch = PayoutBatch.objects.get()
+        self.assertEqual(response['X-Payout-Batch'], batch.reference)
+        self.assertEqual(batch.status, PayoutBatch.STATUS_COMPLETED)
+        self.assertEqual(batch.record_count, 2)
+        self.assertEqual(batch.total_amount, Decimal('1501.00'))
+        self.assertEqual(batch.filters, {'academic_year_filter': str(self.year_2024.id)})
+        self.assertEqual(batch.checksum, hashlib.sha256(''.join(lines[:-1]).encode('utf-8')).hexdigest())
+        self.assertEqual(lines[-1].strip(), f'T,2,1501.00,{batch.checksum}')
+        self.assertIn('111222', lines[2])
+
+        disbursements = SchoolFeeDisbursement.objects.filter(school_fee__in=fees)
+        self.assertEqual(disbursements.count(), 2)
+        self.assertEqual(set(disbursements.values_list('status', 'payout_batch')), {('exported', batch.pk)})
+
+        # Exported rows stay exported when the queue is reconciled again.
+        reconcile_disbursement_scope(academic_year=self.year_2024)
+        self.assertEqual(set(disbursements.values_list('status', flat=True)), {'exported'})
+
+    def test_second_payout_batch_skips_fees_already_exported(self):
+        fee = self._create_fee(self.enrollment_2024, term='1', total='600.00')
+        url = reverse('finance:export_payout_batch') + f'?academic_year={self.year_2024.id}'
+
+        b''.join(self.client.post(url, {'file_format': 'csv'}).streaming_content)
+        first = PayoutBatch.objects.get()
+        second_lines = b''.join(self.client.post(url, {'file_format': 'csv'}).streaming_content).decode('utf-8').splitlines()
+
+        second = PayoutBatch.objects.exclude(pk=first.pk).get()
+        self.assertEqual(second.record_count, 0)
+        self.assertTrue(second_lines[-1].startswith('T,0,0'))
+        self.assertEqual(SchoolFeeDisbursement.objects.get(school_fee=fee).payout_batch, first)
+
+        # An abandoned third download leaves the first batch's rows alone.
+        third = self.client.post(url, {'file_format': 'csv'})
+        next(iter(third.streaming_content))
+        third.close()
+        disbursement = SchoolFeeDisbursement.objects.get(school_fee=fee)
+        self.assertEqual((disbursement.status, disbursement.payout_batch), ('exported', first))
+
+    def test_interleaved_payout_batches_write_each_fee_once(self):
+        fees = [
+            self._create_fee(self.enrollment_2024, term='1', total='600.00'),
+            self._create_fee(self.enrollment_2024, term='2', total='400.00'),
+        ]
+        first = PayoutBatch.objects.create(file_format=PayoutBatch.FORMAT_CSV, created_by=self.user)
+        second = PayoutBatch.objects.create(file_format=PayoutBatch.FORMAT_CSV, created_by=self.user)
+        first_stream = stream_payout_batch(first, SchoolFee.objects.all())
+        claim = payouts._claim_disbursements
+        outputs = {}
+
+        def claim_after_the_second_batch(batch, lines, exported_at):
+            # The first batch has read its rows; the second exports them before it claims.
+            if batch == first and second.pk not in outputs:
+                outputs[second.pk] = ''.join(stream_payout_batch(second, SchoolFee.objects.all()))
+            return claim(batch, lines, exported_at)
+
+        with mock.patch.object(payouts, '_claim_disbursements', side_effect=claim_after_the_second_batch):
+            outputs[first.pk] = ''.join(first_stream)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.record_count, second.record_count), (0, 2))
+        self.assertEqual(first.total_amount, Decimal('0'))
+        for fee in fees:
+            self.assertNotIn(f'FEE {fee.pk} ', outputs[first.pk])
+            self.assertEqual(SchoolFeeDisbursement.objects.get(school_fee=fee).payout_batch, second)
+
+    def test_payout_batch_fixed_width_records_have_constant_length(self):
+        self._create_fee(self.enrollment_2025, term='1', total='900.00')
+        self._create_fee(self.enrollment_2025, term='2', total='1900.00')
+
+        response = self.client.post(reverse('finance:export_payout_batch'), {'file_format': 'fixed'})
+        lines = b''.join(response.streaming_content).decode('ascii').split('\r\n')[:-1]
+        details = [line for line in lines if line.startswith('D')]
+        self.assertEqual(len(details), 2)
+        self.assertEqual(len({len(line) for line in details}), 1)
+        self.assertTrue(lines[-1].startswith('T00000002000000000000280000'))
+
+        self.assertEqual(self.client.post(reverse('finance:export_payout_batch'), {'file_format': 'pdf'}).status_code, 302)
+        self.assertEqual(self.client.get(reverse('finance:export_payout_batch')).status_code, 302)
+        self.assertEqual(PayoutBatch.objects.count(), 1)
+
+    def test_bank_statement_import_posts_matches_once_and_reports_the_rest(self):
+        by_reference = self._create_fee(self.enrollment_2024, term='1', total='500.00')
+        by_account = self._create_fee(self.enrollment_2024, term='2', total='650.00')
+        SchoolFeeDisbursement.objects.create(school_fee=by_reference, status='exported')
+        statement = (
+            'Value Date,Description,Reference,Beneficiary Account,Debit\n'
+            f'01/10/2024,PB000001 FEE {by_reference.pk} T1,TRX-1,111 222,-500.00\n'
+            '02/10/2024,School fees,TRX-2,111222.0,"650.00"\n'
+            '03/10/2024,Unknown payee,TRX-3,999999,75.00\n'
+        ).encode('utf-8')
+
+        def upload():
+            return self.client.post(reverse('finance:bank_statement_import'), {
+                'statement_file': SimpleUploadedFile('october.csv', statement, content_type='text/csv'),
+            })
+
+        response = upload()
+        self.assertEqual(response.status_code, 200)
+        result = response.context['result']
+        self.assertEqual((result.line_count, result.posted_count, len(result.unmatched)), (3, 2, 1))
+        self.assertEqual(result.unmatched[0].line.line_number, 4)
+        self.assertEqual(
+            {match.fee_id: match.matched_by for match in result.matches},
+            {by_reference.pk: 'reference', by_account.pk: 'account'},
+        )
+        self.assertFalse(SchoolFee.objects.filter(pk__in=[by_reference.pk, by_account.pk], balance__gt=0).exists())
+        disbursement = SchoolFeeDisbursement.objects.get(school_fee=by_reference)
+        self.assertEqual((disbursement.status, disbursement.payment_reference), ('paid', 'TRX-1'))
+
+        repeated = upload().context['result']
+        self.assertEqual((repeated.posted_count, repeated.duplicate_count), (0, 2))
+        self.assertEqual(SchoolFeePayment.objects.count(), 2)
+
+    def test_fee_number_in_the_description_needs_the_account_and_amount_to_agree(self):
+        fee = self._create_fee(self.enrollment_2024, term='1', total='500.00')
+        value_date = self.year_2024.created_at.date()
+        lines = [
+            StatementLine(2, value_date, Decimal('200.00'), '111222', 'TRX-1', f'SCHOOL FEE {fee.pk}'),
+            StatementLine(3, value_date, Decimal('500.00'), '999999', 'TRX-2', f'SCHOOL FEE {fee.pk}'),
+            StatementLine(4, value_date, Decimal('200.00'), '', f'FEE {fee.pk}', 'Partial payout'),
+        ]
+
+        result = import_bank_statement(lines, dry_run=True)
+        self.assertEqual([match.line.line_number for match in result.matches], [4])
+        self.assertEqual([item.line.line_number for item in result.unmatched], [2, 3])
+
+    def test_unreadable_statement_files_raise_statement_import_errors(self):
+        with self.assertRaisesMessage(StatementImportError, 'UTF-8'):
+            list(read_statement_lines(BytesIO('Date,Amount,Description\n2024-10-01,400,Caf\xe9\n'.encode('cp1252')), 'october.csv'))
+        with self.assertRaisesMessage(StatementImportError, 'damaged'):
+            list(read_statement_lines(BytesIO(b'not a workbook'), 'october.xlsx'))
+
+        response = self.client.post(reverse('finance:bank_statement_import'), {
+            'statement_file': SimpleUploadedFile('october.csv', 'Date,Amount\n\xe9\n'.encode('cp1252'), content_type='text/csv'),
+        })
+        self.assertRedirects(response, reverse('finance:bank_statement_import'))
+
+    def test_bank_statement_matching_leaves_ambiguous_lines_unmatched(self):
+        self._create_fee(self.enrollment_2024, term='1', total='400.00')
+        self._create_fee(self.enrollment_2024, term='2', total='400.00')
+        line = StatementLine(2, self.year_2024.created_at.date(), Decimal('400.00'), '111222', '', 'Fees')
+
+        result = import_bank_statement([line], dry_run=True)
+        self.assertEqual(result.matched_count, 0)
+        self.assertIn('2 outstanding fees', result.unmatched[0].reason)
+
+        output = StringIO()
+        with tempfile.TemporaryDirectory() as statement_dir:
+            path = os.path.join(statement_dir, 'october.csv')
+            with open(path, 'w', encoding='utf-8') as statement_file:
+                statement_file.write('Date,Amount,Account Number\n2024-10-01,400,111222\n')
+            call_command('import_bank_statement', path, '--dry-run', stdout=output)
+        self.assertIn('matched 0', output.getvalue())
+        self.assertIn('unmatched 1', output.getvalue())
+
+    def test_term_rollout_creates_missing_fees_in_one_pass(self):
+        for index in range(3):
+            student = Student.objects.create(
+                family=self.family,
+                partner=self.partner_a,
+                first_name=f'Pupil{index}',
+                last_name='Rollout',
+                gender='M',
+                date_of_birth='2012-05-05',
+                school=self.school_a,
+                school_name=self.school_a.name,
+                class_level='Primary 5',
+                school_level='primary',
+                enrollment_status='enrolled',
+                sponsorship_status='active',
+                is_active=True,
+            )
+            StudentEnrollmentHistory.objects.create(
+                student=student,
+                academic_year=self.year_2025,
+                school=self.school_a if index else None,
+                school_name='' if index else 'Home School',
+                class_level='Primary 5',
+                school_level='primary',
+            )
+        existing = self._create_fee(self.enrollment_2025, term='2', total='999.00')
+
+        with CaptureQueriesContext(connection) as one_school:
+            roll_out_term_fees(academic_year=self.year_2025, term='1', school=self.school_b, dry_run=True)
+        with CaptureQueriesContext(connection) as every_school:
+            preview = roll_out_term_fees(academic_year=self.year_2025, term='2', dry_run=True)
+        self.assertEqual(len(one_school), len(every_school))
+        self.assertEqual((preview.created_count, preview.existing_count, preview.skipped_without_fee_count), (2, 1, 1))
+        self.assertEqual(SchoolFee.objects.filter(term='2').count(), 1)
+
+        output = StringIO()
+        call_command('roll_out_term_fees', '--academic-year', self.year_2025.name, '--term', '2', stdout=output)
+        self.assertIn('Created fees: 2', output.getvalue())
+        self.assertIn('Skipped existing fees: 1', output.getvalue())
+
+        created = SchoolFee.objects.filter(academic_year=self.year_2025, term='2').exclude(pk=existing.pk)
+        self.assertEqual(created.count(), 2)
+        fee = created.first()
+        self.assertEqual((fee.total_fees, fee.balance, fee.payment_status), (Decimal('1200.00'), Decimal('1200.00'), 'pending'))
+        self.assertEqual((fee.school_name, fee.bank_account_number), ('Alpha Primary', '111222'))
+        self.assertIsNotNone(fee.enrollment_history_id)
+        self.assertEqual(find_fee_ledger_drift(SchoolFee.objects.all()), [])
+
+        repeated = roll_out_term_fees(academic_year=self.year_2025, term='2')
+        self.assertEqual((repeated.created_count, repeated.existing_count), (0, 3))
+
+    def _bulk_entry_payload(self, school, students, *, amount_paid):
+        payload = {
+            'academic_year': self.year_2025.id,
+            'school': school.id,
+            'term': '1',
+            'category': 'all',
+            'payment_date': '2025-02-01',
+            'form-TOTAL_FORMS': str(len(students)),
+            'form-INITIAL_FORMS': '0',
+            'form-MIN_NUM_FORMS': '0',
+            'form-MAX_NUM_FORMS': '1000',
+        }
+        for index, student in enumerate(students):
+            payload[f'form-{index}-student_id'] = str(student.pk)
+            payload[f'form-{index}-total_fees'] = '1200.00'
+            payload[f'form-{index}-amount_paid'] = amount_paid
+        return payload
+
+    def _enroll_class(self, school, size, prefix):
+        students = []
+        for index in range(size):
+            student = Student.objects.create(
+                family=self.family,
+                first_name=f'{prefix}{index}',
+                last_name='Class',
+                gender='F',
+                date_of_birth='2013-03-03',
+                school=school,
+                school_name=school.name,
+                class_level='Primary 4',
+                school_level='primary',
+                enrollment_status='enrolled',
+                sponsorship_status='active',
+                is_active=True,
+            )
+            StudentEnrollmentHistory.objects.create(
+                student=student,
+                academic_year=self.year_2025,
+                school=school,
+                school_name=school.name,
+                class_level='Primary 4',
+                school_level='primary',
+            )
+            students.append(student)
+        return students
+
+    def test_bulk_entry_rereads_payments_posted_after_the_sheet_was_loaded(self):
+        fee = self._create_fee(self.enrollment_2024, term='1', total='1000.00')
+        stale_fee = SchoolFee.objects.get(pk=fee.pk)
+        self._post_payment(fee, Decimal('300.00'), 'COUNTER-1')
+
+        result = save_bulk_fee_entries(
+            [BulkFeeEntry(student_id=self.student.pk, total_fees=Decimal('1000.00'), amount_paid=Decimal('500.00'))],
+            enrollments=[self.enrollment_2024],
+            existing_fees={self.student.pk: stale_fee},
+            term='1',
+            payment_date=date(2025, 1, 15),
+            actor=self.user,
+        )
+        self.assertEqual(result.payment_count, 1)
+        fee.refresh_from_db()
+        self.assertEqual((fee.amount_paid, fee.balance), (Decimal('500.00'), Decimal('500.00')))
+        self.assertEqual(fee.payments.order_by('pk').last().amount_paid, Decimal('200.00'))
+        self.assertEqual(find_fee_ledger_drift(SchoolFee.objects.filter(pk=fee.pk)), [])
+
+    def test_bulk_entry_query_count_stays_flat_as_the_class_grows(self):
+        url = reverse('finance:bulk_fee_entry')
+        small_class = self._enroll_class(self.school_a, 2, 'Small')
+        large_class = self._enroll_class(self.school_b, 8, 'Large')
+
+        # New fees with an opening payment, then payment increases on the existing fees.
+        for amount_paid in ('300.00', '500.00'):
+            with CaptureQueriesContext(connection) as small_save:
+                self.client.post(url, self._bulk_entry_payload(self.school_a, small_class, amount_paid=amount_paid))
+            with CaptureQueriesContext(connection) as large_save:
+                response = self.client.post(url, self._bulk_entry_payload(self.school_b, large_class, amount_paid=amount_paid))
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(len(small_save), len(large_save))
+
+        fees = SchoolFee.objects.filter(academic_year=self.year_2025, term='1')
+        self.assertEqual(fees.count(), 10)
+        self.assertEqual(SchoolFeePayment.objects.count(), 20)
+        self.assertEqual(set(fees.values_list('amount_paid', 'balance', 'payment_status')), {
+            (Decimal('500.00'), Decimal('700.00'), 'partial'),
+        })
+        self.assertEqual(set(fees.values_list('bank_account_number', flat=True)), {'111222', '333444'})
+        self.assertEqual(find_fee_ledger_drift(fees), [])
+
+        response = self.client.post(url, self._bulk_entry_payload(self.school_a, small_class, amount_paid='100.00'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('cannot reduce', response.content.decode())
+        self.assertEqual(SchoolFeePayment.objects.count(), 20)
+
+    def test_overdue_sweep_uses_term_due_dates_and_records_aging(self):
+        self.year_2024.term1_due_date = date(2024, 9, 1)
+        self.year_2024.term2_due_date = date(2024, 12, 1)
+        self.year_2024.save()
+        term_1 = self._create_fee(self.enrollment_2024, term='1', total='1000.00')
+        term_2 = self._create_fee(self.enrollment_2024, term='2', total='800.00')
+        term_3 = self._create_fee(self.enrollment_2024, term='3', total='600.00')
+        self._post_payment(term_2, Decimal('300.00'), 'PART-1')
+        paid = self._create_fee(self.enrollment_2025, term='1', total='500.00')
+        self._post_payment(paid, Decimal('500.00'), 'FULL-1')
+        self.year_2025.term1_due_date = date(2024, 9, 1)
+        self.year_2025.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            result = sweep_overdue_fees(date(2024, 12, 20))
+        fee_updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "finance_schoolfee"')]
+        # One UPDATE marks fees overdue and one reopens fees that are no longer past due.
+        self.assertEqual(len(fee_updates), 2)
+        self.assertEqual((result.swept_count, result.reopened_count), (2, 0))
+
+        statuses = dict(SchoolFee.objects.values_list('pk', 'payment_status'))
+        self.assertEqual(statuses[term_1.pk], 'overdue')
+        self.assertEqual(statuses[term_2.pk], 'overdue')
+        self.assertEqual(statuses[term_3.pk], 'pending')
+        self.assertEqual(statuses[paid.pk], 'paid')
+
+        aging = {
+            (row.term, row.bucket): (row.fee_count, row.outstanding_amount)
+            for row in FeeAgingBucket.objects.filter(snapshot_date=date(2024, 12, 20))
+        }
+        self.assertEqual(aging, {
+            ('1', '90+'): (1, Decimal('1000.00')),
+            ('2', '0-30'): (1, Decimal('500.00')),
+        })
+
+        output = StringIO()
+        call_command('sweep_overdue_fees', '--date', '2024-12-20', stdout=output)
+        self.assertIn('Marked overdue: 0', output.getvalue())
+        self.assertIn('Aging 90+ days: 1 fee(s)', output.getvalue())
+        self.assertEqual(FeeAgingBucket.objects.count(), 2)
+
+        response = self.client.get(reverse('finance:overdue_fees'))
+        self.assertContains(response, 'Over 90 days past due')
+
+    def test_overdue_fees_reopen_only_when_their_due_date_moves_later(self):
+        self.year_2024.term1_due_date = date(2024, 9, 1)
+        self.year_2024.term2_due_date = date(2024, 9, 1)
+        self.year_2024.term3_due_date = date(2024, 9, 1)
+        self.year_2024.save()
+        unpaid = self._create_fee(self.enrollment_2024, term='1', total='1000.00')
+        part_paid = self._create_fee(self.enrollment_2024, term='2', total='800.00')
+        still_due = self._create_fee(self.enrollment_2024, term='3', total='600.00')
+        self._post_payment(part_paid, Decimal('300.00'), 'PART-1')
+        self.assertEqual(sweep_overdue_fees(date(2024, 12, 20)).swept_count, 3)
+
+        self.year_2024.term1_due_date = date(2025, 1, 15)
+        self.year_2024.term2_due_date = date(2024, 12, 20)
+        self.year_2024.save()
+        # A year without due dates keeps fees marked overdue by hand.
+        manual = self._create_fee(self.enrollment_2025, term='1', total='500.00')
+        SchoolFee.objects.filter(pk=manual.pk).update(payment_status='overdue')
+        result = sweep_overdue_fees(date(2024, 12, 20))
+        self.assertEqual((result.swept_count, result.reopened_count), (0, 2))
+
+        statuses = dict(SchoolFee.objects.values_list('pk', 'payment_status'))
+        self.assertEqual(statuses[unpaid.pk], 'pending')
+        self.assertEqual(statuses[part_paid.pk], 'partial')
+        self.assertEqual(statuses[still_due.pk], 'overdue')
+        self.assertEqual(statuses[manual.pk], 'overdue')
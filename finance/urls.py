@@ -11,6 +11,8 @@ urlpatterns = [
     path('school-fees/disbursements/sync/', views.sync_fee_disbursement_queue, name='sync_fee_disbursement_queue'),
     path('school-fees/disbursements/export/', views.export_fee_disbursement_excel, name='export_fee_disbursement_excel'),
     path('school-fees/disbursements/export-pdf/', views.export_fee_disbursement_pdf, name='export_fee_disbursement_pdf'),
+    path('school-fees/disbursements/payout-batch/', views.export_payout_batch, name='export_payout_batch'),
+    path('school-fees/disbursements/statement-import/', views.bank_statement_import, name='bank_statement_import'),
     path('school-fees/disbursements/mark-paid/', views.mark_fee_disbursements_paid, name='mark_fee_disbursements_paid'),
     path('school/<int:school_id>/students/', views.school_fee_students, name='school_fee_students'),
     path('export/excel/', views.export_fees_excel, name='export_fees_excel'),
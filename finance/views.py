@@ -7,7 +7,7 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Q, Sum, Count
+from django.db.models import Count, Max, Q, Sum
 from django.conf import settings
 from django.core.paginator import Paginator
 from django.forms import formset_factory
@@ -15,27 +15,25 @@ from django.urls import reverse
 from django.utils import timezone
 from core.activity import set_audit_context
 from core.models import District, AcademicYear, Partner, School
+from core.pagination import CURSOR_PARAM, CursorPaginator
 from core.export_utils import (
+    EXPORT_CHUNK_SIZE,
+    ExcelReportWriter,
     ExportNumberedCanvas,
     add_export_header,
-    autosize_worksheet_columns,
     build_export_pdf_document,
     build_export_table,
     resolve_logo_path,
-    style_excel_header,
-    style_excel_table_rows,
-    write_excel_report_header,
 )
 from core.utils import normalize_identifier_value, format_money
 from django.http import JsonResponse
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from .models import SchoolFee, SchoolFeePayment, SchoolFeeDisbursement
+from openpyxl.styles import Font
+from .models import FeeAgingBucket, PayoutBatch, SchoolFee, SchoolFeePayment, SchoolFeeDisbursement
 from .forms import (
     FeeForm,
     FamilyInsuranceForm,
@@ -48,7 +46,11 @@ from .forms import (
 from insurance.models import FamilyInsurance
 from families.models import Family, FamilyStudent
 from students.models import Student, StudentEnrollmentHistory
+from .payouts import PAYOUT_FORMATTERS, stream_payout_batch
+from .statements import StatementImportError, import_bank_statement, read_statement_lines
 from .services import (
+    BulkFeeEntry,
+    FeePaymentRequest,
     SchoolFeeScope,
     filter_school_fee_queryset,
     get_bulk_enrollment_queryset,
@@ -56,8 +58,12 @@ from .services import (
     get_or_create_fee_enrollment,
     get_or_create_school_fee_for_enrollment,
     record_school_fee_payment,
+    record_school_fee_payments_bulk,
     reconcile_fee_scope,
     reconcile_disbursement_scope,
+    save_bulk_fee_entries,
+    summarize_fees_by_school,
+    summarize_fees_by_student,
 )
 
 
@@ -187,9 +193,8 @@ def fees_list(request):
     fees, filters = _get_filtered_fees(request)
     
     # Pagination
-    paginator = Paginator(fees.order_by('-created_at'), 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(fees, 20)
+    page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
     
     context = {
         'fees': page_obj,
@@ -210,10 +215,6 @@ def export_fees_excel(request):
     fees, _filters = _get_filtered_fees(request)
     fees = fees.order_by('student__last_name', 'student__first_name', '-academic_year__name', 'term')
 
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = 'School Fees Export'
-
     headers = [
         'No.',
         'Student Name',
@@ -229,13 +230,17 @@ def export_fees_excel(request):
         'Balance To Pay',
         'Status',
     ]
-    header_row = write_excel_report_header(worksheet, 'School Fees Export', 'Filtered school fee records', len(headers))
-    worksheet.append(headers)
-    style_excel_header(worksheet, header_row)
-
-    data_start_row = header_row + 1
-    for index, fee in enumerate(fees, start=1):
-        worksheet.append([
+    writer = ExcelReportWriter(
+        'School Fees Export',
+        'Filtered school fee records',
+        headers,
+        sheet_title='School Fees Export',
+        max_width=30,
+        centered_columns=[1, 3, 4, 13],
+        right_aligned_columns=[10, 11, 12],
+    )
+    for index, fee in enumerate(fees.iterator(chunk_size=EXPORT_CHUNK_SIZE), start=1):
+        writer.append([
             index,
             fee.student.full_name if fee.student else 'N/A',
             fee.academic_year.name if fee.academic_year else 'N/A',
@@ -251,26 +256,7 @@ def export_fees_excel(request):
             fee.get_payment_status_display(),
         ])
 
-    try:
-        autosize_worksheet_columns(worksheet, max_width=30)
-    except AttributeError:
-        pass
-    style_excel_table_rows(
-        worksheet,
-        header_row_idx=header_row,
-        data_start_row=data_start_row,
-        data_end_row=worksheet.max_row,
-        max_col=len(headers),
-        centered_columns=[1, 3, 4, 13],
-        right_aligned_columns=[10, 11, 12],
-    )
-
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="school_fees_students_export.xlsx"'
-    workbook.save(response)
-    return response
+    return writer.to_response('school_fees_students_export.xlsx')
 
 
 @login_required
@@ -373,10 +359,6 @@ def export_fee_disbursement_excel(request):
     totals = _get_disbursement_totals(disbursements)
     labels = _get_disbursement_labels(filters)
 
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = 'Fee Disbursements'
-
     subtitle = (
         f"Academic Year: {labels['academic_year_label']} | "
         f"Term: {labels['term_label']} | "
@@ -386,18 +368,20 @@ def export_fee_disbursement_excel(request):
     )
     headers = ['No.', 'Student Name', 'Class Level', 'Academic Year', 'Term', 'Partner', 'Amount To Pay']
     school_groups = _group_disbursements_by_school(disbursements)
-    header_row = write_excel_report_header(worksheet, 'Pending School Fee Payments By School', subtitle, len(headers))
+    writer = ExcelReportWriter(
+        'Pending School Fee Payments By School',
+        subtitle,
+        sheet_title='Fee Disbursements',
+        total_columns=len(headers),
+        max_width=32,
+        right_aligned_columns=[7],
+    )
+    writer.add_style('school-heading', font=Font(bold=True, size=12, color='1E293B'), fill='E2E8F0', horizontal='left')
+    writer.add_style('school-total', font=Font(bold=True), fill='FEF3C7', horizontal=None)
 
-    current_row = header_row + 1
     for group in school_groups:
-        worksheet.append([f"School: {group['school_name']}"])
-        worksheet.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=len(headers))
-        school_cell = worksheet.cell(row=current_row, column=1)
-        school_cell.font = Font(bold=True, size=12, color='1E293B')
-        school_cell.fill = PatternFill(fill_type='solid', fgColor='E2E8F0')
-        current_row += 1
-
-        worksheet.append([
+        writer.append_section(f"School: {group['school_name']}", style='school-heading')
+        writer.append_plain([
             f"District: {group['district_name']}",
             f"Bank: {group['bank_name']}",
             f"Account Name: {group['bank_account_name']}",
@@ -406,14 +390,9 @@ def export_fee_disbursement_excel(request):
             '',
             f"School Total: {float(group['total_amount'])}",
         ])
-        current_row += 1
-
-        worksheet.append(headers)
-        style_excel_header(worksheet, current_row)
-        current_row += 1
-
+        writer.append_header(headers)
         for index, student in enumerate(group['students'], start=1):
-            worksheet.append([
+            writer.append([
                 index,
                 student['student_name'],
                 student['class_level'],
@@ -422,32 +401,13 @@ def export_fee_disbursement_excel(request):
                 student['partner_name'],
                 float(student['amount_to_pay']),
             ])
-            current_row += 1
-
-        worksheet.append(['', 'School Total', '', '', '', '', float(group['total_amount'])])
-        total_row = current_row
-        for column in range(1, len(headers) + 1):
-            worksheet.cell(row=total_row, column=column).font = Font(bold=True)
-            worksheet.cell(row=total_row, column=column).fill = PatternFill(fill_type='solid', fgColor='FEF3C7')
-        current_row += 1
-        worksheet.append([])
-        current_row += 1
-
-    try:
-        autosize_worksheet_columns(worksheet, max_width=32)
-    except AttributeError:
-        pass
+        writer.append_total(['', 'School Total', '', '', '', '', float(group['total_amount'])], style='school-total')
+        writer.append_plain()
 
-    worksheet.append(['TOTAL RECORDS', totals['listed_count']])
-    worksheet.append(['TOTAL AMOUNT TO PAY', float(totals['total_amount_to_pay'])])
-    worksheet.append(['UNPAID RECORDS', totals['pending_count']])
-
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="pending_school_fee_payments_by_school.xlsx"'
-    workbook.save(response)
-    return response
+    writer.append_plain(['TOTAL RECORDS', totals['listed_count']])
+    writer.append_plain(['TOTAL AMOUNT TO PAY', float(totals['total_amount_to_pay'])])
+    writer.append_plain(['UNPAID RECORDS', totals['pending_count']])
+    return writer.to_response('pending_school_fee_payments_by_school.xlsx')
 
 
 @login_required
@@ -623,6 +583,41 @@ def export_fee_disbursement_pdf(request):
     return buffer
 
 
+@login_required
+@permission_required('finance.manage_fees', raise_exception=True)
+def export_payout_batch(request):
+    """Stream a bank payout file for the filtered queue and record it as a PayoutBatch."""
+
+    if request.method != 'POST':
+        return redirect('finance:fee_disbursement_queue')
+
+    file_format = request.POST.get('file_format', PayoutBatch.FORMAT_CSV)
+    if file_format not in PAYOUT_FORMATTERS:
+        messages.error(request, 'Choose a valid payout file format.')
+        return redirect('finance:fee_disbursement_queue')
+
+    disbursements, filters = _get_filtered_disbursements(request)
+    batch = PayoutBatch.objects.create(
+        file_format=file_format,
+        filters={key: value for key, value in filters.items() if value},
+        created_by=request.user,
+    )
+    formatter = PAYOUT_FORMATTERS[file_format]
+    response = StreamingHttpResponse(
+        stream_payout_batch(batch, disbursements),
+        content_type=formatter.content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="payout_{batch.reference}.{formatter.extension}"'
+    response['X-Payout-Batch'] = batch.reference
+    set_audit_context(
+        request,
+        action='Exported school fee payout batch',
+        description=f'Generated payout file {batch.reference}.',
+        metadata={'payout_batch_id': batch.pk, 'file_format': file_format},
+    )
+    return response
+
+
 @login_required
 @permission_required('finance.manage_fees', raise_exception=True)
 @transaction.atomic
@@ -645,33 +640,32 @@ def mark_fee_disbursements_paid(request):
     payment_reference = form.cleaned_data['payment_reference']
     notes = form.cleaned_data['notes']
 
-    fees = list(
-        get_fee_queryset_with_context()
-        .filter(id__in=selected_ids, balance__gt=0)
+    payment_reference_key = normalize_identifier_value(payment_reference) or 'no-ref'
+    payment_requests = [
+        FeePaymentRequest(
+            fee_id=fee_id,
+            amount_paid=balance,
+            idempotency_key=f'queue-payment:{fee_id}:{payment_date.isoformat()}:{payment_reference_key}:{balance}',
+        )
+        for fee_id, balance in (
+            SchoolFee.objects.filter(id__in=selected_ids, balance__gt=0)
+            .order_by('pk')
+            .values_list('pk', 'balance')
+        )
+    ]
+    outcomes = record_school_fee_payments_bulk(
+        payment_requests,
+        payment_date=payment_date,
+        payment_method='bank',
+        reference_number=payment_reference,
+        recorded_by=request.user,
+        notes=notes or f'Processed from finance payout queue on {payment_date.isoformat()}.',
     )
 
-    updated_count = 0
-    for fee in fees:
-        amount_paid = fee.balance
-        try:
-            _, created = record_school_fee_payment(
-                fee=fee,
-                amount_paid=amount_paid,
-                payment_date=payment_date,
-                payment_method='bank',
-                reference_number=payment_reference,
-                recorded_by=request.user,
-                notes=notes or f'Processed from finance payout queue on {payment_date.isoformat()}.',
-                idempotency_key=(
-                    f'queue-payment:{fee.pk}:{payment_date.isoformat()}:'
-                    f'{normalize_identifier_value(payment_reference) or "no-ref"}:{amount_paid}'
-                ),
-            )
-        except ValidationError as exc:
-            messages.error(request, '; '.join(exc.messages))
-            continue
-        if created:
-            updated_count += 1
+    errors = [outcome.error for outcome in outcomes if outcome.error]
+    if errors:
+        messages.error(request, '; '.join(errors))
+    updated_count = sum(1 for outcome in outcomes if outcome.created)
 
     messages.success(request, f'{updated_count} fee record(s) marked as paid and posted to school fee payments.')
     set_audit_context(
@@ -682,6 +676,61 @@ def mark_fee_disbursements_paid(request):
     return redirect('finance:fee_disbursement_queue')
 
 
+@login_required
+@permission_required('finance.manage_fees', raise_exception=True)
+def bank_statement_import(request):
+    """Match an uploaded bank statement to outstanding fees and post the matched payments."""
+
+    result = None
+    academic_years = AcademicYear.objects.order_by('-name')
+    selected_year = request.POST.get('academic_year', '')
+    if request.method == 'POST':
+        statement_file = request.FILES.get('statement_file')
+        if not statement_file:
+            messages.error(request, 'Choose a bank statement file to import.')
+            return redirect('finance:bank_statement_import')
+
+        fee_queryset = SchoolFee.objects.all()
+        if selected_year:
+            fee_queryset = fee_queryset.filter(academic_year_id=selected_year)
+        dry_run = bool(request.POST.get('dry_run'))
+        try:
+            result = import_bank_statement(
+                read_statement_lines(statement_file, statement_file.name),
+                fee_queryset=fee_queryset,
+                recorded_by=request.user,
+                dry_run=dry_run,
+            )
+        except StatementImportError as exc:
+            messages.error(request, str(exc))
+            return redirect('finance:bank_statement_import')
+
+        if dry_run:
+            messages.info(request, f'Dry run: {result.matched_count} of {result.line_count} line(s) would be posted.')
+        else:
+            messages.success(
+                request,
+                f'Posted {result.posted_count} payment(s) totalling {format_money(result.posted_amount)} RWF.',
+            )
+            set_audit_context(
+                request,
+                action='Imported bank statement',
+                description=f'Posted {result.posted_count} payment(s) from {statement_file.name}.',
+                metadata={
+                    'lines': result.line_count,
+                    'posted': result.posted_count,
+                    'already_posted': result.duplicate_count,
+                    'unmatched': len(result.unmatched),
+                },
+            )
+
+    return render(request, 'finance/bank_statement_import.html', {
+        'result': result,
+        'academic_years': academic_years,
+        'selected_year': selected_year,
+    })
+
+
 @login_required
 @permission_required('finance.manage_fees', raise_exception=True)
 def school_fees_dashboard(request):
@@ -692,9 +741,14 @@ def school_fees_dashboard(request):
     academic_year_count = fees_queryset.values('academic_year_id').distinct().count()
     term_record_count = total_school_fees
 
-    total_fees_required = fees_queryset.aggregate(Sum('total_fees'))['total_fees__sum'] or 0
-    total_fees_collected = fees_queryset.aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0
-    total_fees_outstanding = fees_queryset.aggregate(Sum('balance'))['balance__sum'] or 0
+    fee_totals = SchoolFee.objects.filter(pk__in=fees_queryset.values('pk')).aggregate(
+        required=Sum('total_fees'),
+        collected=Sum('amount_paid'),
+        outstanding=Sum('balance'),
+    )
+    total_fees_required = fee_totals['required'] or 0
+    total_fees_collected = fee_totals['collected'] or 0
+    total_fees_outstanding = fee_totals['outstanding'] or 0
     fees_collection_percentage = round((total_fees_collected / total_fees_required * 100) if total_fees_required > 0 else 0, 1)
 
     from django.utils import timezone
@@ -702,53 +756,27 @@ def school_fees_dashboard(request):
     seven_days_ago = timezone.now() - timedelta(days=7)
     recent_school_fees = fees_queryset.filter(updated_at__gte=seven_days_ago).count()
 
-    school_groups_map = OrderedDict()
-    for fee in fees_queryset:
-        student = fee.student
-        school = fee.school
-        school_name = school.name if school else (fee.school_name or 'Unassigned School')
-        key = ('school', school.id) if school else ('external', school_name.lower())
-        if key not in school_groups_map:
-            school_groups_map[key] = {
-                'school_id': school.id if school else None,
-                'school_name': school_name,
-                'student_ids': set(),
-                'total_required': Decimal('0'),
-                'total_paid': Decimal('0'),
-                'total_balance': Decimal('0'),
-                'status_counts': {
-                    'paid': 0,
-                    'partial': 0,
-                    'pending': 0,
-                    'overdue': 0,
-                },
-            }
-
-        entry = school_groups_map[key]
-        entry['student_ids'].add(student.id if student else None)
-        entry['total_required'] += fee.total_fees
-        entry['total_paid'] += fee.amount_paid
-        entry['total_balance'] += fee.balance
-        status = fee.payment_status or 'pending'
-        if status in entry['status_counts']:
-            entry['status_counts'][status] += 1
-
-    school_fee_groups = []
-    for entry in school_groups_map.values():
-        school_fee_groups.append({
-            'school_id': entry['school_id'],
-            'school_name': entry['school_name'],
-            'student_count': len({sid for sid in entry['student_ids'] if sid}),
-            'total_required': entry['total_required'],
-            'total_paid': entry['total_paid'],
-            'total_balance': entry['total_balance'],
-            'status_counts': entry['status_counts'],
-            'has_linked_school': entry['school_id'] is not None,
-        })
-
-    paginator = Paginator(school_fee_groups, 15)
+    paginator = Paginator(summarize_fees_by_school(fees_queryset), 15)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = [
+        {
+            'school_id': group['school_id'],
+            'school_name': group['school_name'],
+            'student_count': group['student_count'],
+            'total_required': group['total_required'],
+            'total_paid': group['total_paid'],
+            'total_balance': group['total_balance'],
+            'status_counts': {
+                'paid': group['paid_count'],
+                'partial': group['partial_count'],
+                'pending': group['pending_count'],
+                'overdue': group['overdue_count'],
+            },
+            'has_linked_school': group['school_id'] is not None,
+        }
+        for group in page_obj.object_list
+    ]
 
     context = {
         'students_paid_count': students_paid_count,
@@ -775,45 +803,36 @@ def school_fee_students(request, school_id):
     """Display aggregated fee information for students within a school."""
     school = get_object_or_404(School, pk=school_id)
 
-    school_fees = (
-        get_fee_queryset_with_context()
-        .filter(school=school)
-        .order_by('student__first_name', 'student__last_name')
+    school_fees = SchoolFee.objects.filter(school=school)
+    school_totals = school_fees.aggregate(
+        required=Sum('total_fees'),
+        paid=Sum('amount_paid'),
+        balance=Sum('balance'),
+        student_count=Count('student_id', distinct=True),
     )
-
-    student_map = OrderedDict()
-    for fee in school_fees:
-        student = fee.student
-        if not student:
-            continue
-        entry = student_map.setdefault(
-            student.id,
-            {
-                'student': student,
-                'total_required': Decimal('0'),
-                'total_paid': Decimal('0'),
-                'total_balance': Decimal('0'),
-                'latest_status': fee.payment_status,
-                'status_display': fee.get_payment_status_display(),
-            },
-        )
-        entry['total_required'] += fee.total_fees
-        entry['total_paid'] += fee.amount_paid
-        entry['total_balance'] += fee.balance
-        entry['latest_status'] = fee.payment_status
-        entry['status_display'] = fee.get_payment_status_display()
-
-    student_summaries = list(student_map.values())
-    school_totals = {
-        'required': sum((item['total_required'] for item in student_summaries), Decimal('0')),
-        'paid': sum((item['total_paid'] for item in student_summaries), Decimal('0')),
-        'balance': sum((item['total_balance'] for item in student_summaries), Decimal('0')),
-        'student_count': len(student_summaries),
-    }
+    for key in ('required', 'paid', 'balance'):
+        school_totals[key] = school_totals[key] or Decimal('0')
+
+    paginator = Paginator(summarize_fees_by_student(school_fees), 25)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    students = Student.objects.in_bulk([row['student_id'] for row in page_obj.object_list])
+    status_labels = dict(SchoolFee.PAYMENT_STATUS_CHOICES)
+    page_obj.object_list = [
+        {
+            'student': students[row['student_id']],
+            'total_required': row['total_required'],
+            'total_paid': row['total_paid'],
+            'total_balance': row['total_balance'],
+            'latest_status': row['latest_status'],
+            'status_display': status_labels.get(row['latest_status'], row['latest_status']),
+        }
+        for row in page_obj.object_list
+    ]
 
     context = {
         'school': school,
-        'student_summaries': student_summaries,
+        'student_summaries': page_obj,
+        'page_obj': page_obj,
         'school_totals': school_totals,
     }
     return render(request, 'finance/school_fee_students.html', context)
@@ -904,72 +923,25 @@ def bulk_fee_entry(request):
             formset = BulkFormSet(request.POST)
             formset_valid = formset.is_valid()
             if formset_valid:
-                created_count = 0
-                updated_count = 0
-                payment_delta_count = 0
-                enrollment_lookup = {enrollment.student_id: enrollment for enrollment in enrollments}
-                bulk_has_errors = False
-                with transaction.atomic():
-                    for form in formset:
-                        student_id = form.cleaned_data.get('student_id')
-                        total_fees = form.cleaned_data.get('total_fees')
-                        desired_amount_paid = form.cleaned_data.get('amount_paid')
-
-                        if not student_id or student_id not in enrollment_lookup:
-                            continue
-                        if total_fees is None:
-                            continue
-                        if desired_amount_paid is None:
-                            desired_amount_paid = Decimal('0')
-
-                        enrollment = enrollment_lookup[student_id]
-                        fee, created = get_or_create_school_fee_for_enrollment(
-                            enrollment,
-                            term,
-                            total_fees=total_fees,
-                            actor=request.user,
-                        )
-                        fee.payment_date = payment_date
-                        fee.recorded_by = request.user
-                        fee.save()
-
-                        current_paid = fee.amount_paid or Decimal('0')
-                        if desired_amount_paid < current_paid:
-                            form.add_error(
-                                'amount_paid',
-                                'Bulk entry cannot reduce already recorded payments. Use payment history for corrections.'
-                            )
-                            bulk_has_errors = True
-                            break
-
-                        payment_delta = desired_amount_paid - current_paid
-                        if payment_delta > 0:
-                            try:
-                                record_school_fee_payment(
-                                    fee=fee,
-                                    amount_paid=payment_delta,
-                                    payment_date=payment_date,
-                                    payment_method='bank',
-                                    reference_number='',
-                                    recorded_by=request.user,
-                                    notes=f'Bulk entry adjustment for {academic_year.name} {fee.get_term_display()}.',
-                                    idempotency_key=(
-                                        f'bulk-entry:{fee.pk}:{payment_date.isoformat()}:'
-                                        f'{desired_amount_paid}'
-                                    ),
-                                )
-                            except ValidationError as exc:
-                                form.add_error('amount_paid', '; '.join(exc.messages))
-                                bulk_has_errors = True
-                                break
-                            payment_delta_count += 1
-                        if created:
-                            created_count += 1
-                        else:
-                            updated_count += 1
-
-                    if bulk_has_errors:
-                        transaction.set_rollback(True)
+                entries = [
+                    BulkFeeEntry(
+                        student_id=form.cleaned_data.get('student_id'),
+                        total_fees=form.cleaned_data.get('total_fees'),
+                        amount_paid=form.cleaned_data.get('amount_paid') or Decimal('0'),
+                    )
+                    for form in formset
+                ]
+                result = save_bulk_fee_entries(
+                    entries,
+                    enrollments=enrollments,
+                    existing_fees=existing_fee_map,
+                    term=term,
+                    payment_date=payment_date,
+                    actor=request.user,
+                )
+                for position, error in result.errors.items():
+                    formset.forms[position].add_error('amount_paid', error)
+                bulk_has_errors = bool(result.errors)
 
                 if not bulk_has_errors:
                     scope_label = partner.name if partner else (school.name if school else district.name)
@@ -979,15 +951,22 @@ def bulk_fee_entry(request):
                         description=(
                             f'Saved bulk fees for {scope_label} in {academic_year.name} '
                             f'{dict(SchoolFee.TERM_CHOICES).get(term, term)}: '
-                            f'{created_count} created, {updated_count} updated, '
-                            f'{payment_delta_count} payment adjustments.'
+                            f'{result.created_count} created, {result.updated_count} updated, '
+                            f'{result.payment_count} payment adjustments.'
                         ),
+                        metadata={
+                            'created': result.created_count,
+                            'updated': result.updated_count,
+                            'unchanged': result.unchanged_count,
+                            'payments': result.payment_count,
+                        },
                     )
                     messages.success(
                         request,
                         (
                             f"Bulk fees saved for {scope_label}: "
-                            f"{created_count} new, {updated_count} updated, {payment_delta_count} payment adjustment(s) posted."
+                            f"{result.created_count} new, {result.updated_count} updated, "
+                            f"{result.payment_count} payment adjustment(s) posted."
                         ),
                     )
                     params_dict = {
@@ -1143,9 +1122,26 @@ def fee_edit(request, pk):
 def overdue_fees(request):
     """List all overdue fees."""
     overdue = SchoolFee.objects.filter(payment_status='overdue').select_related('student')
-    
+    aging_date = FeeAgingBucket.objects.aggregate(latest=Max('snapshot_date'))['latest']
+    aging_totals = {
+        row['bucket']: row
+        for row in FeeAgingBucket.objects.filter(snapshot_date=aging_date)
+        .values('bucket')
+        .annotate(fee_count=Sum('fee_count'), outstanding_amount=Sum('outstanding_amount'))
+    }
+    aging_buckets = [
+        {
+            'label': label,
+            'fee_count': aging_totals.get(bucket, {}).get('fee_count') or 0,
+            'outstanding_amount': aging_totals.get(bucket, {}).get('outstanding_amount') or Decimal('0'),
+        }
+        for bucket, label in FeeAgingBucket.BUCKET_CHOICES
+    ]
+
     context = {
         'overdue_fees': overdue,
+        'aging_date': aging_date,
+        'aging_buckets': aging_buckets,
     }
     return render(request, 'finance/overdue_fees.html', context)
 
@@ -4,6 +4,8 @@ from django.contrib import messages
 from django.db.models import Q, Sum
 from django.core.paginator import Paginator
 from core.models import District, AcademicYear
+from core.pagination import CURSOR_PARAM, CursorPaginator
+from dashboard.snapshots import summarize_snapshots
 from .models import FamilyInsurance
 from .forms import InsuranceForm
 from families.models import Family, FamilyStudent, MutuelleContributionSettings
@@ -13,15 +15,16 @@ from families.models import Family, FamilyStudent, MutuelleContributionSettings
 @permission_required('insurance.manage_insurance', raise_exception=True)
 def mutuelle_dashboard(request):
     """Dashboard focused on Mutuelle de Santé only."""
+    snapshot = summarize_snapshots()
     total_families = Family.objects.count()
-    families_with_insurance = FamilyInsurance.objects.filter(coverage_status='covered').count()
-    families_partially_covered = FamilyInsurance.objects.filter(coverage_status='partially_covered').count()
-    families_not_covered = FamilyInsurance.objects.filter(coverage_status='not_covered').count()
+    families_with_insurance = snapshot['insurance_covered']
+    families_partially_covered = snapshot['insurance_partially_covered']
+    families_not_covered = snapshot['insurance_not_covered']
 
     total_members_all = Family.objects.aggregate(Sum('total_family_members'))['total_family_members__sum'] or 0
     amount_per_person = MutuelleContributionSettings.current_amount()
     total_insurance_required = total_members_all * amount_per_person
-    total_insurance_collected = FamilyInsurance.objects.aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0
+    total_insurance_collected = snapshot['insurance_paid_amount']
     total_insurance_outstanding = total_insurance_required - total_insurance_collected
     insurance_collection_percentage = round((total_insurance_collected / total_insurance_required * 100) if total_insurance_required > 0 else 0, 1)
 
@@ -89,9 +92,8 @@ def insurance_list(request):
         insurance_records = insurance_records.filter(family__district_id=district_filter)
     
     # Pagination
-    paginator = Paginator(insurance_records.order_by('-created_at'), 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(insurance_records, 20)
+    page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
     
     context = {
         'insurance_records': page_obj,
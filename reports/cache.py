@@ -0,0 +1,457 @@
+"""
+Versioned cache for generated report files.
+
+Building a report PDF or workbook reads and renders every matching row, yet most
+downloads repeat a report whose filters and data have not changed since the last
+time. Each report reads a few *sources* (students, families, schools, fees,
+insurance) and every source has a generation number stored in
+``ReportCacheCounter``. Saving or deleting a row of a source bumps its generation
+(``reports.signals`` for model saves, explicit ``bump_report_generations`` calls
+after bulk updates), which changes the key of every report that reads it, so a
+stale file is never looked up again and writes never have to delete anything.
+Bumps are merged per transaction and applied once it commits, so writers never
+queue behind each other on the shared counter rows.
+
+A key hashes the report, format, normalised filters and arrangement, the
+generations of the report's sources and today's date (ages and "Generated on"
+stamps are date dependent). The generations are read before the report is
+built, so a cached file is always at least as new as the generations it is
+filed under.
+
+Files live under ``REPORT_CACHE_ROOT`` as ``<key>.bin`` with a ``<key>.json``
+metadata sidecar, both written atomically. Reads refresh the file's mtime and
+each write evicts the least recently used entries until the directory fits in
+``REPORT_CACHE_MAX_BYTES``. Hits, misses and evictions are counted in
+memory and added to database counters every ``STATS_FLUSH_INTERVAL`` seconds
+(and at exit), so ``python manage.py report_cache_stats`` covers every process
+without each download updating the same row.
+"""
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F, Model
+from django.http import FileResponse
+
+from .models import ReportCacheCounter
+
+
+# Bump when the builders change output so files from older code are not served.
+CACHE_FORMAT_VERSION = 3
+CONTENT_SUFFIX = '.bin'
+METADATA_SUFFIX = '.json'
+GENERATION_PREFIX = 'generation:'
+STAT_HITS = 'hits'
+STAT_MISSES = 'misses'
+STAT_EVICTIONS = 'evictions'
+STAT_NAMES = (STAT_HITS, STAT_MISSES, STAT_EVICTIONS)
+# Seconds a process keeps its hit/miss/eviction counts in memory before writing them.
+STATS_FLUSH_INTERVAL = 30
+
+# Model label -> source whose generation moves when a row of that model changes.
+MODEL_SOURCES = {
+    'students.student': 'students',
+    'families.family': 'families',
+    'core.school': 'schools',
+    'finance.schoolfee': 'fees',
+    'insurance.familyinsurance': 'insurance',
+}
+
+# Sources each report reads, directly or through related names shown in its rows.
+REPORT_SOURCES = {
+    'students': ('students', 'families', 'schools', 'fees', 'insurance'),
+    'families': ('families',),
+    'schools': ('schools',),
+    'fees': ('fees', 'students', 'families', 'schools'),
+    'insurance': ('insurance', 'families'),
+    'supported_mutuelle_families': ('families',),
+    'financial': ('fees', 'insurance', 'students', 'families', 'schools'),
+}
+
+
+@dataclass(frozen=True)
+class CachedReport:
+    key: str
+    path: str
+    metadata: dict
+
+    def open(self):
+        return open(self.path, 'rb')
+
+    def read(self):
+        with self.open() as content_file:
+            return content_file.read()
+
+
+@dataclass(frozen=True)
+class ReportCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def report_cache_enabled():
+    return settings.REPORT_CACHE_ENABLED
+
+
+def _increment_counters(names, amount=1):
+    """One UPDATE for the counters the migration created; missing rows are added on first use."""
+    names = sorted(set(names))
+    updated = ReportCacheCounter.objects.filter(name__in=names).update(value=F('value') + amount)
+    if updated == len(names):
+        return
+    existing = set(ReportCacheCounter.objects.filter(name__in=names).values_list('name', flat=True))
+    for name in names:
+        if name not in existing:
+            counter, created = ReportCacheCounter.objects.get_or_create(name=name, defaults={'value': amount})
+            if not created:
+                ReportCacheCounter.objects.filter(pk=counter.pk).update(value=F('value') + amount)
+
+
+_pending_generations = threading.local()
+
+
+def _flush_pending_generations():
+    sources = getattr(_pending_generations, 'sources', None)
+    _pending_generations.sources = set()
+    if sources:
+        _increment_counters(f'{GENERATION_PREFIX}{source}' for source in sources)
+
+
+def bump_report_generations(*sources):
+    """
+    Invalidate every cached report that reads one of ``sources`` once the current
+    transaction commits.
+
+    Bumps are merged per transaction and run after it, so concurrent writers do
+    not hold the shared counter rows locked until they commit.
+    """
+    if not sources:
+        return
+    pending = getattr(_pending_generations, 'sources', None)
+    if pending is None:
+        pending = _pending_generations.sources = set()
+    pending.update(sources)
+    transaction.on_commit(_flush_pending_generations)
+
+
+def get_report_generations(sources):
+    names = [f'{GENERATION_PREFIX}{source}' for source in sources]
+    values = dict(ReportCacheCounter.objects.filter(name__in=names).values_list('name', 'value'))
+    return {source: values.get(name, 0) for source, name in zip(sources, names)}
+
+
+def _normalise_value(value):
+    if isinstance(value, Model):
+        return value.pk
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sorted(str(_normalise_value(item)) for item in value)
+    return value
+
+
+def normalise_report_parameters(parameters):
+    """Drop empty values and reduce model instances and dates to stable JSON values."""
+    return {
+        name: _normalise_value(value)
+        for name, value in sorted(parameters.items())
+        if value not in (None, '', [], ())
+    }
+
+
+def report_cache_key(report_key, export_format, parameters):
+    sources = tuple(sorted(REPORT_SOURCES[report_key]))
+    payload = json.dumps(
+        {
+            'version': CACHE_FORMAT_VERSION,
+            'report': report_key,
+            'format': export_format,
+            'parameters': normalise_report_parameters(parameters),
+            'generations': get_report_generations(sources),
+            'date': date.today().isoformat(),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _entry_paths(key):
+    root = settings.REPORT_CACHE_ROOT
+    return os.path.join(root, f'{key}{CONTENT_SUFFIX}'), os.path.join(root, f'{key}{METADATA_SUFFIX}')
+
+
+_pending_stats = Counter()
+_stats_lock = threading.Lock()
+_stats_flushed_at = time.monotonic()
+
+
+def flush_report_cache_stats():
+    """Write this process's pending statistics to the shared counters. Returns rows updated.
+
+    Best effort: if the database is unavailable the counts are kept for the next flush.
+    """
+    global _stats_flushed_at
+    with _stats_lock:
+        pending = dict(_pending_stats)
+        _pending_stats.clear()
+        _stats_flushed_at = time.monotonic()
+    try:
+        for name, amount in pending.items():
+            _increment_counters([name], amount)
+    except DatabaseError:
+        with _stats_lock:
+            _pending_stats.update(pending)
+        return 0
+    return len(pending)
+
+
+def _count_stat(name, amount=1):
+    """Count a statistic in memory; downloads never queue on the shared counter rows."""
+    with _stats_lock:
+        _pending_stats[name] += amount
+        due = time.monotonic() - _stats_flushed_at >= STATS_FLUSH_INTERVAL
+    if due:
+        # Outside a transaction this runs now; inside one it waits so no row lock is held.
+        transaction.on_commit(flush_report_cache_stats)
+
+
+atexit.register(flush_report_cache_stats)
+
+
+def get_cached_report(key):
+    """Return the cached file for ``key`` and mark it recently used, or ``None`` on a miss."""
+    content_path, metadata_path = _entry_paths(key)
+    try:
+        with open(metadata_path, encoding='utf-8') as metadata_file:
+            metadata = json.load(metadata_file)
+        os.utime(content_path)
+    except (OSError, ValueError):
+        _count_stat(STAT_MISSES)
+        return None
+    _count_stat(STAT_HITS)
+    return CachedReport(key=key, path=content_path, metadata=metadata)
+
+
+def _write_atomically(root, path, chunks):
+    with tempfile.NamedTemporaryFile(dir=root, suffix='.tmp', delete=False) as temp_file:
+        try:
+            for chunk in chunks:
+                temp_file.write(chunk)
+        except BaseException:
+            temp_file.close()
+            os.remove(temp_file.name)
+            raise
+    os.replace(temp_file.name, path)
+
+
+def store_report(key, content, metadata):
+    """
+    Save ``content`` (bytes or an iterable of byte chunks) under ``key``.
+
+    Returns the new entry, or ``None`` when the cache directory is not writable.
+    """
+    root = settings.REPORT_CACHE_ROOT
+    content_path, metadata_path = _entry_paths(key)
+    chunks = [content] if isinstance(content, (bytes, bytearray)) else content
+    try:
+        os.makedirs(root, exist_ok=True)
+        _write_atomically(root, content_path, chunks)
+        # The sidecar goes last: an entry only exists once its content is complete.
+        _write_atomically(root, metadata_path, [json.dumps(metadata).encode('utf-8')])
+    except OSError:
+        return None
+    evict_report_cache()
+    return CachedReport(key=key, path=content_path, metadata=metadata)
+
+
+def store_report_stream(key, chunks, metadata):
+    """
+    Yield ``chunks`` unchanged while copying them into the cache under ``key``.
+
+    The entry is only kept when the stream is read to the end, so a download
+    the client abandons halfway never leaves a truncated file behind. A cache
+    directory that cannot be written does not interrupt the stream.
+    """
+    root = settings.REPORT_CACHE_ROOT
+    content_path, metadata_path = _entry_paths(key)
+    try:
+        os.makedirs(root, exist_ok=True)
+        temp_file = tempfile.NamedTemporaryFile(dir=root, suffix='.tmp', delete=False)
+    except OSError:
+        yield from chunks
+        return
+
+    completed = False
+    try:
+        for chunk in chunks:
+            if temp_file is not None:
+                try:
+                    temp_file.write(chunk)
+                except OSError:
+                    temp_file.close()
+                    os.remove(temp_file.name)
+                    temp_file = None
+            yield chunk
+        completed = True
+    finally:
+        if temp_file is not None:
+            temp_file.close()
+            if completed:
+                try:
+                    os.replace(temp_file.name, content_path)
+                    _write_atomically(root, metadata_path, [json.dumps(metadata).encode('utf-8')])
+                except OSError:
+                    completed = False
+            if not completed:
+                try:
+                    os.remove(temp_file.name)
+                except OSError:
+                    pass
+    if temp_file is not None and completed:
+        evict_report_cache()
+
+
+def _cache_entries():
+    """``(mtime, size, key)`` for every complete entry, oldest first."""
+    root = settings.REPORT_CACHE_ROOT
+    if not os.path.isdir(root):
+        return []
+    entries = []
+    for name in os.listdir(root):
+        if not name.endswith(CONTENT_SUFFIX):
+            continue
+        key = name[:-len(CONTENT_SUFFIX)]
+        content_path, metadata_path = _entry_paths(key)
+        try:
+            content_stat = os.stat(content_path)
+            metadata_size = os.stat(metadata_path).st_size
+        except OSError:
+            continue
+        entries.append((content_stat.st_mtime, content_stat.st_size + metadata_size, key))
+    entries.sort()
+    return entries
+
+
+def _remove_entry(key):
+    for path in _entry_paths(key):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def evict_report_cache(max_bytes=None):
+    """Remove least recently used entries until the cache fits in ``max_bytes``."""
+    max_bytes = settings.REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = _cache_entries()
+    total = sum(size for _mtime, size, _key in entries)
+    evicted = 0
+    for _mtime, size, key in entries:
+        if total <= max_bytes:
+            break
+        _remove_entry(key)
+        total -= size
+        evicted += 1
+    if evicted:
+        _count_stat(STAT_EVICTIONS, evicted)
+    return evicted
+
+
+def clear_report_cache():
+    """Delete every cached file and reset the statistics; generations are kept."""
+    entries = _cache_entries()
+    for _mtime, _size, key in entries:
+        _remove_entry(key)
+    with _stats_lock:
+        _pending_stats.clear()
+    ReportCacheCounter.objects.filter(name__in=STAT_NAMES).update(value=0)
+    return len(entries)
+
+
+def get_report_cache_stats():
+    """Statistics of every process; this process's pending counts are written first."""
+    flush_report_cache_stats()
+    counters = dict(ReportCacheCounter.objects.filter(name__in=STAT_NAMES).values_list('name', 'value'))
+    entries = _cache_entries()
+    return ReportCacheStats(
+        hits=counters.get(STAT_HITS, 0),
+        misses=counters.get(STAT_MISSES, 0),
+        evictions=counters.get(STAT_EVICTIONS, 0),
+        entries=len(entries),
+        size=sum(size for _mtime, size, _key in entries),
+    )
+
+
+def _cached_response(cached):
+    response = FileResponse(cached.open(), content_type=cached.metadata['content_type'])
+    if cached.metadata.get('content_disposition'):
+        response['Content-Disposition'] = cached.metadata['content_disposition']
+    return response
+
+
+def cache_report_response(report_key):
+    """
+    Serve a report download view from the cache, keyed by its query string and
+    the generations of ``REPORT_SOURCES[report_key]``.
+
+    Apply it below the permission decorators so access is still checked on every request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not report_cache_enabled() or request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            key = report_cache_key(
+                report_key,
+                f'view:{view.__module__}.{view.__name__}',
+                {name: values for name, values in request.GET.lists()},
+            )
+            cached = get_cached_report(key)
+            if cached is not None:
+                return _cached_response(cached)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            metadata = {
+                'content_type': response['Content-Type'],
+                'content_disposition': response.get('Content-Disposition', ''),
+            }
+            if not response.streaming:
+                store_report(key, response.content, metadata)
+                return response
+            try:
+                cached = store_report(key, response.streaming_content, metadata)
+            finally:
+                response.close()
+            if cached is None:
+                # The stream was consumed by the failed write, so build the report again.
+                return view(request, *args, **kwargs)
+            return _cached_response(cached)
+
+        return wrapper
+
+    return decorator
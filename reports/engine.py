@@ -0,0 +1,467 @@
+"""
+Declarative report specs and the renderers that turn them into files.
+
+Every downloadable list report is a ``ReportSpec`` in
+``reports.services.REPORT_DEFINITIONS``. A spec names the filters it accepts,
+the arrangements it can be sorted by, the function that builds the filtered
+queryset and the columns it prints. Each column is a database expression: a
+field path, or a ``Coalesce``/``Case``/``Concat`` built from one. The whole table
+is therefore read by a single annotated ``values_list`` query, in chunks, with no
+model instances and no per-row lookups.
+
+That one row stream feeds every renderer in ``RENDERERS`` (PDF, XLSX, CSV and
+JSON). Each renderer only decides how a typed value is written: money is
+formatted for the PDF, a float in the workbook and an exact decimal string in
+CSV/JSON. A new report declares its spec and gets every format, the report cache
+(``reports.cache``) and the Send Report page without writing a builder.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, Spacer
+
+from core.export_utils import (
+    EXCEL_CONTENT_TYPE,
+    EXPORT_CHUNK_SIZE,
+    ExcelReportWriter,
+    ExportNumberedCanvas,
+    add_export_header,
+    build_export_pdf_document,
+    build_export_table,
+    prepend_row_numbers,
+)
+from core.utils import format_money
+
+
+TEXT = "text"
+INTEGER = "integer"
+MONEY = "money"
+
+# Rows per chunk sent by the streaming renderers.
+STREAM_BATCH_ROWS = 500
+
+ARRANGEMENT_LABELS = {
+    "default": "Default arrangement",
+    "academic_year": "Academic Year",
+    "age": "Age",
+    "district": "District",
+    "sector": "Sector",
+    "school": "School",
+    "gender": "Gender",
+    "school_level": "Education Level",
+    "sponsorship_status": "Sponsorship Status",
+    "enrollment_status": "Academic Status",
+    "payment_ability": "Payment Ability",
+    "mutuelle_support_status": "Mutuelle Support",
+    "payment_status": "School Fees Status",
+    "coverage_status": "Coverage Status",
+}
+
+
+def arrangement_label(arrangement):
+    return ARRANGEMENT_LABELS.get(arrangement, arrangement.replace("_", " ").title())
+
+
+@dataclass(frozen=True)
+class ReportColumn:
+    """One printed column: a field path or expression plus how each format lays it out."""
+
+    name: str
+    header: str
+    expression: object
+    kind: str = TEXT
+    align: str = "left"
+    empty: str = ""
+    pdf_header: str | None = None
+    pdf_width: float | None = None
+    excel_width: int | None = None
+    total: bool = False
+    transform: Callable | None = None
+
+
+@dataclass(frozen=True)
+class PdfLayout:
+    landscape: bool = False
+    font_size: float = 7
+    number_width: float = 26
+    wrap_cells: bool = False
+    margins: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    key: str
+    label: str
+    permission: str
+    filters: tuple[str, ...]
+    title: str
+    filename: str
+    sheet_title: str
+    queryset: Callable
+    columns: tuple[ReportColumn, ...]
+    arrangements: tuple[str, ...] = ()
+    formats: tuple[str, ...] = ("pdf", "excel", "csv", "json", "ndjson")
+    pdf: PdfLayout = PdfLayout()
+    excel_max_width: int = 32
+    summary_field: str | None = None
+    summary_choices: tuple = ()
+
+    def build(self, cleaned_data):
+        """Return ``(queryset, subtitle)`` for the submitted filters and arrangement."""
+        queryset, subtitle = self.queryset(cleaned_data)
+        arrangement = cleaned_data.get("arrangement")
+        if arrangement:
+            subtitle = f"{subtitle} - Arranged by {arrangement_label(arrangement)}"
+        return queryset, subtitle
+
+    def rows(self, queryset):
+        """
+        Yield one list of typed values per row, read with a single annotated query.
+
+        ``pk`` stays in the projection so ``distinct()`` keeps rows with equal columns apart.
+        """
+        annotations = {}
+        fields = ["pk"]
+        for column in self.columns:
+            if isinstance(column.expression, str):
+                fields.append(column.expression)
+            else:
+                alias = f"report_{column.name}"
+                annotations[alias] = column.expression
+                fields.append(alias)
+        projection = queryset.select_related(None).prefetch_related(None).annotate(**annotations).values_list(*fields)
+        transforms = [column.transform for column in self.columns]
+        for values in projection.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                transform(value) if transform else value
+                for transform, value in zip(transforms, values[1:])
+            ]
+
+    def summary(self, queryset):
+        """``(label, count)`` per ``summary_choices`` value, from one grouped query."""
+        if not self.summary_field:
+            return []
+        counts = dict(
+            queryset.order_by()
+            .values(self.summary_field)
+            .annotate(total=Count("pk", distinct=True))
+            .values_list(self.summary_field, "total")
+        )
+        return [(label, counts.get(value, 0)) for value, label in self.summary_choices]
+
+
+class _Totals:
+    def __init__(self, columns):
+        self.columns = columns
+        self.sums = [Decimal("0") if column.total else None for column in columns]
+
+    def __bool__(self):
+        return any(column.total for column in self.columns)
+
+    def add(self, row):
+        for index, value in enumerate(row):
+            if self.sums[index] is not None and value is not None:
+                self.sums[index] += value
+
+    def row(self, format_value):
+        """The TOTAL row, labelled in the first column that is not summed."""
+        cells = ["" if total is None else format_value(column, total) for column, total in zip(self.columns, self.sums)]
+        label_index = next((index for index, total in enumerate(self.sums) if total is None), 0)
+        cells[label_index] = "TOTAL"
+        return cells
+
+
+def _alignment_indexes(columns, align, offset):
+    return [index + offset for index, column in enumerate(columns) if column.align == align]
+
+
+class PdfReportRenderer:
+    format = "pdf"
+    label = "PDF"
+    extension = "pdf"
+    content_type = "application/pdf"
+
+    def format_value(self, column, value):
+        if value is None or value == "":
+            return column.empty
+        if column.kind == MONEY:
+            return format_money(value)
+        return str(value)
+
+    def render(self, spec, queryset, subtitle):
+        layout = spec.pdf
+        buffer = io.BytesIO()
+        doc = build_export_pdf_document(
+            buffer,
+            spec.title,
+            pagesize=landscape(A4) if layout.landscape else A4,
+            **layout.margins,
+        )
+        cell_styles = self._cell_styles(spec) if layout.wrap_cells else None
+
+        rows = []
+        totals = _Totals(spec.columns)
+        for row in spec.rows(queryset):
+            totals.add(row)
+            cells = [self.format_value(column, value) for column, value in zip(spec.columns, row)]
+            if cell_styles:
+                cells = [Paragraph(cell, style) for cell, style in zip(cells, cell_styles)]
+            rows.append(cells)
+
+        elements = []
+        add_export_header(elements, spec.title, f"{subtitle} (Total: {len(rows)})")
+        self._add_summary(elements, spec.summary(queryset))
+
+        data = prepend_row_numbers([column.pdf_header or column.header for column in spec.columns], rows)
+        total_rows = []
+        if totals:
+            data.append(["", *totals.row(self.format_value)])
+            total_rows.append(len(data) - 1)
+        widths = [column.pdf_width for column in spec.columns]
+        elements.append(build_export_table(
+            data,
+            col_widths=[layout.number_width, *widths] if all(widths) else None,
+            body_font_size=layout.font_size,
+            centered_columns=[0, *_alignment_indexes(spec.columns, "center", 1)],
+            right_aligned_columns=_alignment_indexes(spec.columns, "right", 1),
+            total_row_indexes=total_rows,
+        ))
+        doc.build(elements, canvasmaker=ExportNumberedCanvas)
+        return buffer.getvalue(), len(rows)
+
+    def _cell_styles(self, spec):
+        base = ParagraphStyle(
+            f"{spec.key.title()}ExportCell",
+            parent=getSampleStyleSheet()["BodyText"],
+            fontSize=spec.pdf.font_size,
+            leading=spec.pdf.font_size + 1,
+            wordWrap="CJK",
+        )
+        alignments = {"left": TA_LEFT, "center": TA_CENTER, "right": TA_RIGHT}
+        return [
+            ParagraphStyle(f"{base.name}{column.align.title()}", parent=base, alignment=alignments[column.align])
+            for column in spec.columns
+        ]
+
+    def _add_summary(self, elements, summary):
+        if not summary:
+            return
+        style = ParagraphStyle(
+            "SummaryBox",
+            parent=getSampleStyleSheet()["Normal"],
+            fontSize=9,
+            leading=12,
+            textColor=colors.HexColor("#047857"),
+            alignment=TA_CENTER,
+        )
+        elements.append(build_export_table(
+            [[Paragraph(f"<b>{label}:</b> {count}", style) for label, count in summary]],
+            col_widths=[7.2 * inch / len(summary)] * len(summary),
+            body_font_size=9,
+            centered_columns=list(range(len(summary))),
+        ))
+        elements.append(Spacer(1, 20))
+
+
+class ExcelReportRenderer:
+    format = "excel"
+    label = "Excel"
+    extension = "xlsx"
+    content_type = EXCEL_CONTENT_TYPE
+
+    def format_value(self, column, value):
+        if value is None or value == "":
+            return column.empty
+        if column.kind == MONEY:
+            return float(value)
+        return value
+
+    def render(self, spec, queryset, subtitle):
+        widths = [column.excel_width for column in spec.columns]
+        writer = ExcelReportWriter(
+            spec.title,
+            subtitle,
+            ["No.", *[column.header for column in spec.columns]],
+            sheet_title=spec.sheet_title,
+            column_widths=[8, *widths] if all(widths) else None,
+            max_width=spec.excel_max_width,
+            centered_columns=[1, *_alignment_indexes(spec.columns, "center", 2)],
+            right_aligned_columns=_alignment_indexes(spec.columns, "right", 2),
+        )
+        totals = _Totals(spec.columns)
+        index = 0
+        for index, row in enumerate(spec.rows(queryset), start=1):
+            totals.add(row)
+            writer.append([index, *[self.format_value(column, value) for column, value in zip(spec.columns, row)]])
+        if totals:
+            writer.append_plain()
+            writer.append_total(["", *totals.row(self.format_value)])
+        return writer.to_bytes(), index
+
+
+def _plain_value(value):
+    """Machine-readable value: exact decimals as strings, everything else as read."""
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class _StreamingRenderer:
+    """
+    Renderer whose output is a sequence of lines that can be sent as it is read.
+
+    ``stream()`` yields the header line first, so the first bytes leave before the
+    query has run, then batches of ``STREAM_BATCH_ROWS`` rows read from the server
+    side cursor of ``ReportSpec.rows()``. Memory stays flat whatever the row count.
+    Subclasses define ``line(spec, row)``, returning the text of one row.
+    """
+
+    def header(self, spec):
+        return ""
+
+    def stream(self, spec, queryset):
+        return self._encode(spec, spec.rows(queryset))
+
+    def render(self, spec, queryset, subtitle):
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for count, row in enumerate(rows, start=1):
+                yield row
+
+        return b"".join(self._encode(spec, counted(spec.rows(queryset)))), count
+
+    def _encode(self, spec, rows):
+        header = self.header(spec)
+        if header:
+            yield header.encode("utf-8")
+        batch = []
+        for row in rows:
+            batch.append(self.line(spec, row))
+            if len(batch) >= STREAM_BATCH_ROWS:
+                yield "".join(batch).encode("utf-8")
+                batch = []
+        if batch:
+            yield "".join(batch).encode("utf-8")
+
+
+class _LineWriter:
+    """``csv.writer`` target that hands each formatted line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+class CsvReportRenderer(_StreamingRenderer):
+    format = "csv"
+    label = "CSV"
+    extension = "csv"
+    content_type = "text/csv"
+
+    def __init__(self):
+        self._writer = csv.writer(_LineWriter())
+
+    def header(self, spec):
+        return self._writer.writerow([column.header for column in spec.columns])
+
+    def line(self, spec, row):
+        return self._writer.writerow(["" if value is None else _plain_value(value) for value in row])
+
+
+class NdjsonReportRenderer(_StreamingRenderer):
+    """One JSON object per line, keyed by column name, for loading into BI tools."""
+
+    format = "ndjson"
+    label = "NDJSON"
+    extension = "ndjson"
+    content_type = "application/x-ndjson"
+
+    def line(self, spec, row):
+        names = [column.name for column in spec.columns]
+        return json.dumps(dict(zip(names, map(_plain_value, row))), cls=DjangoJSONEncoder) + "\n"
+
+
+class JsonReportRenderer:
+    format = "json"
+    label = "JSON"
+    extension = "json"
+    content_type = "application/json"
+
+    def render(self, spec, queryset, subtitle):
+        names = [column.name for column in spec.columns]
+        records = [dict(zip(names, map(_plain_value, row))) for row in spec.rows(queryset)]
+        document = {
+            "report": spec.key,
+            "title": spec.title,
+            "subtitle": subtitle,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "count": len(records),
+            "columns": [{"name": column.name, "header": column.header, "kind": column.kind} for column in spec.columns],
+            "rows": records,
+        }
+        return json.dumps(document, cls=DjangoJSONEncoder).encode("utf-8"), len(records)
+
+
+RENDERERS = {
+    renderer.format: renderer
+    for renderer in (
+        PdfReportRenderer(),
+        ExcelReportRenderer(),
+        CsvReportRenderer(),
+        JsonReportRenderer(),
+        NdjsonReportRenderer(),
+    )
+}
+
+
+def render_report(spec, export_format, cleaned_data):
+    """Build ``spec`` in ``export_format`` and return the attachment fields."""
+    renderer = RENDERERS.get(export_format)
+    if renderer is None or export_format not in spec.formats:
+        raise ValueError("Unsupported report format selected.")
+    queryset, subtitle = spec.build(cleaned_data)
+    content, record_count = renderer.render(spec, queryset, subtitle)
+    return {
+        "filename": _attachment_filename(spec, renderer),
+        "content_type": renderer.content_type,
+        "content": content,
+        "subtitle": subtitle,
+        "record_count": record_count,
+    }
+
+
+def _attachment_filename(spec, renderer):
+    return f"{spec.filename}_{datetime.now().strftime('%Y%m%d_%H%M')}.{renderer.extension}"
+
+
+def stream_report(spec, export_format, cleaned_data):
+    """
+    Like ``render_report`` for the line based formats, but ``content`` is an
+    iterator of byte chunks that reads the rows only as it is consumed.
+    """
+    renderer = RENDERERS.get(export_format)
+    if not hasattr(renderer, "stream") or export_format not in spec.formats:
+        raise ValueError("This report format cannot be streamed.")
+    queryset, subtitle = spec.build(cleaned_data)
+    return {
+        "filename": _attachment_filename(spec, renderer),
+        "content_type": renderer.content_type,
+        "content": renderer.stream(spec, queryset),
+        "subtitle": subtitle,
+    }
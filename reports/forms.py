@@ -6,14 +6,12 @@ from finance.models import SchoolFee
 from insurance.models import FamilyInsurance
 from students.models import Student
 
+from .engine import RENDERERS
 from .services import get_arrangement_choices, get_available_reports_for_user, get_report_definition
 
 
 class SendReportForm(forms.Form):
-    REPORT_FORMAT_CHOICES = [
-        ("pdf", "PDF"),
-        ("excel", "Excel"),
-    ]
+    REPORT_FORMAT_CHOICES = [(renderer.format, renderer.label) for renderer in RENDERERS.values()]
 
     report_key = forms.ChoiceField(
         choices=[],
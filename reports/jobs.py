@@ -0,0 +1,170 @@
+"""Database-backed queue for report exports and email deliveries.
+
+Views enqueue a ``ReportJob`` holding the submitted ``SendReportForm`` data and
+return immediately; ``python manage.py run_report_worker`` claims queued jobs,
+rebuilds the form as the requesting user, generates the report and stores or
+emails the result. Concurrency is bounded by ``REPORT_JOBS_MAX_CONCURRENCY``
+(see ``claim_next_report_job`` for how strictly).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import F, Func, IntegerField, Subquery
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+
+from .forms import SendReportForm
+from .models import ReportJob
+from .services import ensure_report_permission, generate_report_attachment, send_report_email
+
+
+IGNORED_PARAMETERS = {'csrfmiddlewaretoken'}
+MAX_JOB_ATTEMPTS = 3
+
+
+def enqueue_report_job(*, user, kind, data):
+    """Queue a report job from submitted (already validated) form data."""
+    parameters = {key: data.get(key) for key in data if key not in IGNORED_PARAMETERS}
+    return ReportJob.objects.create(
+        kind=kind,
+        report_key=parameters.get('report_key', ''),
+        export_format=parameters.get('export_format', ''),
+        parameters=parameters,
+        requested_by=user,
+    )
+
+
+def requeue_stale_report_jobs():
+    """Return jobs orphaned by a crashed worker to the queue, or fail them after repeated attempts."""
+    stale_before = timezone.now() - timedelta(seconds=settings.REPORT_JOBS_STALE_AFTER_SECONDS)
+    stale = ReportJob.objects.filter(status=ReportJob.STATUS_RUNNING, started_at__lt=stale_before)
+    stale.filter(attempts__gte=MAX_JOB_ATTEMPTS).update(
+        status=ReportJob.STATUS_FAILED,
+        error='The report worker stopped before this job finished.',
+        finished_at=timezone.now(),
+    )
+    return stale.update(status=ReportJob.STATUS_QUEUED, progress=0)
+
+
+def _running_job_count():
+    """``COUNT(*)`` of running jobs as a subquery, evaluated inside the claiming UPDATE."""
+    return Subquery(
+        ReportJob.objects.filter(status=ReportJob.STATUS_RUNNING)
+        .order_by()
+        .annotate(total=Func(F('pk'), function='COUNT'))
+        .values('total')[:1],
+        output_field=IntegerField(),
+    )
+
+
+def claim_next_report_job():
+    """Atomically move the oldest queued job to running, respecting the concurrency cap.
+
+    The cap is checked by the claiming UPDATE itself, so a claim never acts on a
+    stale count. SQLite serialises writers, which makes the cap exact there. On a
+    READ COMMITTED database, two workers claiming at the same instant can each
+    miss the other's claim, so the cap is best-effort and can be exceeded by at
+    most the number of workers racing.
+    """
+    candidate_ids = (
+        ReportJob.objects.filter(status=ReportJob.STATUS_QUEUED)
+        .order_by('created_at', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidate_ids:
+        # The conditional UPDATE only succeeds for one worker, so no row lock is needed.
+        claimed = ReportJob.objects.filter(
+            LessThan(_running_job_count(), settings.REPORT_JOBS_MAX_CONCURRENCY),
+            pk=job_id,
+            status=ReportJob.STATUS_QUEUED,
+        ).update(
+            status=ReportJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+            progress=0,
+            error='',
+        )
+        if claimed:
+            return ReportJob.objects.select_related('requested_by').get(pk=job_id)
+    return None
+
+
+def _set_progress(job, progress, **fields):
+    job.progress = progress
+    for name, value in fields.items():
+        setattr(job, name, value)
+    ReportJob.objects.filter(pk=job.pk).update(progress=progress, **fields)
+
+
+def _build_email(attachment, cleaned_data):
+    report_label = attachment['report'].label
+    subject = cleaned_data['subject'] or f"{report_label} - {attachment['subtitle']}"
+    body = cleaned_data['message'] or (
+        f"Please find attached the {report_label.lower()} generated from SIMS.\n\n"
+        f"Filters: {attachment['subtitle']}\n"
+        f"Records included: {attachment['record_count']}"
+    )
+    return subject, body
+
+
+def run_report_job(job):
+    """Generate (and for email jobs, deliver) one claimed report job."""
+    try:
+        form = SendReportForm(job.parameters, user=job.requested_by)
+        if not form.is_valid():
+            raise ValueError(f"Invalid report parameters: {form.errors.as_text()}")
+        cleaned_data = form.cleaned_data
+        ensure_report_permission(job.requested_by, cleaned_data['report_key'])
+        _set_progress(job, 10)
+
+        attachment = generate_report_attachment(
+            cleaned_data['report_key'],
+            cleaned_data['export_format'],
+            cleaned_data,
+        )
+        _set_progress(job, 70, record_count=attachment['record_count'])
+
+        job.result_file.save(attachment['filename'], ContentFile(attachment['content']), save=False)
+        _set_progress(
+            job,
+            85,
+            result_file=job.result_file.name,
+            result_name=attachment['filename'],
+            result_content_type=attachment['content_type'],
+        )
+
+        if job.kind == ReportJob.KIND_EMAIL:
+            subject, body = _build_email(attachment, cleaned_data)
+            send_report_email(
+                recipients=cleaned_data['recipients'],
+                subject=subject,
+                body=body,
+                attachment_name=attachment['filename'],
+                attachment_bytes=attachment['content'],
+                attachment_content_type=attachment['content_type'],
+            )
+
+        _set_progress(job, 100, status=ReportJob.STATUS_SUCCEEDED, finished_at=timezone.now())
+    except Exception as exc:
+        _set_progress(
+            job,
+            job.progress,
+            status=ReportJob.STATUS_FAILED,
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+    return job
+
+
+def run_pending_report_jobs(limit=None):
+    """Process queued jobs one after another until the queue is empty; return how many ran."""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_report_job()
+        if job is None:
+            break
+        run_report_job(job)
+        processed += 1
+    return processed
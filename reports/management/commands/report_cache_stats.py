@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reports.cache import clear_report_cache, evict_report_cache, get_report_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss statistics and disk usage of the generated report cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--evict',
+            action='store_true',
+            help='Remove least recently used files until the cache fits in REPORT_CACHE_MAX_BYTES.',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete every cached report and reset the statistics.',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            removed = clear_report_cache()
+            self.stdout.write(self.style.SUCCESS(f'Removed {removed} cached report(s).'))
+            return
+        if options['evict']:
+            self.stdout.write(f'Evicted: {evict_report_cache()}')
+
+        stats = get_report_cache_stats()
+        self.stdout.write(f'Enabled: {"yes" if settings.REPORT_CACHE_ENABLED else "no"}')
+        self.stdout.write(f'Hits: {stats.hits}')
+        self.stdout.write(f'Misses: {stats.misses}')
+        self.stdout.write(f'Hit rate: {stats.hit_rate:.1%}')
+        self.stdout.write(f'Evictions: {stats.evictions}')
+        self.stdout.write(f'Entries: {stats.entries}')
+        self.stdout.write(
+            f'Size: {stats.size / 1024 / 1024:.1f} MB of {settings.REPORT_CACHE_MAX_BYTES / 1024 / 1024:.1f} MB'
+        )
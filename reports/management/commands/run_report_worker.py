@@ -0,0 +1,81 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from reports.jobs import claim_next_report_job, requeue_stale_report_jobs, run_report_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued report exports and email deliveries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.REPORT_JOBS_MAX_CONCURRENCY,
+            help='Number of jobs this worker runs at the same time.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait before checking an empty queue again.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling forever.',
+        )
+
+    def handle(self, *args, **options):
+        self.once = options['once']
+        self.poll_interval = options['poll_interval']
+        self.processed = 0
+        self.lock = threading.Lock()
+        self.last_requeue = None
+
+        concurrency = max(options['concurrency'], 1)
+        threads = [threading.Thread(target=self._work, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping report worker.')
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {self.processed} report job(s).'))
+
+    def _requeue_stale_jobs(self):
+        """Requeue jobs orphaned by a dead worker at most once per poll interval, across threads."""
+        with self.lock:
+            now = time.monotonic()
+            if self.last_requeue is not None and now - self.last_requeue < self.poll_interval:
+                return
+            self.last_requeue = now
+            requeued = requeue_stale_report_jobs()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale report job(s).')
+
+    def _work(self):
+        try:
+            while True:
+                close_old_connections()
+                # Stuck running rows count toward the concurrency cap, so check for them while running too.
+                self._requeue_stale_jobs()
+                job = claim_next_report_job()
+                if job is None:
+                    if self.once:
+                        return
+                    time.sleep(self.poll_interval)
+                    continue
+                run_report_job(job)
+                with self.lock:
+                    self.processed += 1
+                self.stdout.write(f'Report job {job.pk}: {job.get_status_display()}')
+        finally:
+            connection.close()
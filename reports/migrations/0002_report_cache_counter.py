@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:19
+
+from django.db import migrations, models
+
+
+COUNTER_NAMES = [
+    'generation:families',
+    'generation:fees',
+    'generation:insurance',
+    'generation:schools',
+    'generation:students',
+    'hits',
+    'misses',
+    'evictions',
+]
+
+
+def create_counters(apps, schema_editor):
+    ReportCacheCounter = apps.get_model('reports', 'ReportCacheCounter')
+    ReportCacheCounter.objects.bulk_create([ReportCacheCounter(name=name) for name in COUNTER_NAMES])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportCacheCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Report cache counter',
+                'verbose_name_plural': 'Report cache counters',
+            },
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+
+def get_report_job_storage():
+    """Keep generated reports on local disk, outside the public media storage."""
+    return FileSystemStorage(location=settings.REPORT_JOBS_ROOT)
+
+
+class ReportJob(models.Model):
+    """Report export or email delivery queued for the background worker."""
+
+    KIND_EXPORT = 'export'
+    KIND_EMAIL = 'email'
+    KIND_CHOICES = [
+        (KIND_EXPORT, 'Export'),
+        (KIND_EMAIL, 'Email delivery'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    FINISHED_STATUSES = {STATUS_SUCCEEDED, STATUS_FAILED}
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    report_key = models.CharField(max_length=50)
+    export_format = models.CharField(max_length=10)
+    parameters = models.JSONField(default=dict, blank=True, help_text="Submitted report form data")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_jobs',
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    result_file = models.FileField(upload_to='%Y/%m/', storage=get_report_job_storage, blank=True)
+    result_name = models.CharField(max_length=255, blank=True)
+    result_content_type = models.CharField(max_length=100, blank=True)
+    record_count = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        verbose_name = 'Report job'
+        verbose_name_plural = 'Report jobs'
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.report_key} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+
+class ReportCacheCounter(models.Model):
+    """Named counter shared by every process: report data generations and cache statistics."""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Report cache counter'
+        verbose_name_plural = 'Report cache counters'
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
@@ -1,113 +1,23 @@
 from __future__ import annotations
 
-import io
-from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import date
+from decimal import Decimal
 
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.core.mail import EmailMessage
-from django.db.models import Prefetch, Q, Value, CharField
-from django.db.models.functions import Coalesce
-
-from openpyxl import Workbook
-from openpyxl.styles import Alignment
-from reportlab.lib.enums import TA_CENTER
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import Paragraph
-
-from core.export_utils import (
-    ExportNumberedCanvas,
-    autosize_worksheet_columns,
-    build_export_pdf_document,
-    build_export_table,
-    prepend_row_numbers,
-    style_excel_header,
-    style_excel_table_rows,
-    write_excel_report_header,
-)
+from django.db.models import Case, CharField, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+
 from core.models import School
-from core.utils import normalize_identifier_value, format_money
+from core.utils import normalize_identifier_value
 from families.models import Family
 from finance.models import SchoolFee
 from insurance.models import FamilyInsurance
 from students.models import Student
 
-
-@dataclass(frozen=True)
-class ReportDefinition:
-    key: str
-    label: str
-    permission: str
-    filters: tuple[str, ...]
-    formats: tuple[str, ...] = ("pdf", "excel")
-
-
-REPORT_DEFINITIONS = {
-    "students": ReportDefinition(
-        key="students",
-        label="Students List",
-        permission="students.view_student",
-        filters=("academic_year", "district", "sector", "school", "gender", "school_level", "sponsorship_status", "enrollment_status", "payment_ability", "mutuelle_support_status", "age_from", "age_to"),
-    ),
-    "families": ReportDefinition(
-        key="families",
-        label="Families Directory",
-        permission="families.view_family",
-        filters=("district", "sector", "payment_ability", "mutuelle_support_status"),
-    ),
-    "schools": ReportDefinition(
-        key="schools",
-        label="Schools Directory",
-        permission="core.view_school",
-        filters=("district", "sector"),
-    ),
-    "fees": ReportDefinition(
-        key="fees",
-        label="School Fees Summary",
-        permission="finance.view_schoolfee",
-        filters=("academic_year", "district", "school", "payment_status"),
-    ),
-    "insurance": ReportDefinition(
-        key="insurance",
-        label="Mutuelle Coverage",
-        permission="insurance.view_familyinsurance",
-        filters=("academic_year", "district", "sector", "coverage_status"),
-    ),
-    "supported_mutuelle_families": ReportDefinition(
-        key="supported_mutuelle_families",
-        label="Supported Mutuelle Families",
-        permission="families.view_family",
-        filters=("district", "sector"),
-    ),
-}
-
-ARRANGEMENT_LABELS = {
-    "default": "Default arrangement",
-    "academic_year": "Academic Year",
-    "age": "Age",
-    "district": "District",
-    "sector": "Sector",
-    "school": "School",
-    "gender": "Gender",
-    "school_level": "Education Level",
-    "sponsorship_status": "Sponsorship Status",
-    "enrollment_status": "Academic Status",
-    "payment_ability": "Payment Ability",
-    "mutuelle_support_status": "Mutuelle Support",
-    "payment_status": "School Fees Status",
-    "coverage_status": "Coverage Status",
-}
-
-REPORT_ARRANGEMENT_FIELDS = {
-    "students": ("age", "district", "sector", "school", "gender", "school_level", "sponsorship_status", "enrollment_status", "payment_ability", "mutuelle_support_status"),
-    "families": ("district", "sector", "payment_ability", "mutuelle_support_status"),
-    "schools": ("district", "sector"),
-    "fees": ("academic_year", "district", "school", "payment_status"),
-    "insurance": ("academic_year", "district", "sector", "coverage_status"),
-    "supported_mutuelle_families": ("district", "sector"),
-}
+from .cache import get_cached_report, report_cache_enabled, report_cache_key, store_report, store_report_stream
+from .engine import ARRANGEMENT_LABELS, INTEGER, MONEY, PdfLayout, ReportColumn, ReportSpec, arrangement_label, render_report, stream_report
 
 
 def get_available_reports_for_user(user):
@@ -120,19 +30,14 @@ def get_report_definition(report_key):
 
 def get_arrangement_choices(report_key):
     options = [("", ARRANGEMENT_LABELS["default"])]
-    for field_name in REPORT_ARRANGEMENT_FIELDS.get(report_key, ()):
-        options.append((field_name, ARRANGEMENT_LABELS.get(field_name, field_name.replace("_", " ").title())))
+    report = get_report_definition(report_key)
+    for field_name in report.arrangements if report else ():
+        options.append((field_name, arrangement_label(field_name)))
     return options
 
 
-def _arrangement_label(arrangement):
-    return ARRANGEMENT_LABELS.get(arrangement, arrangement.replace("_", " ").title())
-
-
 def _apply_report_arrangement(queryset, report_key, arrangement):
-    if not arrangement:
-        return queryset
-
+    """Order by ``arrangement``; no arrangement falls back to the report's default order."""
     if report_key == "students":
         if arrangement == "age":
             return queryset.order_by("-date_of_birth", "last_name", "first_name")
@@ -254,74 +159,45 @@ def _normalize_age_bounds(age_from, age_to):
     return parsed_from, parsed_to
 
 
-def _student_guardian_parent_label(student):
-    family = student.family
-    if family:
-        if family.guardian_name:
-            return family.guardian_name
-        parent_names = [name for name in [family.father_name, family.mother_name] if name]
-        if parent_names:
-            return " / ".join(parent_names)
-        return family.head_of_family or "N/A"
-    if student.partner and student.partner.contact_person:
-        return student.partner.contact_person
-    return "N/A"
-
-
-def _student_phone_label(student):
-    family = student.family
-    if family:
-        if family.guardian_phone:
-            return normalize_identifier_value(family.guardian_phone, "N/A")
-        if family.phone_number:
-            return normalize_identifier_value(family.phone_number, "N/A")
-        if family.alternative_phone:
-            return normalize_identifier_value(family.alternative_phone, "N/A")
-    if student.partner and student.partner.phone:
-        return normalize_identifier_value(student.partner.phone, "N/A")
-    return "N/A"
-
-
-def _student_sector_label(student):
-    if student.partner and student.partner.sector:
-        return student.partner.sector.name
-    if student.family and student.family.sector:
-        return student.family.sector.name
-    if student.school and student.school.sector:
-        return student.school.sector.name
-    return "N/A"
-
-
-def _student_export_row(student):
-    return [
-        student.full_name,
-        student.get_gender_display(),
-        str(student.age if student.age is not None else "N/A"),
-        student.get_school_level_display() if student.school_level else "N/A",
-        student.class_level or "N/A",
-        student.school.name if student.school else (student.school_name or "N/A"),
-        student.family_district_name,
-        _student_sector_label(student),
-        _student_guardian_parent_label(student),
-        _student_phone_label(student),
-        student.get_sponsorship_status_display(),
-    ]
+def _nonblank(field_name):
+    return NullIf(field_name, Value(""))
 
 
-def _student_queryset(cleaned_data):
-    students = Student.objects.select_related(
-        "school",
-        "family__district",
-        "family__sector",
-        "partner__district",
-        "partner__sector",
-    ).prefetch_related(
-        Prefetch(
-            "fees",
-            queryset=SchoolFee.objects.select_related("academic_year").order_by("-academic_year__name", "-created_at"),
-            to_attr="prefetched_fees",
-        )
+def _choice_label(field_name, choices, *, blank=""):
+    """SQL version of ``get_FOO_display()``; an empty value reads as ``blank``."""
+    return Case(
+        *[When(**{field_name: value}, then=Value(str(label))) for value, label in choices],
+        default=Coalesce(_nonblank(field_name), Value(blank)),
+        output_field=CharField(),
+    )
+
+
+def _name_or_na(field_name):
+    return Coalesce(field_name, Value("N/A"))
+
+
+def latest_coverage_status_subquery(family_ref="family_id"):
+    """``coverage_status`` of the family's latest insurance record, as ``Student.mutuelle_status`` reads it."""
+    return Subquery(
+        FamilyInsurance.objects.filter(family_id=OuterRef(family_ref))
+        .order_by("-insurance_year__name", "-created_at")
+        .values("coverage_status")[:1]
     )
+
+
+def _age_today(date_of_birth):
+    if date_of_birth is None:
+        return None
+    today = date.today()
+    return today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+
+
+def _identifier(value):
+    return normalize_identifier_value(value, "N/A")
+
+
+def _student_queryset(cleaned_data):
+    students = Student.objects.all()
     subtitle_parts = ["All Students"]
 
     academic_year = cleaned_data.get("academic_year")
@@ -456,234 +332,248 @@ def _insurance_queryset(cleaned_data):
     return records, " - ".join(subtitle_parts)
 
 
-def _build_students_pdf(queryset, subtitle):
-    from reports.views import create_letterhead
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(buffer, "Students List Report", pagesize=landscape(A4), left_margin=36, right_margin=36, top_margin=40, bottom_margin=48)
-    elements = []
-    create_letterhead(elements, "Students List Report", f"{subtitle} (Total: {queryset.count()})")
-    styles = getSampleStyleSheet()
-    cell_style = ParagraphStyle("StudentExportCell", parent=styles["BodyText"], fontSize=6.2, leading=7.2, wordWrap="CJK")
-    centered_style = ParagraphStyle("StudentExportCellCentered", parent=cell_style, alignment=TA_CENTER)
-    rows = []
-    for student in queryset:
-        row = _student_export_row(student)
-        rows.append([
-            Paragraph(row[0], cell_style),
-            Paragraph(row[1], centered_style),
-            Paragraph(row[2], centered_style),
-            Paragraph(row[3], centered_style),
-            Paragraph(row[4], centered_style),
-            Paragraph(row[5], cell_style),
-            Paragraph(row[6], centered_style),
-            Paragraph(row[7], centered_style),
-            Paragraph(row[8], cell_style),
-            Paragraph(row[9], centered_style),
-            Paragraph(row[10], centered_style),
-        ])
-    data = prepend_row_numbers(["Full Name", "Gender", "Age", "Education Level", "Class/Year", "School", "District", "Sector", "Guardian/Parent", "Phone", "Sponsorship Status"], rows)
-    elements.append(build_export_table(data, col_widths=[24, 92, 34, 26, 54, 50, 104, 54, 54, 126, 72, 70], body_font_size=6.2, centered_columns=[0, 2, 3, 4, 5, 7, 10, 11]))
-    doc.build(elements, canvasmaker=ExportNumberedCanvas)
-    return buffer.getvalue()
-
-
-def _build_students_excel(queryset, subtitle):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Students List"
-    headers = ["No.", "Full Name", "Gender", "Age", "Education Level", "Class/Year", "School", "District", "Sector", "Guardian/Parent", "Phone", "Sponsorship Status"]
-    header_row = write_excel_report_header(ws, "Students List Report", subtitle, len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-    data_start_row = header_row + 1
-    for index, student in enumerate(queryset, start=1):
-        ws.append([index, *_student_export_row(student)])
-        for cell in ws[ws.max_row]:
-            cell.alignment = Alignment(vertical="top", wrap_text=True)
-    for column_index, width in enumerate([8, 24, 12, 8, 16, 14, 24, 16, 14, 22, 16, 18], start=1):
-        ws.column_dimensions[chr(64 + column_index)].width = width
-    style_excel_table_rows(ws, header_row_idx=header_row, data_start_row=data_start_row, data_end_row=ws.max_row, max_col=len(headers), centered_columns=[1, 3, 4, 5, 6, 8, 11, 12])
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    return buffer.getvalue()
-
-
-def _build_families_pdf(queryset, subtitle, title):
-    from reports.views import create_letterhead
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(buffer, title, pagesize=landscape(A4))
-    elements = []
-    create_letterhead(elements, title, f"{subtitle} (Total: {queryset.count()})")
-    rows = [[family.family_code, family.head_of_family, normalize_identifier_value(family.phone_number, "N/A"), str(family.total_family_members or 0), family.district.name if family.district else "N/A", family.sector.name if family.sector else "N/A", family.get_payment_ability_display(), family.get_mutuelle_support_status_display()] for family in queryset]
-    data = prepend_row_numbers(["Family Code", "Head of Family", "Phone", "Members", "District", "Sector", "Payment Ability", "Mutuelle Support"], rows)
-    elements.append(build_export_table(data, col_widths=[26, 95, 120, 80, 45, 72, 60, 74, 82], body_font_size=7, centered_columns=[0, 4, 5, 6, 7, 8]))
-    doc.build(elements, canvasmaker=ExportNumberedCanvas)
-    return buffer.getvalue()
-
-
-def _build_families_excel(queryset, subtitle, title, sheet_title):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = sheet_title
-    headers = ["No.", "Family Code", "Head of Family", "Phone", "Members", "District", "Sector", "Payment Ability", "Mutuelle Support"]
-    header_row = write_excel_report_header(ws, title, subtitle, len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-    data_start_row = header_row + 1
-    for index, family in enumerate(queryset, start=1):
-        ws.append([index, family.family_code, family.head_of_family, normalize_identifier_value(family.phone_number, "N/A"), family.total_family_members or 0, family.district.name if family.district else "N/A", family.sector.name if family.sector else "N/A", family.get_payment_ability_display(), family.get_mutuelle_support_status_display()])
-    autosize_worksheet_columns(ws, max_width=24)
-    style_excel_table_rows(ws, header_row_idx=header_row, data_start_row=data_start_row, data_end_row=ws.max_row, max_col=len(headers), centered_columns=[1, 5, 6, 7, 8, 9])
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    return buffer.getvalue()
-
-
-def _build_schools_pdf(queryset, subtitle):
-    from reports.views import create_letterhead
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(buffer, "Schools Directory Report", pagesize=landscape(A4))
-    elements = []
-    create_letterhead(elements, "Schools Directory Report", f"{subtitle} (Total: {queryset.count()})")
-    rows = [[school.name, school.headteacher_name or "N/A", normalize_identifier_value(school.headteacher_mobile, "N/A"), school.district.name if school.district else "N/A", school.sector.name if school.sector else "N/A", format_money(school.fee_amount), school.bank_name or "N/A"] for school in queryset]
-    data = prepend_row_numbers(["School Name", "Headteacher", "Phone", "District", "Sector", "Fee Amount", "Bank"], rows)
-    elements.append(build_export_table(data, col_widths=[26, 132, 100, 92, 60, 56, 66, 100], body_font_size=7, centered_columns=[0, 4, 5, 6], right_aligned_columns=[6]))
-    doc.build(elements, canvasmaker=ExportNumberedCanvas)
-    return buffer.getvalue()
-
-
-def _build_schools_excel(queryset, subtitle):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Schools"
-    headers = ["No.", "School Name", "Headteacher", "Phone", "District", "Sector", "Fee Amount", "Bank"]
-    header_row = write_excel_report_header(ws, "Schools Directory Report", subtitle, len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-    data_start_row = header_row + 1
-    for index, school in enumerate(queryset, start=1):
-        ws.append([index, school.name, school.headteacher_name or "N/A", normalize_identifier_value(school.headteacher_mobile, "N/A"), school.district.name if school.district else "N/A", school.sector.name if school.sector else "N/A", float(school.fee_amount or 0), school.bank_name or "N/A"])
-    autosize_worksheet_columns(ws, max_width=24)
-    style_excel_table_rows(ws, header_row_idx=header_row, data_start_row=data_start_row, data_end_row=ws.max_row, max_col=len(headers), centered_columns=[1, 5, 6], right_aligned_columns=[7])
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    return buffer.getvalue()
-
-
-def _build_fees_pdf(queryset, subtitle):
-    from reports.views import create_letterhead
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(buffer, "School Fees Summary Report")
-    elements = []
-    create_letterhead(elements, "School Fees Summary Report", f"{subtitle} (Total: {queryset.count()})")
-    rows = [[fee.student.full_name, f"Term {fee.term}", fee.student.school.name if fee.student.school else "N/A", f"{fee.total_fees:,.0f}", f"{fee.amount_paid:,.0f}", f"{fee.balance:,.0f}", fee.get_payment_status_display()] for fee in queryset]
-    data = prepend_row_numbers(["Student Name", "Term", "School", "Required (RWF)", "Paid (RWF)", "Balance (RWF)", "Status"], rows)
-    elements.append(build_export_table(data, col_widths=[32, 122, 54, 104, 72, 72, 72, 68], body_font_size=7, centered_columns=[0, 2, 4, 5, 6, 7]))
-    doc.build(elements, canvasmaker=ExportNumberedCanvas)
-    return buffer.getvalue()
-
-
-def _build_fees_excel(queryset, subtitle):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Fees Summary"
-    headers = ["No.", "Student Name", "Term", "Required Fees", "Amount Paid", "Balance", "Status"]
-    header_row = write_excel_report_header(ws, "School Fees Summary Report", subtitle, len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-    data_start_row = header_row + 1
-    for index, fee in enumerate(queryset, start=1):
-        ws.append([index, fee.student.full_name, fee.term, float(fee.total_fees), float(fee.amount_paid), float(fee.balance), fee.get_payment_status_display()])
-    autosize_worksheet_columns(ws, max_width=50)
-    style_excel_table_rows(ws, header_row_idx=header_row, data_start_row=data_start_row, data_end_row=ws.max_row, max_col=len(headers), centered_columns=[1, 3, 7], right_aligned_columns=[4, 5, 6])
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    return buffer.getvalue()
-
-
-def _build_insurance_pdf(queryset, subtitle):
-    from reports.views import create_letterhead
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(buffer, "Mutuelle de Sante Coverage Report")
-    elements = []
-    create_letterhead(elements, "Mutuelle de Sante Coverage Report", f"{subtitle} (Total: {queryset.count()})")
-    rows = []
-    for insurance in queryset:
-        balance = float(insurance.required_amount) - float(insurance.amount_paid)
-        rows.append([insurance.family.head_of_family, insurance.insurance_year.name if insurance.insurance_year else "", f"{insurance.required_amount:,.0f}", f"{insurance.amount_paid:,.0f}", f"{balance:,.0f}", insurance.get_coverage_status_display()])
-    data = prepend_row_numbers(["Family Head", "Year", "Required (RWF)", "Paid (RWF)", "Balance (RWF)", "Status"], rows)
-    elements.append(build_export_table(data, col_widths=[32, 151, 72, 90, 90, 90, 80], body_font_size=8, centered_columns=[0, 2, 3, 4, 5, 6]))
-    doc.build(elements, canvasmaker=ExportNumberedCanvas)
-    return buffer.getvalue()
-
-
-def _build_insurance_excel(queryset, subtitle):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Mutuelle Coverage"
-    headers = ["No.", "Family Head", "Year", "Required Amount", "Amount Paid", "Balance", "Status"]
-    header_row = write_excel_report_header(ws, "Mutuelle de Sante Coverage Report", subtitle, len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-    data_start_row = header_row + 1
-    for index, insurance in enumerate(queryset, start=1):
-        balance = float(insurance.required_amount) - float(insurance.amount_paid)
-        ws.append([index, insurance.family.head_of_family, insurance.insurance_year.name if insurance.insurance_year else "", float(insurance.required_amount), float(insurance.amount_paid), balance, insurance.get_coverage_status_display()])
-    autosize_worksheet_columns(ws, max_width=28)
-    style_excel_table_rows(ws, header_row_idx=header_row, data_start_row=data_start_row, data_end_row=ws.max_row, max_col=len(headers), centered_columns=[1, 3, 7], right_aligned_columns=[4, 5, 6])
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    return buffer.getvalue()
+STUDENT_COLUMNS = (
+    ReportColumn("full_name", "Full Name", Trim(Concat("first_name", Value(" "), "last_name", output_field=CharField())), pdf_width=92, excel_width=24),
+    ReportColumn("gender", "Gender", _choice_label("gender", Student.GENDER_CHOICES), align="center", pdf_width=34, excel_width=12),
+    ReportColumn("age", "Age", "date_of_birth", kind=INTEGER, align="center", empty="N/A", transform=_age_today, pdf_width=26, excel_width=8),
+    ReportColumn("education_level", "Education Level", _choice_label("school_level", Student.SCHOOL_LEVEL_CHOICES, blank="N/A"), align="center", pdf_width=54, excel_width=16),
+    ReportColumn("class_level", "Class/Year", Coalesce(_nonblank("class_level"), Value("N/A")), align="center", pdf_width=50, excel_width=14),
+    ReportColumn("school", "School", Coalesce("school__name", _nonblank("school_name"), Value("N/A")), pdf_width=104, excel_width=24),
+    ReportColumn("district", "District", Coalesce("partner__district__name", "family__district__name", Value("N/A")), align="center", pdf_width=54, excel_width=16),
+    ReportColumn("sector", "Sector", Coalesce("partner__sector__name", "family__sector__name", "school__sector__name", Value("N/A")), pdf_width=54, excel_width=14),
+    ReportColumn(
+        "guardian",
+        "Guardian/Parent",
+        Case(
+            When(
+                family__isnull=False,
+                then=Coalesce(
+                    _nonblank("family__guardian_name"),
+                    Case(
+                        When(
+                            ~Q(family__father_name="") & ~Q(family__mother_name=""),
+                            then=Concat("family__father_name", Value(" / "), "family__mother_name"),
+                        ),
+                        default=Coalesce(_nonblank("family__father_name"), _nonblank("family__mother_name")),
+                        output_field=CharField(),
+                    ),
+                    _nonblank("family__head_of_family"),
+                    Value("N/A"),
+                ),
+            ),
+            default=Coalesce(_nonblank("partner__contact_person"), Value("N/A")),
+            output_field=CharField(),
+        ),
+        pdf_width=126,
+        excel_width=22,
+    ),
+    ReportColumn(
+        "phone",
+        "Phone",
+        Coalesce(
+            _nonblank("family__guardian_phone"),
+            _nonblank("family__phone_number"),
+            _nonblank("family__alternative_phone"),
+            _nonblank("partner__phone"),
+            Value("N/A"),
+        ),
+        align="center",
+        transform=_identifier,
+        pdf_width=72,
+        excel_width=16,
+    ),
+    ReportColumn("sponsorship_status", "Sponsorship Status", _choice_label("sponsorship_status", Student.SPONSORSHIP_STATUS_CHOICES), align="center", pdf_width=70, excel_width=18),
+)
+
+FAMILY_COLUMNS = (
+    ReportColumn("family_code", "Family Code", "family_code", pdf_width=95),
+    ReportColumn("head_of_family", "Head of Family", "head_of_family", pdf_width=120),
+    ReportColumn("phone", "Phone", "phone_number", transform=_identifier, pdf_width=80),
+    ReportColumn("members", "Members", Coalesce("total_family_members", Value(0)), kind=INTEGER, align="center", pdf_width=45),
+    ReportColumn("district", "District", _name_or_na("district__name"), align="center", pdf_width=72),
+    ReportColumn("sector", "Sector", _name_or_na("sector__name"), align="center", pdf_width=60),
+    ReportColumn("payment_ability", "Payment Ability", _choice_label("payment_ability", Family.PAYMENT_ABILITY_CHOICES), align="center", pdf_width=74),
+    ReportColumn("mutuelle_support", "Mutuelle Support", _choice_label("mutuelle_support_status", Family.MUTUELLE_SUPPORT_STATUS_CHOICES), align="center", pdf_width=82),
+)
+
+SCHOOL_COLUMNS = (
+    ReportColumn("name", "School Name", "name", pdf_width=132),
+    ReportColumn("headteacher", "Headteacher", Coalesce(_nonblank("headteacher_name"), Value("N/A")), pdf_width=100),
+    ReportColumn("phone", "Phone", "headteacher_mobile", transform=_identifier, pdf_width=92),
+    ReportColumn("district", "District", _name_or_na("district__name"), align="center", pdf_width=60),
+    ReportColumn("sector", "Sector", _name_or_na("sector__name"), align="center", pdf_width=56),
+    ReportColumn("fee_amount", "Fee Amount", Coalesce("fee_amount", Value(Decimal("0"))), kind=MONEY, align="right", pdf_width=66),
+    ReportColumn("bank", "Bank", Coalesce(_nonblank("bank_name"), Value("N/A")), pdf_width=100),
+)
+
+FEE_COLUMNS = (
+    ReportColumn("student", "Student Name", Trim(Concat("student__first_name", Value(" "), "student__last_name", output_field=CharField())), pdf_width=122),
+    ReportColumn("term", "Term", Concat(Value("Term "), "term", output_field=CharField()), align="center", pdf_width=54),
+    ReportColumn("school", "School", Coalesce("student__school__name", Value("N/A")), pdf_width=104),
+    ReportColumn("required", "Required Fees", "total_fees", kind=MONEY, align="right", total=True, pdf_header="Required (RWF)", pdf_width=72),
+    ReportColumn("paid", "Amount Paid", "amount_paid", kind=MONEY, align="right", total=True, pdf_header="Paid (RWF)", pdf_width=72),
+    ReportColumn("balance", "Balance", "balance", kind=MONEY, align="right", total=True, pdf_header="Balance (RWF)", pdf_width=72),
+    ReportColumn("status", "Status", _choice_label("payment_status", SchoolFee.PAYMENT_STATUS_CHOICES), align="center", pdf_width=68),
+)
+
+INSURANCE_COLUMNS = (
+    ReportColumn("family_head", "Family Head", "family__head_of_family", pdf_width=151),
+    ReportColumn("year", "Year", "insurance_year__name", align="center", pdf_width=72),
+    ReportColumn("required", "Required Amount", "required_amount", kind=MONEY, align="right", total=True, pdf_header="Required (RWF)", pdf_width=90),
+    ReportColumn("paid", "Amount Paid", "amount_paid", kind=MONEY, align="right", total=True, pdf_header="Paid (RWF)", pdf_width=90),
+    ReportColumn(
+        "balance",
+        "Balance",
+        ExpressionWrapper(F("required_amount") - F("amount_paid"), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        kind=MONEY,
+        align="right",
+        total=True,
+        pdf_header="Balance (RWF)",
+        pdf_width=90,
+    ),
+    ReportColumn("status", "Status", _choice_label("coverage_status", FamilyInsurance.COVERAGE_STATUS_CHOICES), align="center", pdf_width=80),
+)
+
+
+def _supported_families_queryset(cleaned_data):
+    return _families_queryset(cleaned_data, supported_only=True)
+
+
+REPORT_DEFINITIONS = {
+    "students": ReportSpec(
+        key="students",
+        label="Students List",
+        permission="students.view_student",
+        filters=("academic_year", "district", "sector", "school", "gender", "school_level", "sponsorship_status", "enrollment_status", "payment_ability", "mutuelle_support_status", "age_from", "age_to"),
+        arrangements=("age", "district", "sector", "school", "gender", "school_level", "sponsorship_status", "enrollment_status", "payment_ability", "mutuelle_support_status"),
+        title="Students List Report",
+        filename="students_list",
+        sheet_title="Students List",
+        queryset=_student_queryset,
+        columns=STUDENT_COLUMNS,
+        pdf=PdfLayout(landscape=True, font_size=6.2, number_width=24, wrap_cells=True, margins={"left_margin": 36, "right_margin": 36, "top_margin": 40, "bottom_margin": 48}),
+    ),
+    "families": ReportSpec(
+        key="families",
+        label="Families Directory",
+        permission="families.view_family",
+        filters=("district", "sector", "payment_ability", "mutuelle_support_status"),
+        arrangements=("district", "sector", "payment_ability", "mutuelle_support_status"),
+        title="Families Directory Report",
+        filename="families_directory",
+        sheet_title="Families",
+        queryset=_families_queryset,
+        columns=FAMILY_COLUMNS,
+        pdf=PdfLayout(landscape=True),
+        excel_max_width=24,
+    ),
+    "schools": ReportSpec(
+        key="schools",
+        label="Schools Directory",
+        permission="core.view_school",
+        filters=("district", "sector"),
+        arrangements=("district", "sector"),
+        title="Schools Directory Report",
+        filename="schools_directory",
+        sheet_title="Schools",
+        queryset=_schools_queryset,
+        columns=SCHOOL_COLUMNS,
+        pdf=PdfLayout(landscape=True),
+        excel_max_width=24,
+    ),
+    "fees": ReportSpec(
+        key="fees",
+        label="School Fees Summary",
+        permission="finance.view_schoolfee",
+        filters=("academic_year", "district", "school", "payment_status"),
+        arrangements=("academic_year", "district", "school", "payment_status"),
+        title="School Fees Summary Report",
+        filename="school_fees",
+        sheet_title="Fees Summary",
+        queryset=_fees_queryset,
+        columns=FEE_COLUMNS,
+        pdf=PdfLayout(number_width=32),
+        excel_max_width=50,
+        summary_field="payment_status",
+        summary_choices=tuple(SchoolFee.PAYMENT_STATUS_CHOICES),
+    ),
+    "insurance": ReportSpec(
+        key="insurance",
+        label="Mutuelle Coverage",
+        permission="insurance.view_familyinsurance",
+        filters=("academic_year", "district", "sector", "coverage_status"),
+        arrangements=("academic_year", "district", "sector", "coverage_status"),
+        title="Mutuelle de Sante Coverage Report",
+        filename="mutuelle_coverage",
+        sheet_title="Mutuelle Coverage",
+        queryset=_insurance_queryset,
+        columns=INSURANCE_COLUMNS,
+        pdf=PdfLayout(font_size=8, number_width=32),
+        excel_max_width=28,
+        summary_field="coverage_status",
+        summary_choices=tuple(FamilyInsurance.COVERAGE_STATUS_CHOICES),
+    ),
+    "supported_mutuelle_families": ReportSpec(
+        key="supported_mutuelle_families",
+        label="Supported Mutuelle Families",
+        permission="families.view_family",
+        filters=("district", "sector"),
+        arrangements=("district", "sector"),
+        title="Supported Mutuelle Families Report",
+        filename="supported_mutuelle_families",
+        sheet_title="Supported Families",
+        queryset=_supported_families_queryset,
+        columns=FAMILY_COLUMNS,
+        pdf=PdfLayout(landscape=True),
+        excel_max_width=24,
+    ),
+}
+
+
+def _report_cache_parameters(report, cleaned_data):
+    return {name: cleaned_data.get(name) for name in (*report.filters, "arrangement")}
 
 
 def generate_report_attachment(report_key, export_format, cleaned_data):
+    """Build the report file, or reuse the cached one while its filters and data are unchanged."""
     report = get_report_definition(report_key)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    arrangement = cleaned_data.get("arrangement")
+    if report is None:
+        raise ValueError("Unsupported report type selected.")
+    if not report_cache_enabled():
+        return {**render_report(report, export_format, cleaned_data), "report": report}
 
-    if report_key == "students":
-        queryset, subtitle = _student_queryset(cleaned_data)
-        content = _build_students_pdf(queryset, subtitle) if export_format == "pdf" else _build_students_excel(queryset, subtitle)
-        filename = f"students_list_{timestamp}.{'pdf' if export_format == 'pdf' else 'xlsx'}"
-    elif report_key == "families":
-        queryset, subtitle = _families_queryset(cleaned_data)
-        content = _build_families_pdf(queryset, subtitle, "Families Directory Report") if export_format == "pdf" else _build_families_excel(queryset, subtitle, "Families Directory Report", "Families")
-        filename = f"families_directory_{timestamp}.{'pdf' if export_format == 'pdf' else 'xlsx'}"
-    elif report_key == "schools":
-        queryset, subtitle = _schools_queryset(cleaned_data)
-        content = _build_schools_pdf(queryset, subtitle) if export_format == "pdf" else _build_schools_excel(queryset, subtitle)
-        filename = f"schools_directory_{timestamp}.{'pdf' if export_format == 'pdf' else 'xlsx'}"
-    elif report_key == "fees":
-        queryset, subtitle = _fees_queryset(cleaned_data)
-        content = _build_fees_pdf(queryset, subtitle) if export_format == "pdf" else _build_fees_excel(queryset, subtitle)
-        filename = f"school_fees_{timestamp}.{'pdf' if export_format == 'pdf' else 'xlsx'}"
-    elif report_key == "insurance":
-        queryset, subtitle = _insurance_queryset(cleaned_data)
-        content = _build_insurance_pdf(queryset, subtitle) if export_format == "pdf" else _build_insurance_excel(queryset, subtitle)
-        filename = f"mutuelle_coverage_{timestamp}.{'pdf' if export_format == 'pdf' else 'xlsx'}"
-    elif report_key == "supported_mutuelle_families":
-        queryset, subtitle = _families_queryset(cleaned_data, supported_only=True)
-        content = _build_families_pdf(queryset, subtitle, "Supported Mutuelle Families Report") if export_format == "pdf" else _build_families_excel(queryset, subtitle, "Supported Mutuelle Families Report", "Supported Families")
-        filename = f"supported_mutuelle_families_{timestamp}.{'pdf' if export_format == 'pdf' else 'xlsx'}"
-    else:
+    key = report_cache_key(report_key, export_format, _report_cache_parameters(report, cleaned_data))
+    cached = get_cached_report(key)
+    if cached is not None:
+        return {**cached.metadata, "content": cached.read(), "report": report}
+
+    attachment = render_report(report, export_format, cleaned_data)
+    store_report(key, attachment["content"], {name: value for name, value in attachment.items() if name != "content"})
+    return {**attachment, "report": report}
+
+
+def stream_report_attachment(report_key, export_format, cleaned_data):
+    """
+    Return the report with ``content`` as an iterable of byte chunks for a streaming response.
+
+    A cached copy is served as an open file; otherwise the rows are read while the
+    response is sent and copied into the cache on the way out.
+    """
+    report = get_report_definition(report_key)
+    if report is None:
         raise ValueError("Unsupported report type selected.")
+    if not report_cache_enabled():
+        return {**stream_report(report, export_format, cleaned_data), "report": report}
 
-    if arrangement:
-        subtitle = f"{subtitle} - Arranged by {_arrangement_label(arrangement)}"
-
-    return {
-        "filename": filename,
-        "content_type": "application/pdf" if export_format == "pdf" else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        "content": content,
-        "report": report,
-        "subtitle": subtitle,
-        "record_count": queryset.count(),
-    }
+    # Streamed entries have no record count, so they are filed apart from rendered ones.
+    key = report_cache_key(report_key, f"{export_format}:stream", _report_cache_parameters(report, cleaned_data))
+    cached = get_cached_report(key)
+    if cached is not None:
+        return {**cached.metadata, "content": cached.open(), "report": report}
+
+    attachment = stream_report(report, export_format, cleaned_data)
+    metadata = {name: value for name, value in attachment.items() if name != "content"}
+    return {**attachment, "content": store_report_stream(key, attachment["content"], metadata), "report": report}
 
 
 def build_filter_preview(report_key, cleaned_data):
@@ -722,7 +612,7 @@ def build_filter_preview(report_key, cleaned_data):
     if arrangement:
         preview.append({
             "label": labels["arrangement"],
-            "value": _arrangement_label(arrangement),
+            "value": arrangement_label(arrangement),
         })
     for field_name in report.filters:
         value = cleaned_data.get(field_name)
@@ -0,0 +1,14 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .cache import MODEL_SOURCES, bump_report_generations
+
+
+def bump_instance_report_generation(sender, **kwargs):
+    bump_report_generations(MODEL_SOURCES[sender._meta.label_lower])
+
+
+for label in MODEL_SOURCES:
+    model = apps.get_model(label)
+    post_save.connect(bump_instance_report_generation, sender=model, dispatch_uid=f'report-cache-save-{label}')
+    post_delete.connect(bump_instance_report_generation, sender=model, dispatch_uid=f'report-cache-delete-{label}')
@@ -0,0 +1,378 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import AcademicYear, District, Partner, Province, School
+from families.models import Family
+from finance.models import SchoolFee
+from students.models import Student
+
+from . import jobs
+from .cache import (
+    clear_report_cache,
+    evict_report_cache,
+    get_cached_report,
+    get_report_cache_stats,
+    get_report_generations,
+    store_report,
+)
+from .jobs import claim_next_report_job, run_pending_report_jobs
+from .models import ReportJob
+from .services import generate_report_attachment, get_report_definition
+
+
+class ReportJobQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+        )
+        self.client.force_login(self.user)
+        School.objects.create(name='Alpha Primary')
+        self.form_data = {
+            'report_key': 'schools',
+            'export_format': 'excel',
+            'arrangement': '',
+            'recipients': 'finance@example.com',
+            'subject': '',
+            'message': '',
+        }
+
+    def tearDown(self):
+        for job in ReportJob.objects.exclude(result_file=''):
+            job.result_file.delete(save=False)
+
+    def test_send_report_queues_email_without_sending_in_request(self):
+        response = self.client.post(reverse('reports:send_report'), self.form_data)
+
+        self.assertRedirects(response, reverse('reports:send_report'))
+        job = ReportJob.objects.get()
+        self.assertEqual((job.kind, job.status), (ReportJob.KIND_EMAIL, ReportJob.STATUS_QUEUED))
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(run_pending_report_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.record_count), (ReportJob.STATUS_SUCCEEDED, 100, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['finance@example.com'])
+
+    def test_export_job_can_be_polled_and_downloaded(self):
+        self.client.post(reverse('reports:export_report'), self.form_data)
+        job = ReportJob.objects.get(kind=ReportJob.KIND_EXPORT)
+
+        status = self.client.get(reverse('reports:report_job_status', args=[job.pk])).json()
+        self.assertEqual((status['status'], status['download_url']), ('queued', ''))
+
+        run_pending_report_jobs()
+        status = self.client.get(reverse('reports:report_job_status', args=[job.pk])).json()
+        self.assertEqual(status['status'], 'succeeded')
+        self.assertEqual(len(mail.outbox), 0)
+
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+    def test_claim_respects_concurrency_limit(self):
+        for _ in range(3):
+            self.client.post(reverse('reports:export_report'), self.form_data)
+
+        with self.settings(REPORT_JOBS_MAX_CONCURRENCY=2):
+            claimed = [claim_next_report_job() for _ in range(2)]
+            with CaptureQueriesContext(connection) as queries:
+                claimed.append(claim_next_report_job())
+
+        self.assertIsNone(claimed[2])
+        # The cap is checked inside the claiming UPDATE, not by a separate count first.
+        counts = [query['sql'] for query in queries if 'COUNT(' in query['sql']]
+        self.assertTrue(counts)
+        self.assertTrue(all(sql.startswith('UPDATE') for sql in counts))
+        self.assertEqual(ReportJob.objects.filter(status=ReportJob.STATUS_RUNNING).count(), 2)
+        self.assertNotEqual(claimed[0].pk, claimed[1].pk)
+
+    def test_running_worker_requeues_jobs_that_become_stale(self):
+        for _ in range(2):
+            self.client.post(reverse('reports:export_report'), self.form_data)
+        stuck, queued = ReportJob.objects.order_by('pk')
+        ReportJob.objects.filter(pk=stuck.pk).update(status=ReportJob.STATUS_RUNNING, started_at=timezone.now(), attempts=1)
+        run_report_job = jobs.run_report_job
+
+        def run_and_age_the_stuck_job(job):
+            # The worker that claimed ``stuck`` dies while this worker keeps running.
+            ReportJob.objects.filter(pk=stuck.pk).update(started_at=timezone.now() - timedelta(hours=1))
+            return run_report_job(job)
+
+        class InlineThread:
+            # Run the worker loop on the test thread, which holds the test database connection.
+            def __init__(self, target, daemon):
+                self.target = target
+
+            def start(self):
+                self.target()
+
+            def join(self):
+                pass
+
+        output = io.StringIO()
+        with mock.patch(
+            'reports.management.commands.run_report_worker.run_report_job',
+            side_effect=run_and_age_the_stuck_job,
+        ), mock.patch('reports.management.commands.run_report_worker.threading.Thread', InlineThread):
+            call_command('run_report_worker', '--once', '--concurrency', '1', '--poll-interval', '0', stdout=output)
+
+        self.assertIn('Requeued 1 stale report job(s).', output.getvalue())
+        self.assertIn('Processed 2 report job(s).', output.getvalue())
+        self.assertEqual(
+            set(ReportJob.objects.filter(pk__in=[stuck.pk, queued.pk]).values_list('status', flat=True)),
+            {ReportJob.STATUS_SUCCEEDED},
+        )
+
+    def test_jobs_are_private_to_their_owner(self):
+        self.client.post(reverse('reports:export_report'), self.form_data)
+        job = ReportJob.objects.get()
+        other = User.objects.create_user(username='other', password='password123')
+        self.client.force_login(other)
+
+        response = self.client.get(reverse('reports:report_job_status', args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root, ignore_errors=True)
+        settings_override = override_settings(REPORT_CACHE_ENABLED=True, REPORT_CACHE_ROOT=cache_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Statistics counted in memory must not leak from one test into the next.
+        self.addCleanup(clear_report_cache)
+        self.cache_root = cache_root
+        self.user = User.objects.create_superuser(username='admin', password='password123')
+        self.client.force_login(self.user)
+        School.objects.create(name='Alpha Primary')
+
+    def test_attachment_is_reused_until_the_data_changes(self):
+        first = generate_report_attachment('schools', 'excel', {'arrangement': ''})
+        second = generate_report_attachment('schools', 'excel', {'arrangement': ''})
+
+        self.assertEqual(second['content'], first['content'])
+        self.assertEqual((second['filename'], second['record_count']), (first['filename'], 1))
+        stats = get_report_cache_stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 1))
+
+        generate_report_attachment('schools', 'pdf', {'arrangement': 'district'})
+        self.assertEqual(get_report_cache_stats().misses, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            School.objects.create(name='Beta Secondary')
+        third = generate_report_attachment('schools', 'excel', {'arrangement': ''})
+        self.assertEqual(third['record_count'], 2)
+        self.assertEqual(get_report_cache_stats().misses, 3)
+
+    def test_download_view_is_served_from_the_cache(self):
+        url = reverse('reports:schools_excel')
+        first = self.client.get(url).content
+        response = self.client.get(url)
+
+        self.assertEqual(response.content, first)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        self.assertEqual(get_report_cache_stats().hits, 1)
+
+        district = District.objects.create(name='Gasabo', province=Province.objects.create(name='Kigali'))
+        self.client.get(url, {'district': str(district.pk)})
+        self.assertEqual(get_report_cache_stats().misses, 2)
+
+    def test_streamed_report_is_cached_once_fully_read(self):
+        url = reverse('reports:stream_report', args=['schools', 'csv'])
+        partial = self.client.get(url)
+        next(iter(partial.streaming_content))
+        partial.close()
+        self.assertEqual(get_report_cache_stats().entries, 0)
+
+        first = b''.join(self.client.get(url).streaming_content)
+        second = b''.join(self.client.get(url).streaming_content)
+
+        self.assertEqual(second, first)
+        self.assertEqual(get_report_cache_stats().hits, 1)
+
+    def test_lookups_count_statistics_in_memory_until_flushed(self):
+        with CaptureQueriesContext(connection) as lookups:
+            for _ in range(3):
+                self.assertIsNone(get_cached_report('d' * 64))
+        self.assertFalse([query for query in lookups if 'reports_reportcachecounter' in query['sql']])
+
+        with mock.patch('reports.cache.STATS_FLUSH_INTERVAL', 0):
+            with self.captureOnCommitCallbacks(execute=True):
+                get_cached_report('d' * 64)
+        with CaptureQueriesContext(connection) as stats:
+            self.assertEqual(get_report_cache_stats().misses, 4)
+        self.assertFalse([query for query in stats if query['sql'].startswith('UPDATE')])
+
+    def test_generation_bumps_wait_for_the_commit_and_are_merged(self):
+        before = get_report_generations(['schools', 'students'])
+        with self.captureOnCommitCallbacks() as callbacks:
+            School.objects.create(name='Beta Secondary')
+            School.objects.create(name='Gamma Secondary')
+            self.assertEqual(get_report_generations(['schools', 'students']), before)
+
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(get_report_generations(['schools'])['schools'], before['schools'] + 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for index, key in enumerate(['a' * 64, 'b' * 64, 'c' * 64]):
+            store_report(key, b'x' * 100, {'content_type': 'text/plain'})
+            content_path = os.path.join(self.cache_root, f'{key}.bin')
+            os.utime(content_path, (1000 + index, 1000 + index))
+
+        self.assertEqual(evict_report_cache(max_bytes=300), 1)
+        self.assertEqual(sorted(name[0] for name in os.listdir(self.cache_root) if name.endswith('.bin')), ['b', 'c'])
+        self.assertEqual(get_report_cache_stats().evictions, 1)
+
+
+class StudentExportProjectionTests(TestCase):
+    def setUp(self):
+        province = Province.objects.create(name='Kigali')
+        self.gasabo = District.objects.create(name='Gasabo', province=province)
+        kicukiro = District.objects.create(name='Kicukiro', province=province)
+        self.school = School.objects.create(name='Alpha Primary', district=self.gasabo)
+        self.family = Family.objects.create(
+            head_of_family='Parent One',
+            national_id='1199999999999999',
+            phone_number='780000000.0',
+            father_name='Jean',
+            mother_name='Marie',
+            province=province,
+            district=self.gasabo,
+            total_family_members=4,
+        )
+        self.partner = Partner.objects.create(
+            name='Partner K',
+            district=kicukiro,
+            contact_person='Grace',
+            phone='0788111222',
+        )
+
+    def _create_student(self, first_name, **fields):
+        defaults = {
+            'last_name': 'Uwase',
+            'gender': 'F',
+            'date_of_birth': '2012-01-01',
+            'class_level': 'P5',
+            'school_level': 'primary',
+            'sponsorship_status': 'active',
+        }
+        return Student.objects.create(first_name=first_name, **{**defaults, **fields})
+
+    def test_rows_match_the_model_labels(self):
+        family_student = self._create_student('Aline', family=self.family, school=self.school)
+        self._create_student('Bella', partner=self.partner, school_name='Hill School', class_level='')
+        family_student.refresh_from_db()
+
+        rows = list(get_report_definition('students').rows(Student.objects.order_by('first_name')))
+
+        self.assertEqual(rows[0], [
+            'Aline Uwase', 'Female', family_student.age, family_student.get_school_level_display(), 'P5',
+            'Alpha Primary', 'Gasabo', 'N/A', 'Jean / Marie', '780000000', family_student.get_sponsorship_status_display(),
+        ])
+        self.assertEqual(rows[1][4:10], ['N/A', 'Hill School', 'Kicukiro', 'N/A', 'Grace', '0788111222'])
+
+    def test_projection_is_one_query_whatever_the_row_count(self):
+        for index in range(5):
+            self._create_student(f'Student {index}', family=self.family, partner=self.partner, school=self.school)
+
+        with self.assertNumQueries(1):
+            rows = list(get_report_definition('students').rows(Student.objects.filter(family=self.family).distinct()))
+        self.assertEqual(len(rows), 5)
+
+
+class ReportSpecRendererTests(TestCase):
+    def setUp(self):
+        self.year = AcademicYear.objects.create(name='2025-2026', is_active=True)
+        school = School.objects.create(name='Alpha Primary', fee_amount=Decimal('1000.00'))
+        for index, paid in enumerate([Decimal('1000.00'), Decimal('250.50')]):
+            student = Student.objects.create(
+                first_name=f'Student{index}',
+                last_name='Test',
+                gender='F',
+                date_of_birth='2012-01-01',
+                school=school,
+            )
+            SchoolFee.objects.create(
+                student=student,
+                academic_year=self.year,
+                term='1',
+                total_fees=Decimal('1000.00'),
+                amount_paid=paid,
+            )
+
+    def test_every_spec_renders_every_format(self):
+        for report_key in ('students', 'families', 'schools', 'fees', 'insurance', 'supported_mutuelle_families'):
+            for export_format in get_report_definition(report_key).formats:
+                with self.subTest(report=report_key, format=export_format):
+                    attachment = generate_report_attachment(report_key, export_format, {'arrangement': 'district'})
+                    self.assertIsInstance(attachment['content'], bytes)
+                    self.assertIn('Arranged by District', attachment['subtitle'])
+
+    def test_csv_keeps_exact_amounts(self):
+        attachment = generate_report_attachment('fees', 'csv', {'academic_year': self.year})
+
+        rows = list(csv.reader(io.StringIO(attachment['content'].decode('utf-8'))))
+        self.assertEqual(rows[0], ['Student Name', 'Term', 'School', 'Required Fees', 'Amount Paid', 'Balance', 'Status'])
+        self.assertEqual(rows[2][:6], ['Student1 Test', 'Term 1', 'Alpha Primary', '1000.00', '250.50', '749.50'])
+        self.assertEqual(attachment['record_count'], 2)
+        self.assertTrue(attachment['filename'].endswith('.csv'))
+
+    def test_json_lists_columns_and_typed_rows(self):
+        document = json.loads(generate_report_attachment('fees', 'json', {})['content'])
+
+        self.assertEqual(document['report'], 'fees')
+        self.assertEqual(document['count'], 2)
+        self.assertEqual(document['columns'][3], {'name': 'required', 'header': 'Required Fees', 'kind': 'money'})
+        self.assertEqual(document['rows'][0]['status'], 'Paid')
+
+    def test_summary_counts_each_status_in_one_query(self):
+        report = get_report_definition('fees')
+        queryset, _subtitle = report.build({})
+
+        with self.assertNumQueries(1):
+            summary = dict(report.summary(queryset))
+        self.assertEqual(summary['Paid'], 1)
+        self.assertEqual(summary['Partial'], 1)
+
+    def test_stream_view_sends_csv_and_ndjson_chunks(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', password='password123'))
+
+        response = self.client.get(reverse('reports:stream_report', args=['fees', 'csv']), {'year': self.year.pk})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="school_fees_', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+
+        response = self.client.get(reverse('reports:stream_report', args=['fees', 'ndjson']))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([record['balance'] for record in records], ['0.00', '749.50'])
+
+    def test_stream_view_checks_the_report_permission(self):
+        self.client.force_login(User.objects.create_user(username='viewer', password='password123'))
+
+        self.assertEqual(self.client.get(reverse('reports:stream_report', args=['fees', 'csv'])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('reports:stream_report', args=['fees', 'pdf'])).status_code, 404)
@@ -8,6 +8,9 @@ urlpatterns = [
     path('analysis/', views.analysis_dashboard, name='analysis'),
     path('send/', views.send_report, name='send_report'),
     path('send/preview/', views.preview_report, name='preview_report'),
+    path('send/export/', views.export_report, name='export_report'),
+    path('jobs/<int:job_id>/status/', views.report_job_status, name='report_job_status'),
+    path('jobs/<int:job_id>/download/', views.report_job_download, name='report_job_download'),
     path('students/pdf/', views.students_pdf, name='students_pdf'),
     path('students/excel/', views.students_excel, name='students_excel'),
     path('students/sponsored/', views.sponsored_students_report, name='sponsored_students_report'),
@@ -20,5 +23,6 @@ urlpatterns = [
     path('financial/pdf/', views.financial_report_pdf, name='financial_report_pdf'),
     path('insurance/pdf/', views.insurance_pdf, name='insurance_pdf'),
     path('insurance/supported-families/pdf/', views.supported_mutuelle_families_pdf, name='supported_mutuelle_families_pdf'),
+    path('stream/<slug:report_key>/<slug:export_format>/', views.stream_report_download, name='stream_report'),
 ]
 
@@ -2,55 +2,54 @@ import json
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, permission_required
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.urls import reverse
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from django.db.models import Prefetch
 from django.db.models import Sum, Count, Avg, Q
 from students.models import Student, StudentMark, StudentMaterial
 from finance.models import SchoolFee
 from insurance.models import FamilyInsurance
-from families.models import Family
-from core.models import AcademicYear, Partner, District, School
+from core.models import AcademicYear, Partner, District, School, Sector
 from core.export_utils import (
     ExportNumberedCanvas,
     add_export_header,
-    autosize_worksheet_columns,
     build_export_pdf_document,
     build_export_table,
-    prepend_row_numbers,
     resolve_logo_path,
-    style_excel_header,
-    style_excel_table_rows,
-    write_excel_report_header,
 )
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+from reportlab.lib.enums import TA_RIGHT, TA_LEFT
 from datetime import datetime, date
 import io
-from core.utils import format_money
+from dashboard.snapshots import summarize_snapshots, summarize_snapshots_by
 
+from .cache import cache_report_response
+from .engine import RENDERERS
 from .forms import SendReportForm
+from .jobs import enqueue_report_job
+from .models import ReportJob
 from .services import (
     build_filter_preview,
     ensure_report_permission,
     generate_report_attachment,
     get_arrangement_choices,
     get_available_reports_for_user,
-    send_report_email,
+    get_report_definition,
+    latest_coverage_status_subquery,
+    stream_report_attachment,
 )
 
 
 NumberedCanvas = ExportNumberedCanvas
+RECENT_REPORT_JOBS = 10
+STREAMING_FORMATS = {name for name, renderer in RENDERERS.items() if hasattr(renderer, 'stream')}
 
 
-def _build_send_report_context(*, request, form, available_reports, sent_summary=None):
+def _build_send_report_context(*, request, form, available_reports):
     report_definitions = {
         report.key: {
             "label": report.label,
@@ -77,7 +76,7 @@ def _build_send_report_context(*, request, form, available_reports, sent_summary
         "selected_report_key": selected_report_key,
         "filter_preview": filter_preview,
         "available_reports": available_reports,
-        "sent_summary": sent_summary,
+        "report_jobs": ReportJob.objects.filter(requested_by=request.user)[:RECENT_REPORT_JOBS],
     }
 
 
@@ -145,340 +144,71 @@ def create_letterhead(elements, report_title, report_subtitle=None):
     add_export_header(elements, report_title, report_subtitle)
 
 
-def _safe_year_shift(years_ago):
-    """Return today's date shifted back by whole years, handling leap years safely."""
-    today = date.today()
-    try:
-        return today.replace(year=today.year - years_ago)
-    except ValueError:
-        return today.replace(month=2, day=28, year=today.year - years_ago)
-
-
-def _apply_student_report_filters(request, queryset=None):
-    """Apply shared student report filters, including age range."""
-    students = queryset or Student.objects.select_related('school', 'program_officer', 'family', 'partner').all()
-
-    year_id = request.GET.get('year')
-    district_id = request.GET.get('district')
-    age_from = request.GET.get('age_from')
-    age_to = request.GET.get('age_to')
-
-    subtitle_parts = ["All Students"]
-
-    if year_id:
-        academic_year = get_object_or_404(AcademicYear, id=year_id)
-        students = students.filter(
-            Q(academic_records__academic_year=academic_year) |
-            Q(fees__academic_year=academic_year)
-        ).distinct()
-        subtitle_parts = [f"Academic Year: {academic_year.name}"]
-
-    if district_id:
-        district = get_object_or_404(District, id=district_id)
-        students = students.filter(
-            Q(family__district_id=district_id) | Q(partner__district_id=district_id)
-        )
-        subtitle_parts.append(district.name)
-
-    parsed_age_from = None
-    parsed_age_to = None
-
-    if age_from:
-        try:
-            parsed_age_from = max(int(age_from), 0)
-            born_on_or_before = _safe_year_shift(parsed_age_from)
-            students = students.filter(date_of_birth__lte=born_on_or_before)
-        except (TypeError, ValueError):
-            parsed_age_from = None
-
-    if age_to:
-        try:
-            parsed_age_to = max(int(age_to), 0)
-            born_after = _safe_year_shift(parsed_age_to + 1)
-            students = students.filter(date_of_birth__gt=born_after)
-        except (TypeError, ValueError):
-            parsed_age_to = None
-
-    if parsed_age_from is not None and parsed_age_to is not None and parsed_age_from > parsed_age_to:
-        parsed_age_from, parsed_age_to = parsed_age_to, parsed_age_from
-        students = queryset or Student.objects.select_related('school', 'program_officer', 'family', 'partner').all()
-
-        if year_id:
-            academic_year = get_object_or_404(AcademicYear, id=year_id)
-            students = students.filter(
-                Q(academic_records__academic_year=academic_year) |
-                Q(fees__academic_year=academic_year)
-            ).distinct()
-        if district_id:
-            students = students.filter(
-                Q(family__district_id=district_id) | Q(partner__district_id=district_id)
-            )
-        students = students.filter(
-            date_of_birth__lte=_safe_year_shift(parsed_age_from),
-            date_of_birth__gt=_safe_year_shift(parsed_age_to + 1),
-        )
+# GET parameters of the download links that name a model instance by id.
+REPORT_MODEL_FILTERS = {
+    'academic_year': AcademicYear,
+    'district': District,
+    'sector': Sector,
+    'school': School,
+}
 
-    if parsed_age_from is not None or parsed_age_to is not None:
-        age_label = f"Age {parsed_age_from if parsed_age_from is not None else 0} to {parsed_age_to if parsed_age_to is not None else 'above'}"
-        subtitle_parts.append(age_label)
 
-    subtitle = " - ".join(subtitle_parts)
-    return students.distinct(), subtitle, {
-        'year_id': year_id,
-        'district_id': district_id,
-        'age_from': parsed_age_from,
-        'age_to': parsed_age_to,
-    }
+def _report_filters_from_request(request, report):
+    """Read ``report.filters`` and the arrangement from the query string of a download link."""
+    cleaned_data = {}
+    for name in report.filters:
+        value = request.GET.get(name) or (request.GET.get('year') if name == 'academic_year' else None)
+        if not value:
+            continue
+        model = REPORT_MODEL_FILTERS.get(name)
+        if model is not None:
+            if not value.isdigit():
+                raise Http404('Unknown report filter value.')
+            value = get_object_or_404(model, pk=value)
+        cleaned_data[name] = value
+    arrangement = request.GET.get('arrangement')
+    if arrangement in report.arrangements:
+        cleaned_data['arrangement'] = arrangement
+    return cleaned_data
+
+
+def _report_download(request, report_key, export_format):
+    """Build ``report_key`` through its report spec and return it as an attachment."""
+    report = get_report_definition(report_key)
+    attachment = generate_report_attachment(report_key, export_format, _report_filters_from_request(request, report))
+    response = HttpResponse(attachment['content'], content_type=attachment['content_type'])
+    response['Content-Disposition'] = f'attachment; filename="{attachment["filename"]}"'
+    return response
 
 
-def _apply_directory_district_filter(request, queryset, base_label="All Records"):
-    """Apply the shared district filter to family and school directory reports."""
-    district_id = request.GET.get('district')
-    subtitle = base_label
-    if district_id:
-        district = get_object_or_404(District, id=district_id)
-        queryset = queryset.filter(district_id=district_id)
-        subtitle = f"{base_label} - {district.name}"
-    return queryset, subtitle
-
-
-def _student_guardian_parent_label(student):
-    family = student.family
-    if family:
-        if family.guardian_name:
-            return family.guardian_name
-        parent_names = [name for name in [family.father_name, family.mother_name] if name]
-        if parent_names:
-            return " / ".join(parent_names)
-        return family.head_of_family or 'N/A'
-    if student.partner and student.partner.contact_person:
-        return student.partner.contact_person
-    return 'N/A'
-
-
-def _student_phone_label(student):
-    family = student.family
-    if family:
-        if family.guardian_phone:
-            return family.guardian_phone
-        if family.phone_number:
-            return family.phone_number
-        if family.alternative_phone:
-            return family.alternative_phone
-    if student.partner and student.partner.phone:
-        return student.partner.phone
-    return 'N/A'
-
-
-def _student_sector_label(student):
-    if student.partner and student.partner.sector:
-        return student.partner.sector.name
-    if student.family and student.family.sector:
-        return student.family.sector.name
-    if student.school and student.school.sector:
-        return student.school.sector.name
-    return 'N/A'
-
-
-def _student_mutuelle_support_label(student):
-    if student.family:
-        return student.family.get_mutuelle_support_status_display()
-    return 'N/A'
-
-
-def _student_latest_fee_status(student):
-    fee_records = getattr(student, 'prefetched_fees', None)
-    if fee_records:
-        return fee_records[0].get_payment_status_display()
-    return 'No Fee Record'
-
-
-def _student_export_row(student):
-    return [
-        student.full_name,
-        student.get_gender_display(),
-        str(student.age if student.age is not None else 'N/A'),
-        student.get_school_level_display() if student.school_level else 'N/A',
-        student.class_level or 'N/A',
-        student.school.name if student.school else (student.school_name or 'N/A'),
-        student.family_district_name,
-        _student_sector_label(student),
-        _student_guardian_parent_label(student),
-        _student_phone_label(student),
-        student.get_sponsorship_status_display(),
-    ]
+@login_required
+def stream_report_download(request, report_key, export_format):
+    """Stream a list report as CSV or NDJSON, reading its rows while the response is sent."""
+    report = get_report_definition(report_key)
+    if report is None or export_format not in STREAMING_FORMATS or export_format not in report.formats:
+        raise Http404('Unknown report or format.')
+    if not request.user.has_perm(report.permission):
+        raise PermissionDenied('You do not have permission to export this report.')
+
+    attachment = stream_report_attachment(report_key, export_format, _report_filters_from_request(request, report))
+    # FileResponse streams a generator like StreamingHttpResponse and reads cached files in blocks.
+    response = FileResponse(attachment['content'], content_type=attachment['content_type'])
+    response['Content-Disposition'] = f'attachment; filename="{attachment["filename"]}"'
+    return response
 
 
 @login_required
 @permission_required('students.view_student', raise_exception=True)
 def students_pdf(request):
     """Export students list as PDF."""
-    base_queryset = Student.objects.select_related(
-        'school',
-        'family__district',
-        'family__sector',
-        'partner__district',
-        'partner__sector',
-    ).prefetch_related(
-        Prefetch(
-            'fees',
-            queryset=SchoolFee.objects.select_related('academic_year').order_by('-academic_year__name', '-created_at'),
-            to_attr='prefetched_fees',
-        )
-    )
-    students, subtitle, _filters = _apply_student_report_filters(request, queryset=base_queryset)
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(
-        buffer,
-        "Students List Report",
-        pagesize=landscape(A4),
-        left_margin=36,
-        right_margin=36,
-        top_margin=40,
-        bottom_margin=48,
-    )
-    elements = []
-
-    create_letterhead(
-        elements,
-        "Students List Report",
-        f"{subtitle} (Total: {students.count()})"
-    )
-
-    styles = getSampleStyleSheet()
-    cell_style = ParagraphStyle(
-        'StudentExportCell',
-        parent=styles['BodyText'],
-        fontSize=6.2,
-        leading=7.2,
-        wordWrap='CJK',
-    )
-    centered_cell_style = ParagraphStyle(
-        'StudentExportCellCentered',
-        parent=cell_style,
-        alignment=TA_CENTER,
-    )
-
-    rows = []
-    for student in students.order_by('last_name', 'first_name'):
-        row = _student_export_row(student)
-        rows.append([
-            Paragraph(row[0], cell_style),
-            Paragraph(row[1], centered_cell_style),
-            Paragraph(row[2], centered_cell_style),
-            Paragraph(row[3], centered_cell_style),
-            Paragraph(row[4], centered_cell_style),
-            Paragraph(row[5], cell_style),
-            Paragraph(row[6], centered_cell_style),
-            Paragraph(row[7], centered_cell_style),
-            Paragraph(row[8], cell_style),
-            Paragraph(row[9], centered_cell_style),
-            Paragraph(row[10], centered_cell_style),
-        ])
-
-    data = prepend_row_numbers(
-        [
-            'Full Name',
-            'Gender',
-            'Age',
-            'Education Level',
-            'Class/Year',
-            'School',
-            'District',
-            'Sector',
-            'Guardian/Parent',
-            'Phone',
-            'Sponsorship Status',
-        ],
-        rows,
-    )
-    table = build_export_table(
-        data,
-        col_widths=[24, 92, 34, 26, 54, 50, 104, 54, 54, 126, 72, 70],
-        body_font_size=6.2,
-        centered_columns=[0, 2, 3, 4, 5, 7, 10, 11],
-    )
-    elements.append(table)
-    doc.build(elements, canvasmaker=NumberedCanvas)
-
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="students_list_report.pdf"'
-    return response
+    return _report_download(request, 'students', 'pdf')
 
 
 @login_required
 @permission_required('students.view_student', raise_exception=True)
 def students_excel(request):
     """Export students list as Excel with optional age range filters."""
-    base_queryset = Student.objects.select_related(
-        'school',
-        'family__district',
-        'family__sector',
-        'partner__district',
-        'partner__sector',
-    ).prefetch_related(
-        Prefetch(
-            'fees',
-            queryset=SchoolFee.objects.select_related('academic_year').order_by('-academic_year__name', '-created_at'),
-            to_attr='prefetched_fees',
-        )
-    )
-    students, subtitle, filters = _apply_student_report_filters(request, queryset=base_queryset)
-    students = students.order_by('last_name', 'first_name')
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Students List"
-
-    headers = [
-        'No.',
-        'Full Name',
-        'Gender',
-        'Age',
-        'Education Level',
-        'Class/Year',
-        'School',
-        'District',
-        'Sector',
-        'Guardian/Parent',
-        'Phone',
-        'Sponsorship Status',
-    ]
-    header_row = write_excel_report_header(ws, 'Students List Report', subtitle, len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-
-    data_start_row = header_row + 1
-    for index, student in enumerate(students, start=1):
-        ws.append([index, *_student_export_row(student)])
-        for cell in ws[ws.max_row]:
-            cell.alignment = Alignment(vertical='top', wrap_text=True)
-
-    preferred_widths = [8, 24, 12, 8, 16, 14, 24, 16, 14, 22, 16, 18]
-    for column_index, width in enumerate(preferred_widths, start=1):
-        ws.column_dimensions[chr(64 + column_index)].width = width
-    style_excel_table_rows(
-        ws,
-        header_row_idx=header_row,
-        data_start_row=data_start_row,
-        data_end_row=ws.max_row,
-        max_col=len(headers),
-        centered_columns=[1, 3, 4, 5, 6, 8, 11, 12],
-    )
-
-    filename_parts = ["students_list"]
-    if filters['age_from'] is not None or filters['age_to'] is not None:
-        filename_parts.append(f"age_{filters['age_from'] if filters['age_from'] is not None else 0}_to_{filters['age_to'] if filters['age_to'] is not None else 'all'}")
-
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{"_".join(filename_parts)}.xlsx"'
-    wb.save(response)
-    return response
-
+    return _report_download(request, 'students', 'excel')
 
 @login_required
 @permission_required('students.view_student', raise_exception=True)
@@ -487,8 +217,18 @@ def sponsored_students_report(request):
     year_id = request.GET.get('year')
     district_id = request.GET.get('district')
     students = (
-        Student.objects.select_related('family', 'school', 'program_officer', 'partner')
+        Student.objects.select_related(
+            'school',
+            'program_officer',
+            'family__district',
+            'family__sector',
+            'family__cell',
+            'partner__district',
+            'partner__sector',
+            'partner__cell',
+        )
         .filter(sponsorship_status='active')
+        .annotate(latest_coverage_status=latest_coverage_status_subquery())
     )
     
     subtitle = "All Sponsored Students"
@@ -532,610 +272,78 @@ def sponsored_students_report(request):
 @permission_required('finance.view_schoolfee', raise_exception=True)
 def fees_pdf(request):
     """Export school fees summary as PDF."""
-    year_id = request.GET.get('year')
-    district_id = request.GET.get('district')
-    fees = SchoolFee.objects.select_related('student', 'student__school').all()
-    
-    subtitle = "All Records"
-    if year_id:
-        academic_year = get_object_or_404(AcademicYear, id=year_id)
-        fees = fees.filter(academic_year=academic_year)
-        subtitle = f"Academic Year: {academic_year.name}"
-    
-    if district_id:
-        district = get_object_or_404(District, id=district_id)
-        fees = fees.filter(student__family__district_id=district_id)
-        subtitle += f" - {district.name}"
-    
-    # Calculate summary statistics
-    total_required = sum(float(fee.total_fees) for fee in fees)
-    total_paid = sum(float(fee.amount_paid) for fee in fees)
-    total_balance = sum(float(fee.balance) for fee in fees)
-    
-    paid_count = fees.filter(payment_status='paid').count()
-    partial_count = fees.filter(payment_status='partial').count()
-    pending_count = fees.filter(payment_status='pending').count()
-    
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(
-        buffer,
-        "School Fees Summary Report",
-    )
-    elements = []
-    
-    # Add letterhead
-    create_letterhead(
-        elements,
-        "School Fees Summary Report",
-        f"{subtitle} (Total: {fees.count()})"
-    )
-    
-    # Summary statistics box
-    styles = getSampleStyleSheet()
-    summary_style = ParagraphStyle(
-        'SummaryBox',
-        parent=styles['Normal'],
-        fontSize=9,
-        leading=12,
-        textColor=colors.HexColor('#047857'),
-        alignment=TA_CENTER
-    )
-    
-    summary_data = [[
-        Paragraph(f"<b>Paid:</b> {paid_count}", summary_style),
-        Paragraph(f"<b>Partial:</b> {partial_count}", summary_style),
-        Paragraph(f"<b>Pending:</b> {pending_count}", summary_style),
-    ]]
-    
-    summary_table = build_export_table(
-        summary_data,
-        col_widths=[2.4 * inch, 2.4 * inch, 2.4 * inch],
-        body_font_size=9,
-        centered_columns=[0, 1, 2],
-    )
-    elements.append(summary_table)
-    elements.append(Spacer(1, 20))
-
-    rows = []
-    for fee in fees.order_by('student__last_name', 'student__first_name', 'term'):
-        rows.append([
-            fee.student.full_name,
-            f"Term {fee.term}",
-            fee.student.school.name if fee.student.school else 'N/A',
-            f"{fee.total_fees:,.0f}",
-            f"{fee.amount_paid:,.0f}",
-            f"{fee.balance:,.0f}",
-            fee.get_payment_status_display(),
-        ])
-
-    data = prepend_row_numbers(
-        ['Student Name', 'Term', 'School', 'Required (RWF)', 'Paid (RWF)', 'Balance (RWF)', 'Status'],
-        rows,
-    )
-    data.append([
-        '',
-        'TOTAL',
-        '',
-        '',
-        f"{total_required:,.0f}",
-        f"{total_paid:,.0f}",
-        f"{total_balance:,.0f}",
-        ''
-    ])
-    table = build_export_table(
-        data,
-        col_widths=[0.45 * inch, 1.7 * inch, 0.75 * inch, 1.45 * inch, 1.0 * inch, 1.0 * inch, 1.0 * inch, 0.95 * inch],
-        body_font_size=7,
-        centered_columns=[0, 2, 4, 5, 6, 7],
-        total_row_indexes=[len(data) - 1],
-    )
-    elements.append(table)
-    doc.build(elements, canvasmaker=NumberedCanvas)
-    
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="school_fees_report.pdf"'
-    return response
+    return _report_download(request, 'fees', 'pdf')
 
 
 @login_required
 @permission_required('finance.view_schoolfee', raise_exception=True)
 def fees_excel(request):
     """Export fees summary as Excel."""
-    year_id = request.GET.get('year')
-    district_id = request.GET.get('district')
-    fees = SchoolFee.objects.select_related('student').all()
-    
-    if year_id:
-        academic_year = get_object_or_404(AcademicYear, id=year_id)
-        fees = fees.filter(academic_year=academic_year)
-    
-    if district_id:
-        district = get_object_or_404(District, id=district_id)
-        fees = fees.filter(student__family__district_id=district_id)
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Fees Summary"
-    
-    headers = ['No.', 'Student Name', 'Term', 'Required Fees', 'Amount Paid', 'Balance', 'Status']
-    header_row = write_excel_report_header(ws, 'School Fees Summary Report', 'Filtered fee records export', len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-    
-    # Data rows
-    total_required = 0
-    total_paid = 0
-    total_balance = 0
-    
-    data_start_row = header_row + 1
-    for index, fee in enumerate(fees.order_by('student__last_name', 'student__first_name', 'term'), start=1):
-        ws.append([
-            index,
-            fee.student.full_name,
-            fee.term,
-            float(fee.total_fees),
-            float(fee.amount_paid),
-            float(fee.balance),
-            fee.get_payment_status_display(),
-        ])
-        total_required += float(fee.total_fees)
-        total_paid += float(fee.amount_paid)
-        total_balance += float(fee.balance)
-    
-    # Summary row
-    ws.append([])
-    ws.append(['', 'TOTAL', '', total_required, total_paid, total_balance, ''])
-    autosize_worksheet_columns(ws, max_width=50)
-    style_excel_table_rows(
-        ws,
-        header_row_idx=header_row,
-        data_start_row=data_start_row,
-        data_end_row=ws.max_row,
-        max_col=len(headers),
-        centered_columns=[1, 3, 7],
-        right_aligned_columns=[4, 5, 6],
-        total_row_indexes=[ws.max_row],
-    )
-    
-    # Save to response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="fees_summary.xlsx"'
-    wb.save(response)
-    return response
+    return _report_download(request, 'fees', 'excel')
 
 
 @login_required
 @permission_required('insurance.view_familyinsurance', raise_exception=True)
 def insurance_pdf(request):
     """Export insurance coverage as PDF."""
-    year_id = request.GET.get('year')
-    district_id = request.GET.get('district')
-    insurance_records = FamilyInsurance.objects.select_related('family').all()
-    
-    subtitle = "All Records"
-    if year_id:
-        academic_year = get_object_or_404(AcademicYear, id=year_id)
-        insurance_records = insurance_records.filter(insurance_year=academic_year)
-        subtitle = f"Academic Year: {academic_year.name}"
-    
-    if district_id:
-        district = get_object_or_404(District, id=district_id)
-        insurance_records = insurance_records.filter(family__district_id=district_id)
-        subtitle += f" - {district.name}"
-    
-    # Calculate summary statistics
-    covered = insurance_records.filter(coverage_status='covered').count()
-    partially_covered = insurance_records.filter(coverage_status='partially_covered').count()
-    not_covered = insurance_records.filter(coverage_status='not_covered').count()
-    total_required = sum(float(i.required_amount) for i in insurance_records)
-    total_paid = sum(float(i.amount_paid) for i in insurance_records)
-    
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(
-        buffer,
-        "Mutuelle de Sante Coverage Report",
-    )
-    elements = []
-    
-    # Add letterhead
-    create_letterhead(
-        elements,
-        "Mutuelle de Santé Coverage Report",
-        f"{subtitle} (Total: {insurance_records.count()})"
-    )
-    
-    # Summary statistics box
-    styles = getSampleStyleSheet()
-    summary_style = ParagraphStyle(
-        'SummaryBox',
-        parent=styles['Normal'],
-        fontSize=10,
-        leading=14,
-        textColor=colors.HexColor('#047857'),
-        alignment=TA_CENTER
-    )
-    
-    summary_data = [[
-        Paragraph(f"<b>Covered:</b> {covered}", summary_style),
-        Paragraph(f"<b>Partially:</b> {partially_covered}", summary_style),
-        Paragraph(f"<b>Not Covered:</b> {not_covered}", summary_style),
-    ]]
-    
-    summary_table = build_export_table(
-        summary_data,
-        col_widths=[2.4 * inch, 2.4 * inch, 2.4 * inch],
-        body_font_size=9,
-        centered_columns=[0, 1, 2],
-    )
-    elements.append(summary_table)
-    elements.append(Spacer(1, 20))
-
-    rows = []
-    for insurance in insurance_records.order_by('family__head_of_family', 'insurance_year__name'):
-        balance = float(insurance.required_amount) - float(insurance.amount_paid)
-        rows.append([
-            insurance.family.head_of_family,
-            insurance.insurance_year.name if insurance.insurance_year else '',
-            f"{insurance.required_amount:,.0f}",
-            f"{insurance.amount_paid:,.0f}",
-            f"{balance:,.0f}",
-            insurance.get_coverage_status_display(),
-        ])
-
-    data = prepend_row_numbers(
-        ['Family Head', 'Year', 'Required (RWF)', 'Paid (RWF)', 'Balance (RWF)', 'Status'],
-        rows,
-    )
-    total_balance = total_required - total_paid
-    data.append([
-        '',
-        'TOTAL',
-        '',
-        f"{total_required:,.0f}",
-        f"{total_paid:,.0f}",
-        f"{total_balance:,.0f}",
-        ''
-    ])
-    table = build_export_table(
-        data,
-        col_widths=[0.45 * inch, 2.1 * inch, 1.0 * inch, 1.25 * inch, 1.25 * inch, 1.25 * inch, 1.1 * inch],
-        body_font_size=8,
-        centered_columns=[0, 2, 3, 4, 5, 6],
-        total_row_indexes=[len(data) - 1],
-    )
-    elements.append(table)
-    doc.build(elements, canvasmaker=NumberedCanvas)
-    
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="mutuelle_coverage_report.pdf"'
-    return response
+    return _report_download(request, 'insurance', 'pdf')
 
 
 @login_required
 @permission_required('families.view_family', raise_exception=True)
 def supported_mutuelle_families_pdf(request):
     """Export families unable to pay and supported in Mutuelle de Sante."""
-    families = (
-        Family.objects.select_related('province', 'district', 'sector')
-        .filter(
-            payment_ability=Family.PAYMENT_ABILITY_UNABLE,
-            mutuelle_support_status=Family.MUTUELLE_SUPPORT_STATUS_SUPPORTED,
-        )
-        .order_by('head_of_family')
-    )
-    families, subtitle = _apply_directory_district_filter(
-        request,
-        families,
-        base_label="Families Unable to Pay and Supported by Solidact",
-    )
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(
-        buffer,
-        "Supported Mutuelle Families Report",
-        pagesize=landscape(A4),
-    )
-    elements = []
-    create_letterhead(
-        elements,
-        "Supported Mutuelle Families Report",
-        f"{subtitle} (Total: {families.count()})"
-    )
-
-    rows = []
-    for family in families:
-        rows.append([
-            family.family_code,
-            family.head_of_family,
-            family.phone_number or 'N/A',
-            str(family.total_family_members or 0),
-            family.district.name if family.district else 'N/A',
-            family.sector.name if family.sector else 'N/A',
-            family.get_payment_ability_display(),
-            family.get_mutuelle_support_status_display(),
-        ])
-
-    data = prepend_row_numbers(
-        ['Family Code', 'Head of Family', 'Phone', 'Members', 'District', 'Sector', 'Payment Ability', 'Mutuelle Support'],
-        rows,
-    )
-    table = build_export_table(
-        data,
-        col_widths=[26, 95, 120, 80, 45, 72, 60, 74, 82],
-        body_font_size=7,
-        centered_columns=[0, 4, 5, 6, 7, 8],
-    )
-    elements.append(table)
-    doc.build(elements, canvasmaker=NumberedCanvas)
-
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="supported_mutuelle_families_report.pdf"'
-    return response
+    return _report_download(request, 'supported_mutuelle_families', 'pdf')
 
 
 @login_required
 @permission_required('families.view_family', raise_exception=True)
 def families_pdf(request):
     """Export family directory as PDF."""
-    families = Family.objects.select_related('province', 'district', 'sector').all().order_by('head_of_family')
-    families, subtitle = _apply_directory_district_filter(request, families, base_label="All Families")
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(
-        buffer,
-        "Families Directory Report",
-        pagesize=landscape(A4),
-    )
-    elements = []
-    create_letterhead(
-        elements,
-        "Families Directory Report",
-        f"{subtitle} (Total: {families.count()})"
-    )
-
-    rows = []
-    for family in families:
-        rows.append([
-            family.family_code,
-            family.head_of_family,
-            family.phone_number or 'N/A',
-            str(family.total_family_members or 0),
-            family.district.name if family.district else 'N/A',
-            family.sector.name if family.sector else 'N/A',
-            family.get_payment_ability_display(),
-            family.get_mutuelle_support_status_display(),
-        ])
-
-    data = prepend_row_numbers(
-        ['Family Code', 'Head of Family', 'Phone', 'Members', 'District', 'Sector', 'Payment Ability', 'Mutuelle Support'],
-        rows,
-    )
-    table = build_export_table(
-        data,
-        col_widths=[26, 95, 120, 80, 45, 72, 60, 74, 82],
-        body_font_size=7,
-        centered_columns=[0, 4, 5, 6, 7, 8],
-    )
-    elements.append(table)
-    doc.build(elements, canvasmaker=NumberedCanvas)
-
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="families_directory_report.pdf"'
-    return response
+    return _report_download(request, 'families', 'pdf')
 
 
 @login_required
 @permission_required('families.view_family', raise_exception=True)
 def families_excel(request):
     """Export family directory as Excel."""
-    families = Family.objects.select_related('province', 'district', 'sector').all().order_by('head_of_family')
-    families, subtitle = _apply_directory_district_filter(request, families, base_label="All Families")
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Families"
-
-    headers = ['No.', 'Family Code', 'Head of Family', 'Phone', 'Members', 'District', 'Sector', 'Payment Ability', 'Mutuelle Support']
-    header_row = write_excel_report_header(ws, 'Families Directory Report', subtitle, len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-    data_start_row = header_row + 1
-
-    for index, family in enumerate(families, start=1):
-        ws.append([
-            index,
-            family.family_code,
-            family.head_of_family,
-            family.phone_number or 'N/A',
-            family.total_family_members or 0,
-            family.district.name if family.district else 'N/A',
-            family.sector.name if family.sector else 'N/A',
-            family.get_payment_ability_display(),
-            family.get_mutuelle_support_status_display(),
-        ])
-
-    autosize_worksheet_columns(ws, max_width=24)
-    style_excel_table_rows(
-        ws,
-        header_row_idx=header_row,
-        data_start_row=data_start_row,
-        data_end_row=ws.max_row,
-        max_col=len(headers),
-        centered_columns=[1, 5, 6, 7, 8, 9],
-    )
-
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="families_directory_report.xlsx"'
-    wb.save(response)
-    return response
+    return _report_download(request, 'families', 'excel')
 
 
 @login_required
 @permission_required('core.view_school', raise_exception=True)
 def schools_pdf(request):
     """Export schools directory as PDF."""
-    schools = School.objects.select_related('province', 'district', 'sector').all().order_by('name')
-    schools, subtitle = _apply_directory_district_filter(request, schools, base_label="All Schools")
-
-    buffer = io.BytesIO()
-    doc = build_export_pdf_document(
-        buffer,
-        "Schools Directory Report",
-        pagesize=landscape(A4),
-    )
-    elements = []
-    create_letterhead(
-        elements,
-        "Schools Directory Report",
-        f"{subtitle} (Total: {schools.count()})"
-    )
-
-    rows = []
-    for school in schools:
-        rows.append([
-            school.name,
-            school.headteacher_name or 'N/A',
-            school.headteacher_mobile or 'N/A',
-            school.district.name if school.district else 'N/A',
-            school.sector.name if school.sector else 'N/A',
-            format_money(school.fee_amount),
-            school.bank_name or 'N/A',
-        ])
-
-    data = prepend_row_numbers(
-        ['School Name', 'Headteacher', 'Phone', 'District', 'Sector', 'Fee Amount', 'Bank'],
-        rows,
-    )
-    table = build_export_table(
-        data,
-        col_widths=[26, 132, 100, 92, 60, 56, 66, 100],
-        body_font_size=7,
-        centered_columns=[0, 4, 5, 6],
-        right_aligned_columns=[6],
-    )
-    elements.append(table)
-    doc.build(elements, canvasmaker=NumberedCanvas)
-
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="schools_directory_report.pdf"'
-    return response
+    return _report_download(request, 'schools', 'pdf')
 
 
 @login_required
 @permission_required('core.view_school', raise_exception=True)
 def schools_excel(request):
     """Export schools directory as Excel."""
-    schools = School.objects.select_related('province', 'district', 'sector').all().order_by('name')
-    schools, subtitle = _apply_directory_district_filter(request, schools, base_label="All Schools")
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Schools"
-
-    headers = ['No.', 'School Name', 'Headteacher', 'Phone', 'District', 'Sector', 'Fee Amount', 'Bank']
-    header_row = write_excel_report_header(ws, 'Schools Directory Report', subtitle, len(headers))
-    ws.append(headers)
-    style_excel_header(ws, header_row)
-    data_start_row = header_row + 1
-
-    for index, school in enumerate(schools, start=1):
-        ws.append([
-            index,
-            school.name,
-            school.headteacher_name or 'N/A',
-            school.headteacher_mobile or 'N/A',
-            school.district.name if school.district else 'N/A',
-            school.sector.name if school.sector else 'N/A',
-            float(school.fee_amount or 0),
-            school.bank_name or 'N/A',
-        ])
-
-    autosize_worksheet_columns(ws, max_width=24)
-    style_excel_table_rows(
-        ws,
-        header_row_idx=header_row,
-        data_start_row=data_start_row,
-        data_end_row=ws.max_row,
-        max_col=len(headers),
-        centered_columns=[1, 5, 6],
-        right_aligned_columns=[7],
-    )
+    return _report_download(request, 'schools', 'excel')
 
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="schools_directory_report.xlsx"'
-    wb.save(response)
-    return response
 
 
 @login_required
 def send_report(request):
-    """Build and email filtered reports as PDF or Excel attachments."""
+    """Queue filtered reports for email delivery as PDF or Excel attachments."""
     available_reports = get_available_reports_for_user(request.user)
     if not available_reports:
         raise PermissionDenied("You do not have permission to send reports.")
 
-    sent_summary = None
     if request.method == "POST":
         form = SendReportForm(request.POST, user=request.user)
         if form.is_valid():
             report_key = form.cleaned_data["report_key"]
             ensure_report_permission(request.user, report_key)
-            try:
-                attachment = generate_report_attachment(
-                    report_key,
-                    form.cleaned_data["export_format"],
-                    form.cleaned_data,
-                )
-                report_label = attachment["report"].label
-                subject = form.cleaned_data["subject"] or f"{report_label} - {attachment['subtitle']}"
-                message_body = form.cleaned_data["message"] or (
-                    f"Please find attached the {report_label.lower()} generated from SIMS.\n\n"
-                    f"Filters: {attachment['subtitle']}\n"
-                    f"Records included: {attachment['record_count']}"
-                )
-                send_report_email(
-                    recipients=form.cleaned_data["recipients"],
-                    subject=subject,
-                    body=message_body,
-                    attachment_name=attachment["filename"],
-                    attachment_bytes=attachment["content"],
-                    attachment_content_type=attachment["content_type"],
-                )
-                sent_summary = {
-                    "report_label": report_label,
-                    "format": form.cleaned_data["export_format"].upper(),
-                    "arrangement": dict(form.fields["arrangement"].choices).get(
-                        form.cleaned_data.get("arrangement", ""),
-                        "Default arrangement",
-                    ),
-                    "recipients": form.cleaned_data["recipients"],
-                    "record_count": attachment["record_count"],
-                }
-                messages.success(
-                    request,
-                    f"{report_label} was sent to {', '.join(form.cleaned_data['recipients'])}.",
-                )
-                form = SendReportForm(user=request.user, initial={
-                    "report_key": report_key,
-                    "export_format": form.cleaned_data["export_format"],
-                    "arrangement": form.cleaned_data.get("arrangement", ""),
-                    "subject": subject,
-                    "message": form.cleaned_data["message"],
-                })
-            except Exception as exc:
-                form.add_error(None, f"Unable to send the report email right now: {exc}")
+            job = enqueue_report_job(user=request.user, kind=ReportJob.KIND_EMAIL, data=request.POST)
+            messages.success(
+                request,
+                f"{job.get_kind_display()} of the {get_report_definition(report_key).label.lower()} was queued. "
+                f"It will be sent to {', '.join(form.cleaned_data['recipients'])} shortly.",
+            )
+            return redirect("reports:send_report")
     else:
         form = SendReportForm(user=request.user)
 
@@ -1143,7 +351,6 @@ def send_report(request):
         request=request,
         form=form,
         available_reports=available_reports,
-        sent_summary=sent_summary,
     )
     return render(request, "reports/send_report.html", context)
 
@@ -1180,6 +387,76 @@ def preview_report(request):
     return response
 
 
+@login_required
+def export_report(request):
+    """Queue the selected filtered report for background generation."""
+    available_reports = get_available_reports_for_user(request.user)
+    if not available_reports:
+        raise PermissionDenied("You do not have permission to export reports.")
+
+    if request.method != "POST":
+        return redirect("reports:send_report")
+
+    form = SendReportForm(request.POST, user=request.user)
+    if not form.is_valid():
+        messages.error(request, "Please fix the form errors before exporting the report.")
+        context = _build_send_report_context(
+            request=request,
+            form=form,
+            available_reports=available_reports,
+        )
+        return render(request, "reports/send_report.html", context, status=400)
+
+    ensure_report_permission(request.user, form.cleaned_data["report_key"])
+    job = enqueue_report_job(user=request.user, kind=ReportJob.KIND_EXPORT, data=request.POST)
+    messages.success(
+        request,
+        f"{get_report_definition(job.report_key).label} export was queued. "
+        "Download it from Recent Report Jobs once it is ready.",
+    )
+    return redirect("reports:send_report")
+
+
+def _get_user_report_job(request, job_id):
+    jobs = ReportJob.objects.all() if request.user.is_superuser else request.user.report_jobs.all()
+    return get_object_or_404(jobs, pk=job_id)
+
+
+@login_required
+def report_job_status(request, job_id):
+    """Return the current state of a queued report job for polling."""
+    job = _get_user_report_job(request, job_id)
+    return JsonResponse({
+        "id": job.pk,
+        "kind": job.kind,
+        "report_key": job.report_key,
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "progress": job.progress,
+        "record_count": job.record_count,
+        "error": job.error,
+        "finished": job.is_finished,
+        "download_url": (
+            reverse("reports:report_job_download", args=[job.pk])
+            if job.status == ReportJob.STATUS_SUCCEEDED and job.result_file else ""
+        ),
+    })
+
+
+@login_required
+def report_job_download(request, job_id):
+    """Download the file produced by a finished report job."""
+    job = _get_user_report_job(request, job_id)
+    if job.status != ReportJob.STATUS_SUCCEEDED or not job.result_file:
+        raise Http404("This report is not ready yet.")
+    return FileResponse(
+        job.result_file.open("rb"),
+        as_attachment=True,
+        filename=job.result_name or None,
+        content_type=job.result_content_type or None,
+    )
+
+
 @login_required
 def reports_index(request):
     """Reports index page."""
@@ -1207,12 +484,14 @@ def reports_index(request):
         'academic_years': academic_years,
         'districts': districts,
         'age_options': range(1, 31),
+        'data_feeds': get_available_reports_for_user(request.user),
     }
     return render(request, 'reports/index.html', context)
 
 
 @login_required
 @permission_required('finance.view_schoolfee', raise_exception=True)
+@cache_report_response('financial')
 def financial_report_pdf(request):
     """Generate comprehensive financial report PDF."""
     year_id = request.GET.get('year')
@@ -1375,7 +654,6 @@ def analysis_dashboard(request):
     students_qs = Student.objects.all()
     marks_qs = StudentMark.objects.all()
     materials_qs = StudentMaterial.objects.all()
-    fees_qs = SchoolFee.objects.all()
 
     # Apply Student Filters (Level, Partner, District)
     if level_val:
@@ -1391,38 +669,45 @@ def analysis_dashboard(request):
     if level_val or partner_id or district_id:
         marks_qs = marks_qs.filter(student__in=students_qs)
         materials_qs = materials_qs.filter(student__in=students_qs)
-        fees_qs = fees_qs.filter(student__in=students_qs)
 
     # Apply Year Filter
     if year_id:
         marks_qs = marks_qs.filter(academic_year_id=year_id)
         materials_qs = materials_qs.filter(academic_year_id=year_id)
-        fees_qs = fees_qs.filter(academic_year_id=year_id)
 
     # Apply Term Filter
     if term_val:
         # StudentMark uses 'Term X' format
         marks_qs = marks_qs.filter(term=f"Term {term_val}")
-        # SchoolFee uses 'X' format
-        fees_qs = fees_qs.filter(term=term_val)
         # StudentMaterial is annual, so term filter doesn't apply directly
 
+    # Counters for students, fees and marks come from the precomputed dashboard snapshots
+    snapshot_scope = {'district': district_id, 'partner': partner_id, 'school_level': level_val}
+    snapshot = summarize_snapshots(academic_year=year_id, term=term_val, **snapshot_scope)
+    level_snapshots = {
+        row['school_level']: row
+        for row in summarize_snapshots_by('school_level', **snapshot_scope)
+    }
+
     # Student Analysis
-    total_students = students_qs.count()
-    university_students = students_qs.filter(school_level='university').count()
+    total_students = snapshot['students_total']
+    university_snapshot = level_snapshots.get('university', {})
+    university_students = university_snapshot.get('students_total', 0)
     
     # Gender Distribution
-    gender_map = dict(Student.GENDER_CHOICES)
-    gender_data = students_qs.values('gender').annotate(count=Count('id'))
-    gender_labels = [gender_map.get(item['gender'], item['gender']) for item in gender_data]
-    gender_counts = [item['count'] for item in gender_data]
+    gender_data = [
+        (label, snapshot[field_name])
+        for label, field_name in (('Male', 'students_male'), ('Female', 'students_female'))
+        if snapshot[field_name]
+    ]
+    gender_labels = [label for label, _count in gender_data]
+    gender_counts = [count for _label, count in gender_data]
     
     # School Level Distribution
     level_map = dict(Student.SCHOOL_LEVEL_CHOICES)
-    level_data = students_qs.values('school_level').annotate(count=Count('id'))
-    level_labels = [level_map.get(item['school_level'], item['school_level']) for item in level_data]
-    level_counts = [item['count'] for item in level_data]
-    level_count_map = {item['school_level']: item['count'] for item in level_data}
+    level_labels = [level_map.get(level, level) for level in level_snapshots]
+    level_counts = [row['students_total'] for row in level_snapshots.values()]
+    level_count_map = {level: row['students_total'] for level, row in level_snapshots.items()}
     school_level_rows = [
         {
             'label': label,
@@ -1445,11 +730,11 @@ def analysis_dashboard(request):
     age_counts = age_analysis['counts']
 
     university_breakdown = {
-        'male': students_qs.filter(school_level='university', gender='M').count(),
-        'female': students_qs.filter(school_level='university', gender='F').count(),
-        'active': students_qs.filter(school_level='university', sponsorship_status='active').count(),
-        'pending': students_qs.filter(school_level='university', sponsorship_status='pending').count(),
-        'graduated': students_qs.filter(school_level='university', sponsorship_status='graduated').count(),
+        'male': university_snapshot.get('students_male', 0),
+        'female': university_snapshot.get('students_female', 0),
+        'active': university_snapshot.get('students_sponsorship_active', 0),
+        'pending': university_snapshot.get('students_sponsorship_pending', 0),
+        'graduated': university_snapshot.get('students_sponsorship_graduated', 0),
     }
     university_chart_labels = ['Male', 'Female', 'Active', 'Pending', 'Graduated']
     university_chart_counts = [
@@ -1461,21 +746,22 @@ def analysis_dashboard(request):
     ]
 
     # Finance Analysis
-    total_fees_expected = fees_qs.aggregate(total=Sum('total_fees'))['total'] or 0
-    total_fees_paid = fees_qs.aggregate(total=Sum('amount_paid'))['total'] or 0
-    total_balance = fees_qs.aggregate(total=Sum('balance'))['total'] or 0
+    total_fees_expected = snapshot['fees_required_amount']
+    total_fees_paid = snapshot['fees_paid_amount']
+    total_balance = snapshot['fees_balance_amount']
     
     # Payment Status Distribution
-    status_map = dict(SchoolFee.PAYMENT_STATUS_CHOICES)
-    payment_status_data = fees_qs.values('payment_status').annotate(count=Count('id'))
-    status_labels = [status_map.get(item['payment_status'], item['payment_status']) for item in payment_status_data]
-    status_counts = [item['count'] for item in payment_status_data]
+    payment_status_data = [
+        (label, snapshot[f'fees_{value}'])
+        for value, label in SchoolFee.PAYMENT_STATUS_CHOICES
+        if snapshot[f'fees_{value}']
+    ]
+    status_labels = [label for label, _count in payment_status_data]
+    status_counts = [count for _label, count in payment_status_data]
 
     # Performance Analysis
-    avg_marks = marks_qs.aggregate(avg=Avg('marks'))['avg'] or 0
-    total_marks_count = marks_qs.count()
-    passed_count = marks_qs.filter(marks__gte=50).count()
-    pass_rate = (passed_count / total_marks_count * 100) if total_marks_count > 0 else 0
+    avg_marks = snapshot['marks_average']
+    pass_rate = snapshot['marks_pass_rate']
 
     # Best District Performance
     district_performance = marks_qs.values(
@@ -1520,9 +806,12 @@ def analysis_dashboard(request):
     materials_counts = [materials_stats['books'], materials_stats['bags'], materials_stats['shoes'], materials_stats['uniforms']]
 
     # Partner Analysis
-    partner_data = students_qs.values('partner__name').annotate(count=Count('id')).order_by('-count')
+    partner_data = sorted(
+        summarize_snapshots_by('partner__name', **snapshot_scope),
+        key=lambda item: -item['students_total'],
+    )
     partner_labels = [item['partner__name'] or 'No Partner' for item in partner_data]
-    partner_counts = [item['count'] for item in partner_data]
+    partner_counts = [item['students_total'] for item in partner_data]
 
     # Context for Filters
     academic_years = AcademicYear.objects.all().order_by('-name')
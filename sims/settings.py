@@ -245,6 +245,41 @@ REPORTS_LETTERHEAD_PATH = os.environ.get(
     str(BASE_DIR / 'static' / 'image' / 'letterhead.png')
 )
 
+# Background report jobs (see `python manage.py run_report_worker`)
+# Generated files stay outside MEDIA_ROOT so they are only served through the owner-checked download view.
+REPORT_JOBS_ROOT = os.environ.get('REPORT_JOBS_ROOT', str(BASE_DIR / 'report_jobs'))
+REPORT_JOBS_MAX_CONCURRENCY = int(os.environ.get('REPORT_JOBS_MAX_CONCURRENCY', '2'))
+REPORT_JOBS_STALE_AFTER_SECONDS = int(os.environ.get('REPORT_JOBS_STALE_AFTER_SECONDS', '1800'))
+
+# Generated report files reused until their data changes (see reports.cache)
+REPORT_CACHE_ROOT = os.environ.get('REPORT_CACHE_ROOT', str(BASE_DIR / 'cache' / 'reports'))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+# The test runner turns the cache off; override_settings(REPORT_CACHE_ENABLED=True) to exercise it.
+REPORT_CACHE_ENABLED = os.environ.get('REPORT_CACHE_ENABLED', 'True') == 'True'
+
+# Audit trail writes (see core.audit): 'buffered' batches SystemActivityLog rows off the
+# request path; the test runner switches to 'sync' so entries exist as soon as a request returns.
+AUDIT_LOG_SINK = os.environ.get('AUDIT_LOG_SINK', 'buffered')
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', '100'))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', '2'))
+AUDIT_LOG_MAX_QUEUE = int(os.environ.get('AUDIT_LOG_MAX_QUEUE', '10000'))
+AUDIT_LOG_SPILL_DIR = os.environ.get('AUDIT_LOG_SPILL_DIR', str(BASE_DIR / 'audit_spill'))
+
+# `manage.py test` runs with sims.test_runner.TEST_SETTINGS (AUDIT_LOG_SINK='sync' and
+# REPORT_CACHE_ENABLED=False); set those environment variables when using another runner.
+TEST_RUNNER = 'sims.test_runner.TestRunner'
+
+# Obfuscated IDs in URLs and API payloads (see core.id_codecs): 'feistel' or 'signed'
+ID_CODEC = os.environ.get('ID_CODEC', 'feistel')
+ID_CODEC_CACHE_SIZE = int(os.environ.get('ID_CODEC_CACHE_SIZE', '65536'))
+
+# Precomputed location tree served by core.api_views.get_full_location_tree
+LOCATION_TREE_CACHE_ROOT = os.environ.get('LOCATION_TREE_CACHE_ROOT', str(BASE_DIR / 'cache' / 'locations'))
+# Seconds another process may serve a cached location tree version after locations change
+LOCATION_TREE_VERSION_TTL = int(os.environ.get('LOCATION_TREE_VERSION_TTL', '300'))
+# Seconds between dataset version checks for the in-memory location search index
+LOCATION_SEARCH_INDEX_TTL = int(os.environ.get('LOCATION_SEARCH_INDEX_TTL', '300'))
+
 # Email configuration (Gmail SMTP)
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
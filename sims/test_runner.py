@@ -0,0 +1,24 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+# Settings every test run needs, whatever the environment of the process says.
+TEST_SETTINGS = {
+    # Entries must exist as soon as a request returns.
+    'AUDIT_LOG_SINK': 'sync',
+    # Tests build every report afresh; override_settings(REPORT_CACHE_ENABLED=True) to exercise the cache.
+    'REPORT_CACHE_ENABLED': False,
+}
+
+
+class TestRunner(DiscoverRunner):
+    """Discover runner that applies ``TEST_SETTINGS`` for the whole run."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._settings_override = override_settings(**TEST_SETTINGS)
+        self._settings_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._settings_override.disable()
+        super().teardown_test_environment(**kwargs)
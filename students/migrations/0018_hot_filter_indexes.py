@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_academicyear_term_due_dates'),
+        ('families', '0008_mutuellecontributionsettings'),
+        ('students', '0017_studentmaterial_material_package_expansion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['sponsorship_status', 'gender', 'school_level'], name='students_st_sponsor_171eef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['school', 'school_level'], name='student_active_school_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentenrollmenthistory',
+            index=models.Index(fields=['academic_year', 'student'], name='students_st_academi_d93ac2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentmark',
+            index=models.Index(fields=['academic_year', 'term'], name='students_st_academi_3bd118_idx'),
+        ),
+    ]
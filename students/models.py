@@ -148,6 +148,14 @@ class Student(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['sponsorship_status', 'gender', 'school_level']),
+            models.Index(
+                fields=['school', 'school_level'],
+                condition=models.Q(is_active=True),
+                name='student_active_school_idx',
+            ),
+        ]
 
     @property
     def full_name(self):
@@ -252,6 +260,10 @@ class StudentEnrollmentHistory(models.Model):
     class Meta:
         ordering = ['student__last_name', 'academic_year__name']
         unique_together = ('student', 'academic_year')
+        # unique_together leads with student; year-wide roll-outs and bulk entry lead with the year.
+        indexes = [
+            models.Index(fields=['academic_year', 'student']),
+        ]
         verbose_name = 'Student Enrollment'
         verbose_name_plural = 'Student Enrollments'
 
@@ -343,6 +355,9 @@ class StudentMark(models.Model):
     class Meta:
         ordering = ['-academic_year__name', 'term', 'subject']
         unique_together = ['student', 'subject', 'term', 'academic_year']
+        indexes = [
+            models.Index(fields=['academic_year', 'term']),
+        ]
 
     def __str__(self):
         year_display = self.academic_year.name if self.academic_year else "N/A"
@@ -16,7 +16,6 @@ from django.db.models import (
     Prefetch,
     DecimalField,
 )
-from django.core.paginator import Paginator
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
@@ -29,20 +28,16 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import landscape, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.styles import Font
 from core.models import District, School, Partner
 from core.export_utils import (
+    ExcelReportWriter,
     ExportNumberedCanvas,
     add_export_header,
-    autosize_worksheet_columns,
     build_export_pdf_document,
     build_export_table,
     prepend_row_numbers,
     resolve_logo_path,
-    style_excel_header,
-    style_excel_table_rows,
-    write_excel_report_header,
 )
 from django.utils import timezone
 from django.core import signing
@@ -59,6 +54,7 @@ from .models import (
 )
 from core.models import Notification, AcademicYear
 from core.academic_years import get_default_academic_year
+from core.pagination import CURSOR_PARAM, CursorPaginator
 from core.utils import format_money
 from .forms import (
     StudentForm,
@@ -150,9 +146,13 @@ def student_list(request):
     }
     
     # Pagination
-    paginator = Paginator(summary_queryset.order_by('first_name', 'last_name'), 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(
+        summary_queryset,
+        20,
+        ordering=('first_name', 'last_name', 'pk'),
+        count=summary_totals['total_students'] or 0,
+    )
+    page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
     
     context = {
         'students': page_obj,
@@ -582,10 +582,6 @@ def _export_student_materials_pdf(context):
 
 
 def _export_student_materials_excel(context):
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = 'Materials'
-
     subtitle = (
         f"Academic Year: {context['academic_year_label']} | "
         f"District: {context['district_label']} | "
@@ -608,63 +604,49 @@ def _export_student_materials_excel(context):
         'Dup Papers',
         'Pads',
     ]
-    header_row_idx = write_excel_report_header(worksheet, 'Student Materials Report', subtitle, len(headers))
-    worksheet.append(headers)
-    style_excel_header(worksheet, header_row_idx, fill_color='0F172A')
+    writer = ExcelReportWriter(
+        'Student Materials Report',
+        subtitle,
+        headers,
+        sheet_title='Materials',
+        column_widths=[8, 28, 18, 14, 10, 10, 10, 10, 12, 12, 12, 12, 12, 12, 10],
+        centered_columns=[1, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
+        header_fill='0F172A',
+    )
+    writer.add_style('received', font=Font(bold=True, color='15803D'))
+    writer.add_style('missing', font=Font(bold=True, color='DC2626'))
 
-    data_start_row = header_row_idx + 1
     for index, row in enumerate(context['rows'], start=1):
         student = row['student']
         material = row['material']
-        worksheet.append([
-            index,
-            student.full_name,
-            row['district_name'],
-            student.school_level or 'N/A',
-            'V' if material and material.bag_received else 'X',
-            'V' if material and material.books_received else 'X',
-            'V' if material and material.pens_pencils_received else 'X',
-            'V' if material and material.rulers_erasers_received else 'X',
-            'V' if material and material.drawing_books_received else 'X',
-            'V' if material and material.register_files_received else 'X',
-            'V' if material and material.mathematical_sets_received else 'X',
-            'V' if material and material.scientific_calculators_received else 'X',
-            'V' if material and material.periodic_tables_received else 'X',
-            'V' if material and material.duplicating_papers_received else 'X',
-            'V' if material and material.sanitary_pads_received else 'X',
-        ])
-
-        current_row = worksheet.max_row
-        for col_idx in range(5, 16):
-            cell = worksheet.cell(row=current_row, column=col_idx)
-            cell.font = Font(
-                bold=True,
-                color='15803D' if cell.value == 'V' else 'DC2626',
-            )
-            cell.alignment = Alignment(horizontal='center')
-
-    column_widths = [8, 28, 18, 14, 10, 10, 10, 10, 12, 12, 12, 12, 12, 12, 10]
-    for idx, width in enumerate(column_widths, start=1):
-        worksheet.column_dimensions[chr(64 + idx)].width = width
-    style_excel_table_rows(
-        worksheet,
-        header_row_idx=header_row_idx,
-        data_start_row=data_start_row,
-        data_end_row=worksheet.max_row,
-        max_col=len(headers),
-        centered_columns=[1, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
-    )
+        received = [
+            bool(material and material.bag_received),
+            bool(material and material.books_received),
+            bool(material and material.pens_pencils_received),
+            bool(material and material.rulers_erasers_received),
+            bool(material and material.drawing_books_received),
+            bool(material and material.register_files_received),
+            bool(material and material.mathematical_sets_received),
+            bool(material and material.scientific_calculators_received),
+            bool(material and material.periodic_tables_received),
+            bool(material and material.duplicating_papers_received),
+            bool(material and material.sanitary_pads_received),
+        ]
+        writer.append(
+            [
+                index,
+                student.full_name,
+                row['district_name'],
+                student.school_level or 'N/A',
+                *['V' if item else 'X' for item in received],
+            ],
+            styles={
+                column: 'received' if item else 'missing'
+                for column, item in enumerate(received, start=5)
+            },
+        )
 
-    buffer = BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="student_materials_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-    response.write(buffer.read())
-    buffer.close()
-    return response
+    return writer.to_response(f'student_materials_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
 
 
 @login_required
@@ -1939,61 +1921,33 @@ class StudentPerformanceListView(LoginRequiredMixin, PermissionRequiredMixin, Li
         return response
 
     def generate_excel(self, rows):
-        workbook = Workbook()
-        worksheet = workbook.active
-        worksheet.title = 'Performance'
-
         headers = ['No.', 'Student Name', 'Class', 'Total Terms Recorded', 'Average (%)', 'Status']
-        header_row_idx = write_excel_report_header(
-            worksheet,
+        writer = ExcelReportWriter(
             'Student Performance Report',
             f"Generated on {timezone.now().strftime('%Y-%m-%d %H:%M')} | {self.describe_filters()}",
-            len(headers),
-        )
-        worksheet.append(headers)
-        style_excel_header(worksheet, header_row_idx, fill_color='0F172A')
-
-        data_start_row = header_row_idx + 1
-        for index, record in enumerate(rows, start=1):
-            worksheet.append([
-                index,
-                record['name'],
-                record['class_level'],
-                record['terms_count'],
-                round(record['avg_marks'], 1),
-                record['status'],
-            ])
-            status_cell = worksheet.cell(row=worksheet.max_row, column=6)
-            fill_color = 'D1FAE5' if record['status'] == 'Pass' else 'FEE2E2'
-            status_cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-
-        column_widths = [8, 32, 18, 18, 18, 14]
-        for idx, width in enumerate(column_widths, start=1):
-            worksheet.column_dimensions[chr(64 + idx)].width = width
-        style_excel_table_rows(
-            worksheet,
-            header_row_idx=header_row_idx,
-            data_start_row=data_start_row,
-            data_end_row=worksheet.max_row,
-            max_col=len(headers),
+            headers,
+            sheet_title='Performance',
+            column_widths=[8, 32, 18, 18, 18, 14],
             centered_columns=[1, 4, 5, 6],
+            header_fill='0F172A',
         )
-        for row_index, record in enumerate(rows, start=data_start_row):
-            status_cell = worksheet.cell(row=row_index, column=6)
-            fill_color = 'D1FAE5' if record['status'] == 'Pass' else 'FEE2E2'
-            status_cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
+        writer.add_style('pass', fill='D1FAE5')
+        writer.add_style('fail', fill='FEE2E2')
+        for index, record in enumerate(rows, start=1):
+            writer.append(
+                [
+                    index,
+                    record['name'],
+                    record['class_level'],
+                    record['terms_count'],
+                    round(record['avg_marks'], 1),
+                    record['status'],
+                ],
+                styles={6: 'pass' if record['status'] == 'Pass' else 'fail'},
+            )
 
-        buffer = BytesIO()
-        workbook.save(buffer)
-        buffer.seek(0)
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
         filename = timezone.now().strftime('student_performance_%Y%m%d_%H%M%S.xlsx')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(buffer.read())
-        buffer.close()
-        return response
+        return writer.to_response(filename)
 
 
 class StudentPerformanceDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):